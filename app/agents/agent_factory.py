@@ -22,14 +22,15 @@ from app.utils.logging_utils import (
     log_performance_metric
 )
 from app.utils.persistent_conversation_memory import get_persistent_conversation_memory
-from app.graphs.coordinator_graph import create_coordinator_graph, create_initial_state as create_coordinator_initial_state
-from app.graphs.resource_planning_graph import create_resource_planning_graph, create_initial_state as create_resource_planning_initial_state
-from app.graphs.financial_graph import create_financial_graph, create_initial_state as create_financial_initial_state
-from app.graphs.stakeholder_management_graph import create_stakeholder_management_graph, create_initial_state as create_stakeholder_initial_state
-from app.graphs.marketing_communications_graph import create_marketing_communications_graph, create_initial_state as create_marketing_initial_state
-from app.graphs.project_management_graph import create_project_management_graph, create_initial_state as create_project_initial_state
-from app.graphs.analytics_graph import create_analytics_graph, create_initial_state as create_analytics_initial_state
-from app.graphs.compliance_security_graph import create_compliance_security_graph, create_initial_state as create_compliance_initial_state
+from app.agents.graph_registry import get_compiled_graph
+from app.graphs.coordinator_graph import create_initial_state as create_coordinator_initial_state
+from app.graphs.resource_planning_graph import create_initial_state as create_resource_planning_initial_state
+from app.graphs.financial_graph import create_initial_state as create_financial_initial_state
+from app.graphs.stakeholder_management_graph import create_initial_state as create_stakeholder_initial_state
+from app.graphs.marketing_communications_graph import create_initial_state as create_marketing_initial_state
+from app.graphs.project_management_graph import create_initial_state as create_project_initial_state
+from app.graphs.analytics_graph import create_initial_state as create_analytics_initial_state
+from app.graphs.compliance_security_graph import create_initial_state as create_compliance_initial_state
 
 # Set up logger for the agent application
 logger = setup_logger(
@@ -286,8 +287,8 @@ class AgentFactory:
             # Update the state with all the default values
             self.state_manager.update_conversation_state(conversation_id, state)
         
-        # Create the agent graph
-        agent_graph = create_coordinator_graph()
+        # Get the shared compiled agent graph
+        agent_graph = get_compiled_graph("coordinator")
         
         # Add tenant context to the state if not present
         if self.organization_id and "organization_id" not in state:
@@ -341,8 +342,8 @@ class AgentFactory:
             state["event_context"] = event_context
             self.state_manager.update_conversation_state(conversation_id, state)
         
-        # Create the agent graph
-        agent_graph = create_resource_planning_graph()
+        # Get the shared compiled agent graph
+        agent_graph = get_compiled_graph("resource_planning")
         
         # Add tenant context to the state if not present
         if self.organization_id and "organization_id" not in state:
@@ -388,8 +389,8 @@ class AgentFactory:
             state["event_context"] = event_context
             self.state_manager.update_conversation_state(conversation_id, state)
         
-        # Create the agent graph
-        agent_graph = create_financial_graph()
+        # Get the shared compiled agent graph
+        agent_graph = get_compiled_graph("financial")
         
         # Add tenant context to the state if not present
         if self.organization_id and "organization_id" not in state:
@@ -435,8 +436,8 @@ class AgentFactory:
             state["event_context"] = event_context
             self.state_manager.update_conversation_state(conversation_id, state)
         
-        # Create the agent graph
-        agent_graph = create_stakeholder_management_graph()
+        # Get the shared compiled agent graph
+        agent_graph = get_compiled_graph("stakeholder_management")
         
         # Add tenant context to the state if not present
         if self.organization_id and "organization_id" not in state:
@@ -482,8 +483,8 @@ class AgentFactory:
             state["event_context"] = event_context
             self.state_manager.update_conversation_state(conversation_id, state)
         
-        # Create the agent graph
-        agent_graph = create_marketing_communications_graph()
+        # Get the shared compiled agent graph
+        agent_graph = get_compiled_graph("marketing_communications")
         
         # Add tenant context to the state if not present
         if self.organization_id and "organization_id" not in state:
@@ -529,8 +530,8 @@ class AgentFactory:
             state["event_context"] = event_context
             self.state_manager.update_conversation_state(conversation_id, state)
         
-        # Create the agent graph
-        agent_graph = create_project_management_graph()
+        # Get the shared compiled agent graph
+        agent_graph = get_compiled_graph("project_management")
         
         # Add tenant context to the state if not present
         if self.organization_id and "organization_id" not in state:
@@ -576,8 +577,8 @@ class AgentFactory:
             state["event_context"] = event_context
             self.state_manager.update_conversation_state(conversation_id, state)
         
-        # Create the agent graph
-        agent_graph = create_analytics_graph()
+        # Get the shared compiled agent graph
+        agent_graph = get_compiled_graph("analytics")
         
         # Add tenant context to the state if not present
         if self.organization_id and "organization_id" not in state:
@@ -623,8 +624,8 @@ class AgentFactory:
             state["event_context"] = event_context
             self.state_manager.update_conversation_state(conversation_id, state)
         
-        # Create the agent graph
-        agent_graph = create_compliance_security_graph()
+        # Get the shared compiled agent graph
+        agent_graph = get_compiled_graph("compliance_security")
         
         # Add tenant context to the state if not present
         if self.organization_id and "organization_id" not in state:
@@ -5,20 +5,37 @@ This module provides FastAPI endpoints for interacting with agents
 with tenant context and subscription-based access controls.
 """
 
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List, Tuple
+import json
 import uuid
 import time
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Request, status, Body
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Body
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import set_committed_value
 from pydantic import BaseModel, Field
 
 from app.db.session import get_db
+from app.db.async_session import get_async_db
 from app.db.models_updated import Event
 from app.auth.dependencies import get_current_user, get_current_user_id
 from app.middleware.tenant import get_tenant_id, require_tenant
 from app.subscription.feature_control import get_feature_control, FeatureNotAvailableError
+from app.utils.llm_rate_limiter import LLMRateLimitError
+from app.services.idempotency import (
+    IDEMPOTENCY_HEADER,
+    MAX_KEY_LENGTH,
+    IdempotencyInProgressError,
+    IdempotencyKeyReusedError,
+    get_idempotency_manager,
+    get_request_fingerprint,
+    get_scope_key
+)
 from app.agents.agent_factory import get_agent_factory
+from app.state.tenant_aware_manager import get_async_tenant_aware_state_manager
+from app.agents.execution import invoke_agent_graph, stream_agent_graph
 from app.utils.logging_utils import (
     setup_logger, 
     log_agent_invocation, 
@@ -209,13 +226,328 @@ SUBSCRIPTION_TIERS = {
 router = APIRouter()
 
 
+async def _prepare_agent_run(
+    agent_type: str,
+    message: str,
+    conversation_id: Optional[str],
+    organization_id: int,
+    db: Session,
+    current_user_id: int,
+    async_db: Optional[AsyncSession] = None
+) -> Dict[str, Any]:
+    """
+    Record the user message and build the agent and its state for a run.
+
+    Shared by the blocking and the streaming message endpoints.
+
+    Args:
+        agent_type: The type of agent to use
+        message: The user message
+        conversation_id: The conversation ID (optional, will be generated if not provided)
+        organization_id: The organization ID
+        db: Database session
+        current_user_id: The current user ID
+        async_db: Async database session to load the conversation with, if enabled
+
+    Returns:
+        Dictionary with the conversation service, conversation ID, agent factory,
+        agent and the state to run the agent graph with
+
+    Raises:
+        FeatureNotAvailableError: If the subscription does not include the agent
+    """
+    # Initialize tenant conversation service
+    from app.services.tenant_conversation_service import (
+        AsyncTenantConversationService,
+        TenantConversationService
+    )
+    
+    if async_db is not None:
+        conversation_service = AsyncTenantConversationService(
+            async_db=async_db,
+            db=db,
+            organization_id=organization_id,
+            user_id=current_user_id
+        )
+    else:
+        conversation_service = TenantConversationService(
+            db=db,
+            organization_id=organization_id,
+            user_id=current_user_id
+        )
+    
+    # Handle conversation creation or retrieval
+    tenant_conversation = None
+    if conversation_id:
+        # Try to get existing conversation
+        try:
+            if async_db is not None:
+                tenant_conversation = await conversation_service.aget_conversation(
+                    conversation_id=int(conversation_id),
+                    include_messages=True
+                )
+            else:
+                tenant_conversation = conversation_service.get_conversation(
+                    conversation_id=int(conversation_id),
+                    include_messages=True
+                )
+        except (ValueError, TypeError):
+            # Invalid conversation ID format
+            pass
+    
+    if not tenant_conversation:
+        # Create new conversation
+        tenant_conversation = conversation_service.create_conversation(
+            title=f"{agent_type.title()} Conversation",
+            conversation_type="agent_chat",
+            primary_agent_type=agent_type
+        )
+        conversation_id = str(tenant_conversation.id)
+        
+        logger.info(f"Created new tenant conversation: {conversation_id}", 
+                   extra={"custom_dimensions": {
+                       "agent_type": agent_type,
+                       "organization_id": organization_id
+                   }})
+    else:
+        conversation_id = str(tenant_conversation.id)
+    
+    # Log the request
+    log_agent_invocation(
+        logger=logger,
+        agent_type=agent_type,
+        task=f"process_message: {message[:50]}{'...' if len(message) > 50 else ''}",
+        conversation_id=conversation_id,
+        organization_id=organization_id
+    )
+    
+    # Add user message to tenant conversation
+    user_message = conversation_service.add_message(
+        conversation_id=int(conversation_id),
+        role="user",
+        content=message,
+        metadata={"source": "api", "agent_type": agent_type}
+    )
+    
+    # Messages loaded through the async session do not see the message just
+    # written through the synchronous one
+    if async_db is not None and object_session(tenant_conversation) is not db:
+        set_committed_value(tenant_conversation, "messages", list(tenant_conversation.messages) + [user_message])
+    
+    # Get agent factory with tenant context (for backward compatibility)
+    agent_factory = get_agent_factory(db=db, organization_id=organization_id)
+    
+    # Create the agent with tenant context and subscription checks
+    agent = agent_factory.create_agent(
+        agent_type=agent_type,
+        conversation_id=conversation_id
+    )
+    
+    # Build state from tenant conversation
+    state = agent["state"]
+    
+    # Load messages from tenant conversation
+    messages = []
+    for msg in tenant_conversation.messages:
+        messages.append({
+            "role": msg.role,
+            "content": msg.content,
+            "timestamp": msg.timestamp.isoformat(),
+            "agent_type": msg.agent_type,
+            "agent_id": msg.agent_id
+        })
+    
+    state["messages"] = messages
+    
+    # Older messages are represented by the rolling summary kept in the conversation context
+    conversation_service.load_rolling_summary(tenant_conversation, state)
+    
+    # Add tenant context to state
+    state["tenant_context"] = {
+        "organization_id": organization_id,
+        "user_id": current_user_id,
+        "conversation_id": int(conversation_id)
+    }
+    
+    # Log state update
+    log_state_update(
+        logger=logger,
+        state_name="messages",
+        state_value=f"Loaded {len(messages)} messages from tenant conversation",
+        conversation_id=conversation_id,
+        organization_id=organization_id
+    )
+    
+    # Ensure required fields are present in the state
+    if agent_type == "coordinator":
+        # Set default phase if missing
+        if "current_phase" not in state:
+            state["current_phase"] = "information_collection"
+            logger.debug(f"Added missing 'current_phase' field to coordinator state: {conversation_id}")
+        
+        # Set default event_details if missing
+        if "event_details" not in state:
+            state["event_details"] = {
+                "event_type": None,
+                "title": None,
+                "description": None,
+                "attendee_count": None,
+                "scale": None,
+                "timeline_start": None,
+                "timeline_end": None
+            }
+            logger.debug(f"Added missing 'event_details' field to coordinator state: {conversation_id}")
+        
+        # Set default requirements if missing
+        if "requirements" not in state:
+            state["requirements"] = {
+                "stakeholders": [],
+                "resources": [],
+                "risks": [],
+                "success_criteria": [],
+                "budget": {},
+                "location": {}
+            }
+            logger.debug(f"Added missing 'requirements' field to coordinator state: {conversation_id}")
+        
+        # Set default information_collected if missing
+        if "information_collected" not in state:
+            state["information_collected"] = {
+                "basic_details": False,
+                "timeline": False,
+                "budget": False,
+                "location": False,
+                "stakeholders": False,
+                "resources": False,
+                "success_criteria": False,
+                "risks": False
+            }
+            logger.debug(f"Added missing 'information_collected' field to coordinator state: {conversation_id}")
+        
+        # Set default agent_assignments if missing
+        if "agent_assignments" not in state:
+            state["agent_assignments"] = []
+            logger.debug(f"Added missing 'agent_assignments' field to coordinator state: {conversation_id}")
+        
+        # Set default next_steps if missing
+        if "next_steps" not in state:
+            state["next_steps"] = ["gather_event_details"]
+            logger.debug(f"Added missing 'next_steps' field to coordinator state: {conversation_id}")
+    
+    # Add memory to the state if available
+    if "memory" in agent:
+        state["memory"] = agent["memory"]
+    
+    return {
+        "conversation_service": conversation_service,
+        "conversation_id": conversation_id,
+        "agent_factory": agent_factory,
+        "agent": agent,
+        "state": state,
+        "summarized_message_count": state["summarized_message_count"]
+    }
+
+
+def _finalize_agent_run(
+    run: Dict[str, Any],
+    result: Dict[str, Any],
+    agent_type: str,
+    organization_id: int,
+    streamed: bool = False
+) -> str:
+    """
+    Store the resulting agent state and persist the assistant's reply.
+
+    Args:
+        run: The run context returned by _prepare_agent_run
+        result: The state returned by the agent graph
+        agent_type: The type of agent used
+        organization_id: The organization ID
+        streamed: Whether the reply was streamed to the client
+
+    Returns:
+        The assistant's reply
+    """
+    conversation_id = run["conversation_id"]
+    
+    try:
+        # Update the state in the state manager
+        run["agent_factory"].state_manager.update_conversation_state(conversation_id, result)
+        logger.debug(f"Updated conversation state for: {conversation_id}")
+    except Exception as update_error:
+        # Log the error but continue
+        log_agent_error(
+            logger=logger,
+            agent_type=agent_type,
+            error=update_error,
+            context=f"Error updating conversation state for conversation: {conversation_id}",
+            conversation_id=conversation_id,
+            organization_id=organization_id
+        )
+    
+    # Persist the rolling summary if it was updated before the run
+    if result.get("summarized_message_count", 0) != run["summarized_message_count"]:
+        try:
+            run["conversation_service"].save_rolling_summary(int(conversation_id), result)
+        except Exception as summary_error:
+            log_agent_error(
+                logger=logger,
+                agent_type=agent_type,
+                error=summary_error,
+                context=f"Error saving conversation summary for conversation: {conversation_id}",
+                conversation_id=conversation_id,
+                organization_id=organization_id
+            )
+    
+    # Extract the assistant's response
+    assistant_messages = [
+        msg for msg in result.get("messages", [])
+        if msg.get("role") == "assistant" and not msg.get("ephemeral", False)
+    ]
+    
+    # Get the last assistant message
+    last_message = assistant_messages[-1]["content"] if assistant_messages else "No response from agent."
+    
+    # Persist the reply so later turns and the history endpoints see it
+    if assistant_messages:
+        try:
+            run["conversation_service"].add_message(
+                conversation_id=int(conversation_id),
+                role="assistant",
+                content=last_message,
+                agent_type=agent_type,
+                metadata={"source": "api", "streamed": streamed}
+            )
+        except Exception as persist_error:
+            log_agent_error(
+                logger=logger,
+                agent_type=agent_type,
+                error=persist_error,
+                context=f"Error saving assistant message for conversation: {conversation_id}",
+                conversation_id=conversation_id,
+                organization_id=organization_id
+            )
+    
+    # Log the agent response
+    log_agent_response(
+        logger=logger,
+        agent_type=agent_type,
+        response=last_message,
+        conversation_id=conversation_id,
+        organization_id=organization_id
+    )
+    
+    return last_message
+
+
 async def get_agent_response(
     agent_type: str,
     message: str,
     conversation_id: Optional[str] = None,
     request: Request = None,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    current_user_id: int = Depends(get_current_user_id),
+    async_db: Optional[AsyncSession] = None
 ) -> Dict[str, Any]:
     """
     Get a response from an agent with tenant context and comprehensive logging.
@@ -227,6 +559,7 @@ async def get_agent_response(
         request: The FastAPI request
         db: Database session
         current_user_id: The current user ID
+        async_db: Async database session, if enabled
         
     Returns:
         The agent response
@@ -248,169 +581,17 @@ async def get_agent_response(
                 detail="Organization context is required"
             )
         
-        # Initialize tenant conversation service
-        from app.services.tenant_conversation_service import TenantConversationService
-        from app.tools.tenant_agent_communication_tools import TenantAgentCommunicationTools
-        
-        conversation_service = TenantConversationService(
-            db=db,
-            organization_id=organization_id,
-            user_id=current_user_id
-        )
-        
-        # Handle conversation creation or retrieval
-        tenant_conversation = None
-        if conversation_id:
-            # Try to get existing conversation
-            try:
-                tenant_conversation = conversation_service.get_conversation(
-                    conversation_id=int(conversation_id),
-                    include_messages=True
-                )
-            except (ValueError, TypeError):
-                # Invalid conversation ID format
-                pass
-        
-        if not tenant_conversation:
-            # Create new conversation
-            tenant_conversation = conversation_service.create_conversation(
-                title=f"{agent_type.title()} Conversation",
-                conversation_type="agent_chat",
-                primary_agent_type=agent_type
-            )
-            conversation_id = str(tenant_conversation.id)
-            
-            logger.info(f"Created new tenant conversation: {conversation_id}", 
-                       extra={"custom_dimensions": {
-                           "agent_type": agent_type,
-                           "organization_id": organization_id
-                       }})
-        else:
-            conversation_id = str(tenant_conversation.id)
-        
-        # Log the request
-        log_agent_invocation(
-            logger=logger,
-            agent_type=agent_type,
-            task=f"process_message: {message[:50]}{'...' if len(message) > 50 else ''}",
-            conversation_id=conversation_id,
-            organization_id=organization_id
-        )
-        
-        # Add user message to tenant conversation
-        user_message = conversation_service.add_message(
-            conversation_id=int(conversation_id),
-            role="user",
-            content=message,
-            metadata={"source": "api", "agent_type": agent_type}
-        )
-        
-        # Initialize tenant-aware agent communication tools
-        agent_tools = TenantAgentCommunicationTools(
-            db=db,
-            organization_id=organization_id,
-            user_id=current_user_id,
-            conversation_id=int(conversation_id),
-            agent_type=agent_type
-        )
-        
-        # Get agent factory with tenant context (for backward compatibility)
-        agent_factory = get_agent_factory(db=db, organization_id=organization_id)
-        
         try:
-            # Create the agent with tenant context and subscription checks
-            agent = agent_factory.create_agent(
+            run = await _prepare_agent_run(
                 agent_type=agent_type,
-                conversation_id=conversation_id
-            )
-            
-            # Build state from tenant conversation
-            state = agent["state"]
-            
-            # Load messages from tenant conversation
-            messages = []
-            for msg in tenant_conversation.messages:
-                messages.append({
-                    "role": msg.role,
-                    "content": msg.content,
-                    "timestamp": msg.timestamp.isoformat(),
-                    "agent_type": msg.agent_type,
-                    "agent_id": msg.agent_id
-                })
-            
-            state["messages"] = messages
-            
-            # Add tenant context to state
-            state["tenant_context"] = {
-                "organization_id": organization_id,
-                "user_id": current_user_id,
-                "conversation_id": int(conversation_id)
-            }
-            
-            # Log state update
-            log_state_update(
-                logger=logger,
-                state_name="messages",
-                state_value=f"Loaded {len(messages)} messages from tenant conversation",
+                message=message,
                 conversation_id=conversation_id,
-                organization_id=organization_id
+                organization_id=organization_id,
+                db=db,
+                current_user_id=current_user_id,
+                async_db=async_db
             )
-            
-            # Ensure required fields are present in the state
-            if agent_type == "coordinator":
-                # Set default phase if missing
-                if "current_phase" not in state:
-                    state["current_phase"] = "information_collection"
-                    logger.debug(f"Added missing 'current_phase' field to coordinator state: {conversation_id}")
-                
-                # Set default event_details if missing
-                if "event_details" not in state:
-                    state["event_details"] = {
-                        "event_type": None,
-                        "title": None,
-                        "description": None,
-                        "attendee_count": None,
-                        "scale": None,
-                        "timeline_start": None,
-                        "timeline_end": None
-                    }
-                    logger.debug(f"Added missing 'event_details' field to coordinator state: {conversation_id}")
-                
-                # Set default requirements if missing
-                if "requirements" not in state:
-                    state["requirements"] = {
-                        "stakeholders": [],
-                        "resources": [],
-                        "risks": [],
-                        "success_criteria": [],
-                        "budget": {},
-                        "location": {}
-                    }
-                    logger.debug(f"Added missing 'requirements' field to coordinator state: {conversation_id}")
-                
-                # Set default information_collected if missing
-                if "information_collected" not in state:
-                    state["information_collected"] = {
-                        "basic_details": False,
-                        "timeline": False,
-                        "budget": False,
-                        "location": False,
-                        "stakeholders": False,
-                        "resources": False,
-                        "success_criteria": False,
-                        "risks": False
-                    }
-                    logger.debug(f"Added missing 'information_collected' field to coordinator state: {conversation_id}")
-                
-                # Set default agent_assignments if missing
-                if "agent_assignments" not in state:
-                    state["agent_assignments"] = []
-                    logger.debug(f"Added missing 'agent_assignments' field to coordinator state: {conversation_id}")
-                
-                # Set default next_steps if missing
-                if "next_steps" not in state:
-                    state["next_steps"] = ["gather_event_details"]
-                    logger.debug(f"Added missing 'next_steps' field to coordinator state: {conversation_id}")
+            conversation_id = run["conversation_id"]
             
             # Log before invoking agent graph
             logger.info(f"Invoking {agent_type} agent graph for conversation: {conversation_id}")
@@ -418,12 +599,8 @@ async def get_agent_response(
             # Measure agent graph execution time
             graph_start_time = time.time()
             
-            # Add memory to the state if available
-            if "memory" in agent:
-                state["memory"] = agent["memory"]
-            
-            # Run the agent graph with the updated state
-            result = agent["graph"].invoke(state)
+            # Run the agent graph with the updated state without blocking the event loop
+            result = await invoke_agent_graph(run["agent"]["graph"], run["state"])
             
             # Calculate and log graph execution time
             graph_duration_ms = (time.time() - graph_start_time) * 1000
@@ -436,38 +613,7 @@ async def get_agent_response(
             )
             logger.debug(f"Agent graph execution completed in {graph_duration_ms:.2f}ms")
             
-            try:
-                # Update the state in the state manager
-                agent_factory.state_manager.update_conversation_state(conversation_id, result)
-                logger.debug(f"Updated conversation state for: {conversation_id}")
-            except Exception as update_error:
-                # Log the error but continue
-                log_agent_error(
-                    logger=logger,
-                    agent_type=agent_type,
-                    error=update_error,
-                    context=f"Error updating conversation state for conversation: {conversation_id}",
-                    conversation_id=conversation_id,
-                    organization_id=organization_id
-                )
-            
-            # Extract the assistant's response
-            assistant_messages = [
-                msg for msg in result.get("messages", [])
-                if msg.get("role") == "assistant" and not msg.get("ephemeral", False)
-            ]
-            
-            # Get the last assistant message
-            last_message = assistant_messages[-1]["content"] if assistant_messages else "No response from agent."
-            
-            # Log the agent response
-            log_agent_response(
-                logger=logger,
-                agent_type=agent_type,
-                response=last_message,
-                conversation_id=conversation_id,
-                organization_id=organization_id
-            )
+            last_message = _finalize_agent_run(run, result, agent_type, organization_id)
             
             # Calculate total request duration
             total_duration_ms = (time.time() - start_time) * 1000
@@ -501,6 +647,20 @@ async def get_agent_response(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=str(e)
             )
+        except LLMRateLimitError as e:
+            # The organization exceeded its LLM rate limit
+            log_agent_error(
+                logger=logger,
+                agent_type=agent_type,
+                error=e,
+                context="Organization LLM rate limit exceeded",
+                conversation_id=conversation_id,
+                organization_id=organization_id
+            )
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e)
+            )
             
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -521,11 +681,215 @@ async def get_agent_response(
         )
 
 
+def _sse_event(event: Dict[str, Any]) -> str:
+    """Format an event as a server-sent event frame."""
+    return f"data: {json.dumps(event, default=str)}\n\n"
+
+
+async def _claim_idempotency_key(
+    request: Request,
+    message_request: "AgentMessageRequest",
+    organization_id: int,
+    current_user_id: int
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Claim the Idempotency-Key of an agent message submission.
+
+    Args:
+        request: The FastAPI request
+        message_request: The agent message request
+        organization_id: The organization ID
+        current_user_id: The current user ID
+
+    Returns:
+        Tuple of (the key this submission now owns, or None if it sent no key;
+        the response to replay if the key was already used for this request)
+
+    Raises:
+        HTTPException: If the key is invalid, was used for another request, or
+            the original submission is still running
+    """
+    idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+    manager = get_idempotency_manager()
+    if not idempotency_key or manager is None:
+        return None, None
+    
+    if len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"
+        )
+    
+    key = get_scope_key(organization_id, current_user_id, idempotency_key)
+    fingerprint = get_request_fingerprint(
+        agent_type=message_request.agent_type,
+        message=message_request.message,
+        conversation_id=message_request.conversation_id
+    )
+    try:
+        replay = await manager.acquire(key, organization_id, fingerprint)
+    except IdempotencyKeyReusedError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except IdempotencyInProgressError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    
+    if replay is not None:
+        logger.info(f"Replaying response for {IDEMPOTENCY_HEADER} of conversation: {replay.get('conversation_id')}")
+        return None, replay
+    return key, None
+
+
+async def _replay_agent_stream(response: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Stream a stored agent response as server-sent events.
+
+    Args:
+        response: The stored response
+
+    Yields:
+        The conversation and done events of the original submission
+    """
+    yield _sse_event({
+        "type": "conversation",
+        "conversation_id": response["conversation_id"],
+        "agent_type": response["agent_type"]
+    })
+    yield _sse_event({"type": "done", **response})
+
+
+async def stream_agent_response(
+    agent_type: str,
+    message: str,
+    conversation_id: Optional[str],
+    organization_id: int,
+    db: Session,
+    current_user_id: int,
+    idempotency_key: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Stream an agent response as server-sent events.
+
+    Emits a ``conversation`` event first, then ``node_start`` and ``token``
+    events while the graph runs, and a ``done`` event with the full reply once
+    it has been persisted. Errors are reported as an ``error`` event since the
+    response status has already been sent.
+
+    Args:
+        agent_type: The type of agent to use
+        message: The user message
+        conversation_id: The conversation ID (optional, will be generated if not provided)
+        organization_id: The organization ID
+        db: Database session
+        current_user_id: The current user ID
+        idempotency_key: The claimed idempotency key the response is stored under
+
+    Yields:
+        Server-sent event frames
+    """
+    start_time = time.time()
+    first_token_logged = False
+    completed = False
+    
+    try:
+        run = await _prepare_agent_run(
+            agent_type=agent_type,
+            message=message,
+            conversation_id=conversation_id,
+            organization_id=organization_id,
+            db=db,
+            current_user_id=current_user_id
+        )
+        conversation_id = run["conversation_id"]
+        yield _sse_event({"type": "conversation", "conversation_id": conversation_id, "agent_type": agent_type})
+        
+        logger.info(f"Streaming {agent_type} agent graph for conversation: {conversation_id}")
+        
+        result = run["state"]
+        async for event in stream_agent_graph(run["agent"]["graph"], run["state"]):
+            if event["type"] == "final":
+                result = event["state"]
+                continue
+            
+            if event["type"] == "token" and not first_token_logged:
+                first_token_logged = True
+                log_performance_metric(
+                    logger=logger,
+                    name=f"agent_time_to_first_token_{agent_type}",
+                    value=(time.time() - start_time) * 1000,
+                    component="agent",
+                    organization_id=organization_id
+                )
+            
+            yield _sse_event(event)
+        
+        last_message = _finalize_agent_run(run, result, agent_type, organization_id, streamed=True)
+        
+        log_performance_metric(
+            logger=logger,
+            name=f"agent_request_total_{agent_type}",
+            value=(time.time() - start_time) * 1000,
+            component="agent",
+            organization_id=organization_id
+        )
+        
+        response = {
+            "response": last_message,
+            "conversation_id": conversation_id,
+            "agent_type": agent_type,
+            "organization_id": organization_id
+        }
+        if idempotency_key:
+            await get_idempotency_manager().complete(idempotency_key, response)
+            completed = True
+        
+        yield _sse_event({"type": "done", **response})
+        
+    except FeatureNotAvailableError as e:
+        log_agent_error(
+            logger=logger,
+            agent_type=agent_type,
+            error=e,
+            context="Subscription does not have access to this agent type",
+            conversation_id=conversation_id,
+            organization_id=organization_id
+        )
+        yield _sse_event({"type": "error", "status_code": status.HTTP_403_FORBIDDEN, "detail": str(e)})
+    except LLMRateLimitError as e:
+        log_agent_error(
+            logger=logger,
+            agent_type=agent_type,
+            error=e,
+            context="Organization LLM rate limit exceeded",
+            conversation_id=conversation_id,
+            organization_id=organization_id
+        )
+        yield _sse_event({"type": "error", "status_code": status.HTTP_429_TOO_MANY_REQUESTS, "detail": str(e)})
+    except Exception as e:
+        log_agent_error(
+            logger=logger,
+            agent_type=agent_type,
+            error=e,
+            context="Unexpected error streaming agent request",
+            conversation_id=conversation_id,
+            organization_id=organization_id
+        )
+        yield _sse_event({
+            "type": "error",
+            "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "detail": f"Error processing agent request: {str(e)}"
+        })
+    finally:
+        # A failed or abandoned run lets the client retry with the same key
+        if idempotency_key and not completed:
+            await get_idempotency_manager().release(idempotency_key)
+
+
 async def get_conversation_history(
     conversation_id: str,
     request: Request = None,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    current_user_id: int = Depends(get_current_user_id),
+    async_db: Optional[AsyncSession] = None
 ) -> Dict[str, Any]:
     """
     Get conversation history with tenant context and comprehensive logging.
@@ -535,6 +899,7 @@ async def get_conversation_history(
         request: The FastAPI request
         db: Database session
         current_user_id: The current user ID
+        async_db: Async database session to read the state with, if enabled
         
     Returns:
         The conversation history
@@ -555,12 +920,16 @@ async def get_conversation_history(
                        "organization_id": organization_id
                    }})
         
-        # Get agent factory with tenant context
-        agent_factory = get_agent_factory(db=db, organization_id=organization_id)
-        
         try:
             # Get the conversation state
-            state = agent_factory.state_manager.get_conversation_state(conversation_id)
+            if async_db is not None:
+                state_manager = get_async_tenant_aware_state_manager(
+                    organization_id=organization_id, async_db=async_db, db=db
+                )
+                state = await state_manager.aget_conversation_state(conversation_id)
+            else:
+                agent_factory = get_agent_factory(db=db, organization_id=organization_id)
+                state = agent_factory.state_manager.get_conversation_state(conversation_id)
         except Exception as get_error:
             # Log the error and return empty state
             log_agent_error(
@@ -664,7 +1033,8 @@ async def list_conversations(
     offset: int = 0,
     request: Request = None,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    current_user_id: int = Depends(get_current_user_id),
+    async_db: Optional[AsyncSession] = None
 ) -> Dict[str, Any]:
     """
     List conversations with tenant context and comprehensive logging.
@@ -675,6 +1045,7 @@ async def list_conversations(
         request: The FastAPI request
         db: Database session
         current_user_id: The current user ID
+        async_db: Async database session to list with, if enabled
         
     Returns:
         List of conversations
@@ -696,12 +1067,16 @@ async def list_conversations(
                        "organization_id": organization_id
                    }})
         
-        # Get agent factory with tenant context
-        agent_factory = get_agent_factory(db=db, organization_id=organization_id)
-        
         try:
             # List conversations for the current organization
-            conversations = agent_factory.state_manager.list_conversations(limit=limit, offset=offset)
+            if async_db is not None:
+                state_manager = get_async_tenant_aware_state_manager(
+                    organization_id=organization_id, async_db=async_db, db=db
+                )
+                conversations = await state_manager.alist_conversations(limit=limit, offset=offset)
+            else:
+                agent_factory = get_agent_factory(db=db, organization_id=organization_id)
+                conversations = agent_factory.state_manager.list_conversations(limit=limit, offset=offset)
             logger.debug(f"Retrieved {len(conversations)} conversations for organization: {organization_id}")
         except Exception as list_error:
             # Handle errors in list_conversations
@@ -944,29 +1319,110 @@ async def get_available_agents(
 @router.post("/agents/message", response_model=AgentMessageResponse)
 async def send_message_to_agent(
     request: Request,
+    response: Response,
     message_request: AgentMessageRequest = Body(...),
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    current_user_id: int = Depends(get_current_user_id),
+    async_db: Optional[AsyncSession] = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """
     Send a message to an agent and get a response.
     
+    A submission retried with the same Idempotency-Key header gets the
+    original response instead of running the agent again.
+    
     Args:
         request: FastAPI request
+        response: FastAPI response
         message_request: Agent message request
         db: Database session
         current_user_id: Current user ID
+        async_db: Async database session, if enabled
         
     Returns:
         Agent response
     """
-    return await get_agent_response(
-        agent_type=message_request.agent_type,
-        message=message_request.message,
-        conversation_id=message_request.conversation_id,
-        request=request,
-        db=db,
-        current_user_id=current_user_id
+    idempotency_key = None
+    organization_id = get_tenant_id(request)
+    if organization_id:
+        idempotency_key, replay = await _claim_idempotency_key(
+            request, message_request, organization_id, current_user_id
+        )
+        if replay is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            return replay
+    
+    try:
+        result = await get_agent_response(
+            agent_type=message_request.agent_type,
+            message=message_request.message,
+            conversation_id=message_request.conversation_id,
+            request=request,
+            db=db,
+            current_user_id=current_user_id,
+            async_db=async_db
+        )
+    except BaseException:
+        if idempotency_key:
+            await get_idempotency_manager().release(idempotency_key)
+        raise
+    
+    if idempotency_key:
+        await get_idempotency_manager().complete(idempotency_key, result)
+    return result
+
+
+@router.post("/agents/message/stream")
+async def stream_message_to_agent(
+    request: Request,
+    message_request: AgentMessageRequest = Body(...),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+) -> StreamingResponse:
+    """
+    Send a message to an agent and stream the response as server-sent events.
+    
+    A submission retried with the same Idempotency-Key header gets the
+    original response as a conversation and a done event.
+    
+    Args:
+        request: FastAPI request
+        message_request: Agent message request
+        db: Database session
+        current_user_id: Current user ID
+        
+    Returns:
+        Streaming response of server-sent events
+    """
+    organization_id = get_tenant_id(request)
+    if not organization_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Organization context is required"
+        )
+    
+    idempotency_key, replay = await _claim_idempotency_key(
+        request, message_request, organization_id, current_user_id
+    )
+    if replay is not None:
+        return StreamingResponse(
+            _replay_agent_stream(replay),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Idempotent-Replayed": "true"}
+        )
+    
+    return StreamingResponse(
+        stream_agent_response(
+            agent_type=message_request.agent_type,
+            message=message_request.message,
+            conversation_id=message_request.conversation_id,
+            organization_id=organization_id,
+            db=db,
+            current_user_id=current_user_id,
+            idempotency_key=idempotency_key
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
@@ -975,7 +1431,8 @@ async def get_agent_conversation(
     conversation_id: str,
     request: Request,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    current_user_id: int = Depends(get_current_user_id),
+    async_db: Optional[AsyncSession] = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """
     Get conversation history for an agent.
@@ -985,6 +1442,7 @@ async def get_agent_conversation(
         request: FastAPI request
         db: Database session
         current_user_id: Current user ID
+        async_db: Async database session, if enabled
         
     Returns:
         Conversation history
@@ -993,7 +1451,8 @@ async def get_agent_conversation(
         conversation_id=conversation_id,
         request=request,
         db=db,
-        current_user_id=current_user_id
+        current_user_id=current_user_id,
+        async_db=async_db
     )
 
 
@@ -1003,7 +1462,8 @@ async def list_agent_conversations(
     offset: int = 0,
     request: Request = None,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    current_user_id: int = Depends(get_current_user_id),
+    async_db: Optional[AsyncSession] = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """
     List conversations for the current organization.
@@ -1014,6 +1474,7 @@ async def list_agent_conversations(
         request: FastAPI request
         db: Database session
         current_user_id: Current user ID
+        async_db: Async database session, if enabled
         
     Returns:
         List of conversations
@@ -1023,7 +1484,8 @@ async def list_agent_conversations(
         offset=offset,
         request=request,
         db=db,
-        current_user_id=current_user_id
+        current_user_id=current_user_id,
+        async_db=async_db
     )
 
 
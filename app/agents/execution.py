@@ -0,0 +1,133 @@
+"""
+Agent graph execution helpers.
+
+This module provides the single entry point used by the API routes and the
+websocket to run an agent graph, so the execution mode (async or sync) is
+chosen in one place. It also provides the streaming variant used by the SSE
+endpoint and the websocket to push tokens to the client while the graph runs.
+Both scope cached LLM responses to the organization that owns the state and
+bring the rolling conversation summary up to date before the graph runs.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+from app import config
+from app.graphs.context_window import update_rolling_summary
+from app.utils.llm_cache import llm_cache_scope
+from app.utils.logging_utils import setup_logger
+
+
+logger = setup_logger(name="agent_execution", component="agent")
+
+
+def get_state_organization_id(state: Dict[str, Any]) -> Optional[int]:
+    """
+    Get the organization an agent state belongs to.
+
+    Args:
+        state: The agent state
+
+    Returns:
+        The organization ID, or None if the state is not tenant-scoped
+    """
+    return state.get("organization_id") or (state.get("tenant_context") or {}).get("organization_id")
+
+
+async def refresh_rolling_summary(state: Dict[str, Any]) -> bool:
+    """
+    Fold messages that have left the context window into the rolling summary.
+
+    Runs the (blocking) summary LLM call in a worker thread. Failures are
+    logged and leave the state unchanged, as graph nodes still receive every
+    message not covered by the summary.
+
+    Args:
+        state: The agent state, updated in place
+
+    Returns:
+        True if the summary was updated
+    """
+    if not config.CONTEXT_ROLLING_SUMMARY:
+        return False
+    try:
+        return await asyncio.to_thread(update_rolling_summary, state)
+    except Exception as e:
+        logger.warning(f"Rolling summary update failed: {str(e)}")
+        return False
+
+
+async def invoke_agent_graph(graph: Any, state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run an agent graph without blocking the event loop.
+
+    With AGENT_ASYNC_EXECUTION enabled the graph is run with ``ainvoke``;
+    async nodes await their LLM calls and sync nodes are executed in
+    LangGraph's thread pool. Otherwise the synchronous ``invoke`` is run in a
+    worker thread.
+
+    Args:
+        graph: The compiled agent graph
+        state: The agent state
+
+    Returns:
+        The resulting agent state
+    """
+    with llm_cache_scope(get_state_organization_id(state)):
+        await refresh_rolling_summary(state)
+        if config.AGENT_ASYNC_EXECUTION:
+            return await graph.ainvoke(state)
+        return await asyncio.to_thread(graph.invoke, state)
+
+
+# Nodes whose LLM output is the user-facing reply and is therefore streamed.
+# Other nodes (e.g. requirement extraction) produce JSON meant for the graph.
+STREAMED_NODES = ("generate_response", "provide_status")
+
+
+async def stream_agent_graph(
+    graph: Any,
+    state: Dict[str, Any],
+    streamed_nodes: Iterable[str] = STREAMED_NODES
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run an agent graph and yield events as they are produced.
+
+    Yields dictionaries with a ``type`` key:
+
+    - ``node_start``: a graph node started (``node`` holds its name)
+    - ``token``: an LLM token from one of ``streamed_nodes`` (``content``)
+    - ``final``: the graph finished (``state`` holds the resulting state)
+
+    Args:
+        graph: The compiled agent graph
+        state: The agent state
+        streamed_nodes: Nodes whose LLM tokens are forwarded to the client
+
+    Yields:
+        Stream events
+    """
+    streamed_nodes = set(streamed_nodes)
+    node_names = {name for name in (getattr(graph, "nodes", None) or {}) if not name.startswith("__")}
+    final_state = None
+
+    with llm_cache_scope(get_state_organization_id(state)):
+        await refresh_rolling_summary(state)
+        async for event in graph.astream_events(state, version="v2"):
+            kind = event.get("event")
+            metadata = event.get("metadata") or {}
+
+            if kind == "on_chain_start" and event.get("name") in node_names \
+                    and metadata.get("langgraph_node") == event.get("name"):
+                yield {"type": "node_start", "node": event["name"]}
+
+            elif kind == "on_chat_model_stream" and metadata.get("langgraph_node") in streamed_nodes:
+                chunk = event.get("data", {}).get("chunk")
+                content = getattr(chunk, "content", None)
+                if content:
+                    yield {"type": "token", "node": metadata["langgraph_node"], "content": content}
+
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                final_state = event.get("data", {}).get("output")
+
+    yield {"type": "final", "state": final_state if final_state is not None else state}
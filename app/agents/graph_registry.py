@@ -0,0 +1,266 @@
+"""
+Process-wide registry of compiled agent graphs.
+
+Building an agent graph creates the LLM client, instantiates every tool,
+builds the tool node and runs ``workflow.compile()``. None of that depends on
+the conversation being served, so each worker compiles every graph once and
+hands out the shared compiled graph to all requests.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app import config
+from app.graphs.task_routing import get_target_nodes
+from app.utils.logging_utils import setup_logger, log_performance_metric
+
+# Set up logger for the graph registry
+logger = setup_logger(
+    name="graph_registry",
+    log_level="DEBUG",
+    enable_app_insights=True,
+    app_insights_level="INFO",
+    component="agent"
+)
+
+
+def _coordinator_builder():
+    from app.graphs.coordinator_graph import create_coordinator_graph
+    return create_coordinator_graph()
+
+
+def _resource_planning_builder(entry_point=None):
+    from app.graphs.resource_planning_graph import create_resource_planning_graph
+    return create_resource_planning_graph(entry_point=entry_point)
+
+
+def _financial_builder(entry_point=None):
+    from app.graphs.financial_graph import create_financial_graph
+    return create_financial_graph(entry_point=entry_point)
+
+
+def _stakeholder_management_builder(entry_point=None):
+    from app.graphs.stakeholder_management_graph import create_stakeholder_management_graph
+    return create_stakeholder_management_graph(entry_point=entry_point)
+
+
+def _marketing_communications_builder():
+    from app.graphs.marketing_communications_graph import create_marketing_communications_graph
+    return create_marketing_communications_graph()
+
+
+def _project_management_builder(entry_point=None):
+    from app.graphs.project_management_graph import create_project_management_graph
+    return create_project_management_graph(entry_point=entry_point)
+
+
+def _analytics_builder(entry_point=None):
+    from app.graphs.analytics_graph import create_analytics_graph
+    return create_analytics_graph(entry_point=entry_point)
+
+
+def _compliance_security_builder(entry_point=None):
+    from app.graphs.compliance_security_graph import create_compliance_security_graph
+    return create_compliance_security_graph(entry_point=entry_point)
+
+
+# Graph builders by agent type. Builders import lazily so that the tool
+# modules (which themselves build sub-agent graphs) can use the registry
+# without creating import cycles. Builders of specialist agents with task
+# routes also accept the entry point of a delegated task.
+GRAPH_BUILDERS: Dict[str, Callable[[], Any]] = {
+    "coordinator": _coordinator_builder,
+    "resource_planning": _resource_planning_builder,
+    "financial": _financial_builder,
+    "stakeholder_management": _stakeholder_management_builder,
+    "marketing_communications": _marketing_communications_builder,
+    "project_management": _project_management_builder,
+    "analytics": _analytics_builder,
+    "compliance_security": _compliance_security_builder,
+}
+
+
+def get_llm_config_key() -> Tuple[str, str]:
+    """
+    Get the LLM configuration part of the registry key.
+
+    Returns:
+        Tuple of (provider, model)
+    """
+    provider = config.LLM_PROVIDER.lower()
+    model = config.GOOGLE_MODEL if provider == "google" else config.LLM_MODEL
+    return provider, model
+
+
+class GraphRegistry:
+    """
+    Registry that compiles each agent graph once per worker.
+
+    Compiled LangGraph graphs hold no per-conversation state (the state is
+    passed to ``invoke``), so a single compiled graph can safely serve
+    concurrent requests.
+    """
+
+    def __init__(self, builders: Optional[Dict[str, Callable[[], Any]]] = None):
+        """
+        Initialize the graph registry.
+
+        Args:
+            builders: Graph builders by agent type (defaults to GRAPH_BUILDERS)
+        """
+        self._builders = builders if builders is not None else GRAPH_BUILDERS
+        self._graphs: Dict[Tuple[str, str, str, str], Any] = {}
+        self._lock = threading.RLock()
+        self._build_locks: Dict[Tuple[str, str, str, str], threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, agent_type: str, entry_point: Optional[str] = None) -> Tuple[str, str, str, str]:
+        provider, model = get_llm_config_key()
+        return (agent_type, entry_point or "", provider, model)
+
+    def get_graph(self, agent_type: str, entry_point: Optional[str] = None) -> Any:
+        """
+        Get the compiled graph for an agent type, compiling it on first use.
+
+        Args:
+            agent_type: The type of agent
+            entry_point: Target node of a delegated task (defaults to the full
+                workflow); must be one of the agent's task routing targets
+
+        Returns:
+            The shared compiled graph
+
+        Raises:
+            ValueError: If the agent type or entry point is not supported
+        """
+        if agent_type not in self._builders:
+            raise ValueError(f"Unsupported agent type: {agent_type}")
+        if entry_point is not None and entry_point not in get_target_nodes(agent_type):
+            raise ValueError(f"Unsupported entry point for {agent_type}: {entry_point}")
+
+        key = self._key(agent_type, entry_point)
+        graph = self._graphs.get(key)
+        if graph is not None:
+            with self._lock:
+                self.hits += 1
+            log_performance_metric(
+                logger=logger,
+                name="graph_registry_hit",
+                value=1,
+                component="agent"
+            )
+            return graph
+
+        # Serialize builds per key so concurrent first requests compile once
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            graph = self._graphs.get(key)
+            if graph is not None:
+                with self._lock:
+                    self.hits += 1
+                return graph
+
+            start_time = time.time()
+            if entry_point is not None:
+                graph = self._builders[agent_type](entry_point=entry_point)
+            else:
+                graph = self._builders[agent_type]()
+            duration_ms = (time.time() - start_time) * 1000
+
+            with self._lock:
+                self._graphs[key] = graph
+                self.misses += 1
+
+        graph_name = f"{agent_type} graph at {entry_point}" if entry_point else f"{agent_type} graph"
+        logger.info(f"Compiled {graph_name} in {duration_ms:.2f}ms")
+        log_performance_metric(
+            logger=logger,
+            name=f"graph_compile_{agent_type}",
+            value=duration_ms,
+            component="agent"
+        )
+        return graph
+
+    def warm_up(self, agent_types: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        Compile graphs ahead of the first request.
+
+        Args:
+            agent_types: Agent types to compile (defaults to all registered types)
+
+        Returns:
+            Dictionary mapping agent type to whether it compiled successfully
+        """
+        results = {}
+        for agent_type in agent_types or list(self._builders.keys()):
+            try:
+                self.get_graph(agent_type)
+                results[agent_type] = True
+            except Exception as e:
+                logger.warning(f"Could not warm up {agent_type} graph: {str(e)}")
+                results[agent_type] = False
+        return results
+
+    def clear(self) -> None:
+        """
+        Drop all compiled graphs, e.g. after the LLM configuration changes.
+        """
+        with self._lock:
+            self._graphs.clear()
+            self._build_locks.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get registry statistics.
+
+        Returns:
+            Dictionary with hit/miss counts and compiled agent types
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "compiled": sorted({key[0] for key in self._graphs})
+            }
+
+
+# Global graph registry
+_graph_registry = None
+_graph_registry_lock = threading.Lock()
+
+
+def get_graph_registry() -> GraphRegistry:
+    """
+    Get the process-wide graph registry.
+
+    Returns:
+        GraphRegistry instance
+    """
+    global _graph_registry
+
+    if _graph_registry is None:
+        with _graph_registry_lock:
+            if _graph_registry is None:
+                _graph_registry = GraphRegistry()
+
+    return _graph_registry
+
+
+def get_compiled_graph(agent_type: str, entry_point: Optional[str] = None) -> Any:
+    """
+    Get the shared compiled graph for an agent type.
+
+    Args:
+        agent_type: The type of agent
+        entry_point: Target node of a delegated task (defaults to the full workflow)
+
+    Returns:
+        The compiled graph
+    """
+    return get_graph_registry().get_graph(agent_type, entry_point)
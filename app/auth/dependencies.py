@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -10,6 +10,7 @@ from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
 from app.db.session import get_db
 from app.db.models import User
 from app.schemas.user import TokenPayload
+from app.auth.user_cache import get_user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
@@ -35,6 +36,39 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
     return encoded_jwt
 
 
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _decode_token(token: str) -> Dict[str, Any]:
+    """
+    Decode and verify an access token.
+
+    Args:
+        token: JWT token
+
+    Returns:
+        The token payload, with "sub" as the user ID integer
+
+    Raises:
+        HTTPException: If the token is invalid
+    """
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id: str = payload.get("sub")
+        if user_id is None or not str(user_id).isdigit():
+            raise _credentials_exception()
+    except JWTError:
+        raise _credentials_exception()
+
+    payload["sub"] = int(user_id)
+    return payload
+
+
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> User:
@@ -49,39 +83,50 @@ def get_current_user(
         User object
 
     Raises:
-        HTTPException: If authentication fails
+        HTTPException: If authentication fails or the user is inactive
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+    user_id = _decode_token(token)["sub"]
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
+    get_user_cache().put(user.id, user.is_active)
+    if not user.is_active:
+        raise _credentials_exception()
     return user
 
 
 def get_current_user_id(
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> int:
     """
-    Get the current authenticated user's ID.
+    Get the current authenticated user's ID without loading the user.
+
+    The user's active flag is looked up once and then served from the user
+    cache for AUTH_USER_CACHE_TTL_SECONDS.
 
     Args:
-        current_user: Current authenticated user
+        db: Database session (only used on a user cache miss)
+        token: JWT token
 
     Returns:
         User ID as integer
+
+    Raises:
+        HTTPException: If authentication fails or the user is inactive
     """
-    return current_user.id
+    user_id = _decode_token(token)["sub"]
+
+    cache = get_user_cache()
+    is_active = cache.get(user_id)
+    if is_active is None:
+        row = db.query(User.is_active).filter(User.id == user_id).first()
+        if row is None:
+            raise _credentials_exception()
+        is_active = bool(row[0])
+        cache.put(user_id, is_active)
+
+    if not is_active:
+        raise _credentials_exception()
+    return user_id
@@ -0,0 +1,114 @@
+"""
+Short-lived per-worker cache of authenticated users.
+
+``get_current_user_id`` used to load the user row on every authenticated
+request just to confirm the token's user exists. The user's active flag is
+now looked up once and remembered here for AUTH_USER_CACHE_TTL_SECONDS, which
+bounds how long a deactivated or deleted user keeps access on a worker. Code
+deactivating or deleting a user should also call ``invalidate`` so the
+change applies at once on that worker.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+from app.utils.ttl_cache import TTLCache
+
+
+class UserCache:
+    """
+    Per-worker TTL cache of the users that authenticated recently.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 10000):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a user is kept (0 disables caching)
+            max_size: Maximum number of users to keep
+        """
+        # user ID -> active flag
+        self._entries = TTLCache(max_size=max_size, ttl=ttl)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything."""
+        return self._entries.enabled
+
+    def get(self, user_id: int) -> Optional[bool]:
+        """
+        Get a cached user.
+
+        Args:
+            user_id: The user ID
+
+        Returns:
+            The user's active flag, or None if the user is not cached
+        """
+        return self._entries.get(user_id)
+
+    def put(self, user_id: int, is_active: bool) -> None:
+        """
+        Store a user.
+
+        Args:
+            user_id: The user ID
+            is_active: The user's active flag
+        """
+        self._entries.put(user_id, bool(is_active))
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        Remove a user from the cache.
+
+        Args:
+            user_id: The user ID
+        """
+        self._entries.pop(user_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size, hit, miss and eviction counts
+        """
+        return {"enabled": self.enabled, **self._entries.get_stats()}
+
+
+# Global cache instance
+_user_cache: Optional[UserCache] = None
+_user_cache_lock = threading.Lock()
+
+
+def get_user_cache() -> UserCache:
+    """
+    Get the process-wide user cache.
+
+    Returns:
+        UserCache instance
+    """
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                from app import config
+
+                _user_cache = UserCache(
+                    ttl=config.AUTH_USER_CACHE_TTL_SECONDS,
+                    max_size=config.AUTH_USER_CACHE_MAX_ENTRIES
+                )
+    return _user_cache
+
+
+def get_user_cache_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get user cache statistics.
+
+    Returns:
+        Cache statistics, or None if no request was authenticated yet
+    """
+    if _user_cache is None:
+        return None
+    return _user_cache.get_stats()
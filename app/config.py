@@ -28,6 +28,10 @@ if not SECRET_KEY:
 
 ALGORITHM: str = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Seconds a verified user is cached by get_current_user_id (0 disables the cache)
+AUTH_USER_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "30"))
+# Maximum number of users kept in the per-worker user cache
+AUTH_USER_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "10000"))
 
 def _construct_azure_postgres_url() -> Optional[str]:
     """Construct PostgreSQL URL from Azure environment variables if available."""
@@ -114,6 +118,13 @@ if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
     print("INFO: Converted postgres:// URL to postgresql:// for SQLAlchemy 2.0 compatibility")
 
+# Read hot conversation routes through an asyncpg engine instead of blocking the event loop
+DATABASE_ASYNC_ENABLED: bool = os.getenv("DATABASE_ASYNC_ENABLED", "false").lower() == "true"
+# Connections kept in the async engine's pool
+DATABASE_ASYNC_POOL_SIZE: int = int(os.getenv("DATABASE_ASYNC_POOL_SIZE", "5"))
+# Extra connections the async engine may open under load
+DATABASE_ASYNC_MAX_OVERFLOW: int = int(os.getenv("DATABASE_ASYNC_MAX_OVERFLOW", "10"))
+
 # Server
 HOST: str = os.getenv("HOST", "0.0.0.0")
 PORT: int = int(os.getenv("PORT", "8000"))
@@ -121,12 +132,140 @@ PORT: int = int(os.getenv("PORT", "8000"))
 # LLM Configuration
 LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-4")  # OpenAI model
 GOOGLE_MODEL: str = os.getenv("GOOGLE_MODEL", "gemini-pro")  # Google AI model
+# Smaller models for extraction-tier graph nodes (empty uses LLM_MODEL / GOOGLE_MODEL)
+LLM_EXTRACTION_MODEL: str = os.getenv("LLM_EXTRACTION_MODEL", "")
+GOOGLE_EXTRACTION_MODEL: str = os.getenv("GOOGLE_EXTRACTION_MODEL", "")
+# Per-node tier overrides, e.g. "coordinator.generate_proposal=extraction,compliance_security.generate_report=response"
+LLM_NODE_TIERS: str = os.getenv("LLM_NODE_TIERS", "")
+# Connection limits of the HTTP pool shared by all OpenAI clients
+LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+# Serve repeated identical prompts of cache-enabled LLM calls from the LLM response cache
+LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+# Cache storage: "postgres" (shared between workers) or "memory" (per process)
+LLM_CACHE_BACKEND: str = os.getenv("LLM_CACHE_BACKEND", "postgres").lower()
+# Seconds a cached LLM response stays valid
+LLM_CACHE_TTL_SECONDS: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+# Entries kept by the in-memory backend
+LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+# Seconds between deletions of expired PostgreSQL cache entries, per worker
+LLM_CACHE_PURGE_INTERVAL_SECONDS: float = float(os.getenv("LLM_CACHE_PURGE_INTERVAL_SECONDS", "300"))
+# Let identical concurrent LLM calls and searches in a worker share one request
+SINGLE_FLIGHT_ENABLED: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+# Limit LLM calls per organization and schedule them fairly between organizations.
+# Off by default: one delegate_tasks turn runs up to 8 specialist pipelines of
+# 5-7 LLM calls each plus the coordinator's own, so about 40-60 calls, and the
+# per-tier requests per minute in LLM_RATE_LIMITS must allow that before enabling.
+LLM_RATE_LIMIT_ENABLED: bool = os.getenv("LLM_RATE_LIMIT_ENABLED", "false").lower() == "true"
+# Token bucket storage: "postgres" (shared between workers) or "memory" (per process)
+LLM_RATE_LIMIT_BACKEND: str = os.getenv("LLM_RATE_LIMIT_BACKEND", "postgres").lower()
+# Requests and tokens per minute per organization by plan tier, as tier=requests:tokens
+LLM_RATE_LIMITS: str = os.getenv("LLM_RATE_LIMITS", "free=30:60000,professional=120:300000,enterprise=600:1500000")
+# Fair queue weight per plan tier
+LLM_TENANT_WEIGHTS: str = os.getenv("LLM_TENANT_WEIGHTS", "free=1,professional=2,enterprise=4")
+# LLM calls running at the same time per worker
+LLM_MAX_CONCURRENT_CALLS: int = int(os.getenv("LLM_MAX_CONCURRENT_CALLS", "16"))
+# Seconds an LLM call may wait for its rate limit before failing
+LLM_RATE_LIMIT_MAX_WAIT_SECONDS: float = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT_SECONDS", "30"))
+# Send a backup request when an LLM call is slower than usual; the first good answer wins
+LLM_HEDGING_ENABLED: bool = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+# Seconds before the backup request is sent, 0 to use the provider's recent p95 latency
+LLM_HEDGE_DELAY_SECONDS: float = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "0"))
+# Lower bound of the p95-based hedge delay
+LLM_HEDGE_MIN_DELAY_SECONDS: float = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "2"))
+# Alternate provider ("openai" or "google") for backup requests and failover, empty for none
+LLM_FALLBACK_PROVIDER: str = os.getenv("LLM_FALLBACK_PROVIDER", "").lower()
+# Error rate over the last minute that opens a provider's circuit breaker
+LLM_CIRCUIT_ERROR_THRESHOLD: float = float(os.getenv("LLM_CIRCUIT_ERROR_THRESHOLD", "0.5"))
+# Calls in the last minute before the error rate is evaluated
+LLM_CIRCUIT_MIN_CALLS: int = int(os.getenv("LLM_CIRCUIT_MIN_CALLS", "10"))
+# Seconds an open circuit breaker sends traffic to the fallback provider
+LLM_CIRCUIT_COOLDOWN_SECONDS: float = float(os.getenv("LLM_CIRCUIT_COOLDOWN_SECONDS", "30"))
 
 # Search API Configuration
 TAVILY_API_KEY: str = os.getenv("TAVILY_API_KEY", "")
 if not TAVILY_API_KEY:
     print("WARNING: TAVILY_API_KEY environment variable is not set. Internet search functionality will be disabled.")
 
+# Agent Execution Configuration
+# Compile every agent graph at startup instead of on the first request
+AGENT_GRAPH_WARMUP: bool = os.getenv("AGENT_GRAPH_WARMUP", "true").lower() == "true"
+# Run agent graphs with graph.ainvoke so LLM calls do not block the event loop
+AGENT_ASYNC_EXECUTION: bool = os.getenv("AGENT_ASYNC_EXECUTION", "true").lower() == "true"
+# Extract requirements from the messages since the last extraction instead of the full transcript
+COORDINATOR_INCREMENTAL_EXTRACTION: bool = os.getenv("COORDINATOR_INCREMENTAL_EXTRACTION", "true").lower() == "true"
+# Seconds a delegated specialist task may take before it is reported as failed
+DELEGATION_TIMEOUT_SECONDS: float = float(os.getenv("DELEGATION_TIMEOUT_SECONDS", "120"))
+# Delegated specialist tasks running at the same time for one organization
+DELEGATION_MAX_CONCURRENCY_PER_TENANT: int = int(os.getenv("DELEGATION_MAX_CONCURRENCY_PER_TENANT", "4"))
+# Threads per process running delegated specialist tasks
+DELEGATION_MAX_WORKERS: int = int(os.getenv("DELEGATION_MAX_WORKERS", "16"))
+# Honor Idempotency-Key headers on agent message submissions
+IDEMPOTENCY_ENABLED: bool = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+# Idempotency record storage: "postgres" (shared between workers) or "memory" (per process)
+IDEMPOTENCY_BACKEND: str = os.getenv("IDEMPOTENCY_BACKEND", "postgres").lower()
+# Seconds a response is kept for replay to retried submissions
+IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Seconds a retried submission waits for the original one to finish
+IDEMPOTENCY_MAX_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_MAX_WAIT_SECONDS", "120"))
+# Seconds after which an unfinished submission's key can be claimed again
+IDEMPOTENCY_LOCK_SECONDS: float = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "600"))
+# Seconds between deletions of expired idempotency records, per worker
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "300"))
+
+# Agent State Configuration
+# Number of conversation states kept in the per-worker LRU cache (0 disables it).
+# Cached states are not invalidated by other workers, so only enable it with a single worker.
+STATE_CACHE_MAX_CONVERSATIONS: int = int(os.getenv("STATE_CACHE_MAX_CONVERSATIONS", "0"))
+# Persist state updates in the background, coalescing repeated updates per conversation.
+# Pending states are only visible to the worker that holds them: a follow-up turn handled
+# by another worker within STATE_FLUSH_INTERVAL_SECONDS loads the previous state and its
+# write can overwrite the newer pending one. Only enable it with a single worker or with
+# sticky routing of conversations to workers.
+STATE_WRITE_BEHIND: bool = os.getenv("STATE_WRITE_BEHIND", "false").lower() == "true"
+# Seconds between write-behind flushes
+STATE_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("STATE_FLUSH_INTERVAL_SECONDS", "1.0"))
+# Maximum conversations written per flush transaction
+STATE_FLUSH_BATCH_SIZE: int = int(os.getenv("STATE_FLUSH_BATCH_SIZE", "100"))
+# Failed flushes of a state before its pending write is dropped
+STATE_FLUSH_MAX_ATTEMPTS: int = int(os.getenv("STATE_FLUSH_MAX_ATTEMPTS", "5"))
+
+# Tenant Resolution Configuration
+# Seconds a resolved subdomain and organization snapshot are cached per worker (0 disables the cache)
+ORG_CACHE_TTL_SECONDS: float = float(os.getenv("ORG_CACHE_TTL_SECONDS", "60"))
+# Maximum number of slugs and of organizations kept per worker
+ORG_CACHE_MAX_ENTRIES: int = int(os.getenv("ORG_CACHE_MAX_ENTRIES", "10000"))
+# Send organization cache invalidations to all workers through PostgreSQL LISTEN/NOTIFY
+ORG_CACHE_NOTIFY: bool = os.getenv("ORG_CACHE_NOTIFY", "false").lower() == "true"
+# Seconds an organization's subscription entitlements are cached per worker (0 disables the cache)
+ENTITLEMENT_CACHE_TTL_SECONDS: float = float(os.getenv("ENTITLEMENT_CACHE_TTL_SECONDS", "300"))
+# Maximum number of organizations whose entitlements are kept per worker
+ENTITLEMENT_CACHE_MAX_ENTRIES: int = int(os.getenv("ENTITLEMENT_CACHE_MAX_ENTRIES", "10000"))
+
+# Conversation Context Configuration
+# Run LLM context extraction of user messages on a background queue
+CONTEXT_EXTRACTION_ASYNC: bool = os.getenv("CONTEXT_EXTRACTION_ASYNC", "true").lower() == "true"
+# Queue backend: "memory" (per process) or "postgres" (persistent, shared between workers)
+CONTEXT_EXTRACTION_BACKEND: str = os.getenv("CONTEXT_EXTRACTION_BACKEND", "memory").lower()
+# Pending jobs accepted before falling back to inline basic extraction
+CONTEXT_EXTRACTION_QUEUE_SIZE: int = int(os.getenv("CONTEXT_EXTRACTION_QUEUE_SIZE", "1000"))
+# Number of background extraction workers per process
+CONTEXT_EXTRACTION_WORKERS: int = int(os.getenv("CONTEXT_EXTRACTION_WORKERS", "2"))
+# Seconds a claimed job is leased to its worker before other workers may reclaim it (postgres backend)
+CONTEXT_EXTRACTION_LEASE_SECONDS: int = int(os.getenv("CONTEXT_EXTRACTION_LEASE_SECONDS", "300"))
+
+# Conversation Context Window Configuration
+# Most recent messages graph nodes send to the LLM verbatim
+CONTEXT_WINDOW_MESSAGES: int = int(os.getenv("CONTEXT_WINDOW_MESSAGES", "12"))
+# Estimated tokens of conversation history a graph node may send
+CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+# Per-node budgets, e.g. "coordinator.generate_response=8000,financial.track_expenses=2000"
+CONTEXT_NODE_TOKEN_BUDGETS: str = os.getenv("CONTEXT_NODE_TOKEN_BUDGETS", "")
+# Summarize messages that left the window into a rolling summary
+CONTEXT_ROLLING_SUMMARY: bool = os.getenv("CONTEXT_ROLLING_SUMMARY", "true").lower() == "true"
+# Messages that must have left the window before the summary is updated
+CONTEXT_SUMMARY_BATCH_MESSAGES: int = int(os.getenv("CONTEXT_SUMMARY_BATCH_MESSAGES", "6"))
+
 def validate_config():
     """Validate configuration and print warnings for missing values."""
     validation_errors = []
@@ -0,0 +1,120 @@
+"""
+Optional asyncio database engine and sessions.
+
+The application's engine (app.db.base) is synchronous, so queries made by
+async route handlers block the event loop while they wait for PostgreSQL.
+With DATABASE_ASYNC_ENABLED an asyncpg engine to the same database is
+created, and the hot conversation routes read through ``AsyncSession``
+instead (see AsyncTenantConversationService and
+AsyncTenantAwareStateManager). Writes and everything else keep using the
+synchronous engine.
+"""
+
+import threading
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
+
+from app.utils.logging_utils import setup_logger
+
+
+logger = setup_logger(name="async_db", component="db")
+
+_async_engine = None
+_async_sessionmaker = None
+_async_engine_lock = threading.Lock()
+
+
+def get_async_url(url: Any) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Get the asyncpg URL of a database URL.
+
+    asyncpg does not understand libpq's ``sslmode`` parameter, so it is
+    passed as the ``ssl`` connect argument instead.
+
+    Args:
+        url: SQLAlchemy URL of the synchronous engine
+
+    Returns:
+        Tuple of (asyncpg URL, connect arguments)
+    """
+    query = dict(url.query)
+    connect_args = {}
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    return url.set(drivername="postgresql+asyncpg", query=query), connect_args
+
+
+def get_async_engine() -> Any:
+    """
+    Get the process-wide async engine, creating it on first use.
+
+    Returns:
+        AsyncEngine instance
+    """
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        with _async_engine_lock:
+            if _async_engine is None:
+                from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+                from app import config
+                from app.db.base import engine
+
+                url, connect_args = get_async_url(engine.url)
+                async_engine = create_async_engine(
+                    url,
+                    connect_args=connect_args,
+                    pool_size=config.DATABASE_ASYNC_POOL_SIZE,
+                    max_overflow=config.DATABASE_ASYNC_MAX_OVERFLOW,
+                    pool_timeout=30,
+                    pool_recycle=1800,
+                )
+                _async_sessionmaker = async_sessionmaker(
+                    async_engine,
+                    autoflush=False,
+                    expire_on_commit=False
+                )
+                _async_engine = async_engine
+                logger.info("Created asyncpg database engine")
+    return _async_engine
+
+
+async def get_async_db() -> AsyncGenerator[Optional[Any], None]:
+    """
+    Dependency for getting an async database session.
+
+    Yields:
+        AsyncSession, or None if DATABASE_ASYNC_ENABLED is false
+    """
+    from app import config
+
+    if not config.DATABASE_ASYNC_ENABLED:
+        yield None
+        return
+
+    get_async_engine()
+    async with _async_sessionmaker() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close the connections of the async engine if it was created."""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+
+def get_async_db_pool_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get async connection pool statistics.
+
+    Returns:
+        Dictionary with pool size, checked out connections and overflow, or
+        None if the async engine was not created
+    """
+    if _async_engine is None:
+        return None
+    pool = _async_engine.pool
+    return {
+        "size": pool.size() if hasattr(pool, "size") else None,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None
+    }
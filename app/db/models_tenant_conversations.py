@@ -293,3 +293,68 @@ class ConversationParticipant(Base):
     organization = relationship("Organization")
     conversation = relationship("TenantConversation")
     user = relationship("User")
+
+
+class ContextExtractionJob(Base):
+    """
+    Pending LLM context extraction for a user message.
+    
+    Used by the PostgreSQL backend of the context extraction queue so that
+    queued work survives restarts and is shared between workers.
+    """
+    
+    __tablename__ = "context_extraction_jobs"
+    __table_args__ = (
+        Index('idx_context_extraction_jobs_status', 'status', 'id'),
+        {'extend_existing': True}
+    )
+    
+    # Primary identifier
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Tenant, user and conversation context
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    conversation_id = Column(Integer, ForeignKey("tenant_conversations.id", ondelete="CASCADE"), nullable=False)
+    message_id = Column(Integer, ForeignKey("tenant_messages.id", ondelete="CASCADE"), nullable=False)
+    
+    # Message to analyze
+    content = Column(Text, nullable=False)
+    message_timestamp = Column(DateTime, nullable=False)
+    
+    # Processing state
+    status = Column(String(20), default="pending", nullable=False)  # pending, processing, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    
+    # Lease of the worker processing the job; expired leases are reclaimed
+    locked_at = Column(DateTime, nullable=True)
+    worker_id = Column(String(255), nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class AgentIdempotencyKey(Base):
+    """
+    Outcome of an agent message submission sent with an Idempotency-Key header.
+    
+    Retried submissions with the same key replay the stored response instead
+    of recording the message and running the agent again.
+    """
+    
+    __tablename__ = "agent_idempotency_keys"
+    __table_args__ = {'extend_existing': True}
+    
+    # SHA-256 of organization, user and the client's Idempotency-Key
+    idempotency_key = Column(String(64), primary_key=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # SHA-256 of the request body, to reject a key reused for another request
+    request_fingerprint = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False)  # in_progress, completed
+    response = Column(Text, nullable=True)  # JSON response of a completed run
+    
+    created_at = Column(DateTime, nullable=False)  # When the current run claimed the key
+    expires_at = Column(DateTime, nullable=False, index=True)
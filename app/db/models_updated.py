@@ -1,6 +1,6 @@
 import json
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Boolean, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Boolean, Text, Float
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -58,6 +58,33 @@ class AgentState(Base):
     conversation = relationship("Conversation", back_populates="agent_state")
 
 
+class LLMCacheEntry(Base):
+    """Cached LLM response for an exact prompt, model and temperature."""
+    
+    __tablename__ = "llm_cache_entries"
+    __table_args__ = {'extend_existing': True}
+    
+    # SHA-256 of tenant scope, LLM parameters and normalized prompt
+    cache_key = Column(String(64), primary_key=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=True, index=True)
+    generations = Column(Text, nullable=False)  # Serialized LangChain generations
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class LLMRateLimitBucket(Base):
+    """Token bucket state of a per-organization LLM rate limit, shared by all workers."""
+    
+    __tablename__ = "llm_rate_limit_buckets"
+    __table_args__ = {'extend_existing': True}
+    
+    # "org:<organization_id>"
+    bucket_key = Column(String(64), primary_key=True)
+    requests = Column(Float, nullable=False)  # Requests left in the bucket
+    tokens = Column(Float, nullable=False)  # LLM tokens left in the bucket
+    updated_at = Column(Float, nullable=False)  # Unix time of the last refill
+
+
 class Event(Base):
     """Event model for storing event details."""
     
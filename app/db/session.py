@@ -1,19 +1,127 @@
-from typing import Generator
+"""
+Database sessions for requests and background work.
 
+Each HTTP request gets at most one session. The tenant middleware opens the
+request scope, the session is created on first use and shared by the
+middleware and every ``Depends(get_db)`` of the request, and it is returned
+to the pool once the response body has been sent. Code running outside a
+request scope (background workers, health checks) gets its own session.
+
+Connection pool checkouts are counted per request for the request log.
+"""
+from contextvars import ContextVar
+from typing import Any, Dict, Generator, Optional
+
+from fastapi import Request
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
-from app.db.base import SessionLocal
+from app.db.base import SessionLocal, engine
+
+
+# Pool checkout counter of the current request
+_request_db_stats: ContextVar[Optional[Dict[str, int]]] = ContextVar("request_db_stats", default=None)
+
+
+@event.listens_for(engine, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats["checkouts"] += 1
+
+
+def begin_request_db(request: Request) -> None:
+    """
+    Open the database scope of a request.
+
+    No session is created until one is needed.
+
+    Args:
+        request: FastAPI request
+    """
+    request.state.db_session = None
+    request.state.db_stats = {"checkouts": 0}
+    _request_db_stats.set(request.state.db_stats)
+
+
+def get_request_db(request: Request) -> Session:
+    """
+    Get the session of a request, creating it on first use.
+
+    Args:
+        request: FastAPI request with an open database scope
+
+    Returns:
+        Session: SQLAlchemy database session
+    """
+    db = request.state.db_session
+    if db is None:
+        db = SessionLocal()
+        request.state.db_session = db
+    return db
+
 
+def close_request_db(request: Request) -> None:
+    """
+    Return the session of a request to the pool.
+
+    Args:
+        request: FastAPI request
+    """
+    db = getattr(request.state, "db_session", None)
+    if db is not None:
+        request.state.db_session = None
+        db.close()
+
+
+def get_request_db_checkouts(request: Request) -> Optional[int]:
+    """
+    Get the number of pool checkouts made by a request so far.
+
+    Args:
+        request: FastAPI request
+
+    Returns:
+        Checkout count, or None outside a request database scope
+    """
+    stats = getattr(request.state, "db_stats", None)
+    return stats["checkouts"] if stats else None
 
-def get_db() -> Generator[Session, None, None]:
+
+def get_db(request: Request = None) -> Generator[Session, None, None]:
     """
     Dependency for getting a database session.
-    
+
+    Within a request database scope the request's session is shared and
+    closed by the middleware; otherwise a new session is opened and closed.
+
+    Args:
+        request: FastAPI request (injected by FastAPI)
+
     Yields:
         Session: SQLAlchemy database session
     """
+    if request is not None and hasattr(request.state, "db_stats"):
+        yield get_request_db(request)
+        return
+
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_db_pool_stats() -> Dict[str, Any]:
+    """
+    Get connection pool statistics.
+
+    Returns:
+        Dictionary with pool size, checked out connections and overflow
+    """
+    pool = engine.pool
+    return {
+        "size": pool.size() if hasattr(pool, "size") else None,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None
+    }
@@ -8,7 +8,10 @@ from langchain_core.tools import BaseTool
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
-from app.utils.llm_factory import get_llm
+from app.utils.llm_factory import get_llm, get_node_llm
+from app.graphs.task_routing import add_pipeline_edges
+from app.graphs.context_window import build_context_messages
+from app.graphs.prompt_registry import get_prompt, register_prompt
 from app.tools.analytics_tools import (
     DataCollectionTool,
     MetricDefinitionTool,
@@ -37,6 +40,8 @@ class AnalyticsStateDict(TypedDict):
     """State for the analytics agent."""
     
     messages: List[Dict[str, str]]
+    conversation_summary: Optional[str]
+    summarized_message_count: int
     event_details: Dict[str, Any]
     data_sources: List[Dict[str, Any]]
     metrics: List[Dict[str, Any]]
@@ -93,19 +98,6 @@ ROI Analysis:
 - Analyze cost-effectiveness
 - Identify revenue opportunities
 
-Your current state:
-Current phase: {current_phase}
-Event details: {event_details}
-Data sources: {data_sources}
-Metrics: {metrics}
-Segments: {segments}
-Surveys: {surveys}
-Reports: {reports}
-ROI analysis: {roi_analysis}
-Attendee analytics: {attendee_analytics}
-Insights: {insights}
-Next steps: {next_steps}
-
 Follow these guidelines:
 1. Analyze the event requirements to understand the analytics needs
 2. Configure appropriate data sources based on the event type and scale
@@ -119,16 +111,38 @@ Follow these guidelines:
 Respond to the coordinator agent or user in a helpful, professional manner. Ask clarifying questions when needed to gather complete analytics requirements.
 """
 
+ANALYTICS_STATE_PROMPT = """Your current state:
+Current phase: {current_phase}
+Event details: {event_details}
+Data sources: {data_sources}
+Metrics: {metrics}
+Segments: {segments}
+Surveys: {surveys}
+Reports: {reports}
+ROI analysis: {roi_analysis}
+Attendee analytics: {attendee_analytics}
+Insights: {insights}
+Next steps: {next_steps}"""
+
+# Response prompt: static instructions, then the history, then the current state
+register_prompt("analytics.generate_response", ANALYTICS_SYSTEM_PROMPT, ("system", ANALYTICS_STATE_PROMPT))
 
-def create_analytics_graph():
+
+def create_analytics_graph(entry_point: Optional[str] = None):
     """
     Create the analytics agent graph.
     
+    Args:
+        entry_point: Target node of a delegated task; the steps after it
+            are skipped (defaults to the full workflow)
+    
     Returns:
         Compiled LangGraph for the analytics agent
     """
     # Initialize the LLM
     llm = get_llm(temperature=0.2)
+    # The analysis step sees identical inputs when a task is re-delegated
+    analysis_llm = get_node_llm("analytics.analyze_data_requirements", temperature=0.2, cache=True)
     
     # Initialize tools
     tools = [
@@ -179,8 +193,8 @@ Analyze these event details and the conversation to determine the analytics requ
         ])
         
         # Analyze requirements using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        chain = prompt | analysis_llm
+        result = chain.invoke({"messages": build_context_messages(state, "analytics.analyze_data_requirements")})
         
         # Add the analysis to messages
         state["messages"].append({
@@ -226,7 +240,7 @@ Identify the data sources needed for analytics for this event. For each source,
         
         # Determine data sources using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "analytics.configure_data_sources")})
         
         # Use the DataCollectionTool to configure data sources
         data_collection_tool = DataCollectionTool()
@@ -304,7 +318,7 @@ Identify the key performance metrics that should be tracked for this event. For
         
         # Determine metrics using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "analytics.define_metrics")})
         
         # Use the MetricDefinitionTool to define metrics
         metric_definition_tool = MetricDefinitionTool()
@@ -384,7 +398,7 @@ Identify the attendee segments that should be analyzed for this event. For each
         
         # Determine segments using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "analytics.create_segments")})
         
         # Use the SegmentationTool to create segments
         segmentation_tool = SegmentationTool()
@@ -462,7 +476,7 @@ Identify the surveys that should be created for this event. For each survey, pro
         
         # Determine surveys using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "analytics.design_surveys")})
         
         # Use the SurveyCreationTool to create surveys
         survey_creation_tool = SurveyCreationTool()
@@ -553,7 +567,7 @@ Identify the analytics reports that should be generated for this event. For each
         
         # Determine reports using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "analytics.generate_reports")})
         
         # Use the ReportGenerationTool to create reports
         report_generation_tool = ReportGenerationTool()
@@ -648,7 +662,7 @@ Identify the costs, revenue sources, and non-financial benefits for ROI calculat
         
         # Determine ROI calculation needs using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "analytics.calculate_roi")})
         
         # Use the ROICalculationTool to calculate ROI
         roi_calculation_tool = ROICalculationTool()
@@ -734,7 +748,7 @@ Identify the attendee metrics, demographic categories, and acquisition channels
         
         # Determine attendee analysis needs using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "analytics.analyze_attendees")})
         
         # Use the AttendeeAnalyticsTool to analyze attendees
         attendee_analytics_tool = AttendeeAnalyticsTool()
@@ -802,7 +816,7 @@ Identify the key insights that should be highlighted from this analytics data.""
         
         # Determine insight generation needs using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "analytics.generate_insights")})
         
         # Use the InsightGenerationTool to generate insights
         insight_generation_tool = InsightGenerationTool()
@@ -842,27 +856,22 @@ Identify the key insights that should be highlighted from this analytics data.""
         Returns:
             Updated state
         """
-        # Create the analytics prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=ANALYTICS_SYSTEM_PROMPT.format(
-                current_phase=state["current_phase"],
-                event_details=state["event_details"],
-                data_sources=state["data_sources"] if "data_sources" in state else [],
-                metrics=state["metrics"] if "metrics" in state else [],
-                segments=state["segments"] if "segments" in state else [],
-                surveys=state["surveys"] if "surveys" in state else [],
-                reports=state["reports"] if "reports" in state else [],
-                roi_analysis=state["roi_analysis"] if "roi_analysis" in state else None,
-                attendee_analytics=state["attendee_analytics"] if "attendee_analytics" in state else None,
-                insights=state["insights"] if "insights" in state else [],
-                next_steps=state["next_steps"]
-            )),
-            MessagesPlaceholder(variable_name="messages"),
-        ])
-        
         # Generate response using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        chain = get_prompt("analytics.generate_response") | llm
+        result = chain.invoke({
+            "messages": build_context_messages(state, "analytics.generate_response"),
+            "current_phase": state["current_phase"],
+            "event_details": state["event_details"],
+            "data_sources": state["data_sources"] if "data_sources" in state else [],
+            "metrics": state["metrics"] if "metrics" in state else [],
+            "segments": state["segments"] if "segments" in state else [],
+            "surveys": state["surveys"] if "surveys" in state else [],
+            "reports": state["reports"] if "reports" in state else [],
+            "roi_analysis": state["roi_analysis"] if "roi_analysis" in state else None,
+            "attendee_analytics": state["attendee_analytics"] if "attendee_analytics" in state else None,
+            "insights": state["insights"] if "insights" in state else [],
+            "next_steps": state["next_steps"]
+        })
         
         # Add the response to messages
         new_message = {
@@ -889,20 +898,23 @@ Identify the key insights that should be highlighted from this analytics data.""
     workflow.add_node("generate_response", generate_response)
     workflow.add_node("tools", tool_node)
     
-    # Add edges
-    workflow.add_edge("analyze_data_requirements", "configure_data_sources")
-    workflow.add_edge("configure_data_sources", "define_metrics")
-    workflow.add_edge("define_metrics", "create_segments")
-    workflow.add_edge("create_segments", "design_surveys")
-    workflow.add_edge("design_surveys", "generate_reports")
-    workflow.add_edge("generate_reports", "calculate_roi")
-    workflow.add_edge("calculate_roi", "analyze_attendees")
-    workflow.add_edge("analyze_attendees", "generate_insights")
-    workflow.add_edge("generate_insights", "generate_response")
-    workflow.add_edge("generate_response", END)
-    
-    # Set the entry point
-    workflow.set_entry_point("analyze_data_requirements")
+    # Add edges and the entry point; a delegated task stops at its target node
+    add_pipeline_edges(
+        workflow,
+        [
+            "analyze_data_requirements",
+            "configure_data_sources",
+            "define_metrics",
+            "create_segments",
+            "design_surveys",
+            "generate_reports",
+            "calculate_roi",
+            "analyze_attendees",
+            "generate_insights",
+            "generate_response"
+        ],
+        entry_point=entry_point
+    )
     
     return workflow.compile()
 
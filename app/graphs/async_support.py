@@ -0,0 +1,59 @@
+"""
+Helpers for running agent graph nodes in both sync and async mode.
+
+Nodes written as coroutines use ``chain.ainvoke`` so that ``graph.ainvoke``
+never blocks the event loop on an LLM call. Callers that still use the
+synchronous ``graph.invoke`` (sub-agent tools, scripts, tests) keep working
+through a sync shim that drives the coroutine to completion.
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine to completion from synchronous code.
+
+    If the calling thread already runs an event loop the coroutine is
+    executed on a fresh loop in a worker thread, since the running loop
+    cannot be re-entered.
+
+    Args:
+        coro: The coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # Context variables (e.g. the tenant scope of LLM calls) follow the coroutine
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(contextvars.copy_context().run, asyncio.run, coro).result()
+
+
+def dual_mode_node(afunc: Callable[..., Awaitable[Dict[str, Any]]]) -> RunnableLambda:
+    """
+    Wrap an async node so the graph supports both ``invoke`` and ``ainvoke``.
+
+    The node receives the runnable config so it can pass it on to its chains;
+    this keeps LLM callbacks (and therefore token streaming) attached to the
+    graph run.
+
+    Args:
+        afunc: The async node function, taking ``(state, config)``
+
+    Returns:
+        Runnable usable as a LangGraph node
+    """
+    def func(state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        return run_sync(afunc(state, config))
+
+    return RunnableLambda(func, afunc=afunc, name=afunc.__name__)
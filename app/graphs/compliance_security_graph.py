@@ -9,7 +9,9 @@ from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
-from app.utils.llm_factory import get_llm
+from app.utils.llm_factory import get_llm, get_node_llm, LLM_TIER_EXTRACTION, LLM_TIER_RESPONSE
+from app.graphs.task_routing import add_pipeline_edges
+from app.graphs.context_window import build_context_messages
 from app.tools.compliance_search_tool import ComplianceSearchTool
 
 
@@ -19,6 +21,8 @@ class ComplianceSecurityState(TypedDict):
     
     event_details: Dict[str, Any]
     messages: List[Dict[str, Any]]
+    conversation_summary: Optional[str]
+    summarized_message_count: int
     current_phase: str
     next_steps: List[str]
     compliance_requirements: List[Dict[str, Any]]
@@ -73,7 +77,7 @@ def analyze_requirements(state: ComplianceSecurityState) -> ComplianceSecuritySt
         Updated state
     """
     # Get the LLM
-    llm = get_llm()
+    llm = get_node_llm("compliance_security.analyze_requirements", tier=LLM_TIER_EXTRACTION, cache=True)
     
     # Create the prompt
     prompt = ChatPromptTemplate.from_messages([
@@ -108,7 +112,7 @@ Provide your analysis in the following format:
     
     # Run the chain
     response = chain.invoke({
-        "messages": [m for m in state["messages"] if not m.get("ephemeral", False)],
+        "messages": build_context_messages(state, "compliance_security.analyze_requirements"),
         "event_details": json.dumps(state["event_details"], indent=2)
     })
     
@@ -156,7 +160,7 @@ def track_requirements(state: ComplianceSecurityState) -> ComplianceSecurityStat
         Updated state
     """
     # Get the LLM
-    llm = get_llm()
+    llm = get_node_llm("compliance_security.track_requirements", tier=LLM_TIER_EXTRACTION)
     
     # Create the prompt
     prompt = ChatPromptTemplate.from_messages([
@@ -193,7 +197,7 @@ Provide your tracking in the following format:
     
     # Run the chain
     response = chain.invoke({
-        "messages": [m for m in state["messages"] if not m.get("ephemeral", False)],
+        "messages": build_context_messages(state, "compliance_security.track_requirements"),
         "event_details": json.dumps(state["event_details"], indent=2),
         "requirements": json.dumps(state["compliance_requirements"], indent=2)
     })
@@ -220,7 +224,7 @@ def plan_security(state: ComplianceSecurityState) -> ComplianceSecurityState:
         Updated state
     """
     # Get the LLM
-    llm = get_llm()
+    llm = get_node_llm("compliance_security.plan_security", tier=LLM_TIER_EXTRACTION)
     
     # Create the prompt
     prompt = ChatPromptTemplate.from_messages([
@@ -255,7 +259,7 @@ Provide your security plan in the following format:
     
     # Run the chain
     response = chain.invoke({
-        "messages": [m for m in state["messages"] if not m.get("ephemeral", False)],
+        "messages": build_context_messages(state, "compliance_security.plan_security"),
         "event_details": json.dumps(state["event_details"], indent=2)
     })
     
@@ -298,7 +302,7 @@ def implement_data_protection(state: ComplianceSecurityState) -> ComplianceSecur
         Updated state
     """
     # Get the LLM
-    llm = get_llm()
+    llm = get_node_llm("compliance_security.implement_data_protection", tier=LLM_TIER_EXTRACTION)
     
     # Create the prompt
     prompt = ChatPromptTemplate.from_messages([
@@ -333,7 +337,7 @@ Provide your data protection plan in the following format:
     
     # Run the chain
     response = chain.invoke({
-        "messages": [m for m in state["messages"] if not m.get("ephemeral", False)],
+        "messages": build_context_messages(state, "compliance_security.implement_data_protection"),
         "event_details": json.dumps(state["event_details"], indent=2)
     })
     
@@ -375,7 +379,7 @@ def conduct_audit(state: ComplianceSecurityState) -> ComplianceSecurityState:
         Updated state
     """
     # Get the LLM
-    llm = get_llm()
+    llm = get_node_llm("compliance_security.conduct_audit", tier=LLM_TIER_EXTRACTION)
     
     # Create the prompt
     prompt = ChatPromptTemplate.from_messages([
@@ -419,7 +423,7 @@ Provide your audit in the following format:
     
     # Run the chain
     response = chain.invoke({
-        "messages": [m for m in state["messages"] if not m.get("ephemeral", False)],
+        "messages": build_context_messages(state, "compliance_security.conduct_audit"),
         "event_details": json.dumps(state["event_details"], indent=2),
         "requirements": json.dumps(state["compliance_requirements"], indent=2),
         "protocols": json.dumps(state["security_protocols"], indent=2),
@@ -471,7 +475,7 @@ def plan_incident_response(state: ComplianceSecurityState) -> ComplianceSecurity
         Updated state
     """
     # Get the LLM
-    llm = get_llm()
+    llm = get_node_llm("compliance_security.plan_incident_response", tier=LLM_TIER_EXTRACTION)
     
     # Create the prompt
     prompt = ChatPromptTemplate.from_messages([
@@ -509,7 +513,7 @@ Provide your incident response plan in the following format:
     
     # Run the chain
     response = chain.invoke({
-        "messages": [m for m in state["messages"] if not m.get("ephemeral", False)],
+        "messages": build_context_messages(state, "compliance_security.plan_incident_response"),
         "event_details": json.dumps(state["event_details"], indent=2),
         "protocols": json.dumps(state["security_protocols"], indent=2)
     })
@@ -566,7 +570,7 @@ def generate_report(state: ComplianceSecurityState) -> ComplianceSecurityState:
         Updated state
     """
     # Get the LLM
-    llm = get_llm()
+    llm = get_node_llm("compliance_security.generate_report", tier=LLM_TIER_RESPONSE)
     
     # Create the prompt
     prompt = ChatPromptTemplate.from_messages([
@@ -613,7 +617,7 @@ Provide your report in a clear, professional format suitable for sharing with ev
     
     # Run the chain
     response = chain.invoke({
-        "messages": [m for m in state["messages"] if not m.get("ephemeral", False)],
+        "messages": build_context_messages(state, "compliance_security.generate_report"),
         "event_details": json.dumps(state["event_details"], indent=2),
         "requirements": json.dumps(state["compliance_requirements"], indent=2),
         "protocols": json.dumps(state["security_protocols"], indent=2),
@@ -688,7 +692,7 @@ def monitor_updates(state: ComplianceSecurityState) -> ComplianceSecurityState:
         Updated state
     """
     # Get the LLM
-    llm = get_llm()
+    llm = get_node_llm("compliance_security.monitor_updates", tier=LLM_TIER_EXTRACTION)
     
     # Create the prompt
     prompt = ChatPromptTemplate.from_messages([
@@ -726,7 +730,7 @@ Provide your monitoring in the following format:
     
     # Run the chain
     response = chain.invoke({
-        "messages": [m for m in state["messages"] if not m.get("ephemeral", False)],
+        "messages": build_context_messages(state, "compliance_security.monitor_updates"),
         "event_details": json.dumps(state["event_details"], indent=2),
         "requirements": json.dumps(state["compliance_requirements"], indent=2)
     })
@@ -776,7 +780,7 @@ def generate_response(state: ComplianceSecurityState) -> ComplianceSecurityState
         Updated state
     """
     # Get the LLM
-    llm = get_llm()
+    llm = get_node_llm("compliance_security.generate_response", tier=LLM_TIER_RESPONSE)
     
     # Create the prompt
     prompt = ChatPromptTemplate.from_messages([
@@ -804,7 +808,7 @@ Provide a clear, helpful response that addresses the user's query or task.""")
     
     # Run the chain
     response = chain.invoke({
-        "messages": [m for m in state["messages"] if not m.get("ephemeral", False)],
+        "messages": build_context_messages(state, "compliance_security.generate_response"),
         "current_phase": state["current_phase"]
     })
     
@@ -858,10 +862,14 @@ def decide_next_step(state: ComplianceSecurityState) -> str:
         return "generate_response"
 
 
-def create_compliance_security_graph() -> StateGraph:
+def create_compliance_security_graph(entry_point: Optional[str] = None) -> StateGraph:
     """
     Create the Compliance & Security Agent graph.
     
+    Args:
+        entry_point: Target node of a delegated task; the steps after it
+            are skipped (defaults to the full workflow)
+    
     Returns:
         StateGraph for the Compliance & Security Agent
     """
@@ -891,6 +899,15 @@ def create_compliance_security_graph() -> StateGraph:
     workflow.add_node("generate_response", generate_response)
     workflow.add_node("tools", tool_node)
     
+    # A delegated task runs the requirements analysis, its target node and the response
+    if entry_point is not None:
+        add_pipeline_edges(
+            workflow,
+            ["analyze_requirements", entry_point, "generate_response"],
+            entry_point=entry_point
+        )
+        return workflow.compile()
+    
     # Set the entry point
     workflow.set_entry_point("analyze_requirements")
     
@@ -0,0 +1,199 @@
+"""
+Sliding-window conversation context for agent graph nodes.
+
+Graph nodes used to send the whole message history to the LLM on every call,
+so long conversations grew slower and eventually ran into the model's context
+limit. Nodes now build their history with ``build_context_messages``, which
+keeps the most recent messages verbatim, replaces older ones with a rolling
+summary and trims the result to the node's token budget.
+
+The rolling summary lives in the state (``conversation_summary`` covering the
+first ``summarized_message_count`` messages) and is persisted in
+``ConversationContext``. ``update_rolling_summary`` folds messages that have
+left the window into the summary; it is run before an agent graph is invoked,
+once enough messages have left the window to make the LLM call worthwhile.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from app import config
+
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an event planning assistant.
+
+Current summary:
+{summary}
+
+New messages to fold into the summary:
+{messages}
+
+Write the updated summary. Keep every fact, decision, requirement, preference, number, date, name and open question that may matter later; drop greetings and repetition. Use at most 300 words of plain prose or short bullet points. Return only the summary."""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a message.
+
+    Uses the usual ~4 characters per token for English text plus a small
+    per-message overhead, which is close enough for budgeting and avoids
+    tokenizing every message on every node.
+
+    Args:
+        text: The message content
+
+    Returns:
+        Estimated token count
+    """
+    return len(text) // 4 + 4
+
+
+def get_node_token_budget(node_name: Optional[str] = None) -> int:
+    """
+    Get the history token budget of a graph node.
+
+    The default (CONTEXT_TOKEN_BUDGET) can be overridden per node with
+    CONTEXT_NODE_TOKEN_BUDGETS, e.g.
+    "coordinator.generate_response=8000,financial.track_expenses=2000".
+
+    Args:
+        node_name: The node name as "<graph>.<node>"
+
+    Returns:
+        The token budget
+    """
+    if node_name:
+        for entry in config.CONTEXT_NODE_TOKEN_BUDGETS.split(","):
+            name, _, budget = entry.partition("=")
+            if name.strip() == node_name and budget.strip().isdigit():
+                return int(budget.strip())
+    return config.CONTEXT_TOKEN_BUDGET
+
+
+def _history(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Messages of the state that are part of the conversation history."""
+    return [
+        m for m in state.get("messages") or []
+        if m.get("content") and not m.get("ephemeral", False)
+    ]
+
+
+def build_context_messages(
+    state: Dict[str, Any],
+    node_name: Optional[str] = None,
+    max_messages: Optional[int] = None,
+    token_budget: Optional[int] = None,
+    roles: Optional[Iterable[str]] = None
+) -> List[Dict[str, str]]:
+    """
+    Build the message history a graph node sends to the LLM.
+
+    The result holds the rolling summary (as a system message) followed by
+    the recent messages. Messages not yet covered by the summary are always
+    kept, even beyond max_messages, so nothing is lost before it is
+    summarized. The oldest messages are then dropped until the estimated
+    size fits the token budget; the latest message is always kept.
+
+    Args:
+        state: The agent state
+        node_name: The node name as "<graph>.<node>", used for its token budget
+        max_messages: Recent messages kept verbatim (default: CONTEXT_WINDOW_MESSAGES)
+        token_budget: Token budget (default: the node's budget)
+        roles: Only include history messages with these roles
+
+    Returns:
+        List of {"role", "content"} dictionaries
+    """
+    if max_messages is None:
+        max_messages = config.CONTEXT_WINDOW_MESSAGES
+    if token_budget is None:
+        token_budget = get_node_token_budget(node_name)
+
+    history = _history(state)
+    summary = state.get("conversation_summary")
+    summarized = min(state.get("summarized_message_count") or 0, len(history)) if summary else 0
+
+    start = max(0, min(summarized, len(history) - max_messages))
+    recent = [
+        {"role": m["role"], "content": m["content"]}
+        for m in history[start:]
+        if roles is None or m["role"] in roles
+    ]
+
+    prefix: List[Dict[str, str]] = []
+    if summary and start > 0:
+        prefix.append({"role": "system", "content": SUMMARY_PREFIX + summary})
+
+    used = sum(estimate_tokens(m["content"]) for m in prefix + recent)
+    while len(recent) > 1 and used > token_budget:
+        used -= estimate_tokens(recent.pop(0)["content"])
+
+    return prefix + recent
+
+
+def get_messages_to_summarize(
+    state: Dict[str, Any],
+    max_messages: Optional[int] = None,
+    batch_messages: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get the messages that have left the window and should be summarized.
+
+    Args:
+        state: The agent state
+        max_messages: Recent messages kept verbatim (default: CONTEXT_WINDOW_MESSAGES)
+        batch_messages: Minimum number of messages worth a summary update
+            (default: CONTEXT_SUMMARY_BATCH_MESSAGES)
+
+    Returns:
+        The messages to fold into the summary, empty if no update is due
+    """
+    if max_messages is None:
+        max_messages = config.CONTEXT_WINDOW_MESSAGES
+    if batch_messages is None:
+        batch_messages = config.CONTEXT_SUMMARY_BATCH_MESSAGES
+
+    history = _history(state)
+    summarized = min(state.get("summarized_message_count") or 0, len(history))
+    evicted = history[summarized:max(summarized, len(history) - max_messages)]
+    if len(evicted) < max(1, batch_messages):
+        return []
+    return evicted
+
+
+def update_rolling_summary(state: Dict[str, Any], llm: Any = None) -> bool:
+    """
+    Fold messages that have left the window into the rolling summary.
+
+    Updates ``conversation_summary`` and ``summarized_message_count`` in the
+    state. Makes one (blocking) LLM call when an update is due.
+
+    Args:
+        state: The agent state
+        llm: The LLM to summarize with (default: the extraction tier LLM of
+            the "conversation.summary" node)
+
+    Returns:
+        True if the summary was updated
+    """
+    evicted = get_messages_to_summarize(state)
+    if not evicted:
+        return False
+
+    if llm is None:
+        from app.utils.llm_factory import get_node_llm, LLM_TIER_EXTRACTION
+        llm = get_node_llm("conversation.summary", temperature=0.1, tier=LLM_TIER_EXTRACTION, cache=True)
+
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in evicted)
+    result = llm.invoke(SUMMARY_PROMPT.format(
+        summary=state.get("conversation_summary") or "(none yet)",
+        messages=transcript
+    ))
+    summary = getattr(result, "content", result)
+    if not isinstance(summary, str) or not summary.strip():
+        return False
+
+    state["conversation_summary"] = summary.strip()
+    state["summarized_message_count"] = (state.get("summarized_message_count") or 0) + len(evicted)
+    return True
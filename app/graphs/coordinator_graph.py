@@ -1,18 +1,26 @@
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+import json
+from functools import partial
+from typing import Callable, Dict, List, Any, Optional
+from datetime import datetime, timezone
 
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.runnables import RunnablePassthrough, RunnableLambda
+from langchain_core.runnables import RunnablePassthrough, RunnableLambda, RunnableConfig
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.tools import BaseTool
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
-from app.utils.llm_factory import get_llm
+from app.utils.llm_factory import get_llm, get_node_llm, LLM_TIER_EXTRACTION
+from app.utils.structured_output import ainvoke_structured
+from app.config import COORDINATOR_INCREMENTAL_EXTRACTION
+from app.graphs.async_support import dual_mode_node
+from app.graphs.delegation import run_delegations
+from app.graphs.task_routing import TASK_ROUTES, get_target_nodes
+from app.graphs.context_window import build_context_messages
+from app.graphs.prompt_registry import get_prompt, register_prompt
 from app.tools.event_tools import RequirementsTool, DelegationTool, MonitoringTool, ReportingTool
 from app.tools.agent_communication_tools import ResourcePlanningTaskTool, FinancialTaskTool, StakeholderManagementTaskTool, MarketingCommunicationsTaskTool, ProjectManagementTaskTool
 from app.tools.coordinator_search_tool import CoordinatorSearchTool
-from app.schemas.event import EventDetails, Requirements, AgentAssignment
+from app.schemas.event import EventDetails, Requirements, AgentAssignment, RequirementsExtraction, DelegationPlan
 
 
 # Define the state schema as a regular dict to avoid TypedDict compatibility issues
@@ -38,13 +46,7 @@ You have access to the following specialized agents:
 - Analytics Agent: Collects data, analyzes performance
 - Compliance & Security Agent: Ensures legal requirements, security protocols
 
-Your current conversation state:
-Current phase: {current_phase}
-Event details: {event_details}
-Requirements: {requirements}
-Agent assignments: {agent_assignments}
-Next steps: {next_steps}
-Information collected: {information_collected}
+The current conversation state is given after the conversation.
 
 IMPORTANT: Your primary goal is to collect comprehensive information about the event before creating a proposal. Follow these guidelines:
 
@@ -66,6 +68,15 @@ IMPORTANT: Your primary goal is to collect comprehensive information about the e
 Respond to the user in a helpful, professional manner. Ask clarifying questions when needed to gather complete requirements. Provide clear updates on the event planning progress.
 """
 
+# Conversation state sent after the history, so the system prompt stays a stable prefix
+COORDINATOR_STATE_PROMPT = """Your current conversation state:
+Current phase: {current_phase}
+Event details: {event_details}
+Requirements: {requirements}
+Agent assignments: {agent_assignments}
+Next steps: {next_steps}
+Information collected: {information_collected}{turn_guidance}"""
+
 # Define the information collection categories
 INFORMATION_CATEGORIES = [
     "basic_details",      # Event type, title, description, attendee count, scale
@@ -78,6 +89,408 @@ INFORMATION_CATEGORIES = [
     "risks"               # Challenges, contingencies, insurance
 ]
 
+# Prompts for requirement extraction in gather_requirements
+REQUIREMENTS_EXTRACTION_SYSTEM_PROMPT = """You are an AI assistant that helps extract event planning requirements from user messages. 
+Extract any details about:
+1. Basic details: event type, title, description, attendee count, scale
+2. Timeline: start/end dates, key milestones, setup/teardown
+3. Budget: budget range, allocation priorities, payment timeline
+4. Location: geographic preferences, venue type, space requirements
+5. Stakeholders: key stakeholders, speakers, sponsors, VIPs
+6. Resources: equipment, staffing, service providers
+7. Success criteria: goals, KPIs, expected outcomes
+8. Risks: challenges, contingencies, insurance
+
+Also determine which information categories have been sufficiently addressed."""
+
+REQUIREMENTS_JSON_FORMAT = """{
+  "event_details": {
+    "event_type": null,
+    "title": null,
+    "description": null,
+    "attendee_count": null,
+    "scale": null
+  },
+  "timeline": {
+    "start_date": null,
+    "end_date": null,
+    "key_milestones": []
+  },
+  "budget": {
+    "range": null,
+    "allocation_priorities": []
+  },
+  "location": {
+    "preferences": [],
+    "venue_type": null,
+    "space_requirements": null
+  },
+  "stakeholders": [],
+  "resources": [],
+  "success_criteria": [],
+  "risks": [],
+  "information_collected": {
+    "basic_details": false,
+    "timeline": false,
+    "budget": false,
+    "location": false,
+    "stakeholders": false,
+    "resources": false,
+    "success_criteria": false,
+    "risks": false
+  }
+}"""
+
+REQUIREMENTS_FULL_EXTRACTION_PROMPT = """Based on the conversation, extract the event requirements with the following structure:
+""" + REQUIREMENTS_JSON_FORMAT + """
+
+For each field, extract the information if available in the conversation. For the information_collected object, set a category to true only if sufficient information has been provided for that category.
+"""
+
+REQUIREMENTS_INCREMENTAL_EXTRACTION_PROMPT = """Based on the requirements extracted so far and the new messages, return the complete updated event requirements with the following structure:
+""" + REQUIREMENTS_JSON_FORMAT + """
+
+Start from the requirements extracted so far and apply any information added or changed in the new messages. Keep existing values the new messages do not change. For the information_collected object, set a category to true only if sufficient information has been provided for that category.
+"""
+
+
+def _message_time(value: Any) -> Optional[datetime]:
+    """
+    Parse a message timestamp.
+    
+    Args:
+        value: ISO format timestamp
+        
+    Returns:
+        The timestamp as naive UTC, or None if it is missing or invalid
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _messages_since_watermark(state: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the messages added since requirements were last extracted.
+    
+    The watermark is the timestamp of the newest message already processed,
+    so it does not depend on how many messages the transcript was loaded
+    with or in which order. Messages without a timestamp were added during
+    the current run and have not been stored yet, so they count as new.
+    
+    Args:
+        state: Current state
+        
+    Returns:
+        The new messages, or None if there is no usable watermark and the
+        full transcript has to be processed
+    """
+    watermark = _message_time(state.get("requirements_extracted_until"))
+    if watermark is None:
+        return None
+    
+    new_messages = []
+    for message in state.get("messages", []):
+        timestamp = _message_time(message.get("timestamp"))
+        if timestamp is None or timestamp > watermark:
+            new_messages.append(message)
+    return new_messages
+
+
+def _extraction_watermark(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Get the watermark covering a transcript.
+    
+    Args:
+        messages: The processed messages
+        
+    Returns:
+        Timestamp of the newest message, or None if no message has one
+    """
+    newest = None
+    watermark = None
+    for message in messages:
+        timestamp = _message_time(message.get("timestamp"))
+        if timestamp is not None and (newest is None or timestamp > newest):
+            newest = timestamp
+            watermark = message["timestamp"]
+    return watermark
+
+
+def _requirements_snapshot(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the structured requirements snapshot sent with incremental extraction.
+    
+    The snapshot uses the same structure the LLM is asked to return.
+    
+    Args:
+        state: Current state
+        
+    Returns:
+        The requirements extracted so far
+    """
+    event_details = state.get("event_details", {})
+    requirements = state.get("requirements", {})
+    return {
+        "event_details": {
+            key: event_details.get(key)
+            for key in ["event_type", "title", "description", "attendee_count", "scale"]
+        },
+        "timeline": {
+            "start_date": event_details.get("timeline_start"),
+            "end_date": event_details.get("timeline_end"),
+            "key_milestones": event_details.get("key_milestones", [])
+        },
+        "budget": requirements.get("budget") or {},
+        "location": requirements.get("location") or {},
+        "stakeholders": requirements.get("stakeholders", []),
+        "resources": requirements.get("resources", []),
+        "success_criteria": requirements.get("success_criteria", []),
+        "risks": requirements.get("risks", []),
+        "information_collected": state.get("information_collected", {})
+    }
+
+
+# Display names used in delegation messages
+AGENT_DISPLAY_NAMES = {
+    "resource_planning": "Resource Planning Agent",
+    "financial": "Financial Agent",
+    "stakeholder_management": "Stakeholder Management Agent",
+    "marketing_communications": "Marketing & Communications Agent",
+    "project_management": "Project Management Agent"
+}
+
+# Task result fields stored in state["agent_results"] for each specialist agent
+AGENT_RESULT_KEYS = {
+    "resource_planning": ["resource_plan", "venue_options", "selected_venue", "service_providers", "equipment_needs"],
+    "financial": ["budget", "expenses", "contracts", "financial_plan"],
+    "stakeholder_management": ["stakeholder_plan", "speakers", "sponsors", "volunteers", "vips"],
+    "marketing_communications": ["channels", "content", "attendees", "registration_forms", "campaigns", "marketing_plan", "communication_plan"],
+    "project_management": ["tasks", "milestones", "risks", "timeline", "project_plan"]
+}
+
+
+# Agent steps the coordinator can target with a delegated task, listed in the delegation prompt
+DELEGATION_TARGET_NODES = "\n".join(
+    f"- {agent_type}: {', '.join(get_target_nodes(agent_type))}"
+    for agent_type in TASK_ROUTES
+    if get_target_nodes(agent_type)
+)
+
+PROPOSAL_SYSTEM_PROMPT = """You are an AI assistant that generates comprehensive event planning proposals. 
+Create a detailed, well-structured proposal based on the information collected about the event.
+
+IMPORTANT: When making recommendations for venues, dates, speakers, vendors, or any other resources, DO NOT validate their availability. 
+Simply recommend possibilities that match the requirements. Actual availability validation will be performed later as part of the project plan.
+
+The proposal should include:
+1. Executive summary
+2. Detailed event description
+3. Timeline with milestones
+4. Budget breakdown
+5. Resource allocation plan (recommended options without availability validation)
+6. Stakeholder management approach (recommended speakers/participants without availability validation)
+7. Risk management strategy
+8. Success metrics
+9. Next steps
+
+Format the proposal with clear headings, bullet points where appropriate, and a professional tone.
+Include a note in the proposal that all recommendations are subject to availability validation during the implementation phase."""
+
+PROPOSAL_REQUEST_PROMPT = """Event details: {event_details}
+Requirements: {requirements}
+
+Generate a comprehensive event proposal based on this information. The proposal should be well-structured, detailed, and ready to present to stakeholders. Remember to clearly indicate that all venue, speaker, vendor, and date recommendations are subject to availability validation during the implementation phase."""
+
+DELEGATION_SYSTEM_PROMPT = """You are an AI assistant that helps delegate event planning tasks to specialized agents.
+            
+Available agents:
+- resource_planning: Handles venue selection, service providers, equipment
+- financial: Manages budget, payments, contracts
+- stakeholder_management: Coordinates sponsors, speakers, volunteers
+- marketing_communications: Manages campaigns, website, attendee communications
+- project_management: Tracks tasks, timeline, risks
+- analytics: Collects data, analyzes performance
+- compliance_security: Ensures legal requirements, security protocols
+
+Based on the event details, requirements, and approved proposal, determine which tasks should be delegated to which agents.
+
+IMPORTANT: Include validation tasks for resources mentioned in the proposal. These should include:
+1. Validating venue availability for the proposed dates
+2. Validating speaker availability for the proposed dates
+3. Validating vendor/service provider availability
+4. Validating equipment availability
+5. Validating sponsor availability and interest
+
+These validation tasks are critical as the proposal contains recommendations that have not yet been validated for availability.
+
+For each task give the 'agent_type' and the 'task', and set 'target_node' to the agent step that should handle the task when one of these fits:
+""" + DELEGATION_TARGET_NODES
+
+DELEGATION_REQUEST_PROMPT = """Event details: {event_details}
+Requirements: {requirements}
+Current assignments: {agent_assignments}
+Proposal: {proposal}
+
+Determine up to 8 new tasks that should be delegated to specialized agents, including necessary validation tasks for resources mentioned in the proposal."""
+
+STATUS_SYSTEM_PROMPT = "You are an AI assistant that generates status reports for event planning. Create a concise but informative status update based on the current state of the event planning process."
+
+STATUS_REQUEST_PROMPT = """Event details: {event_details}
+Requirements: {requirements}
+Agent assignments: {agent_assignments}
+Current phase: {current_phase}
+{agent_results_info}
+
+Generate a status report for the event planning process. Include progress on key tasks, upcoming milestones, and any issues that need attention. If there are results from specialized agents, incorporate those into your report."""
+
+
+# Node prompts: static instructions, then the history, then the current state
+register_prompt(
+    "coordinator.gather_requirements",
+    REQUIREMENTS_EXTRACTION_SYSTEM_PROMPT,
+    HumanMessage(content=REQUIREMENTS_FULL_EXTRACTION_PROMPT)
+)
+register_prompt(
+    "coordinator.gather_requirements.incremental",
+    REQUIREMENTS_EXTRACTION_SYSTEM_PROMPT,
+    ("system", "Requirements extracted so far:\n{requirements_snapshot}"),
+    HumanMessage(content=REQUIREMENTS_INCREMENTAL_EXTRACTION_PROMPT)
+)
+register_prompt("coordinator.generate_proposal", PROPOSAL_SYSTEM_PROMPT, ("human", PROPOSAL_REQUEST_PROMPT))
+register_prompt("coordinator.delegate_tasks", DELEGATION_SYSTEM_PROMPT, ("human", DELEGATION_REQUEST_PROMPT))
+register_prompt("coordinator.provide_status", STATUS_SYSTEM_PROMPT, ("human", STATUS_REQUEST_PROMPT))
+register_prompt("coordinator.generate_response", COORDINATOR_SYSTEM_PROMPT, ("system", COORDINATOR_STATE_PROMPT))
+
+
+def _build_delegation_call(
+    agent_type: str,
+    task: str,
+    state: Dict[str, Any],
+    target_node: Optional[str] = None
+) -> Optional[Callable[[], Dict[str, Any]]]:
+    """
+    Build the blocking task tool call for a delegated assignment.
+    
+    Args:
+        agent_type: The specialist agent type
+        task: The task description
+        state: Current state
+        target_node: The agent step named in the assignment, if any
+        
+    Returns:
+        A callable running the task, or None if the agent type is not delegated
+    """
+    event_details = state["event_details"]
+    requirements = state["requirements"]
+    
+    if agent_type == "resource_planning":
+        return partial(ResourcePlanningTaskTool()._run, task=task, event_details=event_details, requirements=requirements, target_node=target_node)
+    if agent_type == "financial":
+        # Extract budget information from requirements if available
+        budget = requirements.get("budget")
+        return partial(FinancialTaskTool()._run, task=task, event_details=event_details, budget=budget, requirements=requirements, target_node=target_node)
+    if agent_type == "stakeholder_management":
+        return partial(StakeholderManagementTaskTool()._run, task=task, event_details=event_details, requirements=requirements, target_node=target_node)
+    if agent_type == "marketing_communications":
+        return partial(MarketingCommunicationsTaskTool()._run, task=task, event_details=event_details, requirements=requirements, target_node=target_node)
+    if agent_type == "project_management":
+        return partial(ProjectManagementTaskTool()._run, task=task, event_details=event_details, requirements=requirements, target_node=target_node)
+    return None
+
+
+def _merge_delegation_result(state: Dict[str, Any], assignment: Dict[str, Any], task_result: Dict[str, Any]) -> None:
+    """
+    Store the result of a delegated task in the assignment and state["agent_results"].
+    
+    Args:
+        state: Current state
+        assignment: The assignment entry in state["agent_assignments"]
+        task_result: The result returned by the task tool
+    """
+    agent_type = assignment["agent_type"]
+    
+    # Check if there was an error
+    if "error" in task_result:
+        # Update the assignment with the error
+        assignment["status"] = "failed"
+        assignment["completed_at"] = datetime.utcnow().isoformat()
+        assignment["result"] = task_result["response"]
+        assignment["error"] = task_result["error"]
+        
+        # Add an error message to the conversation (not ephemeral so it's visible)
+        state["messages"].append({
+            "role": "assistant",
+            "content": f"I encountered an issue when delegating to the {AGENT_DISPLAY_NAMES[agent_type]}: {task_result['response']}"
+        })
+        
+        print(f"Error in {AGENT_DISPLAY_NAMES[agent_type]}: {task_result['error']['error_message']}")
+        return
+    
+    # Update the assignment with the result
+    assignment["status"] = "completed"
+    assignment["completed_at"] = datetime.utcnow().isoformat()
+    assignment["result"] = task_result["response"]
+    
+    # Store the agent's results
+    if agent_type == "resource_planning":
+        # A resource plan is stored together with its supporting details
+        if not task_result.get("resource_plan"):
+            return
+        agent_results = state.setdefault("agent_results", {}).setdefault(agent_type, {})
+        for key in AGENT_RESULT_KEYS[agent_type]:
+            agent_results[key] = task_result.get(key)
+        return
+    
+    result_keys = [key for key in AGENT_RESULT_KEYS[agent_type] if task_result.get(key)]
+    if result_keys:
+        agent_results = state.setdefault("agent_results", {}).setdefault(agent_type, {})
+        for key in result_keys:
+            agent_results[key] = task_result[key]
+
+
+def _record_delegation_error(state: Dict[str, Any], assignment: Dict[str, Any], error: BaseException) -> None:
+    """
+    Record a delegated task that raised or timed out.
+    
+    Args:
+        state: Current state
+        assignment: The assignment entry in state["agent_assignments"]
+        error: The exception raised by the task
+    """
+    agent_type = assignment["agent_type"]
+    error_message = f"Error delegating task to {AGENT_DISPLAY_NAMES[agent_type]}: {str(error)}"
+    print(error_message)
+    
+    # Update the assignment with the error
+    assignment["status"] = "failed"
+    assignment["completed_at"] = datetime.utcnow().isoformat()
+    assignment["error"] = {
+        "error_message": str(error),
+        "error_type": type(error).__name__,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    
+    if agent_type == "resource_planning":
+        # Add an error message to the conversation (not ephemeral so it's visible)
+        state["messages"].append({
+            "role": "assistant",
+            "content": f"I encountered an error when delegating to the Resource Planning Agent: {str(error)}\n\nThis might be due to insufficient information about the event or a technical issue. Please provide more details about your requirements or try again later."
+        })
+    else:
+        # Add an error message (marked as ephemeral)
+        state["messages"].append({
+            "role": "system",
+            "content": error_message,
+            "ephemeral": True
+        })
+
 
 def create_coordinator_graph():
     """
@@ -86,8 +499,11 @@ def create_coordinator_graph():
     Returns:
         Compiled LangGraph for the coordinator agent
     """
-    # Initialize the LLM
+    # Initialize the LLMs (structured extraction nodes can use a smaller model)
     llm = get_llm(temperature=0.2)
+    requirements_llm = get_node_llm("coordinator.gather_requirements", temperature=0.2, tier=LLM_TIER_EXTRACTION, cache=True)
+    proposal_llm = get_node_llm("coordinator.generate_proposal", temperature=0.2, cache=True)
+    delegation_llm = get_node_llm("coordinator.delegate_tasks", temperature=0.2, tier=LLM_TIER_EXTRACTION)
     
     # Initialize tools
     tools = [
@@ -177,7 +593,7 @@ def create_coordinator_graph():
         
         return state
     
-    def gather_requirements(state: Dict[str, Any]) -> Dict[str, Any]:
+    async def gather_requirements(state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
         """
         Gather event requirements and save to conversation memory.
         
@@ -190,78 +606,39 @@ def create_coordinator_graph():
         # Get conversation memory if available
         memory = state.get("memory")
         
-        # Create a prompt for the LLM to extract requirements
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content="""You are an AI assistant that helps extract event planning requirements from user messages. 
-Extract any details about:
-1. Basic details: event type, title, description, attendee count, scale
-2. Timeline: start/end dates, key milestones, setup/teardown
-3. Budget: budget range, allocation priorities, payment timeline
-4. Location: geographic preferences, venue type, space requirements
-5. Stakeholders: key stakeholders, speakers, sponsors, VIPs
-6. Resources: equipment, staffing, service providers
-7. Success criteria: goals, KPIs, expected outcomes
-8. Risks: challenges, contingencies, insurance
-
-Also determine which information categories have been sufficiently addressed."""),
-            MessagesPlaceholder(variable_name="messages"),
-            HumanMessage(content="""Based on the conversation, extract the event requirements in JSON format with the following structure:
-{
-  "event_details": {
-    "event_type": null,
-    "title": null,
-    "description": null,
-    "attendee_count": null,
-    "scale": null
-  },
-  "timeline": {
-    "start_date": null,
-    "end_date": null,
-    "key_milestones": []
-  },
-  "budget": {
-    "range": null,
-    "allocation_priorities": []
-  },
-  "location": {
-    "preferences": [],
-    "venue_type": null,
-    "space_requirements": null
-  },
-  "stakeholders": [],
-  "resources": [],
-  "success_criteria": [],
-  "risks": [],
-  "information_collected": {
-    "basic_details": false,
-    "timeline": false,
-    "budget": false,
-    "location": false,
-    "stakeholders": false,
-    "resources": false,
-    "success_criteria": false,
-    "risks": false
-  }
-}
-
-For each field, extract the information if available in the conversation. For the information_collected object, set a category to true only if sufficient information has been provided for that category.
-""")
-        ])
+        # Only send the messages added since the last extraction together with the
+        # current structured snapshot, so the prompt does not grow with the transcript
+        new_messages = _messages_since_watermark(state) if COORDINATOR_INCREMENTAL_EXTRACTION else None
+        incremental = new_messages is not None
+        
+        if incremental and not new_messages:
+            # Nothing new to extract from
+            return state
         
         # Extract requirements using the LLM
         # Filter out system messages before invoking the chain
-        filtered_messages = [
-            {"role": m["role"], "content": m["content"]} 
-            for m in state["messages"] 
-            if m["role"] != "system"
-        ]
-        chain = prompt | llm
-        result = chain.invoke({"messages": filtered_messages})
+        if incremental:
+            filtered_messages = [
+                {"role": m["role"], "content": m["content"]} 
+                for m in new_messages
+                if m["role"] != "system"
+            ]
+        else:
+            filtered_messages = build_context_messages(
+                state, "coordinator.gather_requirements", roles=("user", "assistant")
+            )
+        if incremental:
+            prompt_messages = get_prompt("coordinator.gather_requirements.incremental").format_messages(
+                messages=filtered_messages,
+                requirements_snapshot=json.dumps(_requirements_snapshot(state), default=str)
+            )
+        else:
+            prompt_messages = get_prompt("coordinator.gather_requirements").format_messages(messages=filtered_messages)
         
-        # Parse the result
         try:
-            import json
-            requirements_data = json.loads(result.content)
+            # Extract requirements as schema-validated structured output
+            extraction = await ainvoke_structured(requirements_llm, prompt_messages, RequirementsExtraction, config=config)
+            requirements_data = extraction.model_dump()
             
             # Update event details and save to memory
             if "event_details" in requirements_data:
@@ -325,8 +702,18 @@ For each field, extract the information if available in the conversation. For th
                             "Provided by user",
                             f"Collected {category.replace('_', ' ')} information"
                         )
+                    if incremental:
+                        # A delta never takes back information collected earlier
+                        status = status or state["information_collected"].get(category, False)
                     state["information_collected"][category] = status
             
+            # Record how far the transcript has been processed
+            watermark = _extraction_watermark(state["messages"])
+            if watermark is None:
+                state.pop("requirements_extracted_until", None)
+            else:
+                state["requirements_extracted_until"] = watermark
+            
             # Update phase and next steps
             state["current_phase"] = "information_collection"
             
@@ -349,7 +736,7 @@ For each field, extract the information if available in the conversation. For th
         
         return state
     
-    def generate_proposal(state: Dict[str, Any]) -> Dict[str, Any]:
+    async def generate_proposal(state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
         """
         Generate an event proposal based on collected information.
         
@@ -359,37 +746,13 @@ For each field, extract the information if available in the conversation. For th
         Returns:
             Updated state with proposal
         """
-        # Create a prompt for the LLM to generate a proposal
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content="""You are an AI assistant that generates comprehensive event planning proposals. 
-Create a detailed, well-structured proposal based on the information collected about the event.
-
-IMPORTANT: When making recommendations for venues, dates, speakers, vendors, or any other resources, DO NOT validate their availability. 
-Simply recommend possibilities that match the requirements. Actual availability validation will be performed later as part of the project plan.
-
-The proposal should include:
-1. Executive summary
-2. Detailed event description
-3. Timeline with milestones
-4. Budget breakdown
-5. Resource allocation plan (recommended options without availability validation)
-6. Stakeholder management approach (recommended speakers/participants without availability validation)
-7. Risk management strategy
-8. Success metrics
-9. Next steps
-
-Format the proposal with clear headings, bullet points where appropriate, and a professional tone.
-Include a note in the proposal that all recommendations are subject to availability validation during the implementation phase."""),
-            MessagesPlaceholder(variable_name="messages"),
-            HumanMessage(content=f"""Event details: {state['event_details']}
-Requirements: {state['requirements']}
-
-Generate a comprehensive event proposal based on this information. The proposal should be well-structured, detailed, and ready to present to stakeholders. Remember to clearly indicate that all venue, speaker, vendor, and date recommendations are subject to availability validation during the implementation phase.""")
-        ])
-        
         # Generate proposal using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        chain = get_prompt("coordinator.generate_proposal") | proposal_llm
+        result = await chain.ainvoke({
+            "messages": build_context_messages(state, "coordinator.generate_proposal"),
+            "event_details": state['event_details'],
+            "requirements": state['requirements']
+        }, config=config)
         
         # Store the proposal in the state
         state["proposal"] = {
@@ -410,7 +773,7 @@ Generate a comprehensive event proposal based on this information. The proposal
         
         return state
     
-    def delegate_tasks(state: Dict[str, Any]) -> Dict[str, Any]:
+    async def delegate_tasks(state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
         """
         Delegate tasks to specialized agents.
         
@@ -421,303 +784,55 @@ Generate a comprehensive event proposal based on this information. The proposal
             Updated state
         """
         # Create a prompt for the LLM to determine task delegation
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content="""You are an AI assistant that helps delegate event planning tasks to specialized agents.
-            
-Available agents:
-- resource_planning: Handles venue selection, service providers, equipment
-- financial: Manages budget, payments, contracts
-- stakeholder_management: Coordinates sponsors, speakers, volunteers
-- marketing_communications: Manages campaigns, website, attendee communications
-- project_management: Tracks tasks, timeline, risks
-- analytics: Collects data, analyzes performance
-- compliance_security: Ensures legal requirements, security protocols
-
-Based on the event details, requirements, and approved proposal, determine which tasks should be delegated to which agents.
-
-IMPORTANT: Include validation tasks for resources mentioned in the proposal. These should include:
-1. Validating venue availability for the proposed dates
-2. Validating speaker availability for the proposed dates
-3. Validating vendor/service provider availability
-4. Validating equipment availability
-5. Validating sponsor availability and interest
-
-These validation tasks are critical as the proposal contains recommendations that have not yet been validated for availability."""),
-            MessagesPlaceholder(variable_name="messages"),
-            HumanMessage(content=f"""Event details: {state['event_details']}
-Requirements: {state['requirements']}
-Current assignments: {state['agent_assignments']}
-Proposal: {state['proposal']['content'] if 'proposal' in state else 'Not yet generated'}
-
-Determine up to 8 new tasks that should be delegated to specialized agents, including necessary validation tasks for resources mentioned in the proposal. Return the result as a JSON array with objects containing 'agent_type' and 'task' fields.""")
-        ])
-        
-        # Determine task delegation using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        prompt_messages = get_prompt("coordinator.delegate_tasks").format_messages(
+            messages=build_context_messages(state, "coordinator.delegate_tasks"),
+            event_details=state['event_details'],
+            requirements=state['requirements'],
+            agent_assignments=state['agent_assignments'],
+            proposal=state['proposal']['content'] if 'proposal' in state else 'Not yet generated'
+        )
         
-        # Parse the result
         try:
-            import json
-            delegation_data = json.loads(result.content)
+            # Determine task delegation as schema-validated structured output
+            delegation_plan = await ainvoke_structured(delegation_llm, prompt_messages, DelegationPlan, config=config)
+            delegation_data = [task.model_dump() for task in delegation_plan.assignments[:8]]
             
-            # Add new assignments
+            # Add new assignments and collect the tasks to hand to specialist agents
+            delegations = []
             for assignment in delegation_data:
-                if isinstance(assignment, dict) and "agent_type" in assignment and "task" in assignment:
+                if assignment["task"]:
                     # Add the assignment to the state
-                    state["agent_assignments"].append({
+                    assignment_entry = {
                         "agent_type": assignment["agent_type"],
                         "task": assignment["task"],
                         "status": "pending",
                         "assigned_at": datetime.utcnow().isoformat()
-                    })
-                    
-                    # If it's a resource planning task, actually delegate it to the Resource Planning Agent
-                    if assignment["agent_type"] == "resource_planning":
-                        try:
-                            # Use the ResourcePlanningTaskTool to delegate the task
-                            resource_planning_tool = ResourcePlanningTaskTool()
-                            task_result = resource_planning_tool._run(
-                                task=assignment["task"],
-                                event_details=state["event_details"],
-                                requirements=state["requirements"]
-                            )
-                            
-                            # Check if there was an error
-                            if "error" in task_result:
-                                # Update the assignment with the error
-                                state["agent_assignments"][-1]["status"] = "failed"
-                                state["agent_assignments"][-1]["completed_at"] = datetime.utcnow().isoformat()
-                                state["agent_assignments"][-1]["result"] = task_result["response"]
-                                state["agent_assignments"][-1]["error"] = task_result["error"]
-                                
-                                # Add an error message to the conversation (not ephemeral so it's visible)
-                                state["messages"].append({
-                                    "role": "assistant",
-                                    "content": f"I encountered an issue when delegating to the Resource Planning Agent: {task_result['response']}"
-                                })
-                                
-                                print(f"Error in Resource Planning Agent: {task_result['error']['error_message']}")
-                            else:
-                                # Update the assignment with the result
-                                state["agent_assignments"][-1]["status"] = "completed"
-                                state["agent_assignments"][-1]["completed_at"] = datetime.utcnow().isoformat()
-                                state["agent_assignments"][-1]["result"] = task_result["response"]
-                                
-                                # If the task resulted in a resource plan, store it
-                                if task_result.get("resource_plan"):
-                                    if "agent_results" not in state:
-                                        state["agent_results"] = {}
-                                    if "resource_planning" not in state["agent_results"]:
-                                        state["agent_results"]["resource_planning"] = {}
-                                    
-                                    state["agent_results"]["resource_planning"]["resource_plan"] = task_result["resource_plan"]
-                                    state["agent_results"]["resource_planning"]["venue_options"] = task_result["venue_options"]
-                                    state["agent_results"]["resource_planning"]["selected_venue"] = task_result["selected_venue"]
-                                    state["agent_results"]["resource_planning"]["service_providers"] = task_result["service_providers"]
-                                    state["agent_results"]["resource_planning"]["equipment_needs"] = task_result["equipment_needs"]
-                        except Exception as e:
-                            # If delegation fails, add an error message (not ephemeral so it's visible)
-                            error_message = f"Error delegating task to Resource Planning Agent: {str(e)}"
-                            print(error_message)
-                            
-                            # Update the assignment with the error
-                            state["agent_assignments"][-1]["status"] = "failed"
-                            state["agent_assignments"][-1]["completed_at"] = datetime.utcnow().isoformat()
-                            state["agent_assignments"][-1]["error"] = {
-                                "error_message": str(e),
-                                "error_type": "Exception",
-                                "timestamp": datetime.utcnow().isoformat()
-                            }
-                            
-                            # Add an error message to the conversation
-                            state["messages"].append({
-                                "role": "assistant",
-                                "content": f"I encountered an error when delegating to the Resource Planning Agent: {str(e)}\n\nThis might be due to insufficient information about the event or a technical issue. Please provide more details about your requirements or try again later."
-                            })
-                    
-                    # If it's a financial task, delegate it to the Financial Agent
-                    elif assignment["agent_type"] == "financial":
-                        try:
-                            # Use the FinancialTaskTool to delegate the task
-                            financial_task_tool = FinancialTaskTool()
-                            
-                            # Extract budget information from requirements if available
-                            budget = None
-                            if "budget" in state["requirements"]:
-                                budget = state["requirements"]["budget"]
-                            
-                            task_result = financial_task_tool._run(
-                                task=assignment["task"],
-                                event_details=state["event_details"],
-                                budget=budget,
-                                requirements=state["requirements"]
-                            )
-                            
-                            # Update the assignment with the result
-                            state["agent_assignments"][-1]["status"] = "completed"
-                            state["agent_assignments"][-1]["completed_at"] = datetime.utcnow().isoformat()
-                            state["agent_assignments"][-1]["result"] = task_result["response"]
-                            
-                            # Store the financial results
-                            if task_result.get("budget") or task_result.get("expenses") or task_result.get("contracts") or task_result.get("financial_plan"):
-                                if "agent_results" not in state:
-                                    state["agent_results"] = {}
-                                if "financial" not in state["agent_results"]:
-                                    state["agent_results"]["financial"] = {}
-                                
-                                if task_result.get("budget"):
-                                    state["agent_results"]["financial"]["budget"] = task_result["budget"]
-                                if task_result.get("expenses"):
-                                    state["agent_results"]["financial"]["expenses"] = task_result["expenses"]
-                                if task_result.get("contracts"):
-                                    state["agent_results"]["financial"]["contracts"] = task_result["contracts"]
-                                if task_result.get("financial_plan"):
-                                    state["agent_results"]["financial"]["financial_plan"] = task_result["financial_plan"]
-                        except Exception as e:
-                            # If delegation fails, add an error message (marked as ephemeral)
-                            state["messages"].append({
-                                "role": "system",
-                                "content": f"Error delegating task to Financial Agent: {str(e)}",
-                                "ephemeral": True
-                            })
-                    
-                    # If it's a stakeholder management task, delegate it to the Stakeholder Management Agent
-                    elif assignment["agent_type"] == "stakeholder_management":
-                        try:
-                            # Use the StakeholderManagementTaskTool to delegate the task
-                            stakeholder_task_tool = StakeholderManagementTaskTool()
-                            
-                            task_result = stakeholder_task_tool._run(
-                                task=assignment["task"],
-                                event_details=state["event_details"],
-                                requirements=state["requirements"]
-                            )
-                            
-                            # Update the assignment with the result
-                            state["agent_assignments"][-1]["status"] = "completed"
-                            state["agent_assignments"][-1]["completed_at"] = datetime.utcnow().isoformat()
-                            state["agent_assignments"][-1]["result"] = task_result["response"]
-                            
-                            # Store the stakeholder management results
-                            if (task_result.get("stakeholder_plan") or task_result.get("speakers") or 
-                                task_result.get("sponsors") or task_result.get("volunteers") or 
-                                task_result.get("vips")):
-                                if "agent_results" not in state:
-                                    state["agent_results"] = {}
-                                if "stakeholder_management" not in state["agent_results"]:
-                                    state["agent_results"]["stakeholder_management"] = {}
-                                
-                                if task_result.get("stakeholder_plan"):
-                                    state["agent_results"]["stakeholder_management"]["stakeholder_plan"] = task_result["stakeholder_plan"]
-                                if task_result.get("speakers"):
-                                    state["agent_results"]["stakeholder_management"]["speakers"] = task_result["speakers"]
-                                if task_result.get("sponsors"):
-                                    state["agent_results"]["stakeholder_management"]["sponsors"] = task_result["sponsors"]
-                                if task_result.get("volunteers"):
-                                    state["agent_results"]["stakeholder_management"]["volunteers"] = task_result["volunteers"]
-                                if task_result.get("vips"):
-                                    state["agent_results"]["stakeholder_management"]["vips"] = task_result["vips"]
-                        except Exception as e:
-                            # If delegation fails, add an error message (marked as ephemeral)
-                            state["messages"].append({
-                                "role": "system",
-                                "content": f"Error delegating task to Stakeholder Management Agent: {str(e)}",
-                                "ephemeral": True
-                            })
+                    }
+                    if assignment.get("target_node"):
+                        assignment_entry["target_node"] = assignment["target_node"]
+                    state["agent_assignments"].append(assignment_entry)
                     
-                    # If it's a marketing and communications task, delegate it to the Marketing & Communications Agent
-                    elif assignment["agent_type"] == "marketing_communications":
-                        try:
-                            # Use the MarketingCommunicationsTaskTool to delegate the task
-                            marketing_task_tool = MarketingCommunicationsTaskTool()
-                            
-                            task_result = marketing_task_tool._run(
-                                task=assignment["task"],
-                                event_details=state["event_details"],
-                                requirements=state["requirements"]
-                            )
-                            
-                            # Update the assignment with the result
-                            state["agent_assignments"][-1]["status"] = "completed"
-                            state["agent_assignments"][-1]["completed_at"] = datetime.utcnow().isoformat()
-                            state["agent_assignments"][-1]["result"] = task_result["response"]
-                            
-                            # Store the marketing and communications results
-                            if (task_result.get("channels") or task_result.get("content") or 
-                                task_result.get("attendees") or task_result.get("registration_forms") or 
-                                task_result.get("campaigns") or task_result.get("marketing_plan") or
-                                task_result.get("communication_plan")):
-                                if "agent_results" not in state:
-                                    state["agent_results"] = {}
-                                if "marketing_communications" not in state["agent_results"]:
-                                    state["agent_results"]["marketing_communications"] = {}
-                                
-                                if task_result.get("channels"):
-                                    state["agent_results"]["marketing_communications"]["channels"] = task_result["channels"]
-                                if task_result.get("content"):
-                                    state["agent_results"]["marketing_communications"]["content"] = task_result["content"]
-                                if task_result.get("attendees"):
-                                    state["agent_results"]["marketing_communications"]["attendees"] = task_result["attendees"]
-                                if task_result.get("registration_forms"):
-                                    state["agent_results"]["marketing_communications"]["registration_forms"] = task_result["registration_forms"]
-                                if task_result.get("campaigns"):
-                                    state["agent_results"]["marketing_communications"]["campaigns"] = task_result["campaigns"]
-                                if task_result.get("marketing_plan"):
-                                    state["agent_results"]["marketing_communications"]["marketing_plan"] = task_result["marketing_plan"]
-                                if task_result.get("communication_plan"):
-                                    state["agent_results"]["marketing_communications"]["communication_plan"] = task_result["communication_plan"]
-                        except Exception as e:
-                            # If delegation fails, add an error message (marked as ephemeral)
-                            state["messages"].append({
-                                "role": "system",
-                                "content": f"Error delegating task to Marketing & Communications Agent: {str(e)}",
-                                "ephemeral": True
-                            })
-                    
-                    # If it's a project management task, delegate it to the Project Management Agent
-                    elif assignment["agent_type"] == "project_management":
-                        try:
-                            # Use the ProjectManagementTaskTool to delegate the task
-                            project_management_tool = ProjectManagementTaskTool()
-                            
-                            task_result = project_management_tool._run(
-                                task=assignment["task"],
-                                event_details=state["event_details"],
-                                requirements=state["requirements"]
-                            )
-                            
-                            # Update the assignment with the result
-                            state["agent_assignments"][-1]["status"] = "completed"
-                            state["agent_assignments"][-1]["completed_at"] = datetime.utcnow().isoformat()
-                            state["agent_assignments"][-1]["result"] = task_result["response"]
-                            
-                            # Store the project management results
-                            if (task_result.get("tasks") or task_result.get("milestones") or 
-                                task_result.get("risks") or task_result.get("timeline") or 
-                                task_result.get("project_plan")):
-                                if "agent_results" not in state:
-                                    state["agent_results"] = {}
-                                if "project_management" not in state["agent_results"]:
-                                    state["agent_results"]["project_management"] = {}
-                                
-                                if task_result.get("tasks"):
-                                    state["agent_results"]["project_management"]["tasks"] = task_result["tasks"]
-                                if task_result.get("milestones"):
-                                    state["agent_results"]["project_management"]["milestones"] = task_result["milestones"]
-                                if task_result.get("risks"):
-                                    state["agent_results"]["project_management"]["risks"] = task_result["risks"]
-                                if task_result.get("timeline"):
-                                    state["agent_results"]["project_management"]["timeline"] = task_result["timeline"]
-                                if task_result.get("project_plan"):
-                                    state["agent_results"]["project_management"]["project_plan"] = task_result["project_plan"]
-                        except Exception as e:
-                            # If delegation fails, add an error message (marked as ephemeral)
-                            state["messages"].append({
-                                "role": "system",
-                                "content": f"Error delegating task to Project Management Agent: {str(e)}",
-                                "ephemeral": True
-                            })
+                    delegation_call = _build_delegation_call(
+                        assignment["agent_type"],
+                        assignment["task"],
+                        state,
+                        target_node=assignment.get("target_node")
+                    )
+                    if delegation_call:
+                        delegations.append((assignment_entry, delegation_call))
+            
+            # Run the delegated tasks concurrently and merge the results in assignment order
+            if delegations:
+                organization_id = state.get("organization_id") or state.get("tenant_context", {}).get("organization_id")
+                outcomes = await run_delegations(
+                    [delegation_call for _, delegation_call in delegations],
+                    organization_id=organization_id
+                )
+                for (assignment_entry, _), (task_result, error) in zip(delegations, outcomes):
+                    if error is not None:
+                        _record_delegation_error(state, assignment_entry, error)
+                    else:
+                        _merge_delegation_result(state, assignment_entry, task_result)
             
             # Update phase and next steps
             state["current_phase"] = "implementation"
@@ -747,7 +862,7 @@ Determine up to 8 new tasks that should be delegated to specialized agents, incl
         
         return state
     
-    def provide_status(state: Dict[str, Any]) -> Dict[str, Any]:
+    async def provide_status(state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
         """
         Provide status updates.
         
@@ -1037,21 +1152,16 @@ Determine up to 8 new tasks that should be delegated to specialized agents, incl
                         if "critical_path" in timeline and timeline["critical_path"]:
                             agent_results_info += f"  * Critical Path: {len(timeline['critical_path'])} tasks\n"
         
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content="You are an AI assistant that generates status reports for event planning. Create a concise but informative status update based on the current state of the event planning process."),
-            MessagesPlaceholder(variable_name="messages"),
-            HumanMessage(content=f"""Event details: {state['event_details']}
-Requirements: {state['requirements']}
-Agent assignments: {state['agent_assignments']}
-Current phase: {state['current_phase']}
-{agent_results_info}
-
-Generate a status report for the event planning process. Include progress on key tasks, upcoming milestones, and any issues that need attention. If there are results from specialized agents, incorporate those into your report.""")
-        ])
-        
         # Generate status report using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        chain = get_prompt("coordinator.provide_status") | llm
+        result = await chain.ainvoke({
+            "messages": build_context_messages(state, "coordinator.provide_status"),
+            "event_details": state['event_details'],
+            "requirements": state['requirements'],
+            "agent_assignments": state['agent_assignments'],
+            "current_phase": state['current_phase'],
+            "agent_results_info": agent_results_info
+        }, config=config)
         
         # Add the status report to messages
         state["messages"].append({
@@ -1065,7 +1175,7 @@ Generate a status report for the event planning process. Include progress on key
         
         return state
     
-    def generate_response(state: Dict[str, Any]) -> Dict[str, Any]:
+    async def generate_response(state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
         """
         Generate a response to the user using conversation memory for context.
         
@@ -1194,7 +1304,7 @@ Generate a status report for the event planning process. Include progress on key
                 })
                 
                 # Delegate tasks to specialized agents
-                return delegate_tasks(state)
+                return await delegate_tasks(state, config)
 
         # Get conversation context from memory if available
         context_summary = ""
@@ -1226,27 +1336,21 @@ Generate a status report for the event planning process. Include progress on key
         # Determine what information is still needed and ask ONE question at a time
         missing_categories = [category for category, collected in state["information_collected"].items() if not collected]
         
-        # Create enhanced system prompt with memory context and single question focus
-        enhanced_system_prompt = COORDINATOR_SYSTEM_PROMPT.format(
-            current_phase=state["current_phase"],
-            event_details=state["event_details"],
-            requirements=state["requirements"],
-            agent_assignments=state["agent_assignments"],
-            next_steps=state["next_steps"],
-            information_collected=state["information_collected"]
-        )
+        # Guidance for this turn with memory context and single question focus; it is sent
+        # with the conversation state after the history, keeping the system prompt unchanged
+        turn_guidance = ""
         
-        # Add memory context to the system prompt if available
+        # Add memory context if available
         if context_summary:
-            enhanced_system_prompt += f"\n\nConversation Context Summary: {context_summary}"
+            turn_guidance += f"\n\nConversation Context Summary: {context_summary}"
         
         if context_reference:
-            enhanced_system_prompt += f"\n\nRELEVANT CONTEXT: {context_reference}When responding, naturally reference this previous context to show continuity and avoid asking for information already provided."
+            turn_guidance += f"\n\nRELEVANT CONTEXT: {context_reference}When responding, naturally reference this previous context to show continuity and avoid asking for information already provided."
 
         # Add single question instruction
         if missing_categories:
             next_category = missing_categories[0]
-            enhanced_system_prompt += f"\n\nIMPORTANT: You are currently collecting information about '{next_category.replace('_', ' ')}'. Ask ONLY ONE focused question about this category. Do not ask multiple questions at once. Wait for the user's response before asking about other categories."
+            turn_guidance += f"\n\nIMPORTANT: You are currently collecting information about '{next_category.replace('_', ' ')}'. Ask ONLY ONE focused question about this category. Do not ask multiple questions at once. Wait for the user's response before asking about other categories."
             
             # Add specific guidance for each category
             category_guidance = {
@@ -1261,30 +1365,34 @@ Generate a status report for the event planning process. Include progress on key
             }
             
             if next_category in category_guidance:
-                enhanced_system_prompt += f"\n\nSpecific guidance for {next_category}: {category_guidance[next_category]}"
+                turn_guidance += f"\n\nSpecific guidance for {next_category}: {category_guidance[next_category]}"
 
-        # Create the coordinator prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=enhanced_system_prompt),
-            MessagesPlaceholder(variable_name="messages"),
-        ])
-        
         # Convert message dicts to message objects
         message_objects = []
-        for m in state["messages"]:
+        # Avoid adding system messages from history here, as the template adds one;
+        # the only system message left is the summary of earlier turns
+        for m in build_context_messages(state, "coordinator.generate_response", roles=("user", "assistant")):
             role = m.get("role")
             content = m.get("content")
             if role == "user":
                 message_objects.append(HumanMessage(content=content))
             elif role == "assistant":
                 message_objects.append(AIMessage(content=content))
-            # Avoid adding system messages from history here, as the template adds one
-            # elif role == "system":
-            #     message_objects.append(SystemMessage(content=content))
+            elif role == "system":
+                message_objects.append(SystemMessage(content=content))
 
         # Generate response using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": message_objects})
+        chain = get_prompt("coordinator.generate_response") | llm
+        result = await chain.ainvoke({
+            "messages": message_objects,
+            "current_phase": state["current_phase"],
+            "event_details": state["event_details"],
+            "requirements": state["requirements"],
+            "agent_assignments": state["agent_assignments"],
+            "next_steps": state["next_steps"],
+            "information_collected": state["information_collected"],
+            "turn_guidance": turn_guidance
+        }, config=config)
         
         # Track the response in memory if available
         if memory and state["messages"] and state["messages"][-1]["role"] == "user":
@@ -1316,11 +1424,11 @@ Generate a status report for the event planning process. Include progress on key
     
     # Add nodes
     workflow.add_node("assess_request", assess_request)
-    workflow.add_node("gather_requirements", gather_requirements)
-    workflow.add_node("generate_proposal", generate_proposal)
-    workflow.add_node("delegate_tasks", delegate_tasks)
-    workflow.add_node("provide_status", provide_status)
-    workflow.add_node("generate_response", generate_response)
+    workflow.add_node("gather_requirements", dual_mode_node(gather_requirements))
+    workflow.add_node("generate_proposal", dual_mode_node(generate_proposal))
+    workflow.add_node("delegate_tasks", dual_mode_node(delegate_tasks))
+    workflow.add_node("provide_status", dual_mode_node(provide_status))
+    workflow.add_node("generate_response", dual_mode_node(generate_response))
     workflow.add_node("tools", tool_node)
     
     # Add edges
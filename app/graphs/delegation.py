@@ -0,0 +1,233 @@
+"""
+Concurrent execution of coordinator task delegations.
+
+Each delegated task runs a specialist sub-graph through a blocking task tool.
+The calls are run at the same time on a dedicated, bounded thread pool, so
+delegation takes as long as the slowest sub-agent rather than the sum of all
+of them. A per-tenant slot limit keeps one organization from occupying every
+worker: slots are awaited on the event loop before a call is handed to the
+pool, so waiting never ties up a thread. Each call has a timeout; a call that
+times out is asked to stop at its next graph node (see
+``delegation_cancelled``) and keeps its slot until it has. Results are
+returned in submission order so callers can merge them deterministically.
+"""
+
+import asyncio
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.config import (
+    DELEGATION_MAX_CONCURRENCY_PER_TENANT,
+    DELEGATION_MAX_WORKERS,
+    DELEGATION_TIMEOUT_SECONDS
+)
+
+
+class DelegationCancelled(Exception):
+    """Raised inside a delegated task that was asked to stop."""
+
+
+class TenantSlots:
+    """
+    Counting semaphore awaited on an event loop and released from any thread.
+
+    Delegations of one organization may be started from different event loops
+    and finish on pool threads, so asyncio.Semaphore cannot be used. Released
+    slots are handed directly to the longest waiting caller.
+    """
+
+    def __init__(self, limit: int):
+        """
+        Initialize the slots.
+
+        Args:
+            limit: Number of slots
+        """
+        self.limit = limit
+        self._in_use = 0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def in_use(self) -> int:
+        """Number of slots currently held."""
+        return self._in_use
+
+    async def acquire(self) -> None:
+        """Wait for a free slot."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_use < self.limit and not self._waiters:
+                self._in_use += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        future = waiter[1]
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    removed = True
+                except ValueError:
+                    removed = False
+            # A slot handed over just before the cancellation is given back
+            if not removed and future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Give a slot back, handing it to the next waiter if there is one."""
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+                except RuntimeError:
+                    # The waiter's event loop is closed
+                    continue
+            self._in_use -= 1
+
+    def _grant(self, future: asyncio.Future) -> None:
+        if future.done():
+            # The waiter was cancelled after the slot was handed to it
+            self.release()
+        else:
+            future.set_result(None)
+
+
+# Per-tenant slots
+_tenant_slots: Dict[Optional[int], TenantSlots] = {}
+_tenant_slots_lock = threading.Lock()
+
+# Thread pool running delegated tasks
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Cancellation flag of the delegated task running in the current thread
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "delegation_cancel_event", default=None
+)
+
+
+def _get_tenant_slots(organization_id: Optional[int]) -> TenantSlots:
+    """
+    Get the slots limiting concurrent delegations for an organization.
+
+    Args:
+        organization_id: The organization ID
+
+    Returns:
+        The organization's slots
+    """
+    with _tenant_slots_lock:
+        slots = _tenant_slots.get(organization_id)
+        if slots is None:
+            slots = TenantSlots(DELEGATION_MAX_CONCURRENCY_PER_TENANT)
+            _tenant_slots[organization_id] = slots
+        return slots
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool running delegated tasks, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor instance
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=DELEGATION_MAX_WORKERS,
+                    thread_name_prefix="delegation"
+                )
+    return _executor
+
+
+def delegation_cancelled() -> bool:
+    """
+    Check whether the delegated task running in this thread was asked to stop.
+
+    Long-running task code calls this between steps and stops early when it
+    returns True.
+
+    Returns:
+        True if the task timed out or its caller went away
+    """
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+
+async def run_delegations(
+    calls: List[Callable[[], Dict[str, Any]]],
+    organization_id: Optional[int] = None,
+    timeout: float = DELEGATION_TIMEOUT_SECONDS
+) -> List[Tuple[Optional[Dict[str, Any]], Optional[BaseException]]]:
+    """
+    Run delegation calls concurrently.
+
+    Args:
+        calls: Blocking callables, one per delegated task
+        organization_id: The organization the tasks belong to
+        timeout: Seconds each call may take, including time spent waiting for
+            a tenant slot
+
+    Returns:
+        One (result, error) pair per call, in the order of calls
+    """
+    slots = _get_tenant_slots(organization_id)
+
+    async def run_one(call: Callable[[], Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[BaseException]]:
+        cancelled = threading.Event()
+
+        def run_in_slot() -> Dict[str, Any]:
+            token = _cancel_event.set(cancelled)
+            try:
+                return call()
+            finally:
+                _cancel_event.reset(token)
+                slots.release()
+
+        def release_if_not_started(task_future) -> None:
+            if task_future.cancelled():
+                slots.release()
+
+        async def acquire_and_run() -> Dict[str, Any]:
+            await slots.acquire()
+            try:
+                # Run with the caller's context so the tenant scope of LLM
+                # caching and rate limiting applies to the delegated task
+                task_future = _get_executor().submit(contextvars.copy_context().run, run_in_slot)
+            except BaseException:
+                slots.release()
+                raise
+            task_future.add_done_callback(release_if_not_started)
+            return await asyncio.wrap_future(task_future)
+
+        try:
+            result = await asyncio.wait_for(acquire_and_run(), timeout=timeout)
+            return result, None
+        except asyncio.TimeoutError:
+            cancelled.set()
+            return None, TimeoutError(f"Delegated task did not finish within {timeout:.0f} seconds")
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        except Exception as e:
+            return None, e
+
+    return list(await asyncio.gather(*(run_one(call) for call in calls)))
+
+
+def shutdown_delegation_executor() -> None:
+    """Stop the threads running delegated tasks."""
+    if _executor is not None:
+        _executor.shutdown(wait=False)
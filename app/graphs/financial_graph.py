@@ -1,5 +1,5 @@
 from typing import Dict, List, Any, TypedDict, Literal, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda
@@ -8,7 +8,10 @@ from langchain_core.tools import BaseTool
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
-from app.utils.llm_factory import get_llm
+from app.utils.llm_factory import get_llm, get_node_llm
+from app.graphs.task_routing import add_pipeline_edges
+from app.graphs.context_window import build_context_messages
+from app.graphs.prompt_registry import get_prompt, register_prompt
 from app.tools.financial_tools import (
     BudgetAllocationTool, 
     PaymentTrackingTool, 
@@ -24,6 +27,8 @@ class FinancialStateDict(TypedDict):
     """State for the financial agent."""
     
     messages: List[Dict[str, str]]
+    conversation_summary: Optional[str]
+    summarized_message_count: int
     event_details: Dict[str, Any]
     budget: Dict[str, Any]
     expenses: List[Dict[str, Any]]
@@ -63,15 +68,6 @@ Contract Management:
 - Signature collection
 - Compliance verification
 
-Your current state:
-Current phase: {current_phase}
-Event details: {event_details}
-Budget: {budget}
-Expenses: {expenses}
-Contracts: {contracts}
-Payments: {payments}
-Next steps: {next_steps}
-
 Follow these guidelines:
 1. Analyze the event requirements to understand the financial needs
 2. Create detailed budget allocations based on event type, size, and requirements
@@ -83,16 +79,34 @@ Follow these guidelines:
 Respond to the coordinator agent or user in a helpful, professional manner. Ask clarifying questions when needed to gather complete financial requirements.
 """
 
+FINANCIAL_STATE_PROMPT = """Your current state:
+Current phase: {current_phase}
+Event details: {event_details}
+Budget: {budget}
+Expenses: {expenses}
+Contracts: {contracts}
+Payments: {payments}
+Next steps: {next_steps}"""
+
+# Response prompt: static instructions, then the history, then the current state
+register_prompt("financial.generate_response", FINANCIAL_SYSTEM_PROMPT, ("system", FINANCIAL_STATE_PROMPT))
+
 
-def create_financial_graph():
+def create_financial_graph(entry_point: Optional[str] = None):
     """
     Create the financial agent graph.
     
+    Args:
+        entry_point: Target node of a delegated task; the steps after it
+            are skipped (defaults to the full workflow)
+    
     Returns:
         Compiled LangGraph for the financial agent
     """
     # Initialize the LLM
     llm = get_llm(temperature=0.2)
+    # The analysis step sees identical inputs when a task is re-delegated
+    analysis_llm = get_node_llm("financial.analyze_budget_requirements", temperature=0.2, cache=True)
     
     # Initialize tools
     tools = [
@@ -139,8 +153,8 @@ Analyze these event details and the conversation to determine the financial requ
         ])
         
         # Analyze requirements using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        chain = prompt | analysis_llm
+        result = chain.invoke({"messages": build_context_messages(state, "financial.analyze_budget_requirements")})
         
         # Add the analysis to messages
         state["messages"].append({
@@ -184,7 +198,7 @@ Extract the budget allocation criteria from these event details and the conversa
         
         # Extract budget allocation criteria using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "financial.allocate_budget")})
         
         # Use the BudgetAllocationTool to allocate budget
         budget_allocation_tool = BudgetAllocationTool()
@@ -269,7 +283,7 @@ Extract expense information from the conversation. If there are no specific expe
         
         # Extract expense information using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "financial.track_expenses")})
         
         # Check if specific expenses were found
         if "No specific expenses found" in result.content:
@@ -381,7 +395,7 @@ Extract contract information from the conversation. If there are no specific con
         
         # Extract contract information using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "financial.manage_contracts")})
         
         # Check if specific contracts were found
         if "No specific contracts found" in result.content:
@@ -399,7 +413,7 @@ Extract contract information from the conversation. If there are no specific con
                     
                     # Get event timeline
                     start_date = state["event_details"].get("timeline_start", datetime.now().strftime("%Y-%m-%d"))
-                    end_date = state["event_details"].get("timeline_end", (datetime.now() + datetime.timedelta(days=30)).strftime("%Y-%m-%d"))
+                    end_date = state["event_details"].get("timeline_end", (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d"))
                     
                     # Create a sample contract
                     contract_result = contract_generation_tool._run(
@@ -433,7 +447,7 @@ Extract contract information from the conversation. If there are no specific con
             service_type = "Venue"
             amount = 5000.0
             start_date = datetime.now().strftime("%Y-%m-%d")
-            end_date = (datetime.now() + datetime.timedelta(days=30)).strftime("%Y-%m-%d")
+            end_date = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
             
             # Generate the contract
             contract_result = contract_generation_tool._run(
@@ -491,7 +505,7 @@ Determine what type of financial report is needed based on the conversation.""")
         
         # Determine report type using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "financial.generate_financial_report")})
         
         # Extract report type from the LLM result
         report_type = "summary"
@@ -573,23 +587,18 @@ Determine what type of financial report is needed based on the conversation.""")
         Returns:
             Updated state
         """
-        # Create the financial prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=FINANCIAL_SYSTEM_PROMPT.format(
-                current_phase=state["current_phase"],
-                event_details=state["event_details"],
-                budget=state["budget"],
-                expenses=state["expenses"],
-                contracts=state["contracts"],
-                payments=state["payments"],
-                next_steps=state["next_steps"]
-            )),
-            MessagesPlaceholder(variable_name="messages"),
-        ])
-        
         # Generate response using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        chain = get_prompt("financial.generate_response") | llm
+        result = chain.invoke({
+            "messages": build_context_messages(state, "financial.generate_response"),
+            "current_phase": state["current_phase"],
+            "event_details": state["event_details"],
+            "budget": state["budget"],
+            "expenses": state["expenses"],
+            "contracts": state["contracts"],
+            "payments": state["payments"],
+            "next_steps": state["next_steps"]
+        })
         
         # Add the response to messages
         new_message = {
@@ -613,17 +622,20 @@ Determine what type of financial report is needed based on the conversation.""")
     workflow.add_node("generate_response", generate_response)
     workflow.add_node("tools", tool_node)
     
-    # Add edges
-    workflow.add_edge("analyze_budget_requirements", "allocate_budget")
-    workflow.add_edge("allocate_budget", "track_expenses")
-    workflow.add_edge("track_expenses", "manage_contracts")
-    workflow.add_edge("manage_contracts", "generate_financial_report")
-    workflow.add_edge("generate_financial_report", "generate_financial_plan")
-    workflow.add_edge("generate_financial_plan", "generate_response")
-    workflow.add_edge("generate_response", END)
-    
-    # Set the entry point
-    workflow.set_entry_point("analyze_budget_requirements")
+    # Add edges and the entry point; a delegated task stops at its target node
+    add_pipeline_edges(
+        workflow,
+        [
+            "analyze_budget_requirements",
+            "allocate_budget",
+            "track_expenses",
+            "manage_contracts",
+            "generate_financial_report",
+            "generate_financial_plan",
+            "generate_response"
+        ],
+        entry_point=entry_point
+    )
     
     return workflow.compile()
 
@@ -2,7 +2,6 @@ from typing import Dict, List, Any, TypedDict, Literal, Optional
 from datetime import datetime, timedelta
 import uuid
 
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.tools import BaseTool
@@ -10,6 +9,8 @@ from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
 from app.utils.llm_factory import get_llm
+from app.graphs.context_window import build_context_messages
+from app.graphs.prompt_registry import get_prompt, register_prompt
 from app.tools.marketing_tools import (
     ChannelManagementTool,
     ContentCreationTool,
@@ -36,6 +37,8 @@ class MarketingStateDict(TypedDict):
     """State for the marketing and communications agent."""
     
     messages: List[Dict[str, str]]
+    conversation_summary: Optional[str]
+    summarized_message_count: int
     event_details: Dict[str, Any]
     channels: List[Dict[str, Any]]
     content: List[Dict[str, Any]]
@@ -63,7 +66,10 @@ You have expertise in:
 - Registration management
 - Marketing analytics and reporting
 
-Your current state:
+Respond to the user in a helpful, professional manner. Provide strategic marketing advice and practical implementation steps. When creating marketing content, focus on clear messaging, audience targeting, and measurable outcomes.
+"""
+
+MARKETING_STATE_PROMPT = """Your current state:
 Event details: {event_details}
 Marketing channels: {channels}
 Marketing content: {content}
@@ -72,10 +78,10 @@ Registration forms: {registration_forms}
 Marketing campaigns: {campaigns}
 Marketing plan: {marketing_plan}
 Communication plan: {communication_plan}
-Current task: {current_task}
+Current task: {current_task}"""
 
-Respond to the user in a helpful, professional manner. Provide strategic marketing advice and practical implementation steps. When creating marketing content, focus on clear messaging, audience targeting, and measurable outcomes.
-"""
+# Response prompt: static instructions, then the history, then the current state
+register_prompt("marketing_communications.generate_response", MARKETING_SYSTEM_PROMPT, ("system", MARKETING_STATE_PROMPT))
 
 
 def create_marketing_communications_graph():
@@ -148,25 +154,20 @@ def create_marketing_communications_graph():
         Returns:
             Updated state
         """
-        # Create the marketing prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=MARKETING_SYSTEM_PROMPT.format(
-                event_details=state["event_details"],
-                channels=state["channels"],
-                content=state["content"],
-                attendees=state["attendees"],
-                registration_forms=state["registration_forms"],
-                campaigns=state["campaigns"],
-                marketing_plan=state["marketing_plan"],
-                communication_plan=state["communication_plan"],
-                current_task=state["current_task"]
-            )),
-            MessagesPlaceholder(variable_name="messages"),
-        ])
-        
         # Generate response using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        chain = get_prompt("marketing_communications.generate_response") | llm
+        result = chain.invoke({
+            "messages": build_context_messages(state, "marketing_communications.generate_response"),
+            "event_details": state["event_details"],
+            "channels": state["channels"],
+            "content": state["content"],
+            "attendees": state["attendees"],
+            "registration_forms": state["registration_forms"],
+            "campaigns": state["campaigns"],
+            "marketing_plan": state["marketing_plan"],
+            "communication_plan": state["communication_plan"],
+            "current_task": state["current_task"]
+        })
         
         # Add the response to messages
         state["messages"].append({
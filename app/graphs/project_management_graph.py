@@ -8,7 +8,10 @@ from langchain_core.tools import BaseTool
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
-from app.utils.llm_factory import get_llm
+from app.utils.llm_factory import get_llm, get_node_llm
+from app.graphs.task_routing import add_pipeline_edges
+from app.graphs.context_window import build_context_messages
+from app.graphs.prompt_registry import get_prompt, register_prompt
 from app.tools.project_tools import (
     TaskManagementTool,
     MilestoneManagementTool,
@@ -25,6 +28,8 @@ class ProjectManagementStateDict(TypedDict):
     """State for the project management agent."""
     
     messages: List[Dict[str, str]]
+    conversation_summary: Optional[str]
+    summarized_message_count: int
     event_details: Dict[str, Any]
     tasks: List[Dict[str, Any]]
     milestones: List[Dict[str, Any]]
@@ -64,16 +69,6 @@ Risk Management:
 - Issue tracking
 - Contingency activation
 
-Your current state:
-Current phase: {current_phase}
-Event details: {event_details}
-Tasks: {tasks}
-Milestones: {milestones}
-Risks: {risks}
-Timeline: {timeline}
-Project plan: {project_plan}
-Next steps: {next_steps}
-
 Follow these guidelines:
 1. Analyze the event requirements to understand the project management needs
 2. Create a comprehensive project plan with tasks, milestones, and timeline
@@ -85,16 +80,35 @@ Follow these guidelines:
 Respond to the coordinator agent or user in a helpful, professional manner. Ask clarifying questions when needed to gather complete project management requirements.
 """
 
+PROJECT_MANAGEMENT_STATE_PROMPT = """Your current state:
+Current phase: {current_phase}
+Event details: {event_details}
+Tasks: {tasks}
+Milestones: {milestones}
+Risks: {risks}
+Timeline: {timeline}
+Project plan: {project_plan}
+Next steps: {next_steps}"""
+
+# Response prompt: static instructions, then the history, then the current state
+register_prompt("project_management.generate_response", PROJECT_MANAGEMENT_SYSTEM_PROMPT, ("system", PROJECT_MANAGEMENT_STATE_PROMPT))
+
 
-def create_project_management_graph():
+def create_project_management_graph(entry_point: Optional[str] = None):
     """
     Create the project management agent graph.
     
+    Args:
+        entry_point: Target node of a delegated task; the steps after it
+            are skipped (defaults to the full workflow)
+    
     Returns:
         Compiled LangGraph for the project management agent
     """
     # Initialize the LLM
     llm = get_llm(temperature=0.2)
+    # The analysis step sees identical inputs when a task is re-delegated
+    analysis_llm = get_node_llm("project_management.analyze_requirements", temperature=0.2, cache=True)
     
     # Initialize tools
     tools = [
@@ -142,8 +156,8 @@ Analyze these event details and the conversation to determine the project manage
         ])
         
         # Analyze requirements using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        chain = prompt | analysis_llm
+        result = chain.invoke({"messages": build_context_messages(state, "project_management.analyze_requirements")})
         
         # Add the analysis to messages
         state["messages"].append({
@@ -186,7 +200,7 @@ Identify task management needs for this event and recommend specific tasks. If t
         
         # Determine task management needs using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "project_management.manage_tasks")})
         
         # Use the TaskManagementTool to list tasks
         task_management_tool = TaskManagementTool()
@@ -244,7 +258,7 @@ Identify milestone needs for this event and recommend specific milestones. If mi
         
         # Determine milestone needs using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "project_management.manage_milestones")})
         
         # Use the MilestoneManagementTool to list milestones
         milestone_management_tool = MilestoneManagementTool()
@@ -302,7 +316,7 @@ Identify risk management needs for this event and recommend specific risks to mo
         
         # Determine risk management needs using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "project_management.manage_risks")})
         
         # Use the RiskManagementTool to list risks
         risk_management_tool = RiskManagementTool()
@@ -520,24 +534,19 @@ Create a concise summary of this project plan.""")
         Returns:
             Updated state
         """
-        # Create the project management prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=PROJECT_MANAGEMENT_SYSTEM_PROMPT.format(
-                current_phase=state["current_phase"],
-                event_details=state["event_details"],
-                tasks=state["tasks"],
-                milestones=state["milestones"],
-                risks=state["risks"],
-                timeline=state["timeline"],
-                project_plan=state["project_plan"],
-                next_steps=state["next_steps"]
-            )),
-            MessagesPlaceholder(variable_name="messages"),
-        ])
-        
         # Generate response using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        chain = get_prompt("project_management.generate_response") | llm
+        result = chain.invoke({
+            "messages": build_context_messages(state, "project_management.generate_response"),
+            "current_phase": state["current_phase"],
+            "event_details": state["event_details"],
+            "tasks": state["tasks"],
+            "milestones": state["milestones"],
+            "risks": state["risks"],
+            "timeline": state["timeline"],
+            "project_plan": state["project_plan"],
+            "next_steps": state["next_steps"]
+        })
         
         # Add the response to messages
         new_message = {
@@ -561,17 +570,20 @@ Create a concise summary of this project plan.""")
     workflow.add_node("generate_response", generate_response)
     workflow.add_node("tools", tool_node)
     
-    # Add edges
-    workflow.add_edge("analyze_requirements", "manage_tasks")
-    workflow.add_edge("manage_tasks", "manage_milestones")
-    workflow.add_edge("manage_milestones", "manage_risks")
-    workflow.add_edge("manage_risks", "generate_timeline")
-    workflow.add_edge("generate_timeline", "generate_project_plan")
-    workflow.add_edge("generate_project_plan", "generate_response")
-    workflow.add_edge("generate_response", END)
-    
-    # Set the entry point
-    workflow.set_entry_point("analyze_requirements")
+    # Add edges and the entry point; a delegated task stops at its target node
+    add_pipeline_edges(
+        workflow,
+        [
+            "analyze_requirements",
+            "manage_tasks",
+            "manage_milestones",
+            "manage_risks",
+            "generate_timeline",
+            "generate_project_plan",
+            "generate_response"
+        ],
+        entry_point=entry_point
+    )
     
     return workflow.compile()
 
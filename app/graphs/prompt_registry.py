@@ -0,0 +1,141 @@
+"""
+Prompt templates for agent graph nodes, laid out for provider prompt caching.
+
+OpenAI and Gemini serve a repeated prompt prefix from a prompt cache, which
+makes those input tokens cheaper and faster, but only while the prefix is
+byte-for-byte identical. Nodes used to format the event details and
+requirements into the system prompt ahead of the message history, so the
+prefix changed every turn and the cache never hit.
+
+Registered templates always have the same layout: static instructions first,
+then the conversation history, then the messages carrying the current state.
+Templates are built once at import time and looked up by node name with
+``get_prompt`` instead of being rebuilt on every invocation.
+
+``record_prompt_cache_usage`` collects the cached share of prompt tokens
+reported by the provider, per graph node, for ``/health/detailed``.
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+
+# Registered templates by node name ("<graph>.<node>")
+_prompts: Dict[str, ChatPromptTemplate] = {}
+
+# Prompt token usage by graph node
+_usage: Dict[str, Dict[str, int]] = {}
+_usage_lock = threading.Lock()
+
+
+def register_prompt(
+    node_name: str,
+    instructions: str,
+    *after_history: Union[BaseMessage, Tuple[str, str]]
+) -> ChatPromptTemplate:
+    """
+    Register the prompt template of a graph node.
+
+    Args:
+        node_name: The node name as "<graph>.<node>"
+        instructions: The system instructions. They are sent as is, never
+            formatted, so they cannot change between calls.
+        after_history: Messages following the conversation history. Messages
+            are sent as is; (role, template) tuples are formatted with the
+            values passed when the prompt is invoked.
+
+    Returns:
+        The template, expecting the history as "messages"
+    """
+    prompt = ChatPromptTemplate.from_messages([
+        SystemMessage(content=instructions),
+        MessagesPlaceholder(variable_name="messages"),
+        *after_history
+    ])
+    _prompts[node_name] = prompt
+    return prompt
+
+
+def get_prompt(node_name: str) -> ChatPromptTemplate:
+    """
+    Get the registered prompt template of a graph node.
+
+    Args:
+        node_name: The node name as "<graph>.<node>"
+
+    Returns:
+        The template
+
+    Raises:
+        KeyError: If no template is registered under the name
+    """
+    return _prompts[node_name]
+
+
+def get_prompt_cache_tokens(message: Any) -> Tuple[Optional[int], int]:
+    """
+    Get the prompt tokens and cached prompt tokens reported for a reply.
+
+    Args:
+        message: The AI message
+
+    Returns:
+        Tuple of (prompt tokens or None if not reported, cached prompt tokens)
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if usage and usage.get("input_tokens") is not None:
+        details = usage.get("input_token_details") or {}
+        return usage["input_tokens"], details.get("cache_read") or 0
+
+    # Older integrations only report the provider's raw usage
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    if token_usage.get("prompt_tokens") is None:
+        return None, 0
+    details = token_usage.get("prompt_tokens_details") or {}
+    return token_usage["prompt_tokens"], details.get("cached_tokens") or 0
+
+
+def record_prompt_cache_usage(node_name: Optional[str], result: Any) -> None:
+    """
+    Record the prompt cache usage of an LLM call.
+
+    Args:
+        node_name: The graph node that made the call, if known
+        result: The ChatResult of the call
+    """
+    for generation in getattr(result, "generations", None) or []:
+        prompt_tokens, cached_tokens = get_prompt_cache_tokens(getattr(generation, "message", None))
+        if prompt_tokens is None:
+            continue
+        with _usage_lock:
+            usage = _usage.setdefault(node_name or "unknown", {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+            usage["calls"] += 1
+            usage["prompt_tokens"] += prompt_tokens
+            usage["cached_tokens"] += cached_tokens
+
+
+def get_prompt_cache_stats() -> Dict[str, Any]:
+    """
+    Get prompt cache usage statistics.
+
+    Returns:
+        Dictionary with overall and per-node prompt tokens, cached tokens and
+        cached token ratio
+    """
+    with _usage_lock:
+        nodes = {name: dict(usage) for name, usage in _usage.items()}
+
+    for usage in nodes.values():
+        usage["cached_ratio"] = usage["cached_tokens"] / usage["prompt_tokens"] if usage["prompt_tokens"] else 0.0
+    prompt_tokens = sum(usage["prompt_tokens"] for usage in nodes.values())
+    cached_tokens = sum(usage["cached_tokens"] for usage in nodes.values())
+    return {
+        "registered_prompts": len(_prompts),
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "cached_ratio": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+        "nodes": nodes
+    }
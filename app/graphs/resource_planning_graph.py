@@ -9,7 +9,10 @@ from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 from pydantic import BaseModel, Field
 
-from app.utils.llm_factory import get_llm
+from app.utils.llm_factory import get_llm, get_node_llm
+from app.graphs.task_routing import add_pipeline_edges
+from app.graphs.context_window import build_context_messages
+from app.graphs.prompt_registry import get_prompt, register_prompt
 from app.tools.event_tools import RequirementsTool, MonitoringTool, ReportingTool
 from app.tools.resource_planning_search_tool import ResourcePlanningSearchTool
 
@@ -19,6 +22,8 @@ class ResourcePlanningStateDict(TypedDict):
     """State for the resource planning agent."""
     
     messages: List[Dict[str, str]]
+    conversation_summary: Optional[str]
+    summarized_message_count: int
     event_details: Dict[str, Any]
     venue_options: List[Dict[str, Any]]
     selected_venue: Optional[Dict[str, Any]]
@@ -58,15 +63,6 @@ Resource Allocation:
 - Schedule optimization
 - Contingency planning
 
-Your current state:
-Current phase: {current_phase}
-Event details: {event_details}
-Venue options: {venue_options}
-Selected venue: {selected_venue}
-Service providers: {service_providers}
-Equipment needs: {equipment_needs}
-Next steps: {next_steps}
-
 Follow these guidelines:
 1. Analyze the event requirements to understand the resource needs
 2. Research and recommend appropriate venues based on the event type, size, and budget
@@ -78,6 +74,18 @@ Follow these guidelines:
 Respond to the coordinator agent or user in a helpful, professional manner. Ask clarifying questions when needed to gather complete requirements.
 """
 
+RESOURCE_PLANNING_STATE_PROMPT = """Your current state:
+Current phase: {current_phase}
+Event details: {event_details}
+Venue options: {venue_options}
+Selected venue: {selected_venue}
+Service providers: {service_providers}
+Equipment needs: {equipment_needs}
+Next steps: {next_steps}"""
+
+# Response prompt: static instructions, then the history, then the current state
+register_prompt("resource_planning.generate_response", RESOURCE_PLANNING_SYSTEM_PROMPT, ("system", RESOURCE_PLANNING_STATE_PROMPT))
+
 
 # Define input schemas for the Resource Planning Agent's tools
 class VenueSearchInput(BaseModel):
@@ -830,15 +838,21 @@ class ResourcePlanGenerationTool(BaseTool):
         }
 
 
-def create_resource_planning_graph():
+def create_resource_planning_graph(entry_point: Optional[str] = None):
     """
     Create the resource planning agent graph.
     
+    Args:
+        entry_point: Target node of a delegated task; the steps after it
+            are skipped (defaults to the full workflow)
+    
     Returns:
         Compiled LangGraph for the resource planning agent
     """
     # Initialize the LLM
     llm = get_llm(temperature=0.2)
+    # The analysis step sees identical inputs when a task is re-delegated
+    analysis_llm = get_node_llm("resource_planning.analyze_requirements", temperature=0.2, cache=True)
     
     # Initialize tools
     tools = [
@@ -885,9 +899,9 @@ Analyze these event details and the conversation to determine the resource needs
         ])
         
         # Analyze requirements using the LLM
-        chain = prompt | llm
+        chain = prompt | analysis_llm
         # Filter out any messages with empty content to avoid API errors
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"] if m.get("content")]})
+        result = chain.invoke({"messages": build_context_messages(state, "resource_planning.analyze_requirements")})
         
         # Add the analysis to messages
         state["messages"].append({
@@ -932,7 +946,7 @@ Extract the venue search criteria from these event details and the conversation.
         # Extract venue search criteria using the LLM
         chain = prompt | llm
         # Filter out any messages with empty content to avoid API errors
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"] if m.get("content")]})
+        result = chain.invoke({"messages": build_context_messages(state, "resource_planning.search_venues")})
         
         # Use the VenueSearchTool to search for venues
         venue_search_tool = VenueSearchTool()
@@ -1022,7 +1036,7 @@ Select the best venue for this event and explain your reasoning.""")
         # Select venue using the LLM
         chain = prompt | llm
         # Filter out any messages with empty content to avoid API errors
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"] if m.get("content")]})
+        result = chain.invoke({"messages": build_context_messages(state, "resource_planning.select_venue")})
         
         # For demonstration purposes, we'll select the first venue
         # In a real implementation, we would parse the LLM output to determine the selected venue
@@ -1083,7 +1097,7 @@ Determine what service providers are needed for this event.""")
         # Determine required service types using the LLM
         chain = prompt | llm
         # Filter out any messages with empty content to avoid API errors
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"] if m.get("content")]})
+        result = chain.invoke({"messages": build_context_messages(state, "resource_planning.search_service_providers")})
         
         # For demonstration purposes, we'll search for catering and AV services
         # In a real implementation, we would parse the LLM output to determine the required service types
@@ -1261,24 +1275,19 @@ Create a concise summary of this resource plan.""")
         Returns:
             Updated state
         """
-        # Create the resource planning prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=RESOURCE_PLANNING_SYSTEM_PROMPT.format(
-                current_phase=state["current_phase"],
-                event_details=state["event_details"],
-                venue_options=state["venue_options"],
-                selected_venue=state["selected_venue"],
-                service_providers=state["service_providers"],
-                equipment_needs=state["equipment_needs"],
-                next_steps=state["next_steps"]
-            )),
-            MessagesPlaceholder(variable_name="messages"),
-        ])
-        
         # Generate response using the LLM
-        chain = prompt | llm
+        chain = get_prompt("resource_planning.generate_response") | llm
         # Filter out any messages with empty content to avoid API errors
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"] if m.get("content")]})
+        result = chain.invoke({
+            "messages": build_context_messages(state, "resource_planning.generate_response"),
+            "current_phase": state["current_phase"],
+            "event_details": state["event_details"],
+            "venue_options": state["venue_options"],
+            "selected_venue": state["selected_venue"],
+            "service_providers": state["service_providers"],
+            "equipment_needs": state["equipment_needs"],
+            "next_steps": state["next_steps"]
+        })
         
         # Add the response to messages
         new_message = {
@@ -1302,17 +1311,20 @@ Create a concise summary of this resource plan.""")
     workflow.add_node("generate_response", generate_response)
     workflow.add_node("tools", tool_node)
     
-    # Add edges
-    workflow.add_edge("analyze_requirements", "search_venues")
-    workflow.add_edge("search_venues", "select_venue")
-    workflow.add_edge("select_venue", "search_service_providers")
-    workflow.add_edge("search_service_providers", "plan_equipment")
-    workflow.add_edge("plan_equipment", "generate_resource_plan")
-    workflow.add_edge("generate_resource_plan", "generate_response")
-    workflow.add_edge("generate_response", END)
-    
-    # Set the entry point
-    workflow.set_entry_point("analyze_requirements")
+    # Add edges and the entry point; a delegated task stops at its target node
+    add_pipeline_edges(
+        workflow,
+        [
+            "analyze_requirements",
+            "search_venues",
+            "select_venue",
+            "search_service_providers",
+            "plan_equipment",
+            "generate_resource_plan",
+            "generate_response"
+        ],
+        entry_point=entry_point
+    )
     
     return workflow.compile()
 def create_initial_state() -> ResourcePlanningStateDict:
@@ -9,6 +9,7 @@ from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
 from app.utils.llm_factory import get_llm
+from app.graphs.context_window import build_context_messages
 from app.tools.event_tools import RequirementsTool, DelegationTool, MonitoringTool, ReportingTool
 from app.tools.agent_communication_tools import ResourcePlanningTaskTool, FinancialTaskTool, StakeholderManagementTaskTool, MarketingCommunicationsTaskTool, ProjectManagementTaskTool
 from app.tools.coordinator_search_tool import CoordinatorSearchTool
@@ -247,7 +248,7 @@ For each field, extract the information if available in the conversation. For th
         
         # Extract requirements using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "simple_coordinator.gather_requirements")})
         
         # Parse the result
         try:
@@ -353,7 +354,7 @@ Generate a comprehensive event proposal based on this information. The proposal
         
         # Generate proposal using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "simple_coordinator.generate_proposal")})
         
         # Store the proposal in the state
         state["proposal"] = {
@@ -418,7 +419,7 @@ Determine up to 8 new tasks that should be delegated to specialized agents, incl
         
         # Determine task delegation using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "simple_coordinator.delegate_tasks")})
         
         # Parse the result
         try:
@@ -546,7 +547,7 @@ Generate a comprehensive status update on the event planning process.""")
         
         # Generate status update using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "simple_coordinator.provide_status")})
         
         # Add the status update to messages
         state["messages"].append({
@@ -584,7 +585,7 @@ Generate a comprehensive status update on the event planning process.""")
         
         # Generate response using the LLM
         chain = formatted_prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "simple_coordinator.generate_response")})
         
         # Add the response to messages
         state["messages"].append({
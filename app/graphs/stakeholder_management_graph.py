@@ -8,7 +8,10 @@ from langchain_core.tools import BaseTool
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
-from app.utils.llm_factory import get_llm
+from app.utils.llm_factory import get_llm, get_node_llm
+from app.graphs.task_routing import add_pipeline_edges
+from app.graphs.context_window import build_context_messages
+from app.graphs.prompt_registry import get_prompt, register_prompt
 from app.tools.stakeholder_tools import (
     SpeakerManagementTool,
     SponsorManagementTool,
@@ -25,6 +28,8 @@ class StakeholderManagementStateDict(TypedDict):
     """State for the stakeholder management agent."""
     
     messages: List[Dict[str, str]]
+    conversation_summary: Optional[str]
+    summarized_message_count: int
     event_details: Dict[str, Any]
     speakers: List[Dict[str, Any]]
     sponsors: List[Dict[str, Any]]
@@ -70,15 +75,6 @@ VIP Management:
 - VIP experience enhancement
 - Relationship maintenance
 
-Your current state:
-Current phase: {current_phase}
-Event details: {event_details}
-Speakers: {speakers}
-Sponsors: {sponsors}
-Volunteers: {volunteers}
-VIPs: {vips}
-Next steps: {next_steps}
-
 Follow these guidelines:
 1. Analyze the event requirements to understand stakeholder needs
 2. Identify and recruit appropriate speakers, sponsors, and volunteers
@@ -90,16 +86,34 @@ Follow these guidelines:
 Respond to the coordinator agent or user in a helpful, professional manner. Ask clarifying questions when needed to gather complete stakeholder requirements.
 """
 
+STAKEHOLDER_MANAGEMENT_STATE_PROMPT = """Your current state:
+Current phase: {current_phase}
+Event details: {event_details}
+Speakers: {speakers}
+Sponsors: {sponsors}
+Volunteers: {volunteers}
+VIPs: {vips}
+Next steps: {next_steps}"""
+
+# Response prompt: static instructions, then the history, then the current state
+register_prompt("stakeholder_management.generate_response", STAKEHOLDER_MANAGEMENT_SYSTEM_PROMPT, ("system", STAKEHOLDER_MANAGEMENT_STATE_PROMPT))
+
 
-def create_stakeholder_management_graph():
+def create_stakeholder_management_graph(entry_point: Optional[str] = None):
     """
     Create the stakeholder management agent graph.
     
+    Args:
+        entry_point: Target node of a delegated task; the steps after it
+            are skipped (defaults to the full workflow)
+    
     Returns:
         Compiled LangGraph for the stakeholder management agent
     """
     # Initialize the LLM
     llm = get_llm(temperature=0.2)
+    # The analysis step sees identical inputs when a task is re-delegated
+    analysis_llm = get_node_llm("stakeholder_management.analyze_stakeholders", temperature=0.2, cache=True)
     
     # Initialize tools
     tools = [
@@ -148,8 +162,8 @@ Analyze these event details and the conversation to determine the stakeholder re
         ])
         
         # Analyze requirements using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        chain = prompt | analysis_llm
+        result = chain.invoke({"messages": build_context_messages(state, "stakeholder_management.analyze_stakeholders")})
         
         # Add the analysis to messages
         state["messages"].append({
@@ -192,7 +206,7 @@ Identify speaker needs for this event and recommend specific speakers with topic
         
         # Determine speaker needs using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "stakeholder_management.manage_speakers")})
         
         # Use the SpeakerManagementTool to add speakers
         speaker_management_tool = SpeakerManagementTool()
@@ -368,7 +382,7 @@ Identify sponsor needs for this event and recommend specific sponsors. If sponso
         
         # Determine sponsor needs using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "stakeholder_management.manage_sponsors")})
         
         # Use the SponsorManagementTool to add sponsors
         sponsor_management_tool = SponsorManagementTool()
@@ -535,7 +549,7 @@ Identify volunteer needs for this event and recommend specific roles. If volunte
         
         # Determine volunteer needs using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "stakeholder_management.manage_volunteers")})
         
         # Use the VolunteerManagementTool to add volunteers
         volunteer_management_tool = VolunteerManagementTool()
@@ -648,7 +662,7 @@ Identify VIP needs for this event and recommend specific VIPs to invite. If VIPs
         
         # Determine VIP needs using the LLM
         chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        result = chain.invoke({"messages": build_context_messages(state, "stakeholder_management.manage_vips")})
         
         # Use the VIPManagementTool to add VIPs
         vip_management_tool = VIPManagementTool()
@@ -822,23 +836,18 @@ Identify VIP needs for this event and recommend specific VIPs to invite. If VIPs
         Returns:
             Updated state
         """
-        # Create the stakeholder management prompt
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=STAKEHOLDER_MANAGEMENT_SYSTEM_PROMPT.format(
-                current_phase=state["current_phase"],
-                event_details=state["event_details"],
-                speakers=state["speakers"],
-                sponsors=state["sponsors"],
-                volunteers=state["volunteers"],
-                vips=state["vips"],
-                next_steps=state["next_steps"]
-            )),
-            MessagesPlaceholder(variable_name="messages"),
-        ])
-        
         # Generate response using the LLM
-        chain = prompt | llm
-        result = chain.invoke({"messages": [{"role": m["role"], "content": m["content"]} for m in state["messages"]]})
+        chain = get_prompt("stakeholder_management.generate_response") | llm
+        result = chain.invoke({
+            "messages": build_context_messages(state, "stakeholder_management.generate_response"),
+            "current_phase": state["current_phase"],
+            "event_details": state["event_details"],
+            "speakers": state["speakers"],
+            "sponsors": state["sponsors"],
+            "volunteers": state["volunteers"],
+            "vips": state["vips"],
+            "next_steps": state["next_steps"]
+        })
         
         # Add the response to messages
         new_message = {
@@ -862,17 +871,20 @@ Identify VIP needs for this event and recommend specific VIPs to invite. If VIPs
     workflow.add_node("generate_response", generate_response)
     workflow.add_node("tools", tool_node)
     
-    # Add edges
-    workflow.add_edge("analyze_stakeholders", "manage_speakers")
-    workflow.add_edge("manage_speakers", "manage_sponsors")
-    workflow.add_edge("manage_sponsors", "manage_volunteers")
-    workflow.add_edge("manage_volunteers", "manage_vips")
-    workflow.add_edge("manage_vips", "generate_stakeholder_plan")
-    workflow.add_edge("generate_stakeholder_plan", "generate_response")
-    workflow.add_edge("generate_response", END)
-    
-    # Set the entry point
-    workflow.set_entry_point("analyze_stakeholders")
+    # Add edges and the entry point; a delegated task stops at its target node
+    add_pipeline_edges(
+        workflow,
+        [
+            "analyze_stakeholders",
+            "manage_speakers",
+            "manage_sponsors",
+            "manage_volunteers",
+            "manage_vips",
+            "generate_stakeholder_plan",
+            "generate_response"
+        ],
+        entry_point=entry_point
+    )
     
     return workflow.compile()
 
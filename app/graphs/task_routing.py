@@ -0,0 +1,135 @@
+"""
+Routing of delegated tasks to specialist graph nodes.
+
+A task delegated by the coordinator is sent to one node of the specialist's
+graph. The node comes from the coordinator's assignment when it names one,
+otherwise it is matched from keywords in the task. The specialist graph is
+then compiled to run its steps up to that node and go straight to the
+response node, so the task is handled in a single pass instead of running the
+whole graph and then running it again for the matched node. The steps before
+the target still run because each step builds on the state of the previous
+ones (e.g. expenses are tracked against the allocated budget).
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# Keyword routes per agent type: (keywords, node), first match wins. Every
+# node listed here exists in the agent's graph.
+TASK_ROUTES: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {
+    "resource_planning": [
+        (("venue", "location"), "search_venues"),
+        (("service", "provider"), "search_service_providers"),
+        (("equipment", "resource"), "plan_equipment"),
+        (("plan",), "generate_resource_plan"),
+    ],
+    "financial": [
+        (("budget", "allocate"), "allocate_budget"),
+        (("expense", "payment", "track"), "track_expenses"),
+        (("contract",), "manage_contracts"),
+        (("report",), "generate_financial_report"),
+        (("plan",), "generate_financial_plan"),
+    ],
+    "stakeholder_management": [
+        (("speaker", "presenter"), "manage_speakers"),
+        (("sponsor", "funding"), "manage_sponsors"),
+        (("volunteer", "staff"), "manage_volunteers"),
+        (("vip", "important guest"), "manage_vips"),
+        (("plan", "strategy"), "generate_stakeholder_plan"),
+    ],
+    # The marketing graph only has a request assessment and a response node,
+    # so its tasks always run the whole (two node) graph
+    "marketing_communications": [],
+    "project_management": [
+        (("task", "assignment"), "manage_tasks"),
+        (("milestone", "deadline"), "manage_milestones"),
+        (("risk", "issue"), "manage_risks"),
+        (("timeline", "schedule"), "generate_timeline"),
+        (("plan", "project plan"), "generate_project_plan"),
+    ],
+    "analytics": [
+        (("data", "collect"), "configure_data_sources"),
+        (("metric", "kpi"), "define_metrics"),
+        (("segment", "audience"), "create_segments"),
+        (("survey", "feedback"), "design_surveys"),
+        (("report", "analysis"), "generate_reports"),
+        (("roi", "return"), "calculate_roi"),
+        (("attendee", "demographic"), "analyze_attendees"),
+        (("insight", "recommend"), "generate_insights"),
+    ],
+    "compliance_security": [
+        (("requirement", "regulation", "compliance"), "track_requirements"),
+        (("security", "access control", "physical security"), "plan_security"),
+        (("data protection", "privacy", "gdpr"), "implement_data_protection"),
+        (("audit", "assessment", "verify"), "conduct_audit"),
+        (("incident", "response", "emergency"), "plan_incident_response"),
+        (("report", "documentation"), "generate_report"),
+        (("update", "regulatory change"), "monitor_updates"),
+    ],
+}
+
+
+def get_target_nodes(agent_type: str) -> Tuple[str, ...]:
+    """
+    Get the nodes a task for an agent type can be routed to.
+
+    Args:
+        agent_type: The specialist agent type
+
+    Returns:
+        The routable node names
+    """
+    return tuple(dict.fromkeys(node for _, node in TASK_ROUTES.get(agent_type, [])))
+
+
+def resolve_target_node(agent_type: str, task: str, target_node: Optional[str] = None) -> Optional[str]:
+    """
+    Choose the graph node that should handle a delegated task.
+
+    Args:
+        agent_type: The specialist agent type
+        task: The task description
+        target_node: Node named by the coordinator's assignment, if any
+
+    Returns:
+        The node name, or None to run the whole graph
+    """
+    if target_node and target_node in get_target_nodes(agent_type):
+        return target_node
+
+    task_lower = task.lower()
+    for keywords, node in TASK_ROUTES.get(agent_type, []):
+        if any(keyword in task_lower for keyword in keywords):
+            return node
+    return None
+
+
+def add_pipeline_edges(workflow, steps: Sequence[str], entry_point: Optional[str] = None) -> None:
+    """
+    Add the edges and entry point of a sequential specialist graph.
+
+    Without a target step the steps run in order. With one, the steps run in
+    order up to the target step, which then goes straight to the last
+    (response) step.
+
+    Args:
+        workflow: The StateGraph being built
+        steps: Node names in order, ending with the response node
+        entry_point: Target step of a delegated task, or None to run all steps
+
+    Raises:
+        ValueError: If entry_point is not one of the steps
+    """
+    from langgraph.graph import END
+
+    if entry_point is not None:
+        if entry_point not in steps:
+            raise ValueError(f"Unknown entry point: {entry_point}")
+        steps = list(steps[:steps.index(entry_point) + 1]) + [steps[-1]]
+        # The response step may itself be the target
+        steps = list(dict.fromkeys(steps))
+
+    for source, target in zip(steps, steps[1:]):
+        workflow.add_edge(source, target)
+    workflow.set_entry_point(steps[0])
+    workflow.add_edge(steps[-1], END)
@@ -13,9 +13,27 @@ from app.web.router_additional import router as additional_router
 from app.subscription.router import router as subscription_router
 from app.agents.api_router import router as agent_router
 from app.middleware.tenant import tenant_middleware
+from app.auth.user_cache import get_user_cache_stats
+from app.subscription.entitlements import get_entitlement_cache_stats
+from app.middleware.tenant_cache import get_organization_cache_stats, shutdown_organization_cache_listener
 from app.db.base import engine
-from app.config import validate_config
-from app.utils.logging_utils import setup_logger, log_api_request, flush_telemetry
+from app.db.session import get_request_db_checkouts, get_db_pool_stats
+from app.db.async_session import get_async_db_pool_stats, dispose_async_engine
+from app.config import validate_config, AGENT_GRAPH_WARMUP
+from app.agents.graph_registry import get_graph_registry
+from app.state.state_cache import get_conversation_state_cache
+from app.state.write_behind import get_state_flusher, flush_state_writes
+from app.services.context_extraction_queue import get_context_extraction_queue, shutdown_context_extraction_queue
+from app.services.idempotency import get_idempotency_stats
+from app.utils.mcp_adapter import close_mcp_connections
+from app.utils.llm_cache import get_llm_cache_stats
+from app.utils.single_flight import get_single_flight_stats
+from app.utils.structured_output import get_structured_output_stats
+from app.utils.llm_rate_limiter import get_llm_rate_limiter_stats
+from app.utils.llm_resilience import get_llm_resilience_stats, shutdown_llm_resilience
+from app.graphs.delegation import shutdown_delegation_executor
+from app.graphs.prompt_registry import get_prompt_cache_stats
+from app.utils.logging_utils import setup_logger, log_api_request, flush_telemetry, get_telemetry_stats
 
 # Set up logger for the SaaS application
 logger = setup_logger(
@@ -64,7 +82,7 @@ class RequestTimingMiddleware(BaseHTTPMiddleware):
             # Handle cases where AuthenticationMiddleware is not installed
             user_id = None
         
-        # Log the request
+        # Log the request with the database pool checkouts it made up to the response
         log_api_request(
             logger=logger,
             method=request.method,
@@ -72,7 +90,8 @@ class RequestTimingMiddleware(BaseHTTPMiddleware):
             status_code=response.status_code,
             duration_ms=duration_ms,
             user_id=user_id,
-            organization_id=organization_id
+            organization_id=organization_id,
+            db_checkouts=get_request_db_checkouts(request)
         )
         
         return response
@@ -112,7 +131,13 @@ async def startup_event():
             logger.info("Azure Application Insights is configured")
         else:
             logger.warning("Azure Application Insights is not configured - telemetry will not be sent")
-            
+
+        # Compile agent graphs once per worker before serving traffic
+        if AGENT_GRAPH_WARMUP:
+            warm_up_results = get_graph_registry().warm_up()
+            compiled = [agent_type for agent_type, ok in warm_up_results.items() if ok]
+            logger.info(f"Warmed up {len(compiled)} agent graphs: {', '.join(compiled)}")
+
     except ValueError as e:
         logger.error(f"Configuration validation error: {str(e)}")
         # Log the error but don't crash the application
@@ -125,6 +150,27 @@ async def shutdown_event():
     """
     logger.info("Application shutting down")
     
+    # Write agent states that are still pending
+    flush_state_writes()
+    
+    # Stop background context extraction
+    shutdown_context_extraction_queue()
+    
+    # Close pooled MCP server connections
+    close_mcp_connections()
+    
+    # Stop threads running hedged LLM calls
+    shutdown_llm_resilience()
+    
+    # Stop threads running delegated specialist tasks
+    shutdown_delegation_executor()
+    
+    # Stop listening for organization cache invalidations
+    shutdown_organization_cache_listener()
+    
+    # Close the async engine's connections
+    await dispose_async_engine()
+    
     # Flush any pending telemetry
     flush_telemetry()
 
@@ -201,6 +247,7 @@ async def detailed_health_check():
         # Import required modules for agent testing
         from app.db.session import get_db
         from app.agents.agent_factory import get_agent_factory
+        from app.agents.execution import invoke_agent_graph
         import uuid
         
         # Create a test database session
@@ -233,7 +280,7 @@ async def detailed_health_check():
             state["messages"].append(test_message)
             
             # Run the agent graph
-            result = agent["graph"].invoke(state)
+            result = await invoke_agent_graph(agent["graph"], state)
             
             # Extract the response
             assistant_messages = [
@@ -299,6 +346,23 @@ async def detailed_health_check():
         "environment": os.getenv("ENVIRONMENT", "development"),
         "real_agents_available": real_agents_available,
         "agent_test": agent_test_result,
+        "graph_registry": get_graph_registry().get_stats(),
+        "db_pool": get_db_pool_stats(),
+        "async_db_pool": get_async_db_pool_stats(),
+        "organization_cache": get_organization_cache_stats(),
+        "user_cache": get_user_cache_stats(),
+        "entitlement_cache": get_entitlement_cache_stats(),
+        "state_cache": get_conversation_state_cache().get_stats(),
+        "state_write_behind": get_state_flusher().get_stats(),
+        "context_extraction_queue": get_context_extraction_queue().get_stats(),
+        "idempotency": get_idempotency_stats(),
+        "llm_cache": get_llm_cache_stats(),
+        "single_flight": get_single_flight_stats(),
+        "structured_output": get_structured_output_stats(),
+        "llm_rate_limiter": get_llm_rate_limiter_stats(),
+        "llm_resilience": get_llm_resilience_stats(),
+        "prompt_cache": get_prompt_cache_stats(),
+        "telemetry": get_telemetry_stats(),
         "use_real_agents": os.getenv("USE_REAL_AGENTS", "false").lower() == "true"
     }
 
@@ -1,8 +1,13 @@
 from fastapi import Request, Depends
 from sqlalchemy.orm import Session
 from typing import Optional
-from app.db.session import get_db
+from app.db.session import get_db, begin_request_db, get_request_db, close_request_db
 from app.db.models_saas import Organization
+from app.middleware.tenant_cache import (
+    get_organization_cache,
+    get_organization_snapshot,
+    organization_from_snapshot
+)
 
 
 async def extract_tenant_id(request: Request) -> Optional[int]:
@@ -11,7 +16,7 @@ async def extract_tenant_id(request: Request) -> Optional[int]:
     
     Tries to extract tenant ID from:
     1. Header (X-Tenant-ID)
-    2. Subdomain
+    2. Subdomain, resolved through the organization cache
     3. Path parameter
     
     Args:
@@ -31,10 +36,18 @@ async def extract_tenant_id(request: Request) -> Optional[int]:
         subdomain = host.split(".")[0]
         if subdomain != "www" and subdomain:
             # Look up organization by slug
-            db = request.state.db
-            org = db.query(Organization).filter(Organization.slug == subdomain).first()
-            if org:
-                return org.id
+            cache = get_organization_cache()
+            cached, org_id = cache.lookup_slug(subdomain)
+            if not cached:
+                db = get_request_db(request)
+                org = db.query(Organization).filter(Organization.slug == subdomain).first()
+                if org:
+                    cache.put(get_organization_snapshot(org))
+                    org_id = org.id
+                else:
+                    cache.put_slug(subdomain, None)
+            if org_id is not None:
+                return org_id
     
     # Try to get from path parameter
     if "organization_id" in request.path_params:
@@ -49,6 +62,10 @@ async def tenant_middleware(request: Request, call_next):
     """
     Middleware to extract tenant ID and set it in request state.
     
+    Also opens the request's database scope: the session is created on first
+    use, shared with the route dependencies and closed once the response body
+    has been sent.
+    
     Args:
         request: FastAPI request
         call_next: Next middleware or route handler
@@ -60,11 +77,8 @@ async def tenant_middleware(request: Request, call_next):
     if request.url.path == "/health" or request.url.path.startswith(("/static/", "/saas/")):
         return await call_next(request)
     
+    begin_request_db(request)
     try:
-        # Get DB session
-        db = next(get_db())
-        request.state.db = db
-        
         # Extract tenant ID
         tenant_id = await extract_tenant_id(request)
         request.state.tenant_id = tenant_id
@@ -75,8 +89,26 @@ async def tenant_middleware(request: Request, call_next):
         pass
     
     # Continue with request
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+    except BaseException:
+        close_request_db(request)
+        raise
+    
+    # Streaming responses still use the session while the body is sent
+    body_iterator = getattr(response, "body_iterator", None)
+    if body_iterator is None:
+        close_request_db(request)
+        return response
     
+    async def body_then_close():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            close_request_db(request)
+    
+    response.body_iterator = body_then_close()
     return response
 
 
@@ -129,6 +161,9 @@ def get_current_organization(request: Request, db: Session = Depends(get_db)) ->
     """
     Get current organization from request state.
     
+    A cached snapshot of the organization is attached to the session without
+    a query; the organization is only loaded on a cache miss.
+    
     Args:
         request: FastAPI request
         db: Database session
@@ -141,7 +176,15 @@ def get_current_organization(request: Request, db: Session = Depends(get_db)) ->
         return None
     
     try:
-        return db.query(Organization).filter(Organization.id == tenant_id).first()
+        cache = get_organization_cache()
+        snapshot = cache.get(tenant_id)
+        if snapshot is not None:
+            return organization_from_snapshot(db, snapshot)
+        
+        organization = db.query(Organization).filter(Organization.id == tenant_id).first()
+        if organization:
+            cache.put(get_organization_snapshot(organization))
+        return organization
     except Exception as e:
         print(f"Error getting current organization: {e}")
         return None
@@ -0,0 +1,373 @@
+"""
+Process-wide cache of resolved tenants.
+
+The tenant middleware looked up the organization of a subdomain with a query
+on every request, and ``get_current_organization`` queried the same row again
+later in the request. This module keeps, per worker, a TTL cache mapping
+slugs to organization IDs (including slugs that match no organization) and
+organization IDs to a snapshot of the organization's columns, so tenant
+resolution does not cost a database round trip once a tenant has been seen.
+
+Entries are invalidated with ``invalidate_organization`` when an organization
+is created or changed, together with the organization's cached subscription
+entitlements (app.subscription.entitlements). With ORG_CACHE_NOTIFY enabled the invalidation is also
+sent to the other workers through PostgreSQL NOTIFY, and every worker runs a
+listener thread applying them; otherwise other workers pick up the change
+once their entries expire after ORG_CACHE_TTL_SECONDS.
+"""
+
+import json
+import select
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from app.subscription.entitlements import get_entitlement_cache
+from app.utils.logging_utils import setup_logger
+from app.utils.ttl_cache import TTLCache
+
+
+logger = setup_logger(name="tenant_cache", component="middleware")
+
+# PostgreSQL NOTIFY channel carrying organization invalidations
+NOTIFY_CHANNEL = "organization_cache"
+
+
+class OrganizationCache:
+    """
+    Per-worker TTL cache of slug lookups and organization snapshots.
+
+    Snapshots are copied on the way in and out so that callers modifying a
+    snapshot never change the cached copy.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_size: int = 10000):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry is kept (0 disables caching)
+            max_size: Maximum number of slugs and of organizations to keep
+        """
+        # slug -> organization ID, or None for an unknown slug
+        self._slugs = TTLCache(max_size=max_size, ttl=ttl)
+        # organization ID -> snapshot
+        self._organizations = TTLCache(max_size=max_size, ttl=ttl)
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything."""
+        return self._organizations.enabled
+
+    def lookup_slug(self, slug: str) -> Tuple[bool, Optional[int]]:
+        """
+        Look up the organization ID of a slug.
+
+        Args:
+            slug: The organization slug
+
+        Returns:
+            Tuple of (whether the slug is cached, organization ID or None if
+            no organization has the slug)
+        """
+        return self._slugs.lookup(slug)
+
+    def put_slug(self, slug: str, organization_id: Optional[int]) -> None:
+        """
+        Store the organization ID of a slug.
+
+        Args:
+            slug: The organization slug
+            organization_id: The organization ID, or None if no organization
+                has the slug
+        """
+        self._slugs.put(slug, organization_id)
+
+    def get(self, organization_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a copy of a cached organization snapshot.
+
+        Args:
+            organization_id: The organization ID
+
+        Returns:
+            The snapshot, or None if not cached
+        """
+        snapshot = self._organizations.get(organization_id)
+        return dict(snapshot) if snapshot is not None else None
+
+    def put(self, snapshot: Dict[str, Any]) -> None:
+        """
+        Store an organization snapshot and the organization ID of its slug.
+
+        Args:
+            snapshot: The organization's columns, including "id" and "slug"
+        """
+        self._organizations.put(snapshot["id"], dict(snapshot))
+        if snapshot.get("slug"):
+            self._slugs.put(snapshot["slug"], snapshot["id"])
+
+    def invalidate(self, organization_id: Optional[int] = None, slug: Optional[str] = None) -> None:
+        """
+        Remove an organization and its slugs from the cache.
+
+        Args:
+            organization_id: The organization ID
+            slug: The organization slug
+        """
+        if organization_id is not None:
+            self._organizations.pop(organization_id)
+            self._slugs.pop_where(lambda _, cached_id: cached_id == organization_id)
+        if slug is not None:
+            self._slugs.pop(slug)
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._slugs.clear()
+        self._organizations.clear()
+        self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with sizes, hit, miss, eviction and invalidation counts
+        """
+        slugs = self._slugs.get_stats()
+        organizations = self._organizations.get_stats()
+        return {
+            "enabled": self.enabled,
+            "slugs": slugs["size"],
+            "organizations": organizations["size"],
+            "hits": slugs["hits"] + organizations["hits"],
+            "misses": slugs["misses"] + organizations["misses"],
+            "evictions": slugs["evictions"] + organizations["evictions"],
+            "invalidations": self.invalidations
+        }
+
+
+def get_organization_snapshot(organization: Any) -> Dict[str, Any]:
+    """
+    Get the snapshot of an organization to cache.
+
+    Args:
+        organization: The Organization object
+
+    Returns:
+        Dictionary of the organization's column values
+    """
+    return {column.name: getattr(organization, column.name) for column in organization.__table__.columns}
+
+
+def organization_from_snapshot(db: Any, snapshot: Dict[str, Any]) -> Any:
+    """
+    Attach an organization snapshot to a session without loading it.
+
+    Args:
+        db: Database session
+        snapshot: The organization snapshot
+
+    Returns:
+        The Organization object of the session
+    """
+    from sqlalchemy.orm import make_transient_to_detached
+    from app.db.models_saas import Organization
+
+    organization = Organization(**snapshot)
+    make_transient_to_detached(organization)
+    return db.merge(organization, load=False)
+
+
+class OrganizationCacheListener:
+    """
+    Applies organization invalidations sent by other workers through PostgreSQL NOTIFY.
+    """
+
+    def __init__(self, cache: OrganizationCache, reconnect_interval: float = 5.0):
+        """
+        Initialize the listener.
+
+        Args:
+            cache: The cache to invalidate
+            reconnect_interval: Seconds to wait before reconnecting after an error
+        """
+        self.cache = cache
+        self.reconnect_interval = reconnect_interval
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.notifications = 0
+        self.reconnects = 0
+
+    def start(self) -> None:
+        """Start the listener thread if it is not running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="organization-cache-listener",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _listen(self) -> None:
+        from app.db.base import engine
+
+        # A dedicated connection, kept out of the pool for as long as it listens
+        connection = engine.raw_connection()
+        connection.detach()
+        try:
+            dbapi_connection = connection.driver_connection
+            dbapi_connection.autocommit = True
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            # Invalidations sent while not listening were missed
+            self.cache.clear()
+            get_entitlement_cache().clear()
+            while not self._stopped.is_set():
+                if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    notification = dbapi_connection.notifies.pop(0)
+                    self._apply(notification.payload)
+        finally:
+            connection.close()
+
+    def _apply(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring invalid organization cache notification: {payload}")
+            return
+        self.notifications += 1
+        _invalidate_local(self.cache, message.get("organization_id"), message.get("slug"))
+
+    def _run(self) -> None:
+        """Background loop listening for invalidations, reconnecting after errors."""
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                logger.error(f"Organization cache listener error: {str(e)}")
+                self.reconnects += 1
+                self._stopped.wait(self.reconnect_interval)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """
+        Stop the listener thread.
+
+        Args:
+            timeout: Seconds to wait for the thread to finish
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get listener statistics.
+
+        Returns:
+            Dictionary with running state, notification and reconnect counts
+        """
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "notifications": self.notifications,
+            "reconnects": self.reconnects
+        }
+
+
+# Global cache and listener instances
+_organization_cache: Optional[OrganizationCache] = None
+_organization_cache_listener: Optional[OrganizationCacheListener] = None
+_organization_cache_lock = threading.Lock()
+
+
+def get_organization_cache() -> OrganizationCache:
+    """
+    Get the process-wide organization cache.
+
+    The first call also starts the invalidation listener if ORG_CACHE_NOTIFY
+    is enabled.
+
+    Returns:
+        OrganizationCache instance
+    """
+    global _organization_cache, _organization_cache_listener
+    if _organization_cache is None:
+        with _organization_cache_lock:
+            if _organization_cache is None:
+                from app import config
+
+                cache = OrganizationCache(
+                    ttl=config.ORG_CACHE_TTL_SECONDS,
+                    max_size=config.ORG_CACHE_MAX_ENTRIES
+                )
+                if config.ORG_CACHE_NOTIFY and cache.enabled:
+                    _organization_cache_listener = OrganizationCacheListener(cache)
+                    _organization_cache_listener.start()
+                _organization_cache = cache
+    return _organization_cache
+
+
+def _invalidate_local(cache: OrganizationCache, organization_id: Optional[int], slug: Optional[str]) -> None:
+    cache.invalidate(organization_id=organization_id, slug=slug)
+    if organization_id is not None:
+        get_entitlement_cache().invalidate(organization_id)
+
+
+def invalidate_organization(organization_id: Optional[int] = None, slug: Optional[str] = None) -> None:
+    """
+    Invalidate a changed organization in this worker and, with ORG_CACHE_NOTIFY, in all workers.
+
+    Both the cached tenant and the cached subscription entitlements of the
+    organization are invalidated. Call it after the change has been committed.
+
+    Args:
+        organization_id: The organization ID
+        slug: The organization slug
+    """
+    from app import config
+
+    _invalidate_local(get_organization_cache(), organization_id, slug)
+    if not config.ORG_CACHE_NOTIFY:
+        return
+
+    from sqlalchemy import text
+    from app.db.base import engine
+
+    payload = json.dumps({"organization_id": organization_id, "slug": slug})
+    try:
+        with engine.begin() as connection:
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": NOTIFY_CHANNEL, "payload": payload}
+            )
+    except Exception as e:
+        logger.error(f"Error sending organization cache invalidation: {str(e)}")
+
+
+def get_organization_cache_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get organization cache statistics.
+
+    Returns:
+        Cache statistics including the listener's, or None if no tenant was resolved yet
+    """
+    if _organization_cache is None:
+        return None
+    stats = _organization_cache.get_stats()
+    if _organization_cache_listener is not None:
+        stats["listener"] = _organization_cache_listener.get_stats()
+    return stats
+
+
+def shutdown_organization_cache_listener() -> None:
+    """Stop the organization cache invalidation listener if it is running."""
+    if _organization_cache_listener is not None:
+        _organization_cache_listener.shutdown()
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 
 from pydantic import BaseModel, Field
 
@@ -174,6 +174,85 @@ class AgentAssignment(BaseModel):
     status: str = "pending"
 
 
+# Structured LLM output schemas used by the coordinator graph
+class ExtractedEventDetails(BaseModel):
+    """Basic event details extracted from the conversation."""
+    
+    event_type: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    attendee_count: Optional[int] = None
+    scale: Optional[str] = None
+
+
+class ExtractedTimeline(BaseModel):
+    """Timeline extracted from the conversation."""
+    
+    start_date: Optional[str] = Field(default=None, description="Start date as mentioned, ISO 8601 if possible")
+    end_date: Optional[str] = Field(default=None, description="End date as mentioned, ISO 8601 if possible")
+    key_milestones: List[str] = Field(default_factory=list)
+
+
+class ExtractedBudget(BaseModel):
+    """Budget information extracted from the conversation."""
+    
+    range: Optional[str] = Field(default=None, description="Budget or budget range, e.g. '$50,000' or '$40,000-60,000'")
+    allocation_priorities: List[str] = Field(default_factory=list)
+
+
+class ExtractedLocation(BaseModel):
+    """Location information extracted from the conversation."""
+    
+    preferences: List[str] = Field(default_factory=list)
+    venue_type: Optional[str] = None
+    space_requirements: Optional[str] = None
+
+
+class InformationCollected(BaseModel):
+    """Information categories sufficiently addressed in the conversation."""
+    
+    basic_details: bool = False
+    timeline: bool = False
+    budget: bool = False
+    location: bool = False
+    stakeholders: bool = False
+    resources: bool = False
+    success_criteria: bool = False
+    risks: bool = False
+
+
+class RequirementsExtraction(Requirements):
+    """Event requirements extracted from the conversation by the coordinator."""
+    
+    event_details: ExtractedEventDetails = Field(default_factory=ExtractedEventDetails)
+    timeline: ExtractedTimeline = Field(default_factory=ExtractedTimeline)
+    budget: ExtractedBudget = Field(default_factory=ExtractedBudget)
+    location: ExtractedLocation = Field(default_factory=ExtractedLocation)
+    information_collected: InformationCollected = Field(default_factory=InformationCollected)
+
+
+class DelegatedTask(BaseModel):
+    """Task the coordinator delegates to a specialist agent."""
+    
+    agent_type: Literal[
+        "resource_planning",
+        "financial",
+        "stakeholder_management",
+        "marketing_communications",
+        "project_management",
+        "analytics",
+        "compliance_security"
+    ]
+    task: str
+    target_node: Optional[str] = Field(default=None, description="Agent step that should handle the task, if one fits")
+
+
+class DelegationPlan(BaseModel):
+    """Tasks the coordinator delegates to specialist agents."""
+    
+    assignments: List[DelegatedTask] = Field(default_factory=list)
+
+
 class CoordinatorState(BaseModel):
     """Schema for coordinator agent state."""
     
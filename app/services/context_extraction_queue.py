@@ -0,0 +1,468 @@
+"""
+Background queue for LLM context extraction of user messages.
+
+TenantConversationService.add_message used to run an LLM extraction call for
+every user message before the agent could start. Extraction jobs are now put
+on this queue and processed by worker threads, which update the
+ConversationContext once the LLM has answered. When the queue is full the
+service falls back to the inline pattern-based extraction instead of waiting.
+
+Jobs are held by a pluggable backend: an in-process queue (default) or a
+PostgreSQL table that survives restarts and is shared by all workers.
+"""
+
+import abc
+import os
+import queue
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_
+
+from app import config
+from app.db.base import SessionLocal
+from app.db.models_tenant_conversations import ContextExtractionJob
+from app.utils.logging_utils import setup_logger, log_performance_metric
+
+
+logger = setup_logger(name="context_extraction_queue", component="services")
+
+
+class ContextJobBackend(abc.ABC):
+    """
+    Storage for pending context extraction jobs.
+
+    A job is a dictionary with organization_id, user_id, conversation_id,
+    message_id, content and timestamp (ISO format).
+    """
+
+    @abc.abstractmethod
+    def put(self, job: Dict[str, Any]) -> bool:
+        """
+        Add a job.
+
+        Args:
+            job: The job to add
+
+        Returns:
+            True if the job was accepted, False if the backend is full
+        """
+
+    @abc.abstractmethod
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Take the next job, waiting up to timeout seconds.
+
+        Args:
+            timeout: Seconds to wait for a job
+
+        Returns:
+            The job, or None if none became available
+        """
+
+    def task_done(self, job: Dict[str, Any], error: Optional[str] = None) -> None:
+        """
+        Mark a job as finished.
+
+        Args:
+            job: The job returned by get
+            error: Error message if processing failed
+        """
+
+    @abc.abstractmethod
+    def qsize(self) -> int:
+        """
+        Get the number of pending jobs.
+
+        Returns:
+            Number of pending jobs
+        """
+
+
+class InMemoryContextJobBackend(ContextJobBackend):
+    """Bounded in-process job queue. Pending jobs are lost on restart."""
+
+    def __init__(self, max_size: int = 1000):
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_size)
+
+    def put(self, job: Dict[str, Any]) -> bool:
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def task_done(self, job: Dict[str, Any], error: Optional[str] = None) -> None:
+        self._queue.task_done()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+class PostgresContextJobBackend(ContextJobBackend):
+    """
+    Job queue stored in the context_extraction_jobs table.
+
+    Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    processes can share the table. A claimed job is leased to its worker for
+    lease_seconds; jobs whose lease expired, e.g. because their process died,
+    are claimed again by any worker. Finished jobs are deleted; failed jobs are
+    retried up to max_attempts times.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        poll_interval: float = 1.0,
+        max_attempts: int = 3,
+        lease_seconds: float = 300.0
+    ):
+        self.max_size = max_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    def put(self, job: Dict[str, Any]) -> bool:
+        db = SessionLocal()
+        try:
+            if self._pending_count(db) >= self.max_size:
+                return False
+
+            db.add(ContextExtractionJob(
+                organization_id=job["organization_id"],
+                user_id=job.get("user_id"),
+                conversation_id=job["conversation_id"],
+                message_id=job["message_id"],
+                content=job["content"],
+                message_timestamp=datetime.fromisoformat(job["timestamp"]),
+                status="pending",
+                attempts=0
+            ))
+            db.commit()
+            return True
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error queueing context extraction job: {str(e)}")
+            return False
+        finally:
+            db.close()
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        deadline = time.time() + timeout
+        while True:
+            job = self._claim_next()
+            if job is not None or time.time() >= deadline:
+                return job
+            time.sleep(min(self.poll_interval, max(deadline - time.time(), 0)))
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """Claim the oldest pending or abandoned job, or return None if there is none."""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            lease_expired = now - timedelta(seconds=self.lease_seconds)
+            row = db.query(ContextExtractionJob).filter(
+                or_(
+                    ContextExtractionJob.status == "pending",
+                    and_(
+                        ContextExtractionJob.status == "processing",
+                        or_(
+                            ContextExtractionJob.locked_at.is_(None),
+                            ContextExtractionJob.locked_at < lease_expired
+                        )
+                    )
+                )
+            ).order_by(ContextExtractionJob.id).with_for_update(skip_locked=True).first()
+
+            if row is None:
+                db.commit()
+                return None
+
+            if row.status == "processing":
+                logger.warning(
+                    f"Reclaiming context extraction job {row.id} whose lease held by "
+                    f"{row.worker_id} expired"
+                )
+            row.status = "processing"
+            row.attempts += 1
+            row.locked_at = now
+            row.worker_id = self.worker_id
+            job = {
+                "job_id": row.id,
+                "attempts": row.attempts,
+                "organization_id": row.organization_id,
+                "user_id": row.user_id,
+                "conversation_id": row.conversation_id,
+                "message_id": row.message_id,
+                "content": row.content,
+                "timestamp": row.message_timestamp.isoformat()
+            }
+            db.commit()
+            return job
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error claiming context extraction job: {str(e)}")
+            return None
+        finally:
+            db.close()
+
+    def task_done(self, job: Dict[str, Any], error: Optional[str] = None) -> None:
+        db = SessionLocal()
+        try:
+            # Only touch the job while still holding its lease; once it was
+            # reclaimed, the worker that took it over completes it
+            query = db.query(ContextExtractionJob).filter(
+                ContextExtractionJob.id == job["job_id"],
+                ContextExtractionJob.worker_id == self.worker_id,
+                ContextExtractionJob.attempts == job["attempts"]
+            )
+            released = {"locked_at": None, "worker_id": None, "last_error": error}
+            if error is None:
+                query.delete(synchronize_session=False)
+            elif job["attempts"] >= self.max_attempts:
+                query.update({"status": "failed", **released}, synchronize_session=False)
+            else:
+                query.update({"status": "pending", **released}, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error completing context extraction job {job.get('job_id')}: {str(e)}")
+        finally:
+            db.close()
+
+    def qsize(self) -> int:
+        db = SessionLocal()
+        try:
+            return self._pending_count(db)
+        except Exception:
+            return 0
+        finally:
+            db.close()
+
+    @staticmethod
+    def _pending_count(db) -> int:
+        return db.query(func.count(ContextExtractionJob.id)).filter(
+            ContextExtractionJob.status.in_(("pending", "processing"))
+        ).scalar() or 0
+
+
+class ContextExtractionQueue:
+    """
+    Runs context extraction jobs on background worker threads.
+    """
+
+    def __init__(self, backend: ContextJobBackend, num_workers: int = 2):
+        """
+        Initialize the queue.
+
+        Args:
+            backend: Storage for pending jobs
+            num_workers: Number of worker threads
+        """
+        self.backend = backend
+        self.num_workers = num_workers
+        self._workers: List[threading.Thread] = []
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+
+    def submit(
+        self,
+        organization_id: int,
+        user_id: Optional[int],
+        conversation_id: int,
+        message_id: int,
+        content: str,
+        timestamp: datetime
+    ) -> bool:
+        """
+        Queue a message for context extraction.
+
+        Args:
+            organization_id: Organization ID
+            user_id: User ID
+            conversation_id: Conversation ID
+            message_id: Message ID
+            content: Message content
+            timestamp: Message timestamp
+
+        Returns:
+            True if queued, False if the queue is saturated
+        """
+        self._ensure_started()
+        accepted = self.backend.put({
+            "organization_id": organization_id,
+            "user_id": user_id,
+            "conversation_id": conversation_id,
+            "message_id": message_id,
+            "content": content,
+            "timestamp": timestamp.isoformat()
+        })
+        with self._lock:
+            if accepted:
+                self.submitted += 1
+            else:
+                self.rejected += 1
+        return accepted
+
+    def _ensure_started(self) -> None:
+        """Start the worker threads if they are not running."""
+        if self._workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            self._stopped.clear()
+            for index in range(self.num_workers):
+                worker = threading.Thread(
+                    target=self._run,
+                    name=f"context-extraction-{index}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _run(self) -> None:
+        """Worker loop."""
+        while not self._stopped.is_set():
+            job = self.backend.get(timeout=1.0)
+            if job is None:
+                continue
+
+            error = None
+            try:
+                self._process(job)
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Context extraction failed for message {job.get('message_id')}: {error}")
+            finally:
+                self.backend.task_done(job, error)
+
+            with self._lock:
+                if error is None:
+                    self.processed += 1
+                else:
+                    self.failed += 1
+
+    def _process(self, job: Dict[str, Any]) -> None:
+        """
+        Run the LLM extraction for a job and store the result.
+
+        Args:
+            job: The job to process
+        """
+        # Imported here to avoid a circular import with the service module
+        from app.services.tenant_conversation_service import TenantConversationService
+
+        start_time = time.time()
+        db = SessionLocal()
+        try:
+            service = TenantConversationService(
+                db=db,
+                organization_id=job["organization_id"],
+                user_id=job.get("user_id")
+            )
+            extracted_context = service._extract_context_from_message(job["content"])
+            service._apply_context_extraction(
+                conversation_id=job["conversation_id"],
+                message_id=job["message_id"],
+                content=job["content"],
+                timestamp=job["timestamp"],
+                extracted_context=extracted_context
+            )
+        finally:
+            db.close()
+
+        log_performance_metric(
+            logger=logger,
+            name="context_extraction_job",
+            value=(time.time() - start_time) * 1000,
+            component="services",
+            organization_id=job["organization_id"]
+        )
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """
+        Stop the worker threads.
+
+        Jobs still pending in the in-memory backend are dropped; the
+        PostgreSQL backend keeps them for the next start.
+
+        Args:
+            timeout: Seconds to wait for each worker to finish its current job
+        """
+        self._stopped.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics.
+
+        Returns:
+            Dictionary with pending, submitted, rejected, processed and failed counts
+        """
+        with self._lock:
+            return {
+                "pending": self.backend.qsize(),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "processed": self.processed,
+                "failed": self.failed
+            }
+
+
+# Global queue instance
+_context_queue = None
+_context_queue_lock = threading.Lock()
+
+
+def get_context_extraction_queue() -> ContextExtractionQueue:
+    """
+    Get the process-wide context extraction queue.
+
+    The backend is selected with CONTEXT_EXTRACTION_BACKEND ("memory" or "postgres").
+
+    Returns:
+        ContextExtractionQueue instance
+    """
+    global _context_queue
+    if _context_queue is None:
+        with _context_queue_lock:
+            if _context_queue is None:
+                if config.CONTEXT_EXTRACTION_BACKEND == "postgres":
+                    backend = PostgresContextJobBackend(
+                        max_size=config.CONTEXT_EXTRACTION_QUEUE_SIZE,
+                        lease_seconds=config.CONTEXT_EXTRACTION_LEASE_SECONDS
+                    )
+                else:
+                    backend = InMemoryContextJobBackend(max_size=config.CONTEXT_EXTRACTION_QUEUE_SIZE)
+                _context_queue = ContextExtractionQueue(
+                    backend=backend,
+                    num_workers=config.CONTEXT_EXTRACTION_WORKERS
+                )
+    return _context_queue
+
+
+def shutdown_context_extraction_queue() -> None:
+    """
+    Stop the context extraction workers.
+
+    Call this on application shutdown.
+    """
+    if _context_queue is not None:
+        _context_queue.shutdown()
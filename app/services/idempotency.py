@@ -0,0 +1,485 @@
+"""
+Idempotency-Key handling for agent message submissions.
+
+Clients retry ``POST /api/agents/message`` when a request times out, and every
+retry used to record the user message again and run the full agent graph. A
+submission sent with an ``Idempotency-Key`` header now claims the key first:
+
+- The first submission runs the agent and stores its response under the key.
+- A retry after completion gets the stored response replayed.
+- A retry while the original is still running waits for it: in the same
+  worker it is attached to the running submission, in another worker it
+  polls the store until the response is available.
+- Reusing a key for a different request is rejected.
+
+A failed or cancelled run releases its key, so the client can retry it.
+Keys are scoped to the organization and user and expire after
+IDEMPOTENCY_TTL_SECONDS. Expired records are deleted when keys are claimed,
+at most once per purge interval per worker.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from app.utils.logging_utils import setup_logger
+
+
+logger = setup_logger(name="idempotency", component="services")
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_COMPLETED = "completed"
+
+
+class IdempotencyKeyReusedError(Exception):
+    """Raised when an idempotency key is sent again with a different request."""
+
+
+class IdempotencyInProgressError(Exception):
+    """Raised when the original submission is still running after the maximum wait."""
+
+
+def get_scope_key(organization_id: int, user_id: int, idempotency_key: str) -> str:
+    """
+    Get the stored key for a client's idempotency key.
+
+    Args:
+        organization_id: The organization ID
+        user_id: The user ID
+        idempotency_key: The Idempotency-Key header value
+
+    Returns:
+        SHA-256 hex digest
+    """
+    payload = "\n".join((str(organization_id), str(user_id), idempotency_key))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_request_fingerprint(**request: Any) -> str:
+    """
+    Get the fingerprint of a request body.
+
+    Args:
+        request: The request fields
+
+    Returns:
+        SHA-256 hex digest of the fields
+    """
+    payload = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class InMemoryIdempotencyStore:
+    """Idempotency records kept in the process, for single-worker deployments and tests."""
+
+    def __init__(self, purge_interval: float = 300.0):
+        """
+        Initialize the store.
+
+        Args:
+            purge_interval: Seconds between deletions of expired records
+        """
+        self.purge_interval = purge_interval
+        self._next_purge = time.time() + purge_interval
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def claim(
+        self,
+        key: str,
+        organization_id: int,
+        fingerprint: str,
+        ttl: float,
+        lock_seconds: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Claim a key for a new run.
+
+        Args:
+            key: The scope key
+            organization_id: The organization ID
+            fingerprint: The request fingerprint
+            ttl: Seconds the record is kept
+            lock_seconds: Seconds after which an unfinished run is considered dead
+
+        Returns:
+            None if the caller now owns the key, otherwise the existing record
+            with fingerprint, status and response
+        """
+        now = time.time()
+        with self._lock:
+            if now >= self._next_purge:
+                self._next_purge = now + self.purge_interval
+                expired = [record_key for record_key, record in self._records.items() if record["expires_at"] <= now]
+                for record_key in expired:
+                    del self._records[record_key]
+            record = self._records.get(key)
+            if (
+                record is None
+                or record["expires_at"] <= now
+                or (record["status"] == STATUS_IN_PROGRESS and record["created_at"] <= now - lock_seconds)
+            ):
+                self._records[key] = {
+                    "fingerprint": fingerprint,
+                    "status": STATUS_IN_PROGRESS,
+                    "response": None,
+                    "created_at": now,
+                    "expires_at": now + ttl
+                }
+                return None
+            return dict(record)
+
+    def complete(self, key: str, response: Dict[str, Any]) -> None:
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                record["status"] = STATUS_COMPLETED
+                record["response"] = response
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+
+
+class PostgresIdempotencyStore:
+    """Idempotency records stored in the agent_idempotency_keys table, shared by all workers."""
+
+    def __init__(self, purge_interval: float = 300.0):
+        """
+        Initialize the store.
+
+        Args:
+            purge_interval: Seconds between deletions of expired records
+        """
+        self.purge_interval = purge_interval
+        self._next_purge = time.monotonic() + purge_interval
+        self._purge_lock = threading.Lock()
+        self.purged = 0
+
+    def claim(
+        self,
+        key: str,
+        organization_id: int,
+        fingerprint: str,
+        ttl: float,
+        lock_seconds: float
+    ) -> Optional[Dict[str, Any]]:
+        from sqlalchemy.dialects.postgresql import insert
+        from app.db.base import SessionLocal
+        from app.db.models_tenant_conversations import AgentIdempotencyKey
+
+        now = datetime.utcnow()
+        values = {
+            "request_fingerprint": fingerprint,
+            "status": STATUS_IN_PROGRESS,
+            "response": None,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=ttl)
+        }
+        db = SessionLocal()
+        try:
+            result = db.execute(insert(AgentIdempotencyKey.__table__).values(
+                idempotency_key=key,
+                organization_id=organization_id,
+                **values
+            ).on_conflict_do_nothing(index_elements=["idempotency_key"]))
+            if result.rowcount == 1:
+                db.commit()
+                self._purge_if_due()
+                return None
+
+            record = db.query(AgentIdempotencyKey).filter(
+                AgentIdempotencyKey.idempotency_key == key
+            ).with_for_update().first()
+            if (
+                record is None
+                or record.expires_at <= now
+                or (
+                    record.status == STATUS_IN_PROGRESS
+                    and record.created_at <= now - timedelta(seconds=lock_seconds)
+                )
+            ):
+                if record is None:
+                    db.execute(insert(AgentIdempotencyKey.__table__).values(
+                        idempotency_key=key,
+                        organization_id=organization_id,
+                        **values
+                    ).on_conflict_do_nothing(index_elements=["idempotency_key"]))
+                else:
+                    for name, value in values.items():
+                        setattr(record, name, value)
+                db.commit()
+                return None
+
+            existing = {
+                "fingerprint": record.request_fingerprint,
+                "status": record.status,
+                "response": json.loads(record.response) if record.response else None
+            }
+            db.commit()
+            return existing
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _purge_if_due(self) -> None:
+        """Delete expired records if the purge interval has passed."""
+        with self._purge_lock:
+            if time.monotonic() < self._next_purge:
+                return
+            self._next_purge = time.monotonic() + self.purge_interval
+
+        try:
+            self.purge_expired()
+        except Exception as e:
+            logger.warning(f"Purging expired idempotency keys failed: {str(e)}")
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired records, including their stored responses.
+
+        Returns:
+            Number of deleted records
+        """
+        from app.db.base import SessionLocal
+        from app.db.models_tenant_conversations import AgentIdempotencyKey
+
+        db = SessionLocal()
+        try:
+            deleted = db.query(AgentIdempotencyKey).filter(
+                AgentIdempotencyKey.expires_at < datetime.utcnow()
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.purged += deleted
+        return deleted
+
+    def complete(self, key: str, response: Dict[str, Any]) -> None:
+        from app.db.base import SessionLocal
+        from app.db.models_tenant_conversations import AgentIdempotencyKey
+
+        db = SessionLocal()
+        try:
+            db.query(AgentIdempotencyKey).filter(
+                AgentIdempotencyKey.idempotency_key == key
+            ).update(
+                {"status": STATUS_COMPLETED, "response": json.dumps(response, default=str)},
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def release(self, key: str) -> None:
+        from app.db.base import SessionLocal
+        from app.db.models_tenant_conversations import AgentIdempotencyKey
+
+        db = SessionLocal()
+        try:
+            db.query(AgentIdempotencyKey).filter(
+                AgentIdempotencyKey.idempotency_key == key,
+                AgentIdempotencyKey.status == STATUS_IN_PROGRESS
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+class IdempotencyManager:
+    """
+    Claims idempotency keys and attaches duplicate submissions to the original run.
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        ttl: float = 86400.0,
+        max_wait: float = 120.0,
+        lock_seconds: float = 600.0,
+        poll_interval: float = 0.5
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            store: The record store
+            ttl: Seconds a response is kept for replay
+            max_wait: Seconds a duplicate waits for the original run
+            lock_seconds: Seconds after which an unfinished run is considered dead
+            poll_interval: Seconds between store lookups while the original
+                runs in another worker
+        """
+        self.store = store
+        self.ttl = ttl
+        self.max_wait = max_wait
+        self.lock_seconds = lock_seconds
+        self.poll_interval = poll_interval
+        # Runs owned by this worker: scope key -> (fingerprint, future of the response)
+        self._running: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {"runs": 0, "replayed": 0, "attached": 0, "rejected": 0}
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    async def acquire(self, key: str, organization_id: int, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim a key, or get the response of the submission that owns it.
+
+        Args:
+            key: The scope key from get_scope_key
+            organization_id: The organization ID
+            fingerprint: The request fingerprint
+
+        Returns:
+            None if the caller owns the key and must run the request and then
+            call complete or release, otherwise the response to replay
+
+        Raises:
+            IdempotencyKeyReusedError: If the key belongs to a different request
+            IdempotencyInProgressError: If the original run did not finish in time
+        """
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            running = self._running.get(key)
+            if running is not None:
+                running_fingerprint, future = running
+                if running_fingerprint != fingerprint:
+                    self._count("rejected")
+                    raise IdempotencyKeyReusedError("Idempotency-Key was already used for a different request")
+                try:
+                    response = await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    raise IdempotencyInProgressError("A request with this Idempotency-Key is still in progress")
+                except Exception:
+                    # The original run failed and released the key
+                    if future.done():
+                        continue
+                    raise
+                self._count("attached")
+                return response
+
+            record = await asyncio.to_thread(
+                self.store.claim, key, organization_id, fingerprint, self.ttl, self.lock_seconds
+            )
+            if record is None:
+                future = asyncio.get_running_loop().create_future()
+                # Read the outcome so an unawaited failure is not reported
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+                self._running[key] = (fingerprint, future)
+                self._count("runs")
+                return None
+
+            if record["fingerprint"] != fingerprint:
+                self._count("rejected")
+                raise IdempotencyKeyReusedError("Idempotency-Key was already used for a different request")
+            if record["status"] == STATUS_COMPLETED:
+                self._count("replayed")
+                return record["response"]
+
+            # The original run is in another worker
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgressError("A request with this Idempotency-Key is still in progress")
+            await asyncio.sleep(self.poll_interval)
+
+    async def complete(self, key: str, response: Dict[str, Any]) -> None:
+        """
+        Store the response of a run that owns its key.
+
+        Args:
+            key: The scope key
+            response: The response to replay for duplicates
+        """
+        try:
+            await asyncio.to_thread(self.store.complete, key, response)
+        except Exception as e:
+            logger.error(f"Error storing idempotent response: {str(e)}")
+        running = self._running.pop(key, None)
+        if running is not None and not running[1].done():
+            running[1].set_result(response)
+
+    async def release(self, key: str) -> None:
+        """
+        Release the key of a run that failed, so the request can be retried.
+
+        Args:
+            key: The scope key
+        """
+        running = self._running.pop(key, None)
+        if running is not None and not running[1].done():
+            running[1].set_exception(RuntimeError("The original request failed"))
+        try:
+            await asyncio.to_thread(self.store.release, key)
+        except Exception as e:
+            logger.error(f"Error releasing idempotency key: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["running"] = len(self._running)
+        return stats
+
+
+_idempotency_manager: Optional[IdempotencyManager] = None
+_idempotency_manager_lock = threading.Lock()
+
+
+def get_idempotency_manager() -> Optional[IdempotencyManager]:
+    """
+    Get the process-wide idempotency manager.
+
+    Returns:
+        IdempotencyManager instance, or None if IDEMPOTENCY_ENABLED is false
+    """
+    global _idempotency_manager
+    from app import config
+
+    if not config.IDEMPOTENCY_ENABLED:
+        return None
+    if _idempotency_manager is None:
+        with _idempotency_manager_lock:
+            if _idempotency_manager is None:
+                if config.IDEMPOTENCY_BACKEND == "memory":
+                    store = InMemoryIdempotencyStore(purge_interval=config.IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
+                else:
+                    store = PostgresIdempotencyStore(purge_interval=config.IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
+                _idempotency_manager = IdempotencyManager(
+                    store=store,
+                    ttl=config.IDEMPOTENCY_TTL_SECONDS,
+                    max_wait=config.IDEMPOTENCY_MAX_WAIT_SECONDS,
+                    lock_seconds=config.IDEMPOTENCY_LOCK_SECONDS
+                )
+    return _idempotency_manager
+
+
+def get_idempotency_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get idempotency statistics.
+
+    Returns:
+        Manager statistics, or None if no keyed submission was made
+    """
+    if _idempotency_manager is None:
+        return None
+    return _idempotency_manager.get_stats()
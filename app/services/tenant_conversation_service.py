@@ -3,6 +3,8 @@ Tenant-aware conversation service for multi-tenant AI Event Planner.
 
 This service provides comprehensive conversation management with proper tenant,
 user, and event ID scoping, ensuring data isolation and context tracking.
+AsyncTenantConversationService adds coroutine variants of the read operations
+using an async session (see app.db.async_session).
 """
 
 from typing import Dict, List, Any, Optional, Tuple
@@ -10,7 +12,8 @@ from datetime import datetime, timedelta
 import uuid
 import json
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_, or_, desc, func, select
 
 from app.db.models_tenant_conversations import (
     TenantConversation, 
@@ -24,7 +27,10 @@ from app.db.models_saas import Organization
 from app.db.models_updated import Event
 from app.utils.conversation_memory import ConversationMemory
 from app.middleware.tenant import get_tenant_id, get_current_organization
-from app.utils.llm_factory import get_llm
+from app.utils.llm_factory import get_node_llm, LLM_TIER_EXTRACTION
+from app.utils.llm_cache import llm_cache_scope
+from app.services.context_extraction_queue import get_context_extraction_queue
+from app import config
 import re
 
 
@@ -482,11 +488,11 @@ class TenantConversationService:
                 if key in ['user_preferences', 'conversation_memory', 'decision_history', 
                           'topic_transitions', 'event_requirements', 'budget_constraints',
                           'timeline_constraints', 'stakeholder_context', 'response_preferences']:
-                    # JSON fields - merge with existing data
+                    # JSON fields - merge with existing data into a new value,
+                    # since in-place changes are not detected by the session
                     existing_data = getattr(context, key) or {}
                     if isinstance(existing_data, dict) and isinstance(value, dict):
-                        existing_data.update(value)
-                        setattr(context, key, existing_data)
+                        setattr(context, key, {**existing_data, **value})
                     else:
                         setattr(context, key, value)
                 else:
@@ -501,6 +507,38 @@ class TenantConversationService:
         
         return context
     
+    def load_rolling_summary(self, conversation: TenantConversation, state: Dict[str, Any]) -> None:
+        """
+        Put the stored rolling summary of a conversation into an agent state.
+
+        Args:
+            conversation: Conversation loaded with its context
+            state: Agent state to update
+        """
+        context = getattr(conversation, "conversation_context", None)
+        memory = (context.conversation_memory if context else None) or {}
+        state["conversation_summary"] = memory.get("rolling_summary")
+        state["summarized_message_count"] = memory.get("summarized_message_count", 0)
+
+    def save_rolling_summary(self, conversation_id: int, state: Dict[str, Any]) -> ConversationContext:
+        """
+        Store the rolling summary of an agent state in the conversation context.
+
+        Args:
+            conversation_id: Conversation ID
+            state: Agent state holding the summary
+
+        Returns:
+            Updated ConversationContext instance
+        """
+        return self.update_conversation_context(conversation_id, {
+            "conversation_memory": {
+                "rolling_summary": state.get("conversation_summary"),
+                "summarized_message_count": state.get("summarized_message_count", 0)
+            },
+            "last_summary_at": datetime.utcnow()
+        })
+
     def add_participant(
         self,
         conversation_id: int,
@@ -715,21 +753,77 @@ class TenantConversationService:
         return participant
     
     def _update_conversation_context(self, conversation_id: int, message: TenantMessage) -> None:
-        """Update conversation context based on a new message using NLP analysis."""
+        """
+        Update conversation context based on a new message.
 
-        # Extract contextual information from the message
-        extracted_context = self._extract_context_from_message(message.content)
+        The LLM extraction runs on the background context extraction queue so
+        the request does not wait for it. If the queue is saturated the basic
+        pattern-based extraction is applied inline instead.
+        """
+        if config.CONTEXT_EXTRACTION_ASYNC:
+            queued = get_context_extraction_queue().submit(
+                organization_id=self.organization_id,
+                user_id=self.user_id,
+                conversation_id=conversation_id,
+                message_id=message.id,
+                content=message.content,
+                timestamp=message.timestamp
+            )
+            if queued:
+                return
+            extracted_context = self._basic_context_extraction(message.content)
+        else:
+            extracted_context = self._extract_context_from_message(message.content)
+
+        self._apply_context_extraction(
+            conversation_id=conversation_id,
+            message_id=message.id,
+            content=message.content,
+            timestamp=message.timestamp.isoformat(),
+            extracted_context=extracted_context
+        )
+
+    def _apply_context_extraction(
+        self,
+        conversation_id: int,
+        message_id: int,
+        content: str,
+        timestamp: str,
+        extracted_context: Dict[str, Any]
+    ) -> None:
+        """
+        Store context extracted from a user message.
+
+        Args:
+            conversation_id: Conversation ID
+            message_id: ID of the analyzed message
+            content: Message content
+            timestamp: Message timestamp in ISO format
+            extracted_context: Result of the context extraction
+        """
+        # Background extractions of a conversation can finish out of order.
+        # Lock the context row until update_conversation_context commits, and
+        # check whether a newer message has already been applied.
+        context = self.db.query(ConversationContext).filter(
+            ConversationContext.organization_id == self.organization_id,
+            ConversationContext.conversation_id == conversation_id
+        ).with_for_update().first()
+        is_stale = False
+        if context is not None:
+            last_message = (context.conversation_memory or {}).get("last_user_message") or {}
+            last_message_id = last_message.get("message_id")
+            is_stale = last_message_id is not None and last_message_id > message_id
 
         # Build context updates with extracted information
-        context_updates = {
-            "conversation_memory": {
+        context_updates = {}
+        if not is_stale:
+            context_updates["conversation_memory"] = {
                 "last_user_message": {
-                    "content": message.content[:200],  # First 200 chars for quick reference
-                    "timestamp": message.timestamp.isoformat(),
-                    "message_id": message.id
+                    "content": content[:200],  # First 200 chars for quick reference
+                    "timestamp": timestamp,
+                    "message_id": message_id
                 }
             }
-        }
 
         # Add extracted preferences if found
         if extracted_context.get("preferences"):
@@ -753,6 +847,19 @@ class TenantConversationService:
         if extracted_context.get("sentiment"):
             context_updates["sentiment"] = extracted_context["sentiment"]
 
+        if is_stale:
+            # An older message only fills in what newer messages left unset
+            for key, value in list(context_updates.items()):
+                existing_data = getattr(context, key, None)
+                if isinstance(existing_data, dict) and isinstance(value, dict):
+                    context_updates[key] = {**value, **existing_data}
+                elif existing_data:
+                    del context_updates[key]
+
+        if not context_updates:
+            self.db.rollback()
+            return
+
         self.update_conversation_context(conversation_id, context_updates)
 
     def _extract_context_from_message(self, message_content: str) -> Dict[str, Any]:
@@ -777,7 +884,8 @@ class TenantConversationService:
 
         try:
             # Use LLM to extract structured information from the message
-            llm = get_llm(temperature=0.1)  # Low temperature for consistent extraction
+            # Low temperature for consistent extraction
+            llm = get_node_llm("conversation.context_extraction", temperature=0.1, tier=LLM_TIER_EXTRACTION, cache=True)
 
             extraction_prompt = f"""Analyze the following message from a user planning an event and extract structured information.
 
@@ -813,7 +921,8 @@ Only include fields where you find relevant information. If a field has no infor
 Return ONLY the JSON object, no other text."""
 
             # Get response from LLM
-            response = llm.invoke(extraction_prompt)
+            with llm_cache_scope(self.organization_id):
+                response = llm.invoke(extraction_prompt)
             response_text = response.content.strip()
 
             # Extract JSON from response (handle cases where LLM adds markdown formatting)
@@ -943,3 +1052,184 @@ def get_tenant_conversation_service(
         TenantConversationService instance
     """
     return TenantConversationService(db=db, organization_id=organization_id, user_id=user_id)
+
+
+class AsyncTenantConversationService(TenantConversationService):
+    """
+    Tenant conversation service reading conversations through an async session.
+    
+    The read operations used on every agent request have coroutine variants
+    that do not block the event loop. Writes go through the synchronous
+    operations inherited from TenantConversationService.
+    """
+    
+    def __init__(
+        self,
+        async_db: Any,
+        db: Optional[Session] = None,
+        organization_id: Optional[int] = None,
+        user_id: Optional[int] = None
+    ):
+        """
+        Initialize the tenant conversation service.
+        
+        Args:
+            async_db: Async database session
+            db: Database session for the synchronous operations
+            organization_id: Organization ID for tenant context
+            user_id: User ID for user context
+        """
+        super().__init__(db=db, organization_id=organization_id, user_id=user_id)
+        self.async_db = async_db
+    
+    def _access_filter(self, statement: Any) -> Any:
+        """Restrict a conversation query to conversations the user owns or participates in."""
+        if not self.user_id:
+            return statement
+        
+        participant_subquery = select(ConversationParticipant.conversation_id).where(
+            and_(
+                ConversationParticipant.user_id == self.user_id,
+                ConversationParticipant.is_active == True
+            )
+        )
+        return statement.where(
+            or_(
+                TenantConversation.user_id == self.user_id,
+                TenantConversation.id.in_(participant_subquery)
+            )
+        )
+    
+    async def aget_conversation(
+        self,
+        conversation_id: int,
+        include_messages: bool = True,
+        include_context: bool = True
+    ) -> Optional[TenantConversation]:
+        """
+        Get a conversation with proper tenant/user access validation.
+        
+        Args:
+            conversation_id: Conversation ID
+            include_messages: Whether to include messages
+            include_context: Whether to include conversation context
+            
+        Returns:
+            TenantConversation instance or None if not found/accessible
+        """
+        statement = select(TenantConversation).where(
+            and_(
+                TenantConversation.id == conversation_id,
+                TenantConversation.organization_id == self.organization_id
+            )
+        )
+        conversation = (await self.async_db.execute(self._access_filter(statement).limit(1))).scalars().first()
+        
+        # Relationships cannot be lazy loaded from an async session
+        if conversation and include_messages:
+            messages = (await self.async_db.execute(
+                select(TenantMessage).where(
+                    TenantMessage.conversation_id == conversation_id
+                ).order_by(TenantMessage.timestamp.asc())
+            )).scalars().all()
+            set_committed_value(conversation, "messages", list(messages))
+        
+        if conversation and include_context:
+            context = (await self.async_db.execute(
+                select(ConversationContext).where(
+                    ConversationContext.conversation_id == conversation_id
+                ).limit(1)
+            )).scalars().first()
+            set_committed_value(conversation, "conversation_context", context)
+        
+        return conversation
+    
+    async def alist_conversations(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        conversation_type: Optional[str] = None,
+        status: Optional[str] = None,
+        event_id: Optional[int] = None
+    ) -> Tuple[List[TenantConversation], int]:
+        """
+        List conversations for the current tenant and user.
+        
+        Args:
+            limit: Maximum number of conversations to return
+            offset: Offset for pagination
+            conversation_type: Filter by conversation type
+            status: Filter by conversation status
+            event_id: Filter by event ID
+            
+        Returns:
+            Tuple of (conversations list, total count)
+        """
+        if not self.organization_id:
+            return [], 0
+        
+        statement = self._access_filter(select(TenantConversation).where(
+            TenantConversation.organization_id == self.organization_id
+        ))
+        
+        if conversation_type:
+            statement = statement.where(TenantConversation.conversation_type == conversation_type)
+        
+        if status:
+            statement = statement.where(TenantConversation.status == status)
+        
+        if event_id:
+            statement = statement.where(TenantConversation.event_id == event_id)
+        
+        total_count = (await self.async_db.execute(
+            select(func.count()).select_from(statement.subquery())
+        )).scalar_one()
+        
+        conversations = (await self.async_db.execute(
+            statement.order_by(desc(TenantConversation.last_activity_at)).offset(offset).limit(limit)
+        )).scalars().all()
+        
+        return list(conversations), total_count
+    
+    async def aget_messages(
+        self,
+        conversation_id: int,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        include_internal: bool = False,
+        role_filter: Optional[str] = None
+    ) -> List[TenantMessage]:
+        """
+        Get messages for a conversation with proper access validation.
+        
+        Args:
+            conversation_id: Conversation ID
+            limit: Maximum number of messages to return
+            offset: Offset for pagination
+            include_internal: Whether to include internal messages
+            role_filter: Filter by message role
+            
+        Returns:
+            List of TenantMessage instances
+        """
+        conversation = await self.aget_conversation(conversation_id, include_messages=False, include_context=False)
+        if not conversation:
+            return []
+        
+        statement = select(TenantMessage).where(TenantMessage.conversation_id == conversation_id)
+        
+        if not include_internal:
+            statement = statement.where(TenantMessage.is_internal == False)
+        
+        if role_filter:
+            statement = statement.where(TenantMessage.role == role_filter)
+        
+        statement = statement.order_by(TenantMessage.timestamp.asc())
+        
+        if offset:
+            statement = statement.offset(offset)
+        
+        if limit:
+            statement = statement.limit(limit)
+        
+        return list((await self.async_db.execute(statement)).scalars().all())
@@ -0,0 +1,135 @@
+"""
+Process-wide cache of agent conversation states.
+
+TenantAwareStateManager instances are created per request, so states they load
+would otherwise be read from the database and deserialized on every call. This
+module keeps recently used states in a bounded LRU cache shared by all managers
+in the worker process. Entries are keyed by organization and conversation ID so
+tenants never see each other's states.
+
+The cache is off by default (STATE_CACHE_MAX_CONVERSATIONS=0). Entries are
+not invalidated when another worker updates a conversation, so with several
+workers a cached state could be served, and written back, after a newer state
+was stored elsewhere.
+"""
+
+import copy
+import threading
+from typing import Any, Dict, Optional
+
+from app import config
+from app.utils.ttl_cache import TTLCache
+
+
+# State keys holding live objects (e.g. conversation memory) that belong to a
+# single request and must not be cached or persisted
+TRANSIENT_STATE_KEYS = ("memory",)
+
+
+def strip_transient_keys(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a shallow copy of a state without its transient keys.
+
+    Args:
+        state: The agent state
+
+    Returns:
+        The state without transient keys
+    """
+    return {key: value for key, value in state.items() if key not in TRANSIENT_STATE_KEYS}
+
+
+class ConversationStateCache:
+    """
+    Per-worker LRU cache of conversation states.
+
+    States are deep-copied on the way in and out so that a request mutating
+    its state (for example a graph node appending messages) never changes the
+    cached copy seen by other requests.
+    """
+
+    def __init__(self, max_size: int = 1000):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of conversations to keep (0 disables caching)
+        """
+        # (organization ID, conversation ID) -> state
+        self._entries = TTLCache(max_size=max_size)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything."""
+        return self._entries.enabled
+
+    def get(self, organization_id: Optional[int], conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a copy of a cached state.
+
+        Args:
+            organization_id: The organization ID
+            conversation_id: The conversation ID
+
+        Returns:
+            A copy of the cached state, or None if not cached
+        """
+        state = self._entries.get((organization_id, str(conversation_id)))
+        return copy.deepcopy(state) if state is not None else None
+
+    def put(self, organization_id: Optional[int], conversation_id: str, state: Dict[str, Any]) -> None:
+        """
+        Store a copy of a state, evicting the least recently used entries.
+
+        Args:
+            organization_id: The organization ID
+            conversation_id: The conversation ID
+            state: The state to cache
+        """
+        if not self.enabled:
+            return
+        snapshot = copy.deepcopy(strip_transient_keys(state))
+        self._entries.put((organization_id, str(conversation_id)), snapshot)
+
+    def invalidate(self, organization_id: Optional[int], conversation_id: str) -> None:
+        """
+        Remove a conversation from the cache.
+
+        Args:
+            organization_id: The organization ID
+            conversation_id: The conversation ID
+        """
+        self._entries.pop((organization_id, str(conversation_id)))
+
+    def clear(self) -> None:
+        """Remove all cached states."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size, capacity, hits, misses, hit rate and evictions
+        """
+        return self._entries.get_stats()
+
+
+# Global cache instance
+_state_cache = None
+_state_cache_lock = threading.Lock()
+
+
+def get_conversation_state_cache() -> ConversationStateCache:
+    """
+    Get the process-wide conversation state cache.
+
+    Returns:
+        ConversationStateCache instance
+    """
+    global _state_cache
+    if _state_cache is None:
+        with _state_cache_lock:
+            if _state_cache is None:
+                _state_cache = ConversationStateCache(max_size=config.STATE_CACHE_MAX_CONVERSATIONS)
+    return _state_cache
@@ -4,7 +4,16 @@ Tenant-aware state manager for multi-tenant agent operations.
 This module extends the base state manager to include tenant context,
 ensuring proper data isolation between different organizations.
 It implements a hybrid approach with in-memory storage for performance
-and database persistence for durability.
+and database persistence for durability. States are loaded lazily per
+conversation. They can optionally be shared across requests through a
+bounded per-worker LRU cache, which is off by default because other workers
+do not invalidate it (see app.state.state_cache).
+With STATE_WRITE_BEHIND enabled (off by default), updates are persisted by
+a write-behind flusher that coalesces and batches them (see
+app.state.write_behind); otherwise they are written immediately.
+AsyncTenantAwareStateManager reads through an async session (see
+app.db.async_session) so loading and listing conversations does not block
+the event loop.
 """
 
 from typing import Dict, Any, Optional, List, Union
@@ -13,12 +22,16 @@ import json
 import uuid
 import time
 import threading
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
 
 from app.state.manager import StateManager
 from app.db.models_saas import Organization
 from app.db.models_updated import Conversation, AgentState
 from app.db.session import get_db
+from app.state.state_cache import get_conversation_state_cache, strip_transient_keys
+from app.state.write_behind import get_state_flusher
+from app import config
 
 
 class TenantAwareStateManager:
@@ -40,14 +53,11 @@ class TenantAwareStateManager:
             db: Database session (optional, will be created if needed)
         """
         self.organization_id = organization_id
-        self._conversations = {}  # In-memory storage
+        self._conversations = {}  # In-memory storage for conversations used by this manager
+        self._cache = get_conversation_state_cache()  # Shared across requests in this worker
         self._db = db
         self._sync_lock = threading.RLock()  # Lock for thread safety
-        self._last_sync_time = time.time()
-        self._sync_interval = 60  # Sync to database every 60 seconds
-        
-        # Load conversations from database on startup
-        self._load_from_database()
+        self._flusher = get_state_flusher() if config.STATE_WRITE_BEHIND else None
     
     @property
     def db(self) -> Session:
@@ -61,36 +71,96 @@ class TenantAwareStateManager:
             self._db = next(get_db())
         return self._db
     
-    def _load_from_database(self) -> None:
+    def _load_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
         """
-        Load conversations from the database into in-memory storage.
+        Load a single conversation state, from memory, the shared cache or the database.
+        
+        Args:
+            conversation_id: The conversation ID
+            
+        Returns:
+            The conversation state, or None if it does not exist
+        """
+        state = self._load_cached(conversation_id)
+        if state is None:
+            state = self._load_from_database(conversation_id)
+            if state is None:
+                return None
+            self._cache.put(self.organization_id, conversation_id, state)
+        
+        self._conversations[conversation_id] = state
+        return state
+    
+    def _load_cached(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a single conversation state from memory, the shared cache or pending writes.
+        
+        Args:
+            conversation_id: The conversation ID
+            
+        Returns:
+            The conversation state, or None if it has to be loaded from the database
+        """
+        state = self._conversations.get(conversation_id)
+        if state is not None:
+            return state
+        
+        state = self._cache.get(self.organization_id, conversation_id)
+        if state is None and self._flusher:
+            # A write may still be pending if the cache evicted the state
+            pending = self._flusher.get_pending(self.organization_id, conversation_id)
+            if pending is not None:
+                state = json.loads(pending)
+        if state is not None:
+            self._conversations[conversation_id] = state
+        return state
+    
+    def _load_from_database(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a conversation state from the database.
+        
+        Args:
+            conversation_id: The conversation ID
+            
+        Returns:
+            The conversation state, or None if it is not stored
         """
         try:
-            # Query for agent states with the current organization
-            query = self.db.query(AgentState).join(Conversation)
+            conv_id = int(conversation_id)
+        except (TypeError, ValueError):
+            # Non-numeric IDs only exist in memory until they are synced
+            return None
+        
+        try:
+            # Query for the agent state of this conversation within the current organization
+            query = self.db.query(AgentState).join(Conversation).filter(Conversation.id == conv_id)
             
             if self.organization_id:
                 query = query.filter(Conversation.organization_id == self.organization_id)
             
-            agent_states = query.all()
-            
-            # Load each state into memory
-            for agent_state in agent_states:
-                try:
-                    # Get the conversation ID as string (UUID)
-                    conversation_id = str(agent_state.conversation.id)
-                    
-                    # Parse the state data
-                    state_data = json.loads(agent_state.state_data)
-                    
-                    # Store in memory
-                    self._conversations[conversation_id] = state_data
-                    
-                    print(f"Loaded conversation {conversation_id} from database")
-                except Exception as e:
-                    print(f"Error loading conversation state: {str(e)}")
+            agent_state = query.first()
+            if not agent_state:
+                return None
+            
+            return self._parse_state_data(agent_state.state_data)
         except Exception as e:
-            print(f"Error loading conversations from database: {str(e)}")
+            print(f"Error loading conversation {conversation_id} from database: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _parse_state_data(state_data: Any) -> Dict[str, Any]:
+        """
+        Parse stored state data, which may be a JSON string or an already decoded object.
+        
+        Args:
+            state_data: The stored state data
+            
+        Returns:
+            The state as a dictionary
+        """
+        if isinstance(state_data, str):
+            return json.loads(state_data)
+        return state_data or {}
     
     def _sync_to_database(self, conversation_id: str = None) -> None:
         """
@@ -109,9 +179,7 @@ class TenantAwareStateManager:
                     # Sync all conversations
                     for conv_id in self._conversations:
                         self._sync_conversation(conv_id)
-                
-                # Update last sync time
-                self._last_sync_time = time.time()
+
         except Exception as e:
             print(f"Error syncing to database: {str(e)}")
     
@@ -128,6 +196,9 @@ class TenantAwareStateManager:
             if not state:
                 return
             
+            # Live objects such as conversation memory are not persisted
+            state_data = json.dumps(strip_transient_keys(state))
+            
             # Find or create the conversation in the database
             db_conversation = self._get_or_create_conversation(conversation_id)
             if not db_conversation:
@@ -140,13 +211,13 @@ class TenantAwareStateManager:
             
             if agent_state:
                 # Update existing state
-                agent_state.state_data = json.dumps(state)
+                agent_state.state_data = state_data
                 agent_state.updated_at = datetime.utcnow()
             else:
                 # Create new state
                 agent_state = AgentState(
                     conversation_id=db_conversation.id,
-                    state_data=json.dumps(state)
+                    state_data=state_data
                 )
                 self.db.add(agent_state)
             
@@ -224,14 +295,39 @@ class TenantAwareStateManager:
             self.db.rollback()
             return None
     
-    def _check_periodic_sync(self) -> None:
+    def _persist(self, conversation_id: str) -> None:
         """
-        Check if it's time for a periodic sync and perform it if needed.
+        Persist a conversation state, through the write-behind flusher if enabled.
+        
+        Args:
+            conversation_id: The conversation ID
         """
-        current_time = time.time()
-        if current_time - self._last_sync_time > self._sync_interval:
-            # Time for a periodic sync
-            self._sync_to_database()
+        if not self._flusher:
+            self._sync_to_database(conversation_id)
+            return
+        
+        state = self._conversations.get(conversation_id)
+        if not state:
+            return
+        
+        db_conversation_id = state.get("db_conversation_id")
+        if db_conversation_id is None:
+            # Resolve or create the Conversation row once; this also records
+            # db_conversation_id in the state, so it is persisted with it
+            db_conversation = self._get_or_create_conversation(conversation_id)
+            if not db_conversation:
+                return
+            db_conversation_id = db_conversation.id
+        
+        try:
+            self._flusher.mark_dirty(
+                organization_id=self.organization_id,
+                conversation_id=conversation_id,
+                db_conversation_id=db_conversation_id,
+                state_data=json.dumps(strip_transient_keys(state))
+            )
+        except Exception as e:
+            print(f"Error scheduling sync for conversation {conversation_id}: {str(e)}")
     
     def get_conversation_state(self, conversation_id: str) -> Dict[str, Any]:
         """
@@ -243,13 +339,22 @@ class TenantAwareStateManager:
         Returns:
             The conversation state
         """
-        # Check for periodic sync
-        self._check_periodic_sync()
+        # Get the state from memory, the shared cache or the database
+        return self._with_tenant_context(self._load_conversation(conversation_id))
+    
+    def _with_tenant_context(self, state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Add organization context to a loaded state if not present.
         
-        # Get the state from in-memory storage
-        state = self._conversations.get(conversation_id, {})
+        Args:
+            state: The conversation state, or None if it does not exist
+            
+        Returns:
+            The state, empty if it does not exist
+        """
+        if state is None:
+            state = {}
         
-        # Add organization context if not present
         if self.organization_id and "organization_id" not in state:
             state["organization_id"] = self.organization_id
         
@@ -267,12 +372,12 @@ class TenantAwareStateManager:
         if self.organization_id:
             state["organization_id"] = self.organization_id
         
-        # Update the state in in-memory storage
+        # Update the state in in-memory storage and the shared cache
         self._conversations[conversation_id] = state
+        self._cache.put(self.organization_id, conversation_id, state)
         
-        # Sync to database for critical operations
-        # This is a critical operation, so we sync immediately
-        self._sync_to_database(conversation_id)
+        # Persist the state; repeated updates within a flush interval are coalesced
+        self._persist(conversation_id)
     
     def list_conversations(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """
@@ -285,22 +390,93 @@ class TenantAwareStateManager:
         Returns:
             List of conversations
         """
-        # Check for periodic sync
-        self._check_periodic_sync()
+        # States not written yet are listed from the pending writes
+        pending = self._pending_rows()
+        
+        # Page through the stored states instead of loading every conversation
+        try:
+            query = self.db.query(AgentState, Conversation).select_from(Conversation).outerjoin(
+                AgentState, AgentState.conversation_id == Conversation.id
+            ).filter(self._has_state(pending))
+            
+            if self.organization_id:
+                query = query.filter(Conversation.organization_id == self.organization_id)
+            
+            # Newest first
+            query = query.order_by(Conversation.created_at.desc())
+            
+            if offset:
+                query = query.offset(offset)
+            if limit:
+                query = query.limit(limit)
+            
+            rows = query.all()
+        except Exception as e:
+            print(f"Error listing conversations from database: {str(e)}")
+            return []
+        
+        return self._summarize_conversations(rows, pending)
+    
+    def _pending_rows(self) -> Dict[int, str]:
+        """
+        Get this organization's states waiting to be written.
+        
+        Returns:
+            Serialized states keyed by Conversation row ID
+        """
+        if not self._flusher:
+            return {}
+        return self._flusher.get_pending_rows(self.organization_id)
+    
+    @staticmethod
+    def _has_state(pending: Dict[int, str]) -> Any:
+        """
+        Get the condition for conversations that have a stored or pending state.
+        
+        Args:
+            pending: Pending states keyed by Conversation row ID
+            
+        Returns:
+            SQL condition for a query joining AgentState to Conversation
+        """
+        if not pending:
+            return AgentState.id.isnot(None)
+        return or_(AgentState.id.isnot(None), Conversation.id.in_(list(pending)))
+    
+    def _summarize_conversations(self, rows: List[Any], pending: Dict[int, str]) -> List[Dict[str, Any]]:
+        """
+        Convert stored conversations to list entries.
         
+        Args:
+            rows: (AgentState, Conversation) pairs; the state is None for
+                conversations whose state is only pending
+            pending: Pending states keyed by Conversation row ID
+            
+        Returns:
+            List of conversations with metadata and last message
+        """
         # Convert conversations to list of dicts with metadata
         all_conversations = []
-        for conv_id, state in self._conversations.items():
-            # Skip if organization_id doesn't match
-            if self.organization_id and state.get("organization_id") != self.organization_id:
+        for agent_state, db_conversation in rows:
+            conv_id = str(db_conversation.id)
+            try:
+                state = self._conversations.get(conv_id) or self._parse_state_data(
+                    pending.get(db_conversation.id) or (agent_state.state_data if agent_state else None)
+                )
+            except Exception as e:
+                print(f"Error loading conversation state: {str(e)}")
                 continue
-                
+            
             # Extract basic metadata
+            created_at = state.get("created_at")
+            if not created_at:
+                created_at = (db_conversation.created_at or datetime.utcnow()).isoformat()
+            
             conversation = {
                 "id": conv_id,
-                "organization_id": state.get("organization_id"),
+                "organization_id": state.get("organization_id", db_conversation.organization_id),
                 "agent_type": state.get("agent_type", "unknown"),
-                "created_at": state.get("created_at", datetime.utcnow().isoformat()),
+                "created_at": created_at,
                 "last_message": None
             }
             
@@ -316,11 +492,7 @@ class TenantAwareStateManager:
             
             all_conversations.append(conversation)
         
-        # Sort by created_at (newest first)
-        all_conversations.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-        
-        # Apply pagination
-        return all_conversations[offset:offset+limit] if limit else all_conversations
+        return all_conversations
     
     def delete_conversation(self, conversation_id: str) -> bool:
         """
@@ -333,17 +505,20 @@ class TenantAwareStateManager:
             True if deleted, False otherwise
         """
         # Check if the conversation exists
-        if conversation_id not in self._conversations:
+        state = self._load_conversation(conversation_id)
+        if state is None:
             return False
             
         # Check if the conversation belongs to this organization
-        state = self._conversations.get(conversation_id, {})
         if self.organization_id and state.get("organization_id") != self.organization_id:
             # Cannot delete conversations from other organizations
             return False
         
-        # Delete from in-memory storage
+        # Delete from in-memory storage, the shared cache and pending writes
         del self._conversations[conversation_id]
+        self._cache.invalidate(self.organization_id, conversation_id)
+        if self._flusher:
+            self._flusher.discard(self.organization_id, conversation_id)
         
         # Delete from database
         try:
@@ -392,17 +567,21 @@ class TenantAwareStateManager:
         # Add creation timestamp
         initial_state["created_at"] = datetime.utcnow().isoformat()
         
-        # Store the initial state in memory
+        # Store the initial state in memory and the shared cache
         self._conversations[conversation_id] = initial_state
+        self._cache.put(self.organization_id, conversation_id, initial_state)
         
-        # Sync to database immediately
-        self._sync_to_database(conversation_id)
+        # Persist the initial state
+        self._persist(conversation_id)
     
     def force_sync(self) -> None:
         """
         Force a sync of all conversations to the database.
         """
-        self._sync_to_database()
+        if self._flusher:
+            self._flusher.flush()
+        else:
+            self._sync_to_database()
 
 
 def get_tenant_aware_state_manager(organization_id: Optional[int] = None, db: Optional[Session] = None) -> TenantAwareStateManager:
@@ -417,3 +596,132 @@ def get_tenant_aware_state_manager(organization_id: Optional[int] = None, db: Op
         TenantAwareStateManager instance
     """
     return TenantAwareStateManager(organization_id=organization_id, db=db)
+
+
+class AsyncTenantAwareStateManager(TenantAwareStateManager):
+    """
+    Tenant-aware state manager reading conversations through an async session.
+    
+    Adds coroutine variants of the read operations; the memory, shared cache
+    and pending-write lookups are the same as the synchronous manager's, and
+    updates still go through the write-behind flusher.
+    """
+    
+    def __init__(self, organization_id: int = None, async_db: Any = None, db: Optional[Session] = None):
+        """
+        Initialize the state manager.
+        
+        Args:
+            organization_id: The organization ID for tenant context
+            async_db: Async database session
+            db: Database session for the synchronous operations (optional,
+                will be created if needed)
+        """
+        super().__init__(organization_id=organization_id, db=db)
+        self.async_db = async_db
+    
+    async def _aload_from_database(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a conversation state from the database.
+        
+        Args:
+            conversation_id: The conversation ID
+            
+        Returns:
+            The conversation state, or None if it is not stored
+        """
+        try:
+            conv_id = int(conversation_id)
+        except (TypeError, ValueError):
+            # Non-numeric IDs only exist in memory until they are synced
+            return None
+        
+        try:
+            statement = select(AgentState.state_data).join(Conversation).where(Conversation.id == conv_id)
+            if self.organization_id:
+                statement = statement.where(Conversation.organization_id == self.organization_id)
+            
+            result = await self.async_db.execute(statement.limit(1))
+            row = result.first()
+            if row is None:
+                return None
+            
+            return self._parse_state_data(row[0])
+        except Exception as e:
+            print(f"Error loading conversation {conversation_id} from database: {str(e)}")
+            return None
+    
+    async def aget_conversation_state(self, conversation_id: str) -> Dict[str, Any]:
+        """
+        Get the state for a specific conversation, filtered by organization.
+        
+        Args:
+            conversation_id: The conversation ID
+            
+        Returns:
+            The conversation state
+        """
+        state = self._load_cached(conversation_id)
+        if state is None:
+            state = await self._aload_from_database(conversation_id)
+            if state is not None:
+                self._cache.put(self.organization_id, conversation_id, state)
+                self._conversations[conversation_id] = state
+        
+        return self._with_tenant_context(state)
+    
+    async def alist_conversations(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        List conversations for the current organization.
+        
+        Args:
+            limit: Maximum number of conversations to return
+            offset: Offset for pagination
+            
+        Returns:
+            List of conversations
+        """
+        # States not written yet are listed from the pending writes
+        pending = self._pending_rows()
+        
+        try:
+            statement = select(AgentState, Conversation).select_from(Conversation).outerjoin(
+                AgentState, AgentState.conversation_id == Conversation.id
+            ).where(self._has_state(pending))
+            
+            if self.organization_id:
+                statement = statement.where(Conversation.organization_id == self.organization_id)
+            
+            # Newest first
+            statement = statement.order_by(Conversation.created_at.desc())
+            
+            if offset:
+                statement = statement.offset(offset)
+            if limit:
+                statement = statement.limit(limit)
+            
+            rows = (await self.async_db.execute(statement)).all()
+        except Exception as e:
+            print(f"Error listing conversations from database: {str(e)}")
+            return []
+        
+        return self._summarize_conversations(rows, pending)
+
+
+def get_async_tenant_aware_state_manager(
+    organization_id: Optional[int] = None,
+    async_db: Any = None,
+    db: Optional[Session] = None
+) -> AsyncTenantAwareStateManager:
+    """
+    Get a tenant-aware state manager reading through an async session.
+    
+    Args:
+        organization_id: The organization ID for tenant context
+        async_db: Async database session
+        db: Database session for the synchronous operations (optional)
+        
+    Returns:
+        AsyncTenantAwareStateManager instance
+    """
+    return AsyncTenantAwareStateManager(organization_id=organization_id, async_db=async_db, db=db)
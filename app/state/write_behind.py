@@ -0,0 +1,352 @@
+"""
+Write-behind persistence for agent conversation states.
+
+Agent turns update the conversation state several times (state creation,
+default fields, the graph result). Instead of a lookup, a serialization and a
+commit for every update, TenantAwareStateManager marks the conversation dirty
+here. A background thread periodically writes all dirty conversations in one
+transaction using a single PostgreSQL UPSERT, so repeated updates of the same
+conversation are coalesced into one write. Pending writes are flushed on
+shutdown.
+"""
+
+import atexit
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app import config
+from app.db.base import SessionLocal
+from app.db.models_updated import Conversation, AgentState
+from app.utils.logging_utils import setup_logger, log_performance_metric
+
+
+logger = setup_logger(name="state_write_behind", component="state")
+
+# Dirty entries are keyed by (organization_id, conversation_id)
+DirtyKey = Tuple[Optional[int], str]
+
+
+class StateWriteBehindFlusher:
+    """
+    Coalesces agent state updates and writes them to the database in batches.
+    """
+
+    def __init__(self, flush_interval: float = 1.0, batch_size: int = 100, max_attempts: int = 5):
+        """
+        Initialize the flusher.
+
+        Args:
+            flush_interval: Seconds between background flushes
+            batch_size: Maximum conversations written per transaction; reaching
+                it also triggers an early flush
+            max_attempts: Failed writes of a state before it is dropped
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._dirty: Dict[DirtyKey, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.updates = 0
+        self.coalesced = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def mark_dirty(
+        self,
+        organization_id: Optional[int],
+        conversation_id: str,
+        db_conversation_id: int,
+        state_data: str
+    ) -> None:
+        """
+        Schedule a conversation state to be written.
+
+        A newer update for the same conversation replaces the pending one.
+
+        Args:
+            organization_id: The organization ID
+            conversation_id: The conversation ID used by the state manager
+            db_conversation_id: The ID of the existing Conversation row
+            state_data: The serialized state
+        """
+        key = (organization_id, str(conversation_id))
+        with self._lock:
+            if key in self._dirty:
+                self.coalesced += 1
+            self.updates += 1
+            self._dirty[key] = {
+                "organization_id": organization_id,
+                "db_conversation_id": db_conversation_id,
+                "state_data": state_data
+            }
+            pending = len(self._dirty)
+
+        self._ensure_started()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def get_pending(self, organization_id: Optional[int], conversation_id: str) -> Optional[str]:
+        """
+        Get the serialized state waiting to be written for a conversation.
+
+        Args:
+            organization_id: The organization ID
+            conversation_id: The conversation ID
+
+        Returns:
+            The serialized state, or None if nothing is pending
+        """
+        with self._lock:
+            entry = self._dirty.get((organization_id, str(conversation_id)))
+            return entry["state_data"] if entry else None
+
+    def get_pending_rows(self, organization_id: Optional[int]) -> Dict[int, str]:
+        """
+        Get the serialized states waiting to be written for an organization.
+
+        Args:
+            organization_id: The organization ID, or None for every organization
+
+        Returns:
+            Serialized states keyed by the ID of their Conversation row
+        """
+        with self._lock:
+            return {
+                entry["db_conversation_id"]: entry["state_data"]
+                for (entry_organization_id, _), entry in self._dirty.items()
+                if organization_id is None or entry_organization_id == organization_id
+            }
+
+    def discard(self, organization_id: Optional[int], conversation_id: str) -> None:
+        """
+        Drop a pending write, e.g. because the conversation was deleted.
+
+        Args:
+            organization_id: The organization ID
+            conversation_id: The conversation ID
+        """
+        with self._lock:
+            self._dirty.pop((organization_id, str(conversation_id)), None)
+
+    def flush(self) -> int:
+        """
+        Write all pending states to the database.
+
+        Returns:
+            Number of conversations written
+        """
+        total = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if not self._dirty:
+                        break
+                    keys = list(self._dirty)[:self.batch_size]
+                    batch = {key: self._dirty.pop(key) for key in keys}
+
+                try:
+                    total += self._write_batch(batch)
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"Error flushing {len(batch)} agent states: {str(e)}")
+                    self._requeue(batch)
+                    break
+        return total
+
+    def _requeue(self, batch: Dict[DirtyKey, Dict[str, Any]]) -> None:
+        """
+        Put a failed batch back, dropping states that failed too often.
+
+        Entries replaced by a newer update in the meantime are not put back.
+
+        Args:
+            batch: Pending entries keyed by (organization_id, conversation_id)
+        """
+        dropped = []
+        with self._lock:
+            for key, entry in batch.items():
+                if key in self._dirty:
+                    continue
+                entry["attempts"] = entry.get("attempts", 0) + 1
+                if entry["attempts"] >= self.max_attempts:
+                    dropped.append(key)
+                    continue
+                self._dirty[key] = entry
+            self.dropped += len(dropped)
+
+        for organization_id, conversation_id in dropped:
+            logger.error(
+                f"Dropping agent state of conversation {conversation_id} "
+                f"(organization {organization_id}) after {self.max_attempts} failed writes"
+            )
+
+    def _write_batch(self, batch: Dict[DirtyKey, Dict[str, Any]]) -> int:
+        """
+        Write a batch of states in a single transaction.
+
+        Args:
+            batch: Pending entries keyed by (organization_id, conversation_id)
+
+        Returns:
+            Number of conversations written
+        """
+        start_time = time.time()
+        db = SessionLocal()
+        try:
+            # Conversation rows are created by the state manager before an
+            # entry is scheduled; skip the ones deleted since then
+            candidate_ids = {entry["db_conversation_id"] for entry in batch.values()}
+            existing_ids = {
+                row[0] for row in db.query(Conversation.id).filter(Conversation.id.in_(candidate_ids)).all()
+            }
+
+            now = datetime.utcnow()
+            # One row per Conversation; an UPSERT may not touch the same row twice
+            rows: Dict[int, Dict[str, Any]] = {}
+            for (organization_id, conversation_id), entry in batch.items():
+                db_conversation_id = entry["db_conversation_id"]
+                if db_conversation_id not in existing_ids:
+                    logger.warning(
+                        f"Dropping agent state of conversation {conversation_id}: "
+                        f"conversation row {db_conversation_id} no longer exists"
+                    )
+                    continue
+
+                rows[db_conversation_id] = {
+                    "conversation_id": db_conversation_id,
+                    "state_data": entry["state_data"],
+                    "updated_at": now
+                }
+
+            if rows:
+                statement = insert(AgentState).values(list(rows.values()))
+                statement = statement.on_conflict_do_update(
+                    index_elements=[AgentState.conversation_id],
+                    set_={
+                        "state_data": statement.excluded.state_data,
+                        "updated_at": statement.excluded.updated_at
+                    }
+                )
+                db.execute(statement)
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.written += len(rows)
+        self.batches += 1
+        log_performance_metric(
+            logger=logger,
+            name="state_write_behind_flush",
+            value=(time.time() - start_time) * 1000,
+            component="state"
+        )
+        return len(rows)
+
+    def _ensure_started(self) -> None:
+        """Start the background flush thread if it is not running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="state-write-behind",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Background loop flushing pending states."""
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Unexpected error in state write-behind loop: {str(e)}")
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """
+        Stop the background thread and write everything still pending.
+
+        Args:
+            timeout: Seconds to wait for the background thread to finish
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        written = self.flush()
+        if written:
+            logger.info(f"Flushed {written} pending agent states on shutdown")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get flusher statistics.
+
+        Returns:
+            Dictionary with pending, update, coalesced, written, batch, failure
+            and dropped counts
+        """
+        with self._lock:
+            pending = len(self._dirty)
+        return {
+            "pending": pending,
+            "updates": self.updates,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "dropped": self.dropped
+        }
+
+
+# Global flusher instance
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def get_state_flusher() -> StateWriteBehindFlusher:
+    """
+    Get the process-wide state write-behind flusher.
+
+    Returns:
+        StateWriteBehindFlusher instance
+    """
+    global _flusher
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = StateWriteBehindFlusher(
+                    flush_interval=config.STATE_FLUSH_INTERVAL_SECONDS,
+                    batch_size=config.STATE_FLUSH_BATCH_SIZE,
+                    max_attempts=config.STATE_FLUSH_MAX_ATTEMPTS
+                )
+                # Last-resort flush for processes that exit without the app shutdown hook
+                atexit.register(_flusher.shutdown)
+    return _flusher
+
+
+def flush_state_writes() -> None:
+    """
+    Stop the write-behind thread and flush pending agent states.
+
+    Call this on application shutdown.
+    """
+    if _flusher is not None:
+        _flusher.shutdown()
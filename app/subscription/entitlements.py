@@ -0,0 +1,128 @@
+"""
+Process-wide cache of subscription entitlement snapshots.
+
+SubscriptionFeatureControl is created per request, and answering an access
+check used to load the organization and its subscription plan and parse the
+organization's features. The answers only change when the subscription
+does, so they are precomputed once per organization into an immutable
+snapshot (tier, allowed agents, feature access, usage limits) kept here for
+ENTITLEMENT_CACHE_TTL_SECONDS. Subscription changes and Stripe webhooks
+invalidate an organization's snapshot through ``invalidate_organization``.
+"""
+
+import threading
+from typing import Any, Dict, Mapping, Optional
+
+from app.utils.ttl_cache import TTLCache
+
+
+class EntitlementCache:
+    """
+    Per-worker TTL cache of entitlement snapshots by organization.
+
+    Snapshots are read-only mappings and are shared between requests without
+    copying.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_size: int = 10000):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a snapshot is kept (0 disables caching)
+            max_size: Maximum number of organizations to keep
+        """
+        self._entries = TTLCache(max_size=max_size, ttl=ttl)
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything."""
+        return self._entries.enabled
+
+    def get(self, organization_id: int) -> Optional[Mapping[str, Any]]:
+        """
+        Get the cached snapshot of an organization.
+
+        Args:
+            organization_id: The organization ID
+
+        Returns:
+            The snapshot, or None if not cached
+        """
+        return self._entries.get(organization_id)
+
+    def put(self, organization_id: int, snapshot: Mapping[str, Any]) -> None:
+        """
+        Store the snapshot of an organization.
+
+        Args:
+            organization_id: The organization ID
+            snapshot: The entitlement snapshot
+        """
+        self._entries.put(organization_id, snapshot)
+
+    def invalidate(self, organization_id: int) -> None:
+        """
+        Remove the snapshot of an organization.
+
+        Args:
+            organization_id: The organization ID
+        """
+        self._entries.pop(organization_id)
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        """Remove all snapshots."""
+        self._entries.clear()
+        self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size, hit, miss, eviction and invalidation counts
+        """
+        return {
+            "enabled": self.enabled,
+            **self._entries.get_stats(),
+            "invalidations": self.invalidations
+        }
+
+
+# Global cache instance
+_entitlement_cache: Optional[EntitlementCache] = None
+_entitlement_cache_lock = threading.Lock()
+
+
+def get_entitlement_cache() -> EntitlementCache:
+    """
+    Get the process-wide entitlement cache.
+
+    Returns:
+        EntitlementCache instance
+    """
+    global _entitlement_cache
+    if _entitlement_cache is None:
+        with _entitlement_cache_lock:
+            if _entitlement_cache is None:
+                from app import config
+
+                _entitlement_cache = EntitlementCache(
+                    ttl=config.ENTITLEMENT_CACHE_TTL_SECONDS,
+                    max_size=config.ENTITLEMENT_CACHE_MAX_ENTRIES
+                )
+    return _entitlement_cache
+
+
+def get_entitlement_cache_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get entitlement cache statistics.
+
+    Returns:
+        Cache statistics, or None if no entitlements were checked yet
+    """
+    if _entitlement_cache is None:
+        return None
+    return _entitlement_cache.get_stats()
@@ -2,14 +2,18 @@
 Subscription feature control for agent capabilities.
 
 This module provides functionality to check if an organization has access
-to specific agent features based on their subscription plan.
+to specific agent features based on their subscription plan. Checks are
+answered from an entitlement snapshot computed once per organization and
+cached per worker (see app.subscription.entitlements).
 """
 
-from typing import Dict, Any, List, Optional
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional
 import json
 from sqlalchemy.orm import Session
 
 from app.db.models_saas import Organization, SubscriptionPlan
+from app.subscription.entitlements import get_entitlement_cache
 
 
 class FeatureNotAvailableError(Exception):
@@ -87,6 +91,7 @@ class SubscriptionFeatureControl:
         self._organization = None
         self._subscription_plan = None
         self._features = None
+        self._entitlements = None
     
     @property
     def organization(self) -> Optional[Organization]:
@@ -119,19 +124,26 @@ class SubscriptionFeatureControl:
                 self._features = {}
         return self._features
     
+    @property
+    def entitlements(self) -> Mapping[str, Any]:
+        """Get the entitlement snapshot of the organization, from the cache when possible."""
+        if self._entitlements is None:
+            if not self.organization_id:
+                self._entitlements = build_entitlements(None, None, None)
+            else:
+                cache = get_entitlement_cache()
+                self._entitlements = cache.get(self.organization_id)
+                if self._entitlements is None:
+                    self._entitlements = build_entitlements(
+                        self.organization_id, self.organization, self.subscription_plan
+                    )
+                    cache.put(self.organization_id, self._entitlements)
+        return self._entitlements
+    
     @property
     def plan_tier(self) -> str:
         """Get the plan tier for the current subscription."""
-        if not self.subscription_plan:
-            return "free"
-        
-        plan_name = self.subscription_plan.name.lower()
-        if "enterprise" in plan_name:
-            return "enterprise"
-        elif "professional" in plan_name or "premium" in plan_name:
-            return "professional"
-        else:
-            return "free"
+        return self.entitlements["tier"]
     
     def can_access_agent(self, agent_type: str) -> bool:
         """
@@ -156,20 +168,7 @@ class SubscriptionFeatureControl:
         Returns:
             True if the organization can access the feature, False otherwise
         """
-        if not self.organization_id:
-            # Default to basic features only if no organization context
-            return feature_name in self.FEATURE_TIERS["free"]
-        
-        # Check subscription status
-        if self.organization and self.organization.subscription_status != "active":
-            # Only allow basic features for inactive subscriptions
-            return feature_name in self.FEATURE_TIERS["free"] and self.FEATURE_TIERS["free"].get(feature_name, False)
-        
-        # Get available features for the current plan tier
-        available_features = self.FEATURE_TIERS.get(self.plan_tier, {})
-        
-        # Check if the feature exists and is enabled
-        return feature_name in available_features and available_features.get(feature_name, False)
+        return self.entitlements["feature_access"].get(feature_name, False)
     
     def check_usage_limits(self, resource_type: str, current_count: int) -> bool:
         """
@@ -182,25 +181,7 @@ class SubscriptionFeatureControl:
         Returns:
             True if the organization is within limits, False otherwise
         """
-        if not self.organization_id:
-            # Default to free tier limits if no organization context
-            max_limit = self.FEATURE_TIERS["free"].get(f"max_{resource_type}", 0)
-            return current_count <= max_limit
-        
-        # Check subscription status
-        if self.organization and self.organization.subscription_status != "active":
-            # Use free tier limits for inactive subscriptions
-            max_limit = self.FEATURE_TIERS["free"].get(f"max_{resource_type}", 0)
-            return current_count <= max_limit
-        
-        # Get the limit from the organization or plan tier
-        if resource_type == "users" and self.organization:
-            max_limit = self.organization.max_users
-        elif resource_type == "events" and self.organization:
-            max_limit = self.organization.max_events
-        else:
-            # Get from plan tier
-            max_limit = self.FEATURE_TIERS.get(self.plan_tier, {}).get(f"max_{resource_type}", 0)
+        max_limit = self.get_usage_limit(resource_type)
         
         # -1 means unlimited
         if max_limit == -1:
@@ -219,7 +200,7 @@ class SubscriptionFeatureControl:
             FeatureNotAvailableError: If the agent is not available for the current subscription
         """
         if not self.can_access_agent(agent_type):
-            plan_name = self.subscription_plan.name if self.subscription_plan else "Free"
+            plan_name = self.entitlements["plan_name"] or "Free"
             raise FeatureNotAvailableError(
                 f"The {agent_type} agent is not available on your current {plan_name} plan. "
                 f"Please upgrade to access this feature."
@@ -236,7 +217,7 @@ class SubscriptionFeatureControl:
             FeatureNotAvailableError: If the feature is not available for the current subscription
         """
         if not self.can_access_feature(feature_name):
-            plan_name = self.subscription_plan.name if self.subscription_plan else "Free"
+            plan_name = self.entitlements["plan_name"] or "Free"
             raise FeatureNotAvailableError(
                 f"The {feature_name} feature is not available on your current {plan_name} plan. "
                 f"Please upgrade to access this feature."
@@ -254,15 +235,8 @@ class SubscriptionFeatureControl:
             FeatureNotAvailableError: If the organization is not within limits
         """
         if not self.check_usage_limits(resource_type, current_count):
-            plan_name = self.subscription_plan.name if self.subscription_plan else "Free"
-            
-            # Get the limit
-            if resource_type == "users" and self.organization:
-                max_limit = self.organization.max_users
-            elif resource_type == "events" and self.organization:
-                max_limit = self.organization.max_events
-            else:
-                max_limit = self.FEATURE_TIERS.get(self.plan_tier, {}).get(f"max_{resource_type}", 0)
+            plan_name = self.entitlements["plan_name"] or "Free"
+            max_limit = self.get_usage_limit(resource_type)
             
             raise FeatureNotAvailableError(
                 f"You have reached the maximum number of {resource_type} ({max_limit}) "
@@ -288,23 +262,7 @@ class SubscriptionFeatureControl:
         Returns:
             The usage limit (-1 for unlimited, or a positive integer)
         """
-        if not self.organization_id:
-            # Default to free tier limits if no organization context
-            return self.FEATURE_TIERS["free"].get(f"max_{resource_type}", 0)
-
-        # Check subscription status
-        if self.organization and self.organization.subscription_status != "active":
-            # Use free tier limits for inactive subscriptions
-            return self.FEATURE_TIERS["free"].get(f"max_{resource_type}", 0)
-
-        # Get the limit from the organization or plan tier
-        if resource_type == "users" and self.organization:
-            return self.organization.max_users
-        elif resource_type == "events" and self.organization:
-            return self.organization.max_events
-        else:
-            # Get from plan tier
-            return self.FEATURE_TIERS.get(self.plan_tier, {}).get(f"max_{resource_type}", 0)
+        return self.entitlements["usage_limits"].get(f"max_{resource_type}", 0)
 
     def get_all_usage_limits(self) -> Dict[str, int]:
         """
@@ -313,12 +271,70 @@ class SubscriptionFeatureControl:
         Returns:
             Dictionary with all usage limits
         """
-        return {
-            "max_events": self.get_usage_limit("events"),
-            "max_users": self.get_usage_limit("users"),
-            "max_conversations": self.get_usage_limit("conversations"),
-            "max_messages": self.get_usage_limit("messages")
-        }
+        return dict(self.entitlements["usage_limits"])
+
+
+def build_entitlements(
+    organization_id: Optional[int],
+    organization: Optional[Organization],
+    subscription_plan: Optional[SubscriptionPlan]
+) -> Mapping[str, Any]:
+    """
+    Precompute the entitlements of an organization.
+    
+    Args:
+        organization_id: The organization ID, or None without organization context
+        organization: The organization, or None if it does not exist
+        subscription_plan: The organization's subscription plan, if any
+        
+    Returns:
+        Read-only mapping with the plan tier and name, subscription status,
+        allowed agents, feature access and usage limits
+    """
+    free_tier = SubscriptionFeatureControl.FEATURE_TIERS["free"]
+    
+    tier = "free"
+    if subscription_plan:
+        plan_name = subscription_plan.name.lower()
+        if "enterprise" in plan_name:
+            tier = "enterprise"
+        elif "professional" in plan_name or "premium" in plan_name:
+            tier = "professional"
+    tier_features = SubscriptionFeatureControl.FEATURE_TIERS.get(tier, {})
+    
+    # Inactive subscriptions get free tier features and limits
+    inactive = organization is not None and organization.subscription_status != "active"
+    
+    feature_names = {name for features in SubscriptionFeatureControl.FEATURE_TIERS.values() for name in features}
+    if not organization_id:
+        # Default to basic features only if no organization context
+        feature_access = {name: name in free_tier for name in feature_names}
+    elif inactive:
+        feature_access = {name: bool(free_tier.get(name, False)) for name in feature_names}
+    else:
+        feature_access = {name: bool(tier_features.get(name, False)) for name in feature_names}
+    
+    usage_limits = {}
+    for resource_type in ("events", "users", "conversations", "messages"):
+        key = f"max_{resource_type}"
+        if not organization_id or inactive:
+            usage_limits[key] = free_tier.get(key, 0)
+        elif resource_type == "users" and organization:
+            usage_limits[key] = organization.max_users
+        elif resource_type == "events" and organization:
+            usage_limits[key] = organization.max_events
+        else:
+            usage_limits[key] = tier_features.get(key, 0)
+    
+    return MappingProxyType({
+        "organization_id": organization_id,
+        "tier": tier,
+        "plan_name": subscription_plan.name if subscription_plan else None,
+        "subscription_status": organization.subscription_status if organization else None,
+        "allowed_agents": frozenset(SubscriptionFeatureControl.AGENT_TIERS[tier]),
+        "feature_access": MappingProxyType(feature_access),
+        "usage_limits": MappingProxyType(usage_limits)
+    })
 
 
 def get_feature_control(db: Session, organization_id: Optional[int] = None) -> SubscriptionFeatureControl:
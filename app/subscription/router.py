@@ -12,6 +12,7 @@ from app.db.models import User
 from app.db.models_saas import Organization, OrganizationUser, SubscriptionPlan, SubscriptionInvoice
 from app.auth.dependencies import get_current_user
 from app.middleware.tenant import get_tenant_id, require_tenant
+from app.middleware.tenant_cache import invalidate_organization
 from app.subscription.schemas import (
     OrganizationCreate,
     OrganizationResponse,
@@ -92,6 +93,9 @@ async def create_organization(
     db.commit()
     db.refresh(organization)
     
+    # Slug lookups may have cached that no organization has this slug
+    invalidate_organization(organization.id, organization.slug)
+    
     return OrganizationResponseWithFeatures.from_orm(organization)
 
 @router.get("/organizations", response_model=List[OrganizationResponseWithFeatures])
@@ -382,6 +386,7 @@ async def create_subscription(
             )
             organization.stripe_customer_id = customer.id
             db.commit()
+            invalidate_organization(organization.id, organization.slug)
         
         # Create subscription
         subscription = stripe.Subscription.create(
@@ -399,6 +404,7 @@ async def create_subscription(
         organization.max_events = plan.max_events
         organization.features = json.dumps(plan.features) if isinstance(plan.features, dict) else plan.features
         db.commit()
+        invalidate_organization(organization.id, organization.slug)
         
         return {
             "subscription_id": subscription.id,
@@ -473,6 +479,7 @@ async def handle_subscription_created(subscription, db: Session):
         organization.stripe_subscription_id = subscription.id
         organization.subscription_status = subscription.status
         db.commit()
+        invalidate_organization(organization.id, organization.slug)
 
 
 async def handle_subscription_updated(subscription, db: Session):
@@ -490,6 +497,7 @@ async def handle_subscription_updated(subscription, db: Session):
     if organization:
         organization.subscription_status = subscription.status
         db.commit()
+        invalidate_organization(organization.id, organization.slug)
 
 
 async def handle_subscription_deleted(subscription, db: Session):
@@ -507,6 +515,7 @@ async def handle_subscription_deleted(subscription, db: Session):
     if organization:
         organization.subscription_status = "canceled"
         db.commit()
+        invalidate_organization(organization.id, organization.slug)
 
 
 async def handle_invoice_payment_succeeded(invoice, db: Session):
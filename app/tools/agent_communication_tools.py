@@ -8,13 +8,16 @@ from datetime import datetime
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
-from app.graphs.resource_planning_graph import create_resource_planning_graph, create_initial_state as create_resource_planning_initial_state
-from app.graphs.financial_graph import create_financial_graph, create_initial_state as create_financial_initial_state
-from app.graphs.stakeholder_management_graph import create_stakeholder_management_graph, create_initial_state as create_stakeholder_management_initial_state
-from app.graphs.marketing_communications_graph import create_marketing_communications_graph, create_initial_state as create_marketing_communications_initial_state
-from app.graphs.project_management_graph import create_project_management_graph, create_initial_state as create_project_management_initial_state
-from app.graphs.analytics_graph import create_analytics_graph, create_initial_state as create_analytics_initial_state
-from app.graphs.compliance_security_graph import create_compliance_security_graph, create_initial_state as create_compliance_security_initial_state
+from app.agents.graph_registry import get_compiled_graph
+from app.graphs.delegation import DelegationCancelled, delegation_cancelled
+from app.graphs.task_routing import resolve_target_node
+from app.graphs.resource_planning_graph import create_initial_state as create_resource_planning_initial_state
+from app.graphs.financial_graph import create_initial_state as create_financial_initial_state
+from app.graphs.stakeholder_management_graph import create_initial_state as create_stakeholder_management_initial_state
+from app.graphs.marketing_communications_graph import create_initial_state as create_marketing_communications_initial_state
+from app.graphs.project_management_graph import create_initial_state as create_project_management_initial_state
+from app.graphs.analytics_graph import create_initial_state as create_analytics_initial_state
+from app.graphs.compliance_security_graph import create_initial_state as create_compliance_security_initial_state
 from app.utils.logging_utils import setup_logger, log_agent_invocation, log_agent_response, log_agent_error
 
 # Set up logger
@@ -39,6 +42,7 @@ class ProjectManagementTaskInput(BaseModel):
     task: str = Field(..., description="Task to delegate to the Project Management Agent")
     event_details: Dict[str, Any] = Field(..., description="Event details to provide to the Project Management Agent")
     requirements: Optional[Dict[str, Any]] = Field(None, description="Additional requirements for the task")
+    target_node: Optional[str] = Field(None, description="Graph node that should handle the task")
 
 
 class ResourcePlanningTaskInput(BaseModel):
@@ -47,6 +51,7 @@ class ResourcePlanningTaskInput(BaseModel):
     task: str = Field(..., description="Task to delegate to the Resource Planning Agent")
     event_details: Dict[str, Any] = Field(..., description="Event details to provide to the Resource Planning Agent")
     requirements: Optional[Dict[str, Any]] = Field(None, description="Additional requirements for the task")
+    target_node: Optional[str] = Field(None, description="Graph node that should handle the task")
 
 
 class StakeholderManagementTaskInput(BaseModel):
@@ -55,6 +60,7 @@ class StakeholderManagementTaskInput(BaseModel):
     task: str = Field(..., description="Task to delegate to the Stakeholder Management Agent")
     event_details: Dict[str, Any] = Field(..., description="Event details to provide to the Stakeholder Management Agent")
     requirements: Optional[Dict[str, Any]] = Field(None, description="Additional requirements for the task")
+    target_node: Optional[str] = Field(None, description="Graph node that should handle the task")
 
 
 class MarketingCommunicationsTaskInput(BaseModel):
@@ -63,6 +69,7 @@ class MarketingCommunicationsTaskInput(BaseModel):
     task: str = Field(..., description="Task to delegate to the Marketing & Communications Agent")
     event_details: Dict[str, Any] = Field(..., description="Event details to provide to the Marketing & Communications Agent")
     requirements: Optional[Dict[str, Any]] = Field(None, description="Additional requirements for the task")
+    target_node: Optional[str] = Field(None, description="Graph node that should handle the task")
 
 
 class FinancialTaskInput(BaseModel):
@@ -72,6 +79,7 @@ class FinancialTaskInput(BaseModel):
     event_details: Dict[str, Any] = Field(..., description="Event details to provide to the Financial Agent")
     budget: Optional[Dict[str, Any]] = Field(None, description="Budget information for the task")
     requirements: Optional[Dict[str, Any]] = Field(None, description="Additional requirements for the task")
+    target_node: Optional[str] = Field(None, description="Graph node that should handle the task")
 
 
 class AnalyticsTaskInput(BaseModel):
@@ -80,6 +88,7 @@ class AnalyticsTaskInput(BaseModel):
     task: str = Field(..., description="Task to delegate to the Analytics Agent")
     event_details: Dict[str, Any] = Field(..., description="Event details to provide to the Analytics Agent")
     requirements: Optional[Dict[str, Any]] = Field(None, description="Additional requirements for the task")
+    target_node: Optional[str] = Field(None, description="Graph node that should handle the task")
 
 
 class ComplianceSecurityTaskInput(BaseModel):
@@ -88,11 +97,92 @@ class ComplianceSecurityTaskInput(BaseModel):
     task: str = Field(..., description="Task to delegate to the Compliance & Security Agent")
     event_details: Dict[str, Any] = Field(..., description="Event details to provide to the Compliance & Security Agent")
     requirements: Optional[Dict[str, Any]] = Field(None, description="Additional requirements for the task")
+    target_node: Optional[str] = Field(None, description="Graph node that should handle the task")
 
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+
+# Initial state builders by agent type
+INITIAL_STATE_BUILDERS = {
+    "resource_planning": create_resource_planning_initial_state,
+    "financial": create_financial_initial_state,
+    "stakeholder_management": create_stakeholder_management_initial_state,
+    "marketing_communications": create_marketing_communications_initial_state,
+    "project_management": create_project_management_initial_state,
+    "analytics": create_analytics_initial_state,
+    "compliance_security": create_compliance_security_initial_state
+}
+
+
+def _run_delegated_task(
+    agent_type: str,
+    agent_name: str,
+    task: str,
+    event_details: Dict[str, Any],
+    requirements: Optional[Dict[str, Any]] = None,
+    target_node: Optional[str] = None,
+    state_updates: Optional[Dict[str, Any]] = None
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Run a delegated task through a specialist graph in a single pass.
+    
+    The graph runs its steps up to the node chosen for the task (see
+    app.graphs.task_routing) and goes straight to its response node. Tasks
+    without a matching node run the whole graph once.
+    
+    Args:
+        agent_type: The specialist agent type
+        agent_name: Display name of the agent
+        task: Task to delegate
+        event_details: Event details
+        requirements: Additional requirements
+        target_node: Graph node named by the coordinator, if any
+        state_updates: Additional initial state values
+        
+    Returns:
+        Tuple of (final graph state, agent response)
+    """
+    entry_point = resolve_target_node(agent_type, task, target_node)
+    graph = get_compiled_graph(agent_type, entry_point)
+    logger.info(f"Routing task for {agent_name} to {entry_point or 'the full workflow'}")
+    
+    # Create initial state
+    state = INITIAL_STATE_BUILDERS[agent_type]()
+    
+    # Update state with event details
+    for key, value in event_details.items():
+        if key in state["event_details"]:
+            state["event_details"][key] = value
+    
+    if state_updates:
+        state.update(state_updates)
+    
+    # Add task message
+    task_message = f"Task: {task}\n\n"
+    if requirements:
+        task_message += "Requirements:\n"
+        for key, value in requirements.items():
+            task_message += f"- {key}: {value}\n"
+    
+    state["messages"].append({
+        "role": "user",
+        "content": task_message
+    })
+    
+    # Run node by node so a delegation that timed out stops at the next node
+    result = state
+    for result in graph.stream(state, stream_mode="values"):
+        if delegation_cancelled():
+            raise DelegationCancelled(f"Task for {agent_name} was cancelled")
+    
+    # Extract the response
+    assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
+    response = assistant_messages[-1]["content"] if assistant_messages else f"No response from {agent_name}"
+    
+    return result, response
+
 class ResourcePlanningTaskTool(BaseTool):
     """Tool for delegating tasks to the Resource Planning Agent."""
     
@@ -162,7 +252,8 @@ class ResourcePlanningTaskTool(BaseTool):
             "equipment_needs": []
         }
     
-    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None,
+             target_node: Optional[str] = None) -> Dict[str, Any]:
         """
         Run the resource planning task tool.
         
@@ -170,6 +261,7 @@ class ResourcePlanningTaskTool(BaseTool):
             task: Task to delegate
             event_details: Event details
             requirements: Additional requirements
+            target_node: Graph node to handle the task (matched from the task if not given)
             
         Returns:
             Dictionary with task results
@@ -179,97 +271,22 @@ class ResourcePlanningTaskTool(BaseTool):
         print(f"Delegating task to Resource Planning Agent: {task}")
         
         try:
-            # Create the resource planning graph
-            logger.info("Creating Resource Planning graph")
-            resource_planning_graph = create_resource_planning_graph()
-            
-            # Create initial state
-            logger.info("Creating initial state for Resource Planning Agent")
-            state = create_resource_planning_initial_state()
-            
-            # Update state with event details
-            for key, value in event_details.items():
-                if key in state["event_details"]:
-                    state["event_details"][key] = value
-            
-            # Skip ephemeral system message to avoid Google AI format issues
-            # state["messages"].append({
-            #     "role": "system",
-            #     "content": "The Frontend Coordinator Agent has delegated a task to you.",
-            #     "ephemeral": True
-            # })
-            
-            # Add task message
-            task_message = f"Task: {task}\n\n"
-            if requirements:
-                task_message += "Requirements:\n"
-                for key, value in requirements.items():
-                    task_message += f"- {key}: {value}\n"
-            
-            state["messages"].append({
-                "role": "user",
-                "content": task_message
-            })
-            
-            # Log the state preparation
-            logger.debug(f"Prepared state for Resource Planning Agent with task: {task}")
-            
-            # DEBUG: Print state before invoking graph
-            print(f"DEBUG: State before invoking resource planning graph for task '{task}':")
-            import pprint
-            pprint.pprint(state)
-            print("-" * 20)
-            
-            # Run the resource planning graph
+            # Run the task through the Resource Planning graph in a single pass
             logger.info("Invoking Resource Planning graph")
             try:
-                result = resource_planning_graph.invoke(state)
-                logger.info("Resource Planning graph invocation successful")
+                result, response = _run_delegated_task(
+                    agent_type="resource_planning",
+                    agent_name="Resource Planning Agent",
+                    task=task,
+                    event_details=event_details,
+                    requirements=requirements,
+                    target_node=target_node
+                )
+                logger.info(f"Received response from Resource Planning Agent: {response[:100]}...")
             except Exception as e:
                 logger.error(f"Error during Resource Planning graph invocation: {str(e)}", exc_info=True)
                 return self._handle_error(e, f"Error invoking Resource Planning Agent with task: {task}")
             
-            # Extract the response
-            assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-            if assistant_messages:
-                response = assistant_messages[-1]["content"]
-                logger.info(f"Received response from Resource Planning Agent: {response[:100]}...")
-            else:
-                logger.warning("No response received from Resource Planning Agent")
-                response = "No response from Resource Planning Agent. This could be due to an error in processing your request or insufficient information provided."
-            
-            # Determine the appropriate next action based on the task
-            next_action = None
-            if "venue" in task.lower() or "location" in task.lower():
-                next_action = "search_venues"
-                logger.info("Determined next action: search_venues")
-            elif "service" in task.lower() or "provider" in task.lower():
-                next_action = "search_service_providers"
-                logger.info("Determined next action: search_service_providers")
-            elif "equipment" in task.lower() or "resource" in task.lower():
-                next_action = "plan_equipment"
-                logger.info("Determined next action: plan_equipment")
-            elif "plan" in task.lower():
-                next_action = "generate_resource_plan"
-                logger.info("Determined next action: generate_resource_plan")
-            
-            # If a specific next action is determined, run that action
-            if next_action:
-                logger.info(f"Invoking Resource Planning graph with next action: {next_action}")
-                try:
-                    result = resource_planning_graph.invoke(result, {"override_next": next_action})
-                    logger.info(f"Resource Planning graph invocation with {next_action} successful")
-                    
-                    # Extract the updated response
-                    assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-                    if assistant_messages:
-                        response = assistant_messages[-1]["content"]
-                        logger.info(f"Updated response from Resource Planning Agent: {response[:100]}...")
-                except Exception as e:
-                    logger.error(f"Error during Resource Planning graph invocation with next action {next_action}: {str(e)}", exc_info=True)
-                    # Continue with the previous response instead of failing completely
-                    logger.info("Continuing with previous response due to error in next action")
-            
             # Log the response
             log_agent_response(logger, "Resource Planning", response)
             
@@ -299,7 +316,8 @@ class ComplianceSecurityTaskTool(BaseTool):
     description: str = "Delegate a task to the Compliance & Security Agent"
     args_schema: Type[ComplianceSecurityTaskInput] = ComplianceSecurityTaskInput
     
-    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None,
+             target_node: Optional[str] = None) -> Dict[str, Any]:
         """
         Run the compliance and security task tool.
         
@@ -307,73 +325,22 @@ class ComplianceSecurityTaskTool(BaseTool):
             task: Task to delegate
             event_details: Event details
             requirements: Additional requirements
+            target_node: Graph node to handle the task (matched from the task if not given)
             
         Returns:
             Dictionary with task results
         """
         print(f"Delegating task to Compliance & Security Agent: {task}")
         
-        # Create the compliance and security graph
-        compliance_security_graph = create_compliance_security_graph()
-        
-        # Create initial state
-        state = create_compliance_security_initial_state()
-        
-        # Update state with event details
-        for key, value in event_details.items():
-            if key in state["event_details"]:
-                state["event_details"][key] = value
-        
-        # Add initial message
-        # Skip ephemeral system message to avoid Google AI format issues
-        # state["messages"].append({
-        #     "role": "system", 
-        #     "content": "The Frontend Coordinator Agent has delegated a task to you.",
-        #     "ephemeral": True
-        # })
-        
-        # Add task message
-        task_message = f"Task: {task}\n\n"
-        if requirements:
-            task_message += "Requirements:\n"
-            for key, value in requirements.items():
-                task_message += f"- {key}: {value}\n"
-        
-        state["messages"].append({
-            "role": "user",
-            "content": task_message
-        })
-        
-        # Run the compliance and security graph
-        result = compliance_security_graph.invoke(state)
-        
-        # Extract the response
-        assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-        response = assistant_messages[-1]["content"] if assistant_messages else "No response from Compliance & Security Agent"
-        
-        # Determine the appropriate next action based on the task
-        next_action = None
-        if "requirement" in task.lower() or "regulation" in task.lower() or "compliance" in task.lower():
-            next_action = "track_requirements"
-        elif "security" in task.lower() or "access control" in task.lower() or "physical security" in task.lower():
-            next_action = "plan_security"
-        elif "data protection" in task.lower() or "privacy" in task.lower() or "gdpr" in task.lower():
-            next_action = "implement_data_protection"
-        elif "audit" in task.lower() or "assessment" in task.lower() or "verify" in task.lower():
-            next_action = "conduct_audit"
-        elif "incident" in task.lower() or "response" in task.lower() or "emergency" in task.lower():
-            next_action = "plan_incident_response"
-        elif "report" in task.lower() or "documentation" in task.lower():
-            next_action = "generate_report"
-        elif "update" in task.lower() or "regulatory change" in task.lower():
-            next_action = "monitor_updates"
-        
-        # If a specific next action is determined, run that action
-        if next_action:
-            result = compliance_security_graph.invoke(result, {"override_next": next_action})
-            # Extract the updated response
-            assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-            response = assistant_messages[-1]["content"] if assistant_messages else response
+        # Run the task through the Compliance & Security graph in a single pass
+        result, response = _run_delegated_task(
+            agent_type="compliance_security",
+            agent_name="Compliance & Security Agent",
+            task=task,
+            event_details=event_details,
+            requirements=requirements,
+            target_node=target_node
+        )
         
         # Return the result
         return {
@@ -400,7 +367,8 @@ class AnalyticsTaskTool(BaseTool):
     description: str = "Delegate a task to the Analytics Agent"
     args_schema: Type[AnalyticsTaskInput] = AnalyticsTaskInput
     
-    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None,
+             target_node: Optional[str] = None) -> Dict[str, Any]:
         """
         Run the analytics task tool.
         
@@ -408,74 +376,22 @@ class AnalyticsTaskTool(BaseTool):
             task: Task to delegate
             event_details: Event details
             requirements: Additional requirements
+            target_node: Graph node to handle the task (matched from the task if not given)
             
         Returns:
             Dictionary with task results
         """
         print(f"Delegating task to Analytics Agent: {task}")
         
-        # Create the analytics graph
-        analytics_graph = create_analytics_graph()
-        
-        # Create initial state
-        state = create_analytics_initial_state()
-        
-        # Update state with event details
-        for key, value in event_details.items():
-            if key in state["event_details"]:
-                state["event_details"][key] = value
-        
-        # Skip ephemeral system message to avoid Google AI format issues
-        # state["messages"].append({
-        #     "role": "system",
-        #     "content": "The Frontend Coordinator Agent has delegated a task to you.",
-        #     "ephemeral": True
-        # })
-        
-        # Add task message
-        task_message = f"Task: {task}\n\n"
-        if requirements:
-            task_message += "Requirements:\n"
-            for key, value in requirements.items():
-                task_message += f"- {key}: {value}\n"
-        
-        state["messages"].append({
-            "role": "user",
-            "content": task_message
-        })
-        
-        # Run the analytics graph
-        result = analytics_graph.invoke(state)
-        
-        # Extract the response
-        assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-        response = assistant_messages[-1]["content"] if assistant_messages else "No response from Analytics Agent"
-        
-        # Determine the appropriate next action based on the task
-        next_action = None
-        if "data" in task.lower() or "collect" in task.lower():
-            next_action = "configure_data_sources"
-        elif "metric" in task.lower() or "kpi" in task.lower():
-            next_action = "define_metrics"
-        elif "segment" in task.lower() or "audience" in task.lower():
-            next_action = "create_segments"
-        elif "survey" in task.lower() or "feedback" in task.lower():
-            next_action = "design_surveys"
-        elif "report" in task.lower() or "analysis" in task.lower():
-            next_action = "generate_reports"
-        elif "roi" in task.lower() or "return" in task.lower():
-            next_action = "calculate_roi"
-        elif "attendee" in task.lower() or "demographic" in task.lower():
-            next_action = "analyze_attendees"
-        elif "insight" in task.lower() or "recommend" in task.lower():
-            next_action = "generate_insights"
-        
-        # If a specific next action is determined, run that action
-        if next_action:
-            result = analytics_graph.invoke(result, {"override_next": next_action})
-            # Extract the updated response
-            assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-            response = assistant_messages[-1]["content"] if assistant_messages else response
+        # Run the task through the Analytics graph in a single pass
+        result, response = _run_delegated_task(
+            agent_type="analytics",
+            agent_name="Analytics Agent",
+            task=task,
+            event_details=event_details,
+            requirements=requirements,
+            target_node=target_node
+        )
         
         # Return the result
         return {
@@ -503,7 +419,8 @@ class MarketingCommunicationsTaskTool(BaseTool):
     description: str = "Delegate a task to the Marketing & Communications Agent"
     args_schema: Type[MarketingCommunicationsTaskInput] = MarketingCommunicationsTaskInput
     
-    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None,
+             target_node: Optional[str] = None) -> Dict[str, Any]:
         """
         Run the marketing and communications task tool.
         
@@ -511,72 +428,22 @@ class MarketingCommunicationsTaskTool(BaseTool):
             task: Task to delegate
             event_details: Event details
             requirements: Additional requirements
+            target_node: Graph node to handle the task (matched from the task if not given)
             
         Returns:
             Dictionary with task results
         """
         print(f"Delegating task to Marketing & Communications Agent: {task}")
         
-        # Create the marketing communications graph
-        marketing_graph = create_marketing_communications_graph()
-        
-        # Create initial state
-        state = create_marketing_communications_initial_state()
-        
-        # Update state with event details
-        for key, value in event_details.items():
-            if key in state["event_details"]:
-                state["event_details"][key] = value
-        
-        # Skip ephemeral system message to avoid Google AI format issues
-        # state["messages"].append({
-        #     "role": "system",
-        #     "content": "The Frontend Coordinator Agent has delegated a task to you.",
-        #     "ephemeral": True
-        # })
-        
-        # Add task message
-        task_message = f"Task: {task}\n\n"
-        if requirements:
-            task_message += "Requirements:\n"
-            for key, value in requirements.items():
-                task_message += f"- {key}: {value}\n"
-        
-        state["messages"].append({
-            "role": "user",
-            "content": task_message
-        })
-        
-        # Run the marketing communications graph
-        result = marketing_graph.invoke(state)
-        
-        # Extract the response
-        assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-        response = assistant_messages[-1]["content"] if assistant_messages else "No response from Marketing & Communications Agent"
-        
-        # Determine the appropriate next action based on the task
-        next_action = None
-        if "channel" in task.lower() or "platform" in task.lower():
-            next_action = "manage_channels"
-        elif "content" in task.lower() or "post" in task.lower() or "message" in task.lower():
-            next_action = "create_content"
-        elif "attendee" in task.lower() or "registration" in task.lower():
-            next_action = "manage_attendees"
-        elif "form" in task.lower():
-            next_action = "create_registration_form"
-        elif "campaign" in task.lower() or "promotion" in task.lower():
-            next_action = "create_campaign"
-        elif "marketing plan" in task.lower() or "strategy" in task.lower():
-            next_action = "generate_marketing_plan"
-        elif "communication plan" in task.lower() or "stakeholder" in task.lower():
-            next_action = "generate_communication_plan"
-        
-        # If a specific next action is determined, run that action
-        if next_action:
-            result = marketing_graph.invoke(result, {"override_next": next_action})
-            # Extract the updated response
-            assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-            response = assistant_messages[-1]["content"] if assistant_messages else response
+        # Run the task through the Marketing & Communications graph in a single pass
+        result, response = _run_delegated_task(
+            agent_type="marketing_communications",
+            agent_name="Marketing & Communications Agent",
+            task=task,
+            event_details=event_details,
+            requirements=requirements,
+            target_node=target_node
+        )
         
         # Return the result
         return {
@@ -603,7 +470,8 @@ class StakeholderManagementTaskTool(BaseTool):
     description: str = "Delegate a task to the Stakeholder Management Agent"
     args_schema: Type[StakeholderManagementTaskInput] = StakeholderManagementTaskInput
     
-    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None,
+             target_node: Optional[str] = None) -> Dict[str, Any]:
         """
         Run the stakeholder management task tool.
         
@@ -611,68 +479,22 @@ class StakeholderManagementTaskTool(BaseTool):
             task: Task to delegate
             event_details: Event details
             requirements: Additional requirements
+            target_node: Graph node to handle the task (matched from the task if not given)
             
         Returns:
             Dictionary with task results
         """
         print(f"Delegating task to Stakeholder Management Agent: {task}")
         
-        # Create the stakeholder management graph
-        stakeholder_management_graph = create_stakeholder_management_graph()
-        
-        # Create initial state
-        state = create_stakeholder_management_initial_state()
-        
-        # Update state with event details
-        for key, value in event_details.items():
-            if key in state["event_details"]:
-                state["event_details"][key] = value
-        
-        # Skip ephemeral system message to avoid Google AI format issues
-        # state["messages"].append({
-        #     "role": "system",
-        #     "content": "The Frontend Coordinator Agent has delegated a task to you.",
-        #     "ephemeral": True
-        # })
-        
-        # Add task message
-        task_message = f"Task: {task}\n\n"
-        if requirements:
-            task_message += "Requirements:\n"
-            for key, value in requirements.items():
-                task_message += f"- {key}: {value}\n"
-        
-        state["messages"].append({
-            "role": "user",
-            "content": task_message
-        })
-        
-        # Run the stakeholder management graph
-        result = stakeholder_management_graph.invoke(state)
-        
-        # Extract the response
-        assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-        response = assistant_messages[-1]["content"] if assistant_messages else "No response from Stakeholder Management Agent"
-        
-        # Determine the appropriate next action based on the task
-        next_action = None
-        if "speaker" in task.lower() or "presenter" in task.lower():
-            next_action = "manage_speakers"
-        elif "sponsor" in task.lower() or "funding" in task.lower():
-            next_action = "manage_sponsors"
-        elif "volunteer" in task.lower() or "staff" in task.lower():
-            next_action = "manage_volunteers"
-        elif "vip" in task.lower() or "important guest" in task.lower():
-            next_action = "manage_vips"
-        elif "plan" in task.lower() or "strategy" in task.lower():
-            next_action = "generate_stakeholder_plan"
-        
-        # If a specific next action is determined, run that action
-        if next_action:
-            result = stakeholder_management_graph.invoke(result, {"override_next": next_action})
-            # Extract the updated response
-            assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-            response = assistant_messages[-1]["content"] if assistant_messages else response
+        # Run the task through the Stakeholder Management graph in a single pass
+        result, response = _run_delegated_task(
+            agent_type="stakeholder_management",
+            agent_name="Stakeholder Management Agent",
+            task=task,
+            event_details=event_details,
+            requirements=requirements,
+            target_node=target_node
+        )
         
         # Return the result
         return {
@@ -697,7 +519,8 @@ class ProjectManagementTaskTool(BaseTool):
     description: str = "Delegate a task to the Project Management Agent"
     args_schema: Type[ProjectManagementTaskInput] = ProjectManagementTaskInput
     
-    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _run(self, task: str, event_details: Dict[str, Any], requirements: Optional[Dict[str, Any]] = None,
+             target_node: Optional[str] = None) -> Dict[str, Any]:
         """
         Run the project management task tool.
         
@@ -705,68 +528,22 @@ class ProjectManagementTaskTool(BaseTool):
             task: Task to delegate
             event_details: Event details
             requirements: Additional requirements
+            target_node: Graph node to handle the task (matched from the task if not given)
             
         Returns:
             Dictionary with task results
         """
         print(f"Delegating task to Project Management Agent: {task}")
         
-        # Create the project management graph
-        project_management_graph = create_project_management_graph()
-        
-        # Create initial state
-        state = create_project_management_initial_state()
-        
-        # Update state with event details
-        for key, value in event_details.items():
-            if key in state["event_details"]:
-                state["event_details"][key] = value
-        
-        # Skip ephemeral system message to avoid Google AI format issues
-        # state["messages"].append({
-        #     "role": "system",
-        #     "content": "The Frontend Coordinator Agent has delegated a task to you.",
-        #     "ephemeral": True
-        # })
-        
-        # Add task message
-        task_message = f"Task: {task}\n\n"
-        if requirements:
-            task_message += "Requirements:\n"
-            for key, value in requirements.items():
-                task_message += f"- {key}: {value}\n"
-        
-        state["messages"].append({
-            "role": "user",
-            "content": task_message
-        })
-        
-        # Run the project management graph
-        result = project_management_graph.invoke(state)
-        
-        # Extract the response
-        assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-        response = assistant_messages[-1]["content"] if assistant_messages else "No response from Project Management Agent"
-        
-        # Determine the appropriate next action based on the task
-        next_action = None
-        if "task" in task.lower() or "assignment" in task.lower():
-            next_action = "manage_tasks"
-        elif "milestone" in task.lower() or "deadline" in task.lower():
-            next_action = "manage_milestones"
-        elif "risk" in task.lower() or "issue" in task.lower():
-            next_action = "manage_risks"
-        elif "timeline" in task.lower() or "schedule" in task.lower():
-            next_action = "generate_timeline"
-        elif "plan" in task.lower() or "project plan" in task.lower():
-            next_action = "generate_project_plan"
-        
-        # If a specific next action is determined, run that action
-        if next_action:
-            result = project_management_graph.invoke(result, {"override_next": next_action})
-            # Extract the updated response
-            assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-            response = assistant_messages[-1]["content"] if assistant_messages else response
+        # Run the task through the Project Management graph in a single pass
+        result, response = _run_delegated_task(
+            agent_type="project_management",
+            agent_name="Project Management Agent",
+            task=task,
+            event_details=event_details,
+            requirements=requirements,
+            target_node=target_node
+        )
         
         # Return the result
         return {
@@ -793,7 +570,8 @@ class FinancialTaskTool(BaseTool):
     
     def _run(self, task: str, event_details: Dict[str, Any], 
              budget: Optional[Dict[str, Any]] = None,
-             requirements: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+             requirements: Optional[Dict[str, Any]] = None,
+             target_node: Optional[str] = None) -> Dict[str, Any]:
         """
         Run the financial task tool.
         
@@ -802,72 +580,23 @@ class FinancialTaskTool(BaseTool):
             event_details: Event details
             budget: Budget information
             requirements: Additional requirements
+            target_node: Graph node to handle the task (matched from the task if not given)
             
         Returns:
             Dictionary with task results
         """
         print(f"Delegating task to Financial Agent: {task}")
         
-        # Create the financial graph
-        financial_graph = create_financial_graph()
-        
-        # Create initial state
-        state = create_financial_initial_state()
-        
-        # Update state with event details
-        for key, value in event_details.items():
-            if key in state["event_details"]:
-                state["event_details"][key] = value
-        
-        # Update state with budget if provided
-        if budget:
-            state["budget"] = budget
-        
-        # Skip ephemeral system message to avoid Google AI format issues
-        # state["messages"].append({
-        #     "role": "system",
-        #     "content": "The Frontend Coordinator Agent has delegated a task to you.",
-        #     "ephemeral": True
-        # })
-        
-        # Add task message
-        task_message = f"Task: {task}\n\n"
-        if requirements:
-            task_message += "Requirements:\n"
-            for key, value in requirements.items():
-                task_message += f"- {key}: {value}\n"
-        
-        state["messages"].append({
-            "role": "user",
-            "content": task_message
-        })
-        
-        # Run the financial graph
-        result = financial_graph.invoke(state)
-        
-        # Extract the response
-        assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-        response = assistant_messages[-1]["content"] if assistant_messages else "No response from Financial Agent"
-        
-        # Determine the appropriate next action based on the task
-        next_action = None
-        if "budget" in task.lower() or "allocate" in task.lower():
-            next_action = "allocate_budget"
-        elif "expense" in task.lower() or "payment" in task.lower() or "track" in task.lower():
-            next_action = "track_expenses"
-        elif "contract" in task.lower():
-            next_action = "manage_contracts"
-        elif "report" in task.lower():
-            next_action = "generate_financial_report"
-        elif "plan" in task.lower():
-            next_action = "generate_financial_plan"
-        
-        # If a specific next action is determined, run that action
-        if next_action:
-            result = financial_graph.invoke(result, {"override_next": next_action})
-            # Extract the updated response
-            assistant_messages = [m for m in result["messages"] if m["role"] == "assistant"]
-            response = assistant_messages[-1]["content"] if assistant_messages else response
+        # Run the task through the Financial graph in a single pass
+        result, response = _run_delegated_task(
+            agent_type="financial",
+            agent_name="Financial Agent",
+            task=task,
+            event_details=event_details,
+            requirements=requirements,
+            target_node=target_node,
+            state_updates={"budget": budget} if budget else None
+        )
         
         # Return the result
         return {
@@ -0,0 +1,374 @@
+"""
+Exact-match cache for LLM responses.
+
+Several LLM calls are effectively deterministic: context extraction runs at a
+low temperature, specialist analysis nodes see the same task and event
+details when the coordinator re-delegates, and proposals are regenerated from
+unchanged state. LLMResponseCache plugs into LangChain's model cache
+(``ChatOpenAI(cache=...)``) and returns the stored generations when the same
+normalized prompt is sent to the same model with the same parameters again.
+
+Entries are scoped to the organization set with ``llm_cache_scope`` so that
+one tenant never receives another tenant's cached output. Entries expire
+after a TTL and are stored in PostgreSQL (shared by all workers) or in an
+in-process LRU (for tests and local development). Expired PostgreSQL rows
+are deleted by the workers writing to the cache, at most once per purge
+interval per worker.
+"""
+
+import contextvars
+import hashlib
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from sqlalchemy.dialects.postgresql import insert
+
+from app import config
+from app.db.base import SessionLocal
+from app.db.models_updated import LLMCacheEntry
+from app.utils.logging_utils import setup_logger
+from app.utils.ttl_cache import TTLCache
+
+
+logger = setup_logger(name="llm_cache", component="agent")
+
+# Organization whose cache entries the current LLM calls use
+_cache_scope: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("llm_cache_scope", default=None)
+
+
+@contextmanager
+def llm_cache_scope(organization_id: Optional[int]) -> Iterator[None]:
+    """
+    Scope cached LLM responses to an organization.
+
+    The scope is carried by a context variable, so it follows the agent run
+    into graph nodes, asyncio tasks and worker threads started with
+    asyncio.to_thread.
+
+    Args:
+        organization_id: The organization making the LLM calls
+    """
+    token = _cache_scope.set(organization_id)
+    try:
+        yield
+    finally:
+        _cache_scope.reset(token)
+
+
+def get_llm_cache_scope() -> Optional[int]:
+    """
+    Get the organization the current LLM calls are scoped to.
+
+    Returns:
+        The organization ID, or None outside of a tenant scope
+    """
+    return _cache_scope.get()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt for cache lookups.
+
+    Runs of whitespace are collapsed so that formatting differences (e.g.
+    indentation of prompt templates) do not cause misses.
+
+    Args:
+        prompt: The serialized prompt
+
+    Returns:
+        The normalized prompt
+    """
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def make_cache_key(organization_id: Optional[int], llm_string: str, prompt: str) -> str:
+    """
+    Build the cache key for a prompt.
+
+    Args:
+        organization_id: The tenant scope
+        llm_string: LangChain's serialization of the model and its parameters
+            (model name, temperature, ...)
+        prompt: The serialized prompt
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    scope = "global" if organization_id is None else str(organization_id)
+    payload = "\n".join((scope, llm_string, normalize_prompt(prompt)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class InMemoryLLMCacheBackend:
+    """In-process LRU store for cached responses."""
+
+    def __init__(self, max_size: int = 1000):
+        """
+        Initialize the backend.
+
+        Args:
+            max_size: Maximum number of entries
+        """
+        self.max_size = max_size
+        self._entries = TTLCache(max_size=max_size)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._entries.get(key)
+
+    def set(self, key: str, organization_id: Optional[int], value: str, ttl: float) -> None:
+        self._entries.put(key, value, ttl=ttl)
+
+    def clear(self, organization_id: Optional[int] = None) -> None:
+        # Keys are hashes, so without a tenant index everything is dropped
+        self._entries.clear()
+
+
+class PostgresLLMCacheBackend:
+    """Cached responses stored in the llm_cache_entries table."""
+
+    def __init__(self, purge_interval: float = 300.0):
+        """
+        Initialize the backend.
+
+        Args:
+            purge_interval: Seconds between deletions of expired entries
+        """
+        self.purge_interval = purge_interval
+        self._next_purge = time.monotonic() + purge_interval
+        self._purge_lock = threading.Lock()
+        self.purged = 0
+
+    def get(self, key: str) -> Optional[str]:
+        db = SessionLocal()
+        try:
+            row = db.query(LLMCacheEntry.generations).filter(
+                LLMCacheEntry.cache_key == key,
+                LLMCacheEntry.expires_at > datetime.utcnow()
+            ).first()
+            return row[0] if row else None
+        finally:
+            db.close()
+
+    def set(self, key: str, organization_id: Optional[int], value: str, ttl: float) -> None:
+        now = datetime.utcnow()
+        statement = insert(LLMCacheEntry.__table__).values(
+            cache_key=key,
+            organization_id=organization_id,
+            generations=value,
+            created_at=now,
+            expires_at=now + timedelta(seconds=ttl)
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["cache_key"],
+            set_={
+                "generations": statement.excluded.generations,
+                "created_at": statement.excluded.created_at,
+                "expires_at": statement.excluded.expires_at
+            }
+        )
+        db = SessionLocal()
+        try:
+            db.execute(statement)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self._purge_if_due()
+
+    def _purge_if_due(self) -> None:
+        """Delete expired entries if the purge interval has passed."""
+        with self._purge_lock:
+            if time.monotonic() < self._next_purge:
+                return
+            self._next_purge = time.monotonic() + self.purge_interval
+
+        try:
+            self.purge_expired()
+        except Exception as e:
+            logger.warning(f"Purging expired LLM cache entries failed: {str(e)}")
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired entries.
+
+        Returns:
+            Number of deleted entries
+        """
+        db = SessionLocal()
+        try:
+            deleted = db.query(LLMCacheEntry).filter(
+                LLMCacheEntry.expires_at < datetime.utcnow()
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.purged += deleted
+        return deleted
+
+    def clear(self, organization_id: Optional[int] = None) -> None:
+        db = SessionLocal()
+        try:
+            query = db.query(LLMCacheEntry)
+            if organization_id is not None:
+                query = query.filter(LLMCacheEntry.organization_id == organization_id)
+            query.delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain model cache with tenant scoping, TTL and hit statistics.
+
+    Backend errors are logged and treated as misses, so an unavailable cache
+    never fails an LLM call.
+    """
+
+    def __init__(self, backend: Any, ttl: float = 86400.0):
+        """
+        Initialize the cache.
+
+        Args:
+            backend: Storage for cached responses
+            ttl: Seconds an entry stays valid
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Any]]:
+        """
+        Look up cached generations.
+
+        Args:
+            prompt: The serialized prompt
+            llm_string: The serialized model parameters
+
+        Returns:
+            The cached generations, or None on a miss
+        """
+        key = make_cache_key(get_llm_cache_scope(), llm_string, prompt)
+        try:
+            value = self.backend.get(key)
+            generations = loads(value) if value is not None else None
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {str(e)}")
+            with self._lock:
+                self.errors += 1
+            return None
+
+        with self._lock:
+            if generations is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Any]) -> None:
+        """
+        Store generations for a prompt.
+
+        Args:
+            prompt: The serialized prompt
+            llm_string: The serialized model parameters
+            return_val: The generations returned by the model
+        """
+        organization_id = get_llm_cache_scope()
+        key = make_cache_key(organization_id, llm_string, prompt)
+        try:
+            self.backend.set(key, organization_id, dumps(list(return_val)), self.ttl)
+        except Exception as e:
+            logger.warning(f"LLM cache update failed: {str(e)}")
+            with self._lock:
+                self.errors += 1
+            return
+
+        with self._lock:
+            self.writes += 1
+
+    def clear(self, **kwargs: Any) -> None:
+        """
+        Remove cached responses.
+
+        Args:
+            **kwargs: organization_id limits the removal to one tenant
+        """
+        self.backend.clear(kwargs.get("organization_id"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit/miss/write/error counts and the hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "writes": self.writes,
+                "errors": self.errors
+            }
+
+
+# Global cache instance
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Get the process-wide LLM response cache.
+
+    The backend is selected with LLM_CACHE_BACKEND ("postgres" or "memory").
+
+    Returns:
+        LLMResponseCache instance, or None if LLM_CACHE_ENABLED is false
+    """
+    global _llm_cache
+    if not config.LLM_CACHE_ENABLED:
+        return None
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                if config.LLM_CACHE_BACKEND == "memory":
+                    backend = InMemoryLLMCacheBackend(max_size=config.LLM_CACHE_MAX_ENTRIES)
+                else:
+                    backend = PostgresLLMCacheBackend(purge_interval=config.LLM_CACHE_PURGE_INTERVAL_SECONDS)
+                _llm_cache = LLMResponseCache(backend, ttl=config.LLM_CACHE_TTL_SECONDS)
+    return _llm_cache
+
+
+def get_llm_cache_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get statistics of the LLM response cache.
+
+    Returns:
+        Cache statistics, or None if the cache has not been used
+    """
+    if _llm_cache is None:
+        return None
+    return _llm_cache.get_stats()
@@ -1,13 +1,45 @@
 """
 LLM Factory module for creating LLM instances based on configuration.
+
+LLM clients are pooled: one client is created per (provider, model,
+temperature) and shared by every caller, so HTTP connections (and their TLS
+sessions) are kept alive and reused across graph nodes and requests. OpenAI
+clients additionally share one keep-alive HTTP connection pool for sync calls
+and one per event loop for async calls, since async connections cannot outlive
+the loop they were opened on (sync graph runs drive every node on its own
+loop).
+
+Callers making effectively deterministic calls can ask for a client backed
+by the LLM response cache (see app.utils.llm_cache).
+
+Identical LLM calls already in flight in this worker are coalesced: later
+callers wait for the first caller's response instead of sending the same
+request again (see app.utils.single_flight). The remaining calls are limited
+per organization and scheduled fairly between organizations (see
+app.utils.llm_rate_limiter). Slow calls can be hedged with a backup request,
+and calls are routed to a fallback provider while the configured provider's
+circuit breaker is open (see app.utils.llm_resilience). The share of prompt
+tokens served from the provider's prompt cache is recorded per graph node.
+
+Graph nodes declare a model tier. The "extraction" tier is meant for
+structured extraction and intermediate analysis and can be pointed at a
+smaller, cheaper model; the "response" tier is used for user-facing answers.
 """
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
+import hashlib
 import importlib.util
 import os
 import sys
+import threading
+import time
+import weakref
 
+from langchain_core.load import dumps
 from langchain_openai import ChatOpenAI
 
+from app.utils.logging_utils import setup_logger
+from app.utils.single_flight import get_single_flight
+
 # Try to import config from different possible paths
 try:
     from app import config
@@ -47,23 +79,514 @@ except ImportError:
                 config.GOOGLE_MODEL = os.getenv("GOOGLE_MODEL", "gemini-pro")
 
 
-def get_llm(temperature: float = 0.2):
+# Model tiers
+LLM_TIER_EXTRACTION = "extraction"
+LLM_TIER_RESPONSE = "response"
+LLM_TIERS = (LLM_TIER_EXTRACTION, LLM_TIER_RESPONSE)
+
+logger = setup_logger(name="llm_factory", component="agent")
+
+# Pooled clients keyed by (provider, model, temperature, cached)
+_llm_clients: Dict[Tuple[str, str, float, bool], Any] = {}
+_llm_clients_lock = threading.Lock()
+
+# (provider, tier, temperature, cached) of each pooled client, by id
+_llm_profiles: Dict[int, Tuple[str, str, float, bool]] = {}
+
+# Shared HTTP connection pools for OpenAI clients
+_http_clients: Optional[Tuple[Any, Any]] = None
+_http_clients_lock = threading.Lock()
+
+
+class SingleFlightChatMixin:
     """
-    Get the appropriate LLM based on configuration.
+    Chat model mixin coalescing identical in-flight generations.
+    
+    The key covers the organization of the current tenant scope, the
+    serialized model parameters (model, temperature, tools, ...) and the full
+    message list, so a follower only ever receives the response to exactly
+    the prompt it sent, charged to its own organization's rate limit.
+    Streaming calls are not coalesced.
+    """
+    
+    def _single_flight_key(self, messages, stop, kwargs) -> str:
+        from app.utils.llm_cache import get_llm_cache_scope
+        
+        payload = "\n".join((
+            str(get_llm_cache_scope()),
+            self._get_llm_string(stop=stop, **kwargs),
+            dumps(messages)
+        ))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return get_single_flight("llm").do(
+            self._single_flight_key(messages, stop, kwargs),
+            lambda: super(SingleFlightChatMixin, self)._generate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+        )
+    
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return await get_single_flight("llm").ado(
+            self._single_flight_key(messages, stop, kwargs),
+            lambda: super(SingleFlightChatMixin, self)._agenerate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+        )
+
+
+class PromptCacheStatsChatMixin:
+    """
+    Chat model mixin recording how many prompt tokens the provider served
+    from its prompt cache, per graph node (see app.graphs.prompt_registry).
+    
+    The node is taken from the LangGraph run metadata. Streaming calls are
+    not recorded.
+    """
+    
+    def _record_prompt_cache_usage(self, result, run_manager) -> None:
+        from app.graphs.prompt_registry import record_prompt_cache_usage
+        
+        metadata = getattr(run_manager, "metadata", None) or {}
+        record_prompt_cache_usage(metadata.get("langgraph_node"), result)
+    
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        result = super(PromptCacheStatsChatMixin, self)._generate(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        self._record_prompt_cache_usage(result, run_manager)
+        return result
+    
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        result = await super(PromptCacheStatsChatMixin, self)._agenerate(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        self._record_prompt_cache_usage(result, run_manager)
+        return result
+
+
+class RateLimitedChatMixin:
+    """
+    Chat model mixin running every generation through the per-organization
+    LLM rate limiter and fair scheduler (see app.utils.llm_rate_limiter).
+    
+    The organization is taken from the tenant scope of the current agent run.
+    """
+    
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        from app.utils.llm_cache import get_llm_cache_scope
+        from app.utils.llm_rate_limiter import get_llm_rate_limiter
+        
+        limiter = get_llm_rate_limiter()
+        generate = lambda: super(RateLimitedChatMixin, self)._generate(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        if limiter is None:
+            return generate()
+        return limiter.run(get_llm_cache_scope(), messages, generate)
+    
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        from app.utils.llm_cache import get_llm_cache_scope
+        from app.utils.llm_rate_limiter import get_llm_rate_limiter
+        
+        limiter = get_llm_rate_limiter()
+        agenerate = lambda: super(RateLimitedChatMixin, self)._agenerate(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        if limiter is None:
+            return await agenerate()
+        return await limiter.arun(get_llm_cache_scope(), messages, agenerate)
+    
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        from app.utils.llm_cache import get_llm_cache_scope
+        from app.utils.llm_rate_limiter import get_llm_rate_limiter
+        
+        limiter = get_llm_rate_limiter()
+        stream = super(RateLimitedChatMixin, self)._stream
+        if limiter is None:
+            yield from stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            return
+        with limiter.limit(get_llm_cache_scope(), messages):
+            yield from stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+    
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        from app.utils.llm_cache import get_llm_cache_scope
+        from app.utils.llm_rate_limiter import get_llm_rate_limiter
+        
+        limiter = get_llm_rate_limiter()
+        astream = super(RateLimitedChatMixin, self)._astream
+        if limiter is None:
+            async for chunk in astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
+            return
+        async with limiter.alimit(get_llm_cache_scope(), messages):
+            async for chunk in astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
+
+
+class HedgedChatMixin:
+    """
+    Chat model mixin sending backup requests for slow generations and routing
+    around providers whose circuit breaker is open (see
+    app.utils.llm_resilience).
+    
+    Backups go to the fallback provider's client for the same tier and
+    temperature when one is configured and its breaker is closed. Calls with
+    provider-specific arguments (bound tools, structured output) stay on this
+    client; with hedging enabled their backup is a second request to the same
+    provider. Streaming calls are not hedged.
+    """
+    
+    def _generate_unhedged(self, messages, stop=None, run_manager=None, **kwargs):
+        return super(HedgedChatMixin, self)._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+    
+    async def _agenerate_unhedged(self, messages, stop=None, run_manager=None, **kwargs):
+        return await super(HedgedChatMixin, self)._agenerate(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+    
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        from app.utils.llm_resilience import get_llm_resilience, hedged_race_sync
+        
+        resilience = get_llm_resilience()
+        primary, backup, failover = _plan_hedged_call(self, kwargs)
+        
+        def call(llm, callbacks):
+            provider = _llm_provider(llm)
+            start = time.monotonic()
+            try:
+                result = llm._generate_unhedged(messages, stop=stop, run_manager=callbacks, **kwargs)
+            except Exception as e:
+                _record_provider_error(provider, e)
+                raise
+            resilience.record(provider, True, time.monotonic() - start)
+            return result
+        
+        result, hedged, backup_won = hedged_race_sync(
+            lambda: call(primary, run_manager),
+            (lambda: call(backup, None)) if backup is not None else None,
+            resilience.get_hedge_delay(_llm_provider(primary)),
+            resilience.executor,
+            retry_on_error=_failover_predicate(primary, backup)
+        )
+        resilience.record_race(hedged, backup_won, failover)
+        return result
+    
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        from app.utils.llm_resilience import get_llm_resilience, hedged_race
+        
+        resilience = get_llm_resilience()
+        primary, backup, failover = _plan_hedged_call(self, kwargs)
+        
+        async def call(llm, callbacks):
+            provider = _llm_provider(llm)
+            start = time.monotonic()
+            try:
+                result = await llm._agenerate_unhedged(messages, stop=stop, run_manager=callbacks, **kwargs)
+            except Exception as e:
+                _record_provider_error(provider, e)
+                raise
+            resilience.record(provider, True, time.monotonic() - start)
+            return result
+        
+        result, hedged, backup_won = await hedged_race(
+            lambda: call(primary, run_manager),
+            (lambda: call(backup, None)) if backup is not None else None,
+            resilience.get_hedge_delay(_llm_provider(primary)),
+            retry_on_error=_failover_predicate(primary, backup)
+        )
+        resilience.record_race(hedged, backup_won, failover)
+        return result
+
+
+def _llm_provider(llm: Any) -> str:
+    """
+    Get the provider of a pooled client.
     
     Args:
-        temperature: Temperature setting for the LLM (default: 0.2)
+        llm: The client
         
     Returns:
-        Configured LLM instance
+        The provider name
+    """
+    profile = _llm_profiles.get(id(llm))
+    return profile[0] if profile else config.LLM_PROVIDER.lower()
+
+
+def _get_fallback_llm(llm: Any) -> Optional[Any]:
+    """
+    Get the fallback provider's client matching a pooled client.
+    
+    Args:
+        llm: The client
+        
+    Returns:
+        The fallback client, or None if no usable fallback provider is configured
+    """
+    fallback = getattr(config, "LLM_FALLBACK_PROVIDER", "")
+    profile = _llm_profiles.get(id(llm))
+    if not fallback or profile is None or fallback == profile[0]:
+        return None
+    
+    _, tier, temperature, cache = profile
+    try:
+        return _get_pooled_llm(fallback, tier, temperature, cache)
+    except (ImportError, ValueError) as e:
+        logger.warning(f"Fallback LLM provider {fallback} is unavailable: {str(e)}")
+        return None
+
+
+def _plan_hedged_call(llm: Any, kwargs: Dict[str, Any]) -> Tuple[Any, Optional[Any], bool]:
+    """
+    Choose the clients for a generation.
+    
+    Args:
+        llm: The client the call was made on
+        kwargs: The call's extra model arguments
+        
+    Returns:
+        Tuple of (primary client, backup client or None, whether the call was
+        moved to the fallback provider)
+    """
+    from app.utils.llm_resilience import get_llm_resilience
+    
+    resilience = get_llm_resilience()
+    # Bound tools and response formats are provider-specific
+    fallback = _get_fallback_llm(llm) if not kwargs else None
+    if fallback is not None and not resilience.breaker(_llm_provider(fallback)).allow():
+        fallback = None
+    
+    if fallback is not None and not resilience.breaker(_llm_provider(llm)).allow():
+        return fallback, None, True
+    if fallback is not None:
+        return llm, fallback, False
+    return llm, (llm if resilience.hedging else None), False
+
+
+def _failover_predicate(primary: Any, backup: Optional[Any]):
+    """
+    Decide which primary call errors the backup call replaces.
+    
+    Only calls to another provider are retried: the same request to the same
+    provider would most likely fail the same way. The organization's own
+    rate limit is never retried.
+    
+    Args:
+        primary: The primary client
+        backup: The backup client
+        
+    Returns:
+        Predicate on the error, or None
+    """
+    if backup is None or backup is primary:
+        return None
+    
+    from app.utils.llm_rate_limiter import LLMRateLimitError
+    return lambda error: not isinstance(error, LLMRateLimitError)
+
+
+def _record_provider_error(provider: str, error: Exception) -> None:
+    """
+    Record a failed call in the provider's circuit breaker.
+    
+    Args:
+        provider: The provider
+        error: The error raised by the call
+    """
+    from app.utils.llm_rate_limiter import LLMRateLimitError
+    from app.utils.llm_resilience import get_llm_resilience
+    
+    # The organization's own rate limit says nothing about the provider
+    if not isinstance(error, LLMRateLimitError):
+        get_llm_resilience().record(provider, False)
+
+
+# Chat model classes with the enabled mixins, by base class
+_chat_model_classes: Dict[Tuple[type, bool, bool, bool], type] = {}
+
+
+def _chat_model_class(base: type) -> type:
+    """
+    Get the chat model class for a provider's base class.
+    
+    Single-flight coalescing wraps rate limiting, so coalesced followers do
+    not use up their organization's rate limit. Hedging sits in between: a
+    backup request is a separate request to the provider and is rate limited
+    as one. Prompt cache usage is recorded once per call that reached the
+    provider, for the request that won.
+    
+    Args:
+        base: The provider's chat model class
+        
+    Returns:
+        The base class extended with the enabled mixins
+    """
+    single_flight = getattr(config, "SINGLE_FLIGHT_ENABLED", True)
+    rate_limited = getattr(config, "LLM_RATE_LIMIT_ENABLED", False)
+    hedged = bool(getattr(config, "LLM_HEDGING_ENABLED", False) or getattr(config, "LLM_FALLBACK_PROVIDER", ""))
+    key = (base, single_flight, hedged, rate_limited)
+    
+    llm_class = _chat_model_classes.get(key)
+    if llm_class is None:
+        mixins = tuple(
+            mixin for mixin, enabled in (
+                (SingleFlightChatMixin, single_flight),
+                (PromptCacheStatsChatMixin, True),
+                (HedgedChatMixin, hedged),
+                (RateLimitedChatMixin, rate_limited)
+            ) if enabled
+        )
+        llm_class = type(base.__name__, mixins + (base,), {})
+        _chat_model_classes[key] = llm_class
+    return llm_class
+
+
+def get_model_for_tier(tier: str = LLM_TIER_RESPONSE, provider: Optional[str] = None) -> str:
+    """
+    Get the configured model name for a tier.
+    
+    Args:
+        tier: The model tier
+        provider: The provider (default: the configured provider)
+        
+    Returns:
+        Model name for the provider
+    """
+    provider = (provider or config.LLM_PROVIDER).lower()
+    if provider == "google":
+        response_model = config.GOOGLE_MODEL
+        extraction_model = getattr(config, "GOOGLE_EXTRACTION_MODEL", "")
+    else:
+        response_model = config.LLM_MODEL
+        extraction_model = getattr(config, "LLM_EXTRACTION_MODEL", "")
+    
+    if tier == LLM_TIER_EXTRACTION and extraction_model:
+        return extraction_model
+    return response_model
+
+
+def get_node_tier(node_name: str, default_tier: str = LLM_TIER_RESPONSE) -> str:
+    """
+    Get the model tier for a graph node.
+    
+    The tier a node declares can be overridden with LLM_NODE_TIERS, e.g.
+    "coordinator.generate_proposal=extraction,compliance_security.generate_report=response".
+    
+    Args:
+        node_name: The node name as "<graph>.<node>"
+        default_tier: The tier declared by the node
+        
+    Returns:
+        The tier to use
     """
-    provider = config.LLM_PROVIDER.lower()
+    overrides = getattr(config, "LLM_NODE_TIERS", "")
+    for entry in overrides.split(","):
+        name, _, tier = entry.partition("=")
+        if name.strip() == node_name and tier.strip() in LLM_TIERS:
+            return tier.strip()
+    return default_tier
+
+
+class _LoopLocalAsyncTransport:
+    """
+    Async HTTP transport keeping one connection pool per event loop.
+    
+    Keep-alive connections are bound to the loop that opened them. A pool is
+    dropped together with its loop, so connections of a finished
+    ``asyncio.run`` are never handed to a later loop.
+    """
+    
+    def __init__(self, limits: Any):
+        self._limits = limits
+        self._transports = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+    
+    def _transport(self) -> Any:
+        import asyncio
+        import httpx
+        
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(limits=self._limits)
+                self._transports[loop] = transport
+        return transport
+    
+    async def handle_async_request(self, request: Any) -> Any:
+        return await self._transport().handle_async_request(request)
+    
+    async def aclose(self) -> None:
+        import asyncio
+        
+        with self._lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+
+def _get_http_clients() -> Tuple[Any, Any]:
+    """
+    Get the shared sync and async HTTP clients for OpenAI.
+    
+    The async client keeps a separate connection pool per event loop.
+    
+    Returns:
+        Tuple of (httpx.Client, httpx.AsyncClient)
+    """
+    global _http_clients
+    if _http_clients is None:
+        import httpx
+        
+        with _http_clients_lock:
+            if _http_clients is None:
+                limits = httpx.Limits(
+                    max_connections=getattr(config, "LLM_HTTP_MAX_CONNECTIONS", 100),
+                    max_keepalive_connections=getattr(config, "LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+                )
+                # Request timeouts are set per request by the OpenAI client
+                _http_clients = (
+                    httpx.Client(limits=limits, timeout=None),
+                    httpx.AsyncClient(transport=_LoopLocalAsyncTransport(limits), timeout=None)
+                )
+    return _http_clients
+
+
+def _create_llm(provider: str, model: str, temperature: float, cache: bool = False):
+    """
+    Create a new LLM client.
+    
+    Args:
+        provider: The LLM provider
+        model: The model name
+        temperature: Temperature setting for the LLM
+        cache: Whether to use the LLM response cache
+        
+    Returns:
+        LLM instance
+    """
+    # Imported here so that using the factory does not require the database
+    llm_cache = None
+    if cache:
+        from app.utils.llm_cache import get_llm_cache
+        llm_cache = get_llm_cache()
     
     if provider == "openai":
-        return ChatOpenAI(
+        http_client, http_async_client = _get_http_clients()
+        return _chat_model_class(ChatOpenAI)(
             api_key=config.OPENAI_API_KEY,
-            model=config.LLM_MODEL,
-            temperature=temperature
+            model=model,
+            temperature=temperature,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            cache=llm_cache
         )
     elif provider == "google":
         # Dynamically import Google AI module only when needed
@@ -75,10 +598,82 @@ def get_llm(temperature: float = 0.2):
         
         from langchain_google_genai import ChatGoogleGenerativeAI
         
-        return ChatGoogleGenerativeAI(
+        return _chat_model_class(ChatGoogleGenerativeAI)(
             api_key=config.GOOGLE_API_KEY,
-            model=config.GOOGLE_MODEL,
-            temperature=temperature
+            model=model,
+            temperature=temperature,
+            cache=llm_cache
         )
     else:
         raise ValueError(f"Unsupported LLM provider: {provider}")
+
+
+def get_llm(temperature: float = 0.2, tier: str = LLM_TIER_RESPONSE, cache: bool = False):
+    """
+    Get the appropriate LLM based on configuration.
+    
+    The client is shared with every other caller using the same provider,
+    model, temperature and cache setting.
+    
+    Args:
+        temperature: Temperature setting for the LLM (default: 0.2)
+        tier: Model tier (default: response)
+        cache: Serve repeated identical prompts from the LLM response cache
+            (default: False)
+        
+    Returns:
+        Configured LLM instance
+    """
+    return _get_pooled_llm(config.LLM_PROVIDER.lower(), tier, temperature, cache)
+
+
+def _get_pooled_llm(provider: str, tier: str, temperature: float, cache: bool):
+    """
+    Get the pooled client for a provider, creating it on first use.
+    
+    Args:
+        provider: The LLM provider
+        tier: Model tier
+        temperature: Temperature setting for the LLM
+        cache: Whether to use the LLM response cache
+        
+    Returns:
+        LLM instance
+    """
+    model = get_model_for_tier(tier, provider)
+    key = (provider, model, float(temperature), cache)
+    
+    llm = _llm_clients.get(key)
+    if llm is None:
+        with _llm_clients_lock:
+            llm = _llm_clients.get(key)
+            if llm is None:
+                llm = _create_llm(provider, model, temperature, cache=cache)
+                _llm_clients[key] = llm
+                _llm_profiles[id(llm)] = (provider, tier, float(temperature), cache)
+    return llm
+
+
+def get_node_llm(node_name: str, temperature: float = 0.2, tier: str = LLM_TIER_RESPONSE, cache: bool = False):
+    """
+    Get the LLM for a graph node.
+    
+    Args:
+        node_name: The node name as "<graph>.<node>"
+        temperature: Temperature setting for the LLM (default: 0.2)
+        tier: The tier the node declares (default: response)
+        cache: Whether the node's calls may be served from the LLM response cache
+        
+    Returns:
+        Configured LLM instance
+    """
+    return get_llm(temperature=temperature, tier=get_node_tier(node_name, tier), cache=cache)
+
+
+def clear_llm_clients() -> None:
+    """
+    Drop all pooled LLM clients, e.g. after the LLM configuration changes.
+    """
+    with _llm_clients_lock:
+        _llm_clients.clear()
+        _llm_profiles.clear()
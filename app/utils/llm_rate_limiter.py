@@ -0,0 +1,663 @@
+"""
+Per-organization LLM rate limiting and fair scheduling.
+
+All tenants share one provider API key, so without limits one organization
+running many delegations can use up the provider quota and slow down or
+trigger 429s for everybody else. Each LLM call made by a pooled client now
+goes through two stages:
+
+1. A token bucket per organization limits requests and tokens per minute.
+   Limits depend on the organization's plan tier. The bucket state is kept in
+   PostgreSQL so that the limit holds across all gunicorn workers, or in
+   memory for a single process.
+2. A weighted fair queue limits the LLM calls running at the same time in a
+   worker. When calls have to wait, they are started in weighted fair order,
+   with the weight given by the plan tier, so a tenant with many queued calls
+   cannot starve the others.
+
+A call that cannot start within LLM_RATE_LIMIT_MAX_WAIT_SECONDS raises
+LLMRateLimitError. Errors of the shared store are logged and let the call
+through, so an unavailable database never blocks LLM calls.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.utils.logging_utils import setup_logger
+
+
+logger = setup_logger(name="llm_rate_limiter", component="agent")
+
+# Completion tokens reserved per call before the actual usage is known
+DEFAULT_COMPLETION_TOKENS = 500
+
+# Seconds a resolved plan tier is reused
+PLAN_TIER_TTL_SECONDS = 300.0
+
+
+class LLMRateLimitError(Exception):
+    """Raised when an LLM call cannot start within the maximum wait."""
+    pass
+
+
+def parse_tier_settings(value: str) -> Dict[str, str]:
+    """
+    Parse "tier=value" pairs, e.g. "free=1,professional=2,enterprise=4".
+
+    Args:
+        value: Comma separated pairs
+
+    Returns:
+        Values by tier
+    """
+    settings = {}
+    for entry in value.split(","):
+        tier, _, setting = entry.partition("=")
+        if tier.strip() and setting.strip():
+            settings[tier.strip()] = setting.strip()
+    return settings
+
+
+def refill_bucket(level: float, updated_at: float, now: float, capacity: float, limit_per_minute: float) -> float:
+    """
+    Refill a token bucket for the time elapsed since its last update.
+
+    Args:
+        level: Tokens in the bucket at updated_at
+        updated_at: Time of the last update
+        now: Current time
+        capacity: Maximum tokens in the bucket
+        limit_per_minute: Tokens added per minute
+
+    Returns:
+        Tokens in the bucket now
+    """
+    return min(capacity, level + max(0.0, now - updated_at) * limit_per_minute / 60.0)
+
+
+def take_from_buckets(
+    requests: float,
+    tokens: float,
+    limits: Tuple[float, float],
+    cost_tokens: float
+) -> Tuple[float, float, float]:
+    """
+    Take one request and its estimated tokens from refilled buckets.
+
+    Args:
+        requests: Requests left in the bucket
+        tokens: Tokens left in the bucket
+        limits: (requests per minute, tokens per minute)
+        cost_tokens: Estimated tokens of the call
+
+    Returns:
+        Tuple of (requests left, tokens left, seconds to wait). If the wait is
+        positive nothing was taken.
+    """
+    rpm, tpm = limits
+    # A call larger than a minute's worth of tokens only needs a full bucket
+    needed_tokens = min(cost_tokens, tpm)
+    if requests >= 1 and tokens >= needed_tokens:
+        return requests - 1, tokens - cost_tokens, 0.0
+
+    wait = 0.0
+    if requests < 1:
+        wait = max(wait, (1 - requests) * 60.0 / rpm)
+    if tokens < needed_tokens:
+        wait = max(wait, (needed_tokens - tokens) * 60.0 / tpm)
+    return requests, tokens, wait
+
+
+class InMemoryRateLimitStore:
+    """Token buckets kept in this process."""
+
+    def __init__(self):
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limits: Tuple[float, float], cost_tokens: float) -> float:
+        now = time.time()
+        with self._lock:
+            bucket = self._buckets.setdefault(key, [limits[0], limits[1], now])
+            requests = refill_bucket(bucket[0], bucket[2], now, limits[0], limits[0])
+            tokens = refill_bucket(bucket[1], bucket[2], now, limits[1], limits[1])
+            requests, tokens, wait = take_from_buckets(requests, tokens, limits, cost_tokens)
+            bucket[:] = [requests, tokens, now]
+            return wait
+
+    def charge(self, key: str, limits: Tuple[float, float], tokens: float) -> None:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                # The bucket may go into debt, which delays the next calls
+                bucket[1] = max(-limits[1], bucket[1] - tokens)
+
+
+class PostgresRateLimitStore:
+    """Token buckets stored in the llm_rate_limit_buckets table."""
+
+    def _locked_bucket(self, db, key: str, limits: Tuple[float, float], now: float):
+        """Get the bucket row locked for update, creating a full bucket if missing."""
+        from sqlalchemy.dialects.postgresql import insert
+        from app.db.models_updated import LLMRateLimitBucket
+
+        bucket = db.query(LLMRateLimitBucket).filter(
+            LLMRateLimitBucket.bucket_key == key
+        ).with_for_update().first()
+        if bucket is None:
+            db.execute(insert(LLMRateLimitBucket.__table__).values(
+                bucket_key=key,
+                requests=limits[0],
+                tokens=limits[1],
+                updated_at=now
+            ).on_conflict_do_nothing(index_elements=["bucket_key"]))
+            bucket = db.query(LLMRateLimitBucket).filter(
+                LLMRateLimitBucket.bucket_key == key
+            ).with_for_update().first()
+        return bucket
+
+    def take(self, key: str, limits: Tuple[float, float], cost_tokens: float) -> float:
+        from app.db.base import SessionLocal
+
+        now = time.time()
+        db = SessionLocal()
+        try:
+            bucket = self._locked_bucket(db, key, limits, now)
+            requests = refill_bucket(bucket.requests, bucket.updated_at, now, limits[0], limits[0])
+            tokens = refill_bucket(bucket.tokens, bucket.updated_at, now, limits[1], limits[1])
+            bucket.requests, bucket.tokens, wait = take_from_buckets(requests, tokens, limits, cost_tokens)
+            bucket.updated_at = now
+            db.commit()
+            return wait
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def charge(self, key: str, limits: Tuple[float, float], tokens: float) -> None:
+        from sqlalchemy import func
+        from app.db.base import SessionLocal
+        from app.db.models_updated import LLMRateLimitBucket
+
+        db = SessionLocal()
+        try:
+            # The bucket may go into debt, which delays the next calls
+            db.query(LLMRateLimitBucket).filter(
+                LLMRateLimitBucket.bucket_key == key
+            ).update(
+                {"tokens": func.greatest(LLMRateLimitBucket.tokens - tokens, -limits[1])},
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+class _Waiter:
+    """A call waiting in the fair queue."""
+
+    def __init__(self, start_tag: float):
+        self.start_tag = start_tag
+        self.future: Future = Future()
+
+
+class WeightedFairScheduler:
+    """
+    Concurrency limit with weighted fair queueing between tenants.
+
+    Uses start-time fair queueing: each call gets a virtual finish tag of
+    max(virtual time, the tenant's last tag) + 1 / weight, and waiting calls
+    start in tag order. A tenant with weight 4 gets four calls started for
+    every call of a waiting tenant with weight 1.
+    """
+
+    def __init__(self, max_concurrent: int):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrent: Calls allowed to run at the same time
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self._lock = threading.Lock()
+        self._queue: List[Tuple[float, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        self._last_tags: Dict[Any, float] = {}
+        self._virtual_time = 0.0
+        self._active = 0
+        self.started = 0
+        self.timeouts = 0
+
+    def _enqueue(self, tenant: Any, weight: float) -> _Waiter:
+        with self._lock:
+            start = max(self._virtual_time, self._last_tags.get(tenant, 0.0))
+            tag = start + 1.0 / max(weight, 0.001)
+            self._last_tags[tenant] = tag
+            waiter = _Waiter(start)
+            heapq.heappush(self._queue, (tag, next(self._sequence), waiter))
+            self._dispatch()
+        return waiter
+
+    def _dispatch(self) -> None:
+        """Start waiting calls while slots are free (lock held)."""
+        while self._active < self.max_concurrent and self._queue:
+            tag, _, waiter = heapq.heappop(self._queue)
+            if not waiter.future.set_running_or_notify_cancel():
+                continue
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            self._active += 1
+            self.started += 1
+            waiter.future.set_result(True)
+        if not self._queue and not self._active:
+            # Idle: forget tags so returning tenants start on equal terms
+            self._last_tags.clear()
+            self._virtual_time = 0.0
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Give up a waiting call, releasing its slot if it was granted meanwhile."""
+        with self._lock:
+            self.timeouts += 1
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._active -= 1
+                self._dispatch()
+            else:
+                waiter.future.cancel()
+
+    def acquire(self, tenant: Any, weight: float, timeout: float) -> bool:
+        """
+        Wait for a slot.
+
+        Args:
+            tenant: The tenant key
+            weight: The tenant's weight
+            timeout: Seconds to wait
+
+        Returns:
+            True if a slot was acquired
+        """
+        waiter = self._enqueue(tenant, weight)
+        try:
+            waiter.future.result(timeout=max(0.0, timeout))
+            return True
+        except FutureTimeoutError:
+            self._abandon(waiter)
+            return False
+
+    async def aacquire(self, tenant: Any, weight: float, timeout: float) -> bool:
+        """
+        Wait for a slot without blocking the event loop.
+
+        Args:
+            tenant: The tenant key
+            weight: The tenant's weight
+            timeout: Seconds to wait
+
+        Returns:
+            True if a slot was acquired
+        """
+        waiter = self._enqueue(tenant, weight)
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(waiter.future)), timeout=max(0.0, timeout))
+            return True
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            return False
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def release(self) -> None:
+        """Free a slot."""
+        with self._lock:
+            self._active -= 1
+            self._dispatch()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self._active,
+                "queued": sum(1 for _, _, waiter in self._queue if not waiter.future.cancelled()),
+                "started": self.started,
+                "timeouts": self.timeouts
+            }
+
+
+def estimate_prompt_tokens(messages: Any) -> int:
+    """
+    Estimate the prompt tokens of a list of chat messages.
+
+    Args:
+        messages: LangChain messages
+
+    Returns:
+        Estimated token count (about 4 characters per token)
+    """
+    return sum(len(str(getattr(message, "content", message))) // 4 + 4 for message in messages)
+
+
+def get_completion_tokens(result: Any) -> Optional[int]:
+    """
+    Get the completion tokens reported in a ChatResult.
+
+    Args:
+        result: The ChatResult
+
+    Returns:
+        The completion token count, or None if not reported
+    """
+    total = 0
+    found = False
+    for generation in getattr(result, "generations", None) or []:
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if usage and usage.get("output_tokens") is not None:
+            total += usage["output_tokens"]
+            found = True
+    return total if found else None
+
+
+class LLMRateLimiter:
+    """
+    Token bucket limits per organization and fair scheduling of LLM calls.
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        scheduler: WeightedFairScheduler,
+        limits: Dict[str, Tuple[float, float]],
+        weights: Dict[str, float],
+        max_wait: float = 30.0,
+        tier_resolver: Optional[Callable[[int], str]] = None
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            store: Shared token bucket store
+            scheduler: Per-worker fair scheduler
+            limits: (requests per minute, tokens per minute) by plan tier
+            weights: Fair queue weight by plan tier
+            max_wait: Seconds a call may wait before LLMRateLimitError is raised
+            tier_resolver: Returns the plan tier of an organization
+        """
+        self.store = store
+        self.scheduler = scheduler
+        self.limits = limits
+        self.weights = weights
+        self.max_wait = max_wait
+        self.tier_resolver = tier_resolver
+        self._tiers: Dict[int, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.rejected = 0
+        self.store_errors = 0
+
+    def get_plan_tier(self, organization_id: Optional[int]) -> str:
+        """
+        Get the plan tier of an organization, cached for a few minutes.
+
+        Args:
+            organization_id: The organization ID
+
+        Returns:
+            The plan tier ("free" if unknown)
+        """
+        if organization_id is None or self.tier_resolver is None:
+            return "free"
+        now = time.time()
+        cached = self._tiers.get(organization_id)
+        if cached and cached[1] > now:
+            return cached[0]
+        try:
+            tier = self.tier_resolver(organization_id)
+        except Exception as e:
+            logger.warning(f"Could not resolve plan tier of organization {organization_id}: {str(e)}")
+            tier = cached[0] if cached else "free"
+        self._tiers[organization_id] = (tier, now + PLAN_TIER_TTL_SECONDS)
+        return tier
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _take(self, organization_id: int, tier: str, cost_tokens: float) -> float:
+        """Take from the organization's bucket; store errors let the call through."""
+        try:
+            return self.store.take(f"org:{organization_id}", self.limits[tier], cost_tokens)
+        except Exception as e:
+            logger.warning(f"LLM rate limit store unavailable: {str(e)}")
+            self._count("store_errors")
+            return 0.0
+
+    def _charge(self, organization_id: Optional[int], tier: str, result: Any) -> None:
+        """Charge completion tokens beyond the reserved estimate."""
+        if organization_id is None or tier not in self.limits:
+            return
+        completion_tokens = get_completion_tokens(result)
+        if completion_tokens is None or completion_tokens <= DEFAULT_COMPLETION_TOKENS:
+            return
+        try:
+            self.store.charge(f"org:{organization_id}", self.limits[tier], completion_tokens - DEFAULT_COMPLETION_TOKENS)
+        except Exception as e:
+            logger.warning(f"LLM rate limit store unavailable: {str(e)}")
+            self._count("store_errors")
+
+    def _reject(self, organization_id: Optional[int]) -> None:
+        self._count("rejected")
+        raise LLMRateLimitError(
+            f"LLM rate limit exceeded for organization {organization_id}; "
+            f"the call could not start within {self.max_wait:.0f} seconds"
+        )
+
+    def _admit(self, organization_id: Optional[int], messages: Any) -> str:
+        """Wait for the organization's bucket and a scheduler slot; returns the plan tier."""
+        deadline = time.time() + self.max_wait
+        tier = self.get_plan_tier(organization_id)
+        if organization_id is not None and tier in self.limits:
+            cost_tokens = estimate_prompt_tokens(messages) + DEFAULT_COMPLETION_TOKENS
+            while True:
+                wait = self._take(organization_id, tier, cost_tokens)
+                if wait <= 0:
+                    break
+                if time.time() + wait > deadline:
+                    self._reject(organization_id)
+                self._count("throttled")
+                time.sleep(wait)
+
+        if not self.scheduler.acquire(organization_id, self.weights.get(tier, 1.0), deadline - time.time()):
+            self._reject(organization_id)
+        return tier
+
+    async def _aadmit(self, organization_id: Optional[int], messages: Any) -> str:
+        """Async variant of _admit that does not block the event loop."""
+        deadline = time.time() + self.max_wait
+        tier = await asyncio.to_thread(self.get_plan_tier, organization_id)
+        if organization_id is not None and tier in self.limits:
+            cost_tokens = estimate_prompt_tokens(messages) + DEFAULT_COMPLETION_TOKENS
+            while True:
+                wait = await asyncio.to_thread(self._take, organization_id, tier, cost_tokens)
+                if wait <= 0:
+                    break
+                if time.time() + wait > deadline:
+                    self._reject(organization_id)
+                self._count("throttled")
+                await asyncio.sleep(wait)
+
+        if not await self.scheduler.aacquire(organization_id, self.weights.get(tier, 1.0), deadline - time.time()):
+            self._reject(organization_id)
+        return tier
+
+    @contextmanager
+    def limit(self, organization_id: Optional[int], messages: Any) -> Iterator[str]:
+        """
+        Hold a rate-limited slot for a blocking LLM call, e.g. a stream.
+
+        Args:
+            organization_id: The organization making the call
+            messages: The prompt messages, used to estimate tokens
+
+        Yields:
+            The organization's plan tier
+
+        Raises:
+            LLMRateLimitError: If the call could not start within the maximum wait
+        """
+        tier = self._admit(organization_id, messages)
+        try:
+            yield tier
+        finally:
+            self.scheduler.release()
+
+    @asynccontextmanager
+    async def alimit(self, organization_id: Optional[int], messages: Any) -> AsyncIterator[str]:
+        """
+        Hold a rate-limited slot for an async LLM call, e.g. a stream.
+
+        Args:
+            organization_id: The organization making the call
+            messages: The prompt messages, used to estimate tokens
+
+        Yields:
+            The organization's plan tier
+
+        Raises:
+            LLMRateLimitError: If the call could not start within the maximum wait
+        """
+        tier = await self._aadmit(organization_id, messages)
+        try:
+            yield tier
+        finally:
+            self.scheduler.release()
+
+    def run(self, organization_id: Optional[int], messages: Any, func: Callable[[], Any]) -> Any:
+        """
+        Run a blocking LLM call within the limits.
+
+        Args:
+            organization_id: The organization making the call
+            messages: The prompt messages, used to estimate tokens
+            func: Makes the call and returns the ChatResult
+
+        Returns:
+            The result of func
+
+        Raises:
+            LLMRateLimitError: If the call could not start within the maximum wait
+        """
+        with self.limit(organization_id, messages) as tier:
+            result = func()
+        self._charge(organization_id, tier, result)
+        return result
+
+    async def arun(self, organization_id: Optional[int], messages: Any, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await an LLM call within the limits.
+
+        Args:
+            organization_id: The organization making the call
+            messages: The prompt messages, used to estimate tokens
+            func: Returns the awaitable making the call
+
+        Returns:
+            The result of the awaited call
+
+        Raises:
+            LLMRateLimitError: If the call could not start within the maximum wait
+        """
+        async with self.alimit(organization_id, messages) as tier:
+            result = await func()
+        await asyncio.to_thread(self._charge, organization_id, tier, result)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get limiter statistics.
+
+        Returns:
+            Dictionary with scheduler and throttling counts
+        """
+        with self._lock:
+            stats = {
+                "throttled": self.throttled,
+                "rejected": self.rejected,
+                "store_errors": self.store_errors
+            }
+        stats["scheduler"] = self.scheduler.get_stats()
+        return stats
+
+
+def _resolve_plan_tier(organization_id: int) -> str:
+    """Look up the plan tier of an organization."""
+    from app.db.base import SessionLocal
+    from app.subscription.feature_control import SubscriptionFeatureControl
+
+    db = SessionLocal()
+    try:
+        return SubscriptionFeatureControl(db, organization_id).plan_tier
+    finally:
+        db.close()
+
+
+# Global limiter instance
+_llm_rate_limiter = None
+_llm_rate_limiter_lock = threading.Lock()
+
+
+def get_llm_rate_limiter() -> Optional[LLMRateLimiter]:
+    """
+    Get the process-wide LLM rate limiter.
+
+    Returns:
+        LLMRateLimiter instance, or None if LLM_RATE_LIMIT_ENABLED is false
+    """
+    global _llm_rate_limiter
+    from app import config
+
+    if not config.LLM_RATE_LIMIT_ENABLED:
+        return None
+    if _llm_rate_limiter is None:
+        with _llm_rate_limiter_lock:
+            if _llm_rate_limiter is None:
+                limits = {}
+                for tier, setting in parse_tier_settings(config.LLM_RATE_LIMITS).items():
+                    rpm, _, tpm = setting.partition(":")
+                    limits[tier] = (float(rpm), float(tpm))
+                weights = {
+                    tier: float(weight)
+                    for tier, weight in parse_tier_settings(config.LLM_TENANT_WEIGHTS).items()
+                }
+                if config.LLM_RATE_LIMIT_BACKEND == "memory":
+                    store = InMemoryRateLimitStore()
+                else:
+                    store = PostgresRateLimitStore()
+                _llm_rate_limiter = LLMRateLimiter(
+                    store=store,
+                    scheduler=WeightedFairScheduler(config.LLM_MAX_CONCURRENT_CALLS),
+                    limits=limits,
+                    weights=weights,
+                    max_wait=config.LLM_RATE_LIMIT_MAX_WAIT_SECONDS,
+                    tier_resolver=_resolve_plan_tier
+                )
+    return _llm_rate_limiter
+
+
+def get_llm_rate_limiter_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get statistics of the LLM rate limiter.
+
+    Returns:
+        Limiter statistics, or None if the limiter has not been used
+    """
+    if _llm_rate_limiter is None:
+        return None
+    return _llm_rate_limiter.get_stats()
@@ -0,0 +1,471 @@
+"""
+Hedged LLM requests and per-provider circuit breakers.
+
+Occasional completions take 30 seconds or more and dominate tail latency.
+With hedging enabled, a call that has not finished after the provider's
+recent p95 latency (or a configured delay) gets a backup request, to the
+alternate provider when one is configured or to the same provider otherwise.
+The first good answer wins and the other request is cancelled. A call whose
+request fails is retried on the backup at once.
+
+Each provider has a circuit breaker. When its error rate over the recent
+window crosses the threshold, the breaker opens. Calls then go to the
+alternate provider until a cooldown has passed and a trial call succeeds.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from app.utils.logging_utils import setup_logger
+
+
+logger = setup_logger(name="llm_resilience", component="agent")
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker for one provider.
+
+    States are "closed" (calls allowed), "open" (calls rejected until the
+    cooldown has passed) and "half_open" (trial calls allowed; a success
+    closes the breaker, a failure opens it again).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        error_threshold: float = 0.5,
+        min_calls: int = 10,
+        window_seconds: float = 60.0,
+        cooldown_seconds: float = 30.0
+    ):
+        """
+        Initialize the breaker.
+
+        Args:
+            name: Provider name used in statistics
+            error_threshold: Error rate that opens the breaker
+            min_calls: Calls in the window before the error rate is evaluated
+            window_seconds: Seconds of outcomes the error rate is computed over
+            cooldown_seconds: Seconds the breaker stays open
+        """
+        self.name = name
+        self.error_threshold = error_threshold
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._open_until = 0.0
+        self._half_open = False
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.time())
+
+    def _state(self, now: float) -> str:
+        if self._open_until > now:
+            return "open"
+        if self._half_open:
+            return "half_open"
+        return "closed"
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may be sent to the provider.
+
+        Returns:
+            False while the breaker is open
+        """
+        with self._lock:
+            now = time.time()
+            if self._open_until > now:
+                return False
+            if self._open_until:
+                # The cooldown has passed: let trial calls through
+                self._open_until = 0.0
+                self._half_open = True
+            return True
+
+    def record(self, success: bool) -> None:
+        """
+        Record the outcome of a call.
+
+        Args:
+            success: Whether the call succeeded
+        """
+        with self._lock:
+            now = time.time()
+            if self._half_open:
+                self._half_open = False
+                if success:
+                    self._outcomes.clear()
+                else:
+                    self._trip(now)
+                return
+
+            self._outcomes.append((now, success))
+            while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+                self._outcomes.popleft()
+            if len(self._outcomes) >= self.min_calls:
+                errors = sum(1 for _, ok in self._outcomes if not ok)
+                if errors / len(self._outcomes) >= self.error_threshold:
+                    self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        """Open the breaker (lock held)."""
+        self._open_until = now + self.cooldown_seconds
+        self._outcomes.clear()
+        self.opened += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self._outcomes)
+            errors = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "state": self._state(time.time()),
+                "window_calls": calls,
+                "window_error_rate": (errors / calls) if calls else 0.0,
+                "opened": self.opened
+            }
+
+
+class LatencyTracker:
+    """Recent call latencies of one provider."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        """
+        Initialize the tracker.
+
+        Args:
+            size: Latencies kept
+            min_samples: Latencies needed before percentiles are reported
+        """
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Get a latency percentile.
+
+        Args:
+            p: Percentile between 0 and 100
+
+        Returns:
+            The latency in seconds, or None with too few samples
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+async def hedged_race(
+    primary: Callable[[], Awaitable[Any]],
+    backup: Optional[Callable[[], Awaitable[Any]]],
+    delay: Optional[float],
+    retry_on_error: Optional[Callable[[BaseException], bool]] = None
+) -> Tuple[Any, bool, bool]:
+    """
+    Await a call, starting a backup if it is slow or fails.
+
+    Args:
+        primary: Starts the primary call
+        backup: Starts the backup call, or None for no backup
+        delay: Seconds before the backup is started, or None to start it only
+            when the primary call fails
+        retry_on_error: Decides whether a failed primary call is replaced by
+            the backup; None never replaces failed calls
+
+    Returns:
+        Tuple of (result, whether a backup was started, whether it won)
+
+    Raises:
+        Exception: The error of the last call to fail if none succeeded
+    """
+    primary_task = asyncio.ensure_future(primary())
+    if backup is None:
+        return await primary_task, False, False
+
+    tasks = [primary_task]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if primary_task in done:
+            error = primary_task.exception()
+            if error is None:
+                return primary_task.result(), False, False
+            if retry_on_error is None or not retry_on_error(error):
+                raise error
+
+        backup_task = asyncio.ensure_future(backup())
+        tasks.append(backup_task)
+        pending = {task for task in tasks if not task.done()}
+        while True:
+            for task in (primary_task, backup_task):
+                if task.done() and task.exception() is None:
+                    return task.result(), True, task is backup_task
+            if not pending:
+                raise backup_task.exception()
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def hedged_race_sync(
+    primary: Callable[[], Any],
+    backup: Optional[Callable[[], Any]],
+    delay: Optional[float],
+    executor: ThreadPoolExecutor,
+    retry_on_error: Optional[Callable[[BaseException], bool]] = None
+) -> Tuple[Any, bool, bool]:
+    """
+    Blocking variant of hedged_race.
+
+    Both calls run on the executor with the caller's context variables. A
+    losing call cannot be interrupted; its result is discarded.
+
+    Args:
+        primary: Makes the primary call
+        backup: Makes the backup call, or None for no backup
+        delay: Seconds before the backup is started, or None to start it only
+            when the primary call fails
+        executor: Thread pool running the calls
+        retry_on_error: Decides whether a failed primary call is replaced by
+            the backup; None never replaces failed calls
+
+    Returns:
+        Tuple of (result, whether a backup was started, whether it won)
+    """
+    if backup is None:
+        return primary(), False, False
+    if delay is None:
+        # Failover only: no need to leave the calling thread
+        try:
+            return primary(), False, False
+        except Exception as error:
+            if retry_on_error is None or not retry_on_error(error):
+                raise
+        return backup(), True, True
+
+    primary_future: Future = executor.submit(contextvars.copy_context().run, primary)
+    done, _ = wait([primary_future], timeout=delay)
+    if primary_future in done:
+        error = primary_future.exception()
+        if error is None:
+            return primary_future.result(), False, False
+        if retry_on_error is None or not retry_on_error(error):
+            raise error
+
+    backup_future: Future = executor.submit(contextvars.copy_context().run, backup)
+    pending = {future for future in (primary_future, backup_future) if not future.done()}
+    while True:
+        for future in (primary_future, backup_future):
+            if future.done() and future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return future.result(), True, future is backup_future
+        if not pending:
+            raise backup_future.exception()
+        _, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+
+class LLMResilience:
+    """
+    Circuit breakers, latency tracking and hedging statistics per provider.
+    """
+
+    def __init__(
+        self,
+        hedging: bool = False,
+        hedge_delay: float = 0.0,
+        min_hedge_delay: float = 2.0,
+        default_hedge_delay: float = 10.0,
+        breaker_settings: Optional[Dict[str, Any]] = None,
+        max_workers: int = 32
+    ):
+        """
+        Initialize the resilience state.
+
+        Args:
+            hedging: Whether slow calls get a backup request
+            hedge_delay: Fixed hedge delay in seconds, 0 to use the provider's p95
+            min_hedge_delay: Lower bound of the p95-based delay
+            default_hedge_delay: Delay used until enough latencies are known
+            breaker_settings: Keyword arguments for each CircuitBreaker
+            max_workers: Threads running blocking hedged calls
+        """
+        self.hedging = hedging
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.breaker_settings = breaker_settings or {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_workers = max_workers
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(provider)
+            if breaker is None:
+                breaker = CircuitBreaker(provider, **self.breaker_settings)
+                self._breakers[provider] = breaker
+            return breaker
+
+    def latency(self, provider: str) -> LatencyTracker:
+        with self._lock:
+            tracker = self._latencies.get(provider)
+            if tracker is None:
+                tracker = LatencyTracker()
+                self._latencies[provider] = tracker
+            return tracker
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers,
+                        thread_name_prefix="llm-hedge"
+                    )
+        return self._executor
+
+    def get_hedge_delay(self, provider: str) -> Optional[float]:
+        """
+        Get the delay before a backup request is sent.
+
+        Args:
+            provider: The provider of the primary call
+
+        Returns:
+            Seconds, or None if hedging is disabled (backups then only
+            replace failed calls)
+        """
+        if not self.hedging:
+            return None
+        if self.hedge_delay > 0:
+            return self.hedge_delay
+        p95 = self.latency(provider).percentile(95)
+        if p95 is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p95)
+
+    def record(self, provider: str, success: bool, seconds: Optional[float] = None) -> None:
+        """
+        Record the outcome of a provider call.
+
+        Args:
+            provider: The provider
+            success: Whether the call succeeded
+            seconds: Latency of a successful call
+        """
+        breaker = self.breaker(provider)
+        opened = breaker.opened
+        breaker.record(success)
+        if breaker.opened != opened:
+            logger.warning(
+                f"Circuit breaker for LLM provider {provider} opened for "
+                f"{breaker.cooldown_seconds:.0f}s after repeated errors"
+            )
+        if success and seconds is not None:
+            self.latency(provider).record(seconds)
+
+    def record_race(self, hedged: bool, backup_won: bool, failover: bool = False) -> None:
+        with self._lock:
+            if hedged:
+                self.hedged += 1
+            if backup_won:
+                self.hedge_wins += 1
+            if failover:
+                self.failovers += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            providers = sorted(set(self._breakers) | set(self._latencies))
+            stats: Dict[str, Any] = {
+                "hedging": self.hedging,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "failovers": self.failovers
+            }
+        stats["providers"] = {
+            provider: {
+                **self.breaker(provider).get_stats(),
+                "p95_seconds": self.latency(provider).percentile(95)
+            }
+            for provider in providers
+        }
+        return stats
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+_llm_resilience: Optional[LLMResilience] = None
+_llm_resilience_lock = threading.Lock()
+
+
+def get_llm_resilience() -> LLMResilience:
+    """
+    Get the process-wide LLM hedging and circuit breaker state.
+
+    Returns:
+        LLMResilience instance
+    """
+    global _llm_resilience
+    from app import config
+
+    if _llm_resilience is None:
+        with _llm_resilience_lock:
+            if _llm_resilience is None:
+                _llm_resilience = LLMResilience(
+                    hedging=config.LLM_HEDGING_ENABLED,
+                    hedge_delay=config.LLM_HEDGE_DELAY_SECONDS,
+                    min_hedge_delay=config.LLM_HEDGE_MIN_DELAY_SECONDS,
+                    breaker_settings={
+                        "error_threshold": config.LLM_CIRCUIT_ERROR_THRESHOLD,
+                        "min_calls": config.LLM_CIRCUIT_MIN_CALLS,
+                        "cooldown_seconds": config.LLM_CIRCUIT_COOLDOWN_SECONDS
+                    }
+                )
+    return _llm_resilience
+
+
+def get_llm_resilience_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get hedging and circuit breaker statistics.
+
+    Returns:
+        Statistics, or None if no hedged or failover-capable call was made
+    """
+    if _llm_resilience is None:
+        return None
+    return _llm_resilience.get_stats()
+
+
+def shutdown_llm_resilience() -> None:
+    """Stop the threads running blocking hedged calls."""
+    if _llm_resilience is not None:
+        _llm_resilience.shutdown()
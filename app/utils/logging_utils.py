@@ -5,6 +5,8 @@ import os
 import logging
 import sys
 import json
+import threading
+import atexit
 import traceback
 from datetime import datetime
 from typing import Optional, Dict, Any, Union
@@ -20,6 +22,8 @@ except ImportError:
     LoggingHandler = None
     APPINSIGHTS_AVAILABLE = False
 
+from app.utils.telemetry_pipeline import TelemetryPipeline
+
 # Define log levels
 LOG_LEVELS = {
     "DEBUG": logging.DEBUG,
@@ -71,6 +75,61 @@ def get_telemetry_client() -> Optional[TelemetryClient]:
     
     return _telemetry_client
 
+# Global telemetry pipeline
+_telemetry_pipeline = None
+_telemetry_pipeline_lock = threading.Lock()
+
+def get_telemetry_pipeline() -> Optional[TelemetryPipeline]:
+    """
+    Get or create the pipeline that sends telemetry in the background.
+    
+    Returns:
+        TelemetryPipeline instance or None if there is no telemetry client
+    """
+    global _telemetry_pipeline
+    
+    if _telemetry_pipeline is None:
+        telemetry_client = get_telemetry_client()
+        if telemetry_client is None:
+            return None
+        
+        with _telemetry_pipeline_lock:
+            if _telemetry_pipeline is None:
+                _telemetry_pipeline = TelemetryPipeline(
+                    telemetry_client,
+                    max_queue_size=int(os.getenv("TELEMETRY_QUEUE_SIZE", "10000")),
+                    batch_size=int(os.getenv("TELEMETRY_BATCH_SIZE", "100")),
+                    flush_interval=float(os.getenv("TELEMETRY_FLUSH_INTERVAL_SECONDS", "2.0"))
+                )
+                # Last-resort flush for processes that exit without the app shutdown hook
+                atexit.register(_telemetry_pipeline.shutdown)
+    
+    return _telemetry_pipeline
+
+def _submit_telemetry(func, *args, **kwargs) -> None:
+    """
+    Queue a telemetry client call so it runs on the background sender.
+    
+    Args:
+        func: Telemetry client method to call
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+    """
+    pipeline = get_telemetry_pipeline()
+    if pipeline:
+        pipeline.submit(func, *args, **kwargs)
+
+def get_telemetry_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get statistics of the telemetry pipeline.
+    
+    Returns:
+        Pipeline statistics or None if telemetry is disabled
+    """
+    if _telemetry_pipeline is None:
+        return None
+    return _telemetry_pipeline.get_stats()
+
 def setup_logger(
     name: str, 
     log_level: str = "INFO", 
@@ -170,7 +229,10 @@ class AppInsightsHandler(logging.Handler if not APPINSIGHTS_AVAILABLE else Loggi
         
     def emit(self, record):
         """
-        Emit a log record to Application Insights.
+        Queue a log record for Application Insights.
+        
+        The message is formatted here; building the properties and tracking
+        happen on the telemetry sender thread.
         
         Args:
             record: Log record
@@ -178,7 +240,25 @@ class AppInsightsHandler(logging.Handler if not APPINSIGHTS_AVAILABLE else Loggi
         # If Application Insights is not available, do nothing
         if not APPINSIGHTS_AVAILABLE or not self.client:
             return
-            
+        
+        try:
+            msg = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        
+        pipeline = get_telemetry_pipeline()
+        if pipeline:
+            pipeline.submit(self._track_record, record, msg)
+    
+    def _track_record(self, record, msg):
+        """
+        Send a log record to Application Insights.
+        
+        Args:
+            record: Log record
+            msg: The formatted message
+        """
         # Add component name to properties if available
         properties = {
             'custom_dimensions': {
@@ -199,9 +279,6 @@ class AppInsightsHandler(logging.Handler if not APPINSIGHTS_AVAILABLE else Loggi
         # Add thread info
         properties['custom_dimensions']['thread'] = record.threadName
         
-        # Get the formatted message
-        msg = self.format(record)
-        
         # Log to Application Insights with appropriate level
         if record.levelno >= logging.ERROR:
             if record.exc_info:
@@ -243,8 +320,7 @@ def log_agent_invocation(logger: logging.Logger, agent_type: str, task: str, con
         if organization_id:
             event_properties["organization_id"] = str(organization_id)
             
-        telemetry_client.track_event("AgentInvocation", event_properties)
-        telemetry_client.flush()
+        _submit_telemetry(telemetry_client.track_event, "AgentInvocation", event_properties)
 
 def log_agent_response(logger: logging.Logger, agent_type: str, response: str, conversation_id: str = None, organization_id: int = None) -> None:
     """
@@ -283,8 +359,7 @@ def log_agent_response(logger: logging.Logger, agent_type: str, response: str, c
         if organization_id:
             event_properties["organization_id"] = str(organization_id)
             
-        telemetry_client.track_event("AgentResponse", event_properties)
-        telemetry_client.flush()
+        _submit_telemetry(telemetry_client.track_event, "AgentResponse", event_properties)
 
 def log_agent_error(
     logger: logging.Logger, 
@@ -331,8 +406,7 @@ def log_agent_error(
         if organization_id:
             properties["organization_id"] = str(organization_id)
             
-        telemetry_client.track_exception(type(error), error, error.__traceback__, properties=properties)
-        telemetry_client.flush()
+        _submit_telemetry(telemetry_client.track_exception, type(error), error, error.__traceback__, properties=properties)
 
 def log_state_update(logger: logging.Logger, state_name: str, state_value: any, conversation_id: str = None, organization_id: int = None) -> None:
     """
@@ -368,10 +442,9 @@ def log_state_update(logger: logging.Logger, state_name: str, state_value: any,
         if organization_id:
             event_properties["organization_id"] = str(organization_id)
             
-        telemetry_client.track_event("StateUpdate", event_properties)
-        telemetry_client.flush()
+        _submit_telemetry(telemetry_client.track_event, "StateUpdate", event_properties)
 
-def log_api_request(logger: logging.Logger, method: str, path: str, status_code: int, duration_ms: float, user_id: str = None, organization_id: int = None) -> None:
+def log_api_request(logger: logging.Logger, method: str, path: str, status_code: int, duration_ms: float, user_id: str = None, organization_id: int = None, db_checkouts: int = None) -> None:
     """
     Log an API request.
     
@@ -383,6 +456,7 @@ def log_api_request(logger: logging.Logger, method: str, path: str, status_code:
         duration_ms: Request duration in milliseconds
         user_id: Optional user ID
         organization_id: Optional organization ID for tenant context
+        db_checkouts: Optional number of database pool checkouts made by the request
     """
     properties = {
         "method": method,
@@ -394,6 +468,8 @@ def log_api_request(logger: logging.Logger, method: str, path: str, status_code:
         properties["user_id"] = user_id
     if organization_id:
         properties["organization_id"] = str(organization_id)
+    if db_checkouts is not None:
+        properties["db_checkouts"] = db_checkouts
     
     logger.info(f"{method} {path} - {status_code} ({duration_ms:.2f}ms)", extra={"custom_dimensions": properties})
     
@@ -401,10 +477,9 @@ def log_api_request(logger: logging.Logger, method: str, path: str, status_code:
     telemetry_client = get_telemetry_client()
     if telemetry_client:
         success = 200 <= status_code < 400
-        telemetry_client.track_request(f"{method} {path}", path, success, start_time=None, 
-                                      duration=duration_ms, response_code=status_code, 
-                                      properties=properties)
-        telemetry_client.flush()
+        _submit_telemetry(telemetry_client.track_request, f"{method} {path}", path, success, start_time=None, 
+                          duration=duration_ms, response_code=status_code, 
+                          properties=properties)
 
 def log_performance_metric(logger: logging.Logger, name: str, value: float, component: str = None, organization_id: int = None) -> None:
     """
@@ -437,13 +512,18 @@ def log_performance_metric(logger: logging.Logger, name: str, value: float, comp
         if organization_id:
             metric_properties["organization_id"] = str(organization_id)
             
-        telemetry_client.track_metric(name, value, properties=metric_properties)
-        telemetry_client.flush()
+        _submit_telemetry(telemetry_client.track_metric, name, value, properties=metric_properties)
 
 def flush_telemetry() -> None:
     """
-    Flush any pending telemetry to Application Insights.
+    Send any queued telemetry to Application Insights and stop the sender.
+    
+    Call this on application shutdown.
     """
+    if _telemetry_pipeline is not None:
+        _telemetry_pipeline.shutdown()
+        return
+    
     telemetry_client = get_telemetry_client()
     if telemetry_client:
         telemetry_client.flush()
@@ -3,14 +3,18 @@ MCP Adapter for AI-EventPlanner
 
 This module provides an adapter for communicating with MCP servers from Python code.
 It supports both local development (using stdio) and Azure deployment (using localhost).
+Each worker keeps one long-lived, multiplexed connection per server in a shared pool.
 """
 
 import os
 import json
+import itertools
 import subprocess
 import socket
+import threading
 import logging
-from typing import Dict, Any, Optional, List, Union
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, List, Tuple, Union
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -24,62 +28,183 @@ class McpToolError(Exception):
     pass
 
 class McpConnection:
-    """Base class for MCP connections."""
+    """
+    Base class for MCP connections.
+    
+    A connection keeps one long-lived channel to the MCP server and
+    multiplexes JSON-RPC requests over it: every request gets its own id and
+    a reader thread hands each response to the caller waiting for that id, so
+    several requests can be in flight at once. If the channel dies (process
+    exit, closed socket) pending requests fail and the next request reopens
+    it automatically.
+    """
     
-    def __init__(self, server_name: str):
+    def __init__(self, server_name: str, request_timeout: float = 30.0):
         """Initialize the MCP connection."""
         self.server_name = server_name
-    
-    def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
-        """Call an MCP tool."""
-        raise NotImplementedError("Subclasses must implement call_tool")
-    
-    def access_resource(self, uri: str) -> Any:
-        """Access an MCP resource."""
-        raise NotImplementedError("Subclasses must implement access_resource")
-
-
-class McpStdioConnection(McpConnection):
-    """MCP connection using stdio (for local development)."""
-    
-    def __init__(self, server_name: str, command: List[str]):
-        """Initialize the MCP stdio connection."""
-        super().__init__(server_name)
-        self.command = command
-    
-    def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
-        """Call an MCP tool using stdio."""
-        try:
-            # Create the request
-            request = {
-                "jsonrpc": "2.0",
-                "method": "callTool",
-                "params": {
-                    "name": tool_name,
-                    "arguments": arguments
-                },
-                "id": 1
-            }
+        self.request_timeout = request_timeout
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._reader = None
+        self._writer = None
+        self._connected = False
+        self.restarts = 0
+    
+    # Transport hooks implemented by subclasses
+    
+    def _open(self) -> Tuple[Any, Any]:
+        """Open the transport and return (reader, writer) binary file objects."""
+        raise NotImplementedError("Subclasses must implement _open")
+    
+    def _close_transport(self) -> None:
+        """Release the transport resources."""
+        raise NotImplementedError("Subclasses must implement _close_transport")
+    
+    def _transport_alive(self) -> bool:
+        """Whether the underlying transport is still usable."""
+        return self._connected
+    
+    # Channel management
+    
+    def _ensure_connected(self) -> None:
+        """Open the channel, or reopen it if it died."""
+        with self._lock:
+            if self._connected and self._transport_alive():
+                return
             
-            # Execute the MCP server process
-            process = subprocess.Popen(
-                self.command,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            if self._reader is not None:
+                # The previous channel died; start a new one
+                self._shutdown_channel(McpConnectionError(f"MCP server {self.server_name} connection lost"))
+                self.restarts += 1
+                logger.warning(f"Restarting MCP connection to {self.server_name} (restart #{self.restarts})")
             
-            # Send the request
-            request_json = json.dumps(request) + "\n"
-            stdout, stderr = process.communicate(input=request_json)
+            try:
+                self._reader, self._writer = self._open()
+            except Exception as e:
+                raise McpConnectionError(f"Could not connect to MCP server {self.server_name}: {str(e)}")
             
-            if process.returncode != 0:
-                logger.error(f"MCP server process failed: {stderr}")
-                raise McpConnectionError(f"MCP server process failed: {stderr}")
+            self._connected = True
+            threading.Thread(
+                target=self._read_loop,
+                args=(self._reader,),
+                name=f"mcp-{self.server_name}-reader",
+                daemon=True
+            ).start()
+    
+    def _read_loop(self, reader: Any) -> None:
+        """Dispatch responses to the requests waiting for them."""
+        try:
+            for line in reader:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    response = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring invalid JSON from MCP server {self.server_name}")
+                    continue
+                
+                with self._lock:
+                    future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except Exception as e:
+            logger.debug(f"MCP reader for {self.server_name} stopped: {str(e)}")
+        
+        with self._lock:
+            if self._reader is reader:
+                self._connected = False
+                self._fail_pending(McpConnectionError(f"MCP server {self.server_name} closed the connection"))
+    
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail all requests that are waiting for a response."""
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+    
+    def _shutdown_channel(self, error: Exception) -> None:
+        """Close the transport and fail pending requests."""
+        self._connected = False
+        self._fail_pending(error)
+        try:
+            self._close_transport()
+        except Exception:
+            pass
+        self._reader = None
+        self._writer = None
+    
+    def _request(self, method: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Send a JSON-RPC request and wait for its response.
+        
+        Args:
+            method: The JSON-RPC method
+            params: The method parameters
+            timeout: Seconds to wait for the response (defaults to request_timeout)
             
-            # Parse the response
-            response = json.loads(stdout.strip())
+        Returns:
+            The JSON-RPC response
+        """
+        self._ensure_connected()
+        
+        request_id = next(self._ids)
+        future: Future = Future()
+        request = {"jsonrpc": "2.0", "method": method, "id": request_id}
+        if params is not None:
+            request["params"] = params
+        
+        with self._lock:
+            self._pending[request_id] = future
+            writer = self._writer
+        
+        try:
+            with self._write_lock:
+                writer.write((json.dumps(request) + "\n").encode())
+                writer.flush()
+        except Exception as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+                self._connected = False
+            raise McpConnectionError(f"Error sending request to MCP server {self.server_name}: {str(e)}")
+        
+        try:
+            return future.result(timeout=timeout or self.request_timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise McpConnectionError(f"MCP server {self.server_name} did not respond to {method} in time")
+    
+    def ping(self, timeout: float = 5.0) -> bool:
+        """
+        Check that the server answers requests.
+        
+        Args:
+            timeout: Seconds to wait for the answer
+            
+        Returns:
+            True if the server responded
+        """
+        try:
+            self._request("ping", {}, timeout=timeout)
+            return True
+        except Exception:
+            return False
+    
+    def close(self) -> None:
+        """Close the connection."""
+        with self._lock:
+            self._shutdown_channel(McpConnectionError(f"MCP connection to {self.server_name} closed"))
+    
+    def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """Call an MCP tool."""
+        try:
+            response = self._request("callTool", {
+                "name": tool_name,
+                "arguments": arguments
+            })
             
             if "error" in response:
                 logger.error(f"MCP tool error: {response['error']}")
@@ -92,37 +217,11 @@ class McpStdioConnection(McpConnection):
             raise McpConnectionError(f"Error calling MCP tool {tool_name}: {str(e)}")
     
     def access_resource(self, uri: str) -> Any:
-        """Access an MCP resource using stdio."""
+        """Access an MCP resource."""
         try:
-            # Create the request
-            request = {
-                "jsonrpc": "2.0",
-                "method": "readResource",
-                "params": {
-                    "uri": uri
-                },
-                "id": 1
-            }
-            
-            # Execute the MCP server process
-            process = subprocess.Popen(
-                self.command,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Send the request
-            request_json = json.dumps(request) + "\n"
-            stdout, stderr = process.communicate(input=request_json)
-            
-            if process.returncode != 0:
-                logger.error(f"MCP server process failed: {stderr}")
-                raise McpConnectionError(f"MCP server process failed: {stderr}")
-            
-            # Parse the response
-            response = json.loads(stdout.strip())
+            response = self._request("readResource", {
+                "uri": uri
+            })
             
             if "error" in response:
                 logger.error(f"MCP resource error: {response['error']}")
@@ -135,95 +234,182 @@ class McpStdioConnection(McpConnection):
             raise McpConnectionError(f"Error accessing MCP resource {uri}: {str(e)}")
 
 
+class McpStdioConnection(McpConnection):
+    """MCP connection to a long-running server process over stdio (for local development)."""
+    
+    def __init__(self, server_name: str, command: List[str], request_timeout: float = 30.0):
+        """Initialize the MCP stdio connection."""
+        super().__init__(server_name, request_timeout)
+        self.command = command
+        self.process = None
+    
+    def _open(self) -> Tuple[Any, Any]:
+        """Start the MCP server process."""
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        
+        # Drain stderr so a chatty server can never block on a full pipe
+        threading.Thread(
+            target=self._log_stderr,
+            args=(self.process.stderr,),
+            name=f"mcp-{self.server_name}-stderr",
+            daemon=True
+        ).start()
+        
+        return self.process.stdout, self.process.stdin
+    
+    def _log_stderr(self, stream: Any) -> None:
+        """Forward the server's stderr to the logger."""
+        try:
+            for line in stream:
+                logger.debug(f"[{self.server_name}] {line.decode(errors='replace').rstrip()}")
+        except Exception:
+            pass
+    
+    def _transport_alive(self) -> bool:
+        return self._connected and self.process is not None and self.process.poll() is None
+    
+    def _close_transport(self) -> None:
+        process, self.process = self.process, None
+        if process is None:
+            return
+        for stream in (process.stdin, process.stdout):
+            try:
+                stream.close()
+            except Exception:
+                pass
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
 class McpTcpConnection(McpConnection):
-    """MCP connection using TCP (for Azure deployment)."""
+    """MCP connection over a persistent TCP socket (for Azure deployment)."""
     
-    def __init__(self, server_name: str, host: str, port: int):
+    def __init__(self, server_name: str, host: str, port: int, request_timeout: float = 30.0):
         """Initialize the MCP TCP connection."""
-        super().__init__(server_name)
+        super().__init__(server_name, request_timeout)
         self.host = host
         self.port = port
-    
-    def _send_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
-        """Send a request to the MCP server and receive the response."""
+        self._socket = None
+    
+    def _open(self) -> Tuple[Any, Any]:
+        """Connect to the MCP server."""
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.request_timeout)
+        # Responses are awaited per request; the reader thread blocks indefinitely
+        self._socket.settimeout(None)
+        return self._socket.makefile("rb"), self._socket.makefile("wb")
+    
+    def _close_transport(self) -> None:
+        sock, self._socket = self._socket, None
+        if sock is None:
+            return
+        # Shut the socket down first so a reader thread blocked in readline
+        # returns; closing its buffered stream while it is blocked would hang
         try:
-            # Create a socket connection
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.connect((self.host, self.port))
-                
-                # Send the request
-                request_json = json.dumps(request) + "\n"
-                sock.sendall(request_json.encode())
-                
-                # Receive the response
-                response_data = b""
-                while True:
-                    data = sock.recv(4096)
-                    if not data:
-                        break
-                    response_data += data
-                
-                # Parse the response
-                response = json.loads(response_data.decode().strip())
-                
-                return response
-        
-        except Exception as e:
-            logger.error(f"Error communicating with MCP server: {str(e)}")
-            raise McpConnectionError(f"Error communicating with MCP server: {str(e)}")
-    
-    def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
-        """Call an MCP tool using TCP."""
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
         try:
-            # Create the request
-            request = {
-                "jsonrpc": "2.0",
-                "method": "callTool",
-                "params": {
-                    "name": tool_name,
-                    "arguments": arguments
-                },
-                "id": 1
-            }
-            
-            # Send the request and get the response
-            response = self._send_request(request)
-            
-            if "error" in response:
-                logger.error(f"MCP tool error: {response['error']}")
-                raise McpToolError(f"MCP tool error: {response['error']}")
-            
-            return response["result"]["content"]
-        
-        except Exception as e:
-            logger.error(f"Error calling MCP tool {tool_name}: {str(e)}")
-            raise McpConnectionError(f"Error calling MCP tool {tool_name}: {str(e)}")
+            self._writer.close()
+        except Exception:
+            pass
+        sock.close()
+
+
+class McpConnectionPool:
+    """
+    Process-wide pool holding one long-lived connection per MCP server.
     
-    def access_resource(self, uri: str) -> Any:
-        """Access an MCP resource using TCP."""
-        try:
-            # Create the request
-            request = {
-                "jsonrpc": "2.0",
-                "method": "readResource",
-                "params": {
-                    "uri": uri
-                },
-                "id": 1
-            }
-            
-            # Send the request and get the response
-            response = self._send_request(request)
-            
-            if "error" in response:
-                logger.error(f"MCP resource error: {response['error']}")
-                raise McpToolError(f"MCP resource error: {response['error']}")
+    Connections are created on first use and shared by all callers in the
+    worker. An optional background thread pings idle connections and
+    restarts those that stopped answering.
+    """
+    
+    def __init__(self, health_check_interval: float = 0):
+        """
+        Initialize the pool.
+        
+        Args:
+            health_check_interval: Seconds between health checks (0 disables them)
+        """
+        self.health_check_interval = health_check_interval
+        self._connections: Dict[str, McpConnection] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._health_thread = None
+    
+    def get(self, server_name: str) -> McpConnection:
+        """
+        Get the pooled connection for a server, creating it if needed.
+        
+        Args:
+            server_name: The name of the MCP server
             
-            return response["result"]["contents"][0]["text"]
+        Returns:
+            The shared MCP connection
+        """
+        connection = self._connections.get(server_name)
+        if connection is not None:
+            return connection
         
-        except Exception as e:
-            logger.error(f"Error accessing MCP resource {uri}: {str(e)}")
-            raise McpConnectionError(f"Error accessing MCP resource {uri}: {str(e)}")
+        with self._lock:
+            connection = self._connections.get(server_name)
+            if connection is None:
+                connection = create_mcp_connection(server_name)
+                self._connections[server_name] = connection
+            self._ensure_health_checks()
+        return connection
+    
+    def health_check(self) -> Dict[str, bool]:
+        """
+        Ping every pooled connection and restart the ones that do not answer.
+        
+        Returns:
+            Health status per server after the check
+        """
+        with self._lock:
+            connections = dict(self._connections)
+        
+        results = {}
+        for server_name, connection in connections.items():
+            healthy = connection.ping()
+            if not healthy:
+                logger.warning(f"MCP server {server_name} failed its health check; restarting")
+                connection.close()
+                healthy = connection.ping()
+            results[server_name] = healthy
+        return results
+    
+    def _ensure_health_checks(self) -> None:
+        """Start the health check thread if enabled."""
+        if self.health_check_interval <= 0 or self._health_thread is not None:
+            return
+        self._health_thread = threading.Thread(target=self._health_loop, name="mcp-health", daemon=True)
+        self._health_thread.start()
+    
+    def _health_loop(self) -> None:
+        while not self._stopped.wait(self.health_check_interval):
+            try:
+                self.health_check()
+            except Exception as e:
+                logger.error(f"MCP health check failed: {str(e)}")
+    
+    def close_all(self) -> None:
+        """Close every pooled connection."""
+        self._stopped.set()
+        with self._lock:
+            connections, self._connections = self._connections, {}
+            self._health_thread = None
+        for connection in connections.values():
+            connection.close()
+        self._stopped.clear()
 
 
 # MCP server configuration
@@ -238,9 +424,9 @@ MCP_SERVER_CONFIG = {
     }
 }
 
-def get_mcp_connection(server_name: str) -> McpConnection:
+def create_mcp_connection(server_name: str) -> McpConnection:
     """
-    Get an MCP connection for the specified server.
+    Create a new MCP connection for the specified server.
     
     In Azure, this will use a TCP connection to localhost.
     In local development, this will use a stdio connection.
@@ -254,24 +440,71 @@ def get_mcp_connection(server_name: str) -> McpConnection:
     if server_name not in MCP_SERVER_CONFIG:
         raise ValueError(f"Unknown MCP server: {server_name}")
     
+    server_config = MCP_SERVER_CONFIG[server_name]
+    
     # Check if running in Azure
     running_in_azure = os.environ.get("WEBSITE_SITE_NAME") is not None
     
-    if running_in_azure:
+    if running_in_azure or server_config.get("transport") == "tcp":
         # In Azure, use TCP connection to localhost
         return McpTcpConnection(
             server_name=server_name,
-            host="localhost",
-            port=MCP_SERVER_CONFIG[server_name]["port"]
+            host=server_config.get("host", "localhost"),
+            port=server_config["port"]
         )
     else:
         # In local development, use stdio connection
         return McpStdioConnection(
             server_name=server_name,
-            command=MCP_SERVER_CONFIG[server_name]["command"]
+            command=server_config["command"]
         )
 
 
+# Global connection pool
+_connection_pool = None
+_connection_pool_lock = threading.Lock()
+
+
+def get_mcp_connection_pool() -> McpConnectionPool:
+    """
+    Get the process-wide MCP connection pool.
+    
+    Returns:
+        McpConnectionPool instance
+    """
+    global _connection_pool
+    if _connection_pool is None:
+        with _connection_pool_lock:
+            if _connection_pool is None:
+                _connection_pool = McpConnectionPool(
+                    health_check_interval=float(os.environ.get("MCP_HEALTH_CHECK_INTERVAL", "60"))
+                )
+    return _connection_pool
+
+
+def get_mcp_connection(server_name: str) -> McpConnection:
+    """
+    Get the shared MCP connection for the specified server.
+    
+    Args:
+        server_name: The name of the MCP server
+        
+    Returns:
+        An MCP connection
+    """
+    return get_mcp_connection_pool().get(server_name)
+
+
+def close_mcp_connections() -> None:
+    """
+    Close all pooled MCP connections.
+    
+    Call this on application shutdown.
+    """
+    if _connection_pool is not None:
+        _connection_pool.close_all()
+
+
 # Convenience functions for calling MCP tools and accessing resources
 
 def call_mcp_tool(server_name: str, tool_name: str, arguments: Dict[str, Any]) -> Any:
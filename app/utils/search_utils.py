@@ -1,10 +1,14 @@
 """
 Search utilities module for performing internet searches using Tavily API.
+
+Identical searches already in flight in this worker are coalesced, so
+concurrent agents researching the same thing send one request to Tavily.
 """
 import logging
 from typing import Dict, Any, List, Optional
 
 from app import config
+from app.utils.single_flight import get_single_flight
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -64,14 +68,24 @@ class SearchService:
         try:
             logger.info(f"Performing search: '{query}' (depth: {search_depth}, topic: {topic})")
             
-            response = self.client.search(
-                query=query,
-                search_depth=search_depth,
-                max_results=max_results,
-                include_domains=include_domains or [],
-                exclude_domains=exclude_domains or [],
-                topic=topic
-            )
+            def run_search():
+                return self.client.search(
+                    query=query,
+                    search_depth=search_depth,
+                    max_results=max_results,
+                    include_domains=include_domains or [],
+                    exclude_domains=exclude_domains or [],
+                    topic=topic
+                )
+            
+            if config.SINGLE_FLIGHT_ENABLED:
+                key = (
+                    query, search_depth, max_results,
+                    tuple(include_domains or ()), tuple(exclude_domains or ()), topic
+                )
+                response = get_single_flight("search").do(key, run_search)
+            else:
+                response = run_search()
             
             results = response.get("results", [])
             logger.info(f"Search completed. Found {len(results)} results.")
@@ -0,0 +1,220 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+When the same expensive call (an LLM completion, a web search) is already in
+flight in this worker, later callers with the same key wait for the first
+caller's result instead of issuing a duplicate request. This cuts burst load
+on rate-limited providers exactly when many users or delegated tasks ask the
+same thing at the same time. Nothing is cached: once the call finishes, the
+next caller with the same key starts a new one.
+
+Sync and async callers share the same in-flight calls. Each follower receives
+its own deep copy of the result, so callers may modify what they get.
+Followers see the exceptions raised by the call, but not the cancellation of
+the caller that made it: if that caller is cancelled or interrupted, the
+followers retry and one of them makes the call instead.
+"""
+
+import asyncio
+import copy
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+# Result handed to followers when the leader gave up without a call outcome
+_ABANDONED = object()
+
+
+class SingleFlight:
+    """
+    Group of calls deduplicated by key.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize the group.
+
+        Args:
+            name: Name used in statistics
+        """
+        self.name = name
+        self._calls: Dict[Hashable, Tuple[Future, int, Optional[asyncio.Task]]] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def _join(self, key: Hashable, task: Optional[asyncio.Task] = None) -> Tuple[Future, bool]:
+        """
+        Join the in-flight call for a key or register a new one.
+
+        A caller never waits for a call it would block: a sync caller on the
+        thread that started the call (e.g. the event loop thread of an async
+        leader), or an async caller re-entering from the leader's own task.
+        Such a caller runs its own call instead.
+
+        Args:
+            key: The call key
+            task: The asyncio task of an async caller
+
+        Returns:
+            Tuple of (future, whether the caller is the leader)
+        """
+        thread_id = threading.get_ident()
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                future, leader_thread, leader_task = call
+                if leader_thread != thread_id or (
+                    task is not None and leader_task is not None and leader_task is not task
+                ):
+                    self.coalesced += 1
+                    return future, False
+
+            future = Future()
+            if call is None:
+                self._calls[key] = (future, thread_id, task)
+            self.executed += 1
+            return future, True
+
+    def _finish(
+        self,
+        key: Hashable,
+        future: Future,
+        result: Any = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """
+        Remove a finished call so the next caller starts a new one, and hand
+        its outcome to the followers.
+
+        Args:
+            key: The call key
+            future: The future of the call
+            result: The call result
+            error: The exception raised by the call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call[0] is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run func, or wait for the identical call already in flight.
+
+        Args:
+            key: Identifies identical calls
+            func: The call to make
+
+        Returns:
+            The call result (a copy for followers)
+        """
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            result = future.result()
+            if result is not _ABANDONED:
+                return copy.deepcopy(result)
+
+        try:
+            result = func()
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        except BaseException:
+            # Interrupted leader: the followers retry instead of failing
+            self._finish(key, future, result=_ABANDONED)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def ado(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await func, or wait for the identical call already in flight.
+
+        Args:
+            key: Identifies identical calls
+            func: Returns the awaitable making the call
+
+        Returns:
+            The call result (a copy for followers)
+        """
+        while True:
+            future, leader = self._join(key, asyncio.current_task())
+            if leader:
+                break
+            # Shielded so that a cancelled follower does not cancel the shared call
+            result = await asyncio.shield(asyncio.wrap_future(future))
+            if result is not _ABANDONED:
+                return copy.deepcopy(result)
+
+        try:
+            result = await func()
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        except BaseException:
+            # Cancelled leader: the followers retry instead of failing
+            self._finish(key, future, result=_ABANDONED)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get group statistics.
+
+        Returns:
+            Dictionary with executed, coalesced and in-flight counts
+        """
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "coalesced_rate": (self.coalesced / total) if total else 0.0,
+                "in_flight": len(self._calls)
+            }
+
+
+# Process-wide groups by name
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """
+    Get the process-wide single-flight group with the given name.
+
+    Args:
+        name: Group name, e.g. "llm" or "search"
+
+    Returns:
+        SingleFlight instance
+    """
+    group = _groups.get(name)
+    if group is None:
+        with _groups_lock:
+            group = _groups.get(name)
+            if group is None:
+                group = SingleFlight(name)
+                _groups[name] = group
+    return group
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get statistics of all single-flight groups.
+
+    Returns:
+        Statistics by group name
+    """
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.get_stats() for group in groups}
@@ -0,0 +1,131 @@
+"""
+Schema-validated structured output from LLM calls.
+
+Extraction nodes used to ask for JSON in the prompt and ``json.loads`` the
+reply, so a stray sentence or markdown fence around the JSON made the whole
+extraction fail and the next turn redo it. ``ainvoke_structured`` instead
+binds a Pydantic schema with the provider's native structured output
+(function calling / JSON schema), validates the reply against it and, if the
+reply still does not validate, sends a bounded number of repair requests
+quoting the invalid output and the validation error.
+"""
+
+import json
+import threading
+from typing import Any, Dict, List, Optional, Type, TypeVar
+
+from langchain_core.messages import BaseMessage, HumanMessage
+from pydantic import BaseModel
+
+from app.utils.logging_utils import setup_logger
+
+
+logger = setup_logger(name="structured_output", component="agent")
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+REPAIR_PROMPT = """Your previous output did not match the required schema.
+
+Output:
+{output}
+
+Validation error:
+{error}
+
+Return the corrected output for the same request, following the schema exactly."""
+
+# Call statistics
+_stats = {"calls": 0, "repairs": 0, "failures": 0}
+_stats_lock = threading.Lock()
+
+
+class StructuredOutputError(ValueError):
+    """Raised when an LLM reply does not validate against the schema after all repairs."""
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _raw_output(raw: Any) -> str:
+    """
+    Get the text of an invalid reply to quote in a repair request.
+
+    Args:
+        raw: The raw AI message
+
+    Returns:
+        The tool call arguments, or the message content
+    """
+    tool_calls = getattr(raw, "tool_calls", None)
+    if tool_calls:
+        return json.dumps(tool_calls[0].get("args"), default=str)
+    content = getattr(raw, "content", raw)
+    return content if isinstance(content, str) else json.dumps(content, default=str)
+
+
+async def ainvoke_structured(
+    llm: Any,
+    messages: List[BaseMessage],
+    schema: Type[SchemaT],
+    config: Optional[Dict[str, Any]] = None,
+    max_repairs: int = 1
+) -> SchemaT:
+    """
+    Call an LLM and return its reply parsed into a Pydantic schema.
+
+    Args:
+        llm: The chat model
+        messages: The prompt messages
+        schema: The Pydantic model the reply must validate against
+        config: Runnable config passed to the model (callbacks, tags, ...)
+        max_repairs: Repair requests sent when the reply does not validate
+
+    Returns:
+        The validated schema instance
+
+    Raises:
+        StructuredOutputError: If no valid reply was received
+    """
+    structured_llm = llm.with_structured_output(schema, include_raw=True)
+    _count("calls")
+
+    attempt_messages = list(messages)
+    for attempt in range(max_repairs + 1):
+        result = await structured_llm.ainvoke(attempt_messages, config=config)
+        parsed = result.get("parsed")
+        if isinstance(parsed, schema):
+            return parsed
+        if isinstance(parsed, dict):
+            # Some providers return a dict for Pydantic schemas
+            try:
+                return schema.model_validate(parsed)
+            except Exception as e:
+                error = e
+        else:
+            error = result.get("parsing_error") or "No structured output returned"
+
+        if attempt == max_repairs:
+            break
+
+        logger.warning(f"{schema.__name__} output did not validate, requesting a repair: {str(error)}")
+        _count("repairs")
+        attempt_messages = list(messages) + [HumanMessage(content=REPAIR_PROMPT.format(
+            output=_raw_output(result.get("raw")),
+            error=str(error)
+        ))]
+
+    _count("failures")
+    raise StructuredOutputError(f"{schema.__name__} output did not validate: {str(error)}")
+
+
+def get_structured_output_stats() -> Dict[str, int]:
+    """
+    Get structured output call statistics.
+
+    Returns:
+        Dictionary with calls, repairs and failures counts
+    """
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,241 @@
+"""
+Non-blocking delivery of Application Insights telemetry.
+
+The logging helpers used to call the telemetry client and flush it on the
+request thread, so every agent response waited for a network round trip to
+Application Insights. Telemetry calls are now put on a bounded in-memory queue
+and a background thread hands them to the client in batches, flushing the
+client after each batch. A batch is sent when it reaches batch_size items or
+when flush_interval seconds have passed since its first item.
+
+When the queue is full new items are dropped and counted rather than blocking
+the caller. Pending items are flushed on shutdown.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# A queued telemetry call: (function, args, kwargs)
+TelemetryItem = Tuple[Callable[..., Any], Tuple[Any, ...], Dict[str, Any]]
+
+
+class _FlushRequest:
+    """Queue marker asking the sender to send everything queued before it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class TelemetryPipeline:
+    """
+    Bounded queue with a background sender for telemetry calls.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        max_queue_size: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 2.0
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            client: Telemetry client flushed after each batch
+            max_queue_size: Maximum queued items; further items are dropped
+            batch_size: Maximum items sent per batch
+            flush_interval: Seconds a batch may wait for more items
+        """
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> bool:
+        """
+        Queue a telemetry call without waiting for it.
+
+        Args:
+            func: The function to call on the sender thread, usually a
+                telemetry client method such as track_event
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            True if queued, False if the item was dropped
+        """
+        if self._stopped.is_set():
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((func, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _ensure_started(self) -> None:
+        """Start the sender thread if it is not running."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="telemetry-sender",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Sender loop."""
+        while not self._stopped.is_set():
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch: List[TelemetryItem] = []
+            flush_requests: List[_FlushRequest] = []
+            deadline = time.time() + self.flush_interval
+            while True:
+                if isinstance(item, _FlushRequest):
+                    # Send what is queued so far without waiting for a full batch
+                    flush_requests.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            self._send(batch)
+            for request in flush_requests:
+                request.done.set()
+
+    def _send(self, batch: List[TelemetryItem]) -> None:
+        """
+        Hand a batch to the client and flush it.
+
+        Args:
+            batch: The queued telemetry calls
+        """
+        if not batch:
+            return
+
+        sent = 0
+        failed = 0
+        with self._send_lock:
+            for func, args, kwargs in batch:
+                try:
+                    func(*args, **kwargs)
+                    sent += 1
+                except Exception:
+                    failed += 1
+            try:
+                self.client.flush()
+            except Exception:
+                failed += sent
+                sent = 0
+
+        with self._lock:
+            self.sent += sent
+            self.failed += failed
+            self.batches += 1
+
+    def _drain(self) -> None:
+        """Send every queued item on the calling thread."""
+        batch: List[TelemetryItem] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushRequest):
+                item.done.set()
+            else:
+                batch.append(item)
+        for start in range(0, len(batch), self.batch_size):
+            self._send(batch[start:start + self.batch_size])
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Send everything queued so far and flush the client.
+
+        Args:
+            timeout: Seconds to wait for the sender thread
+
+        Returns:
+            True if the queued items were sent within the timeout
+        """
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self._drain()
+            return True
+
+        request = _FlushRequest()
+        try:
+            self._queue.put(request, timeout=timeout)
+        except queue.Full:
+            return False
+        return request.done.wait(timeout)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """
+        Flush pending telemetry and stop the sender thread.
+
+        Items submitted after shutdown are dropped.
+
+        Args:
+            timeout: Seconds to wait for the sender thread
+        """
+        if self._stopped.is_set():
+            return
+        self.flush(timeout)
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        # Anything that raced in before the stop flag was set
+        self._drain()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pipeline statistics.
+
+        Returns:
+            Dictionary with pending, enqueued, dropped, sent, failed and batches counts
+        """
+        with self._lock:
+            return {
+                "pending": self._queue.qsize(),
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "sent": self.sent,
+                "failed": self.failed,
+                "batches": self.batches
+            }
@@ -0,0 +1,154 @@
+"""
+Bounded, thread-safe LRU cache with expiring entries.
+
+The per-worker caches (tenants, users, entitlements, conversation states,
+in-memory LLM responses) all keep a bounded number of entries, drop the least
+recently used one when full and forget entries after a TTL. They share this
+implementation and only add what is specific to them (copying, statistics
+names, secondary indexes).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU mapping whose entries expire.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries (0 disables caching)
+            ttl: Default seconds an entry is kept; None keeps entries until
+                they are evicted, 0 disables caching
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        # key -> (value, expiry or None)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything."""
+        return self.max_size > 0 and (self.ttl is None or self.ttl > 0)
+
+    def lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Look up a key, telling a cached None apart from a miss.
+
+        Args:
+            key: The key
+
+        Returns:
+            Tuple of (whether the key is cached, value)
+        """
+        if not self.enabled:
+            return False, None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Get the value of a key.
+
+        Args:
+            key: The key
+
+        Returns:
+            The value, or None if not cached
+        """
+        return self.lookup(key)[1]
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries.
+
+        Args:
+            key: The key
+            value: The value
+            ttl: Seconds to keep this entry instead of the default TTL
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expiry = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expiry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Any:
+        """
+        Remove a key.
+
+        Args:
+            key: The key
+
+        Returns:
+            The removed value, or None if the key was not cached
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[0] if entry is not None else None
+
+    def pop_where(self, predicate: Callable[[Hashable, Any], bool]) -> List[Hashable]:
+        """
+        Remove the entries matching a predicate.
+
+        Args:
+            predicate: Called with each key and value
+
+        Returns:
+            The removed keys
+        """
+        with self._lock:
+            keys = [key for key, (value, _) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                del self._entries[key]
+        return keys
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size, capacity, hits, misses, hit rate and evictions
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions
+            }
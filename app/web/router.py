@@ -26,7 +26,9 @@ from app.auth.dependencies import get_current_user
 from app.schemas.event import ConversationCreate, Conversation as ConversationSchema, ConversationMessage, EventUpdate
 from app.schemas.project import TaskUpdateSchema
 from app.state.manager import StateManager
-from app.graphs.coordinator_graph import create_coordinator_graph, create_initial_state
+from app.graphs.coordinator_graph import create_initial_state
+from app.agents.graph_registry import get_compiled_graph
+from app.agents.execution import invoke_agent_graph, stream_agent_graph
 from app.middleware.tenant import get_tenant_id
 
 router = APIRouter()
@@ -635,6 +637,10 @@ async def websocket_endpoint(
     """
     WebSocket endpoint for chat.
     
+    Client messages are JSON objects with a ``content`` field. Setting
+    ``"stream": true`` makes the server push ``node_start`` and ``token``
+    frames (marked ephemeral) while the reply is generated.
+    
     Args:
         websocket: WebSocket connection
         conversation_id: ID of the conversation
@@ -676,7 +682,7 @@ async def websocket_endpoint(
             # Initialize state manager and coordinator graph
             print(f"Initializing state manager and coordinator graph for conversation {conversation_id}")
             state_manager = StateManager(db)
-            coordinator_graph = create_coordinator_graph()
+            coordinator_graph = get_compiled_graph("coordinator")
             
             # Get current state or create initial state
             current_state = await state_manager.get_state(conversation_id)
@@ -698,7 +704,7 @@ async def websocket_endpoint(
                 })
                 
                 # Run the coordinator graph to generate the initial response
-                coordinator_graph_result = coordinator_graph.invoke(current_state)
+                coordinator_graph_result = await invoke_agent_graph(coordinator_graph, current_state)
                 
                 # Save the initial state with the assistant's response
                 await state_manager.save_state(conversation_id, coordinator_graph_result)
@@ -796,7 +802,21 @@ async def websocket_endpoint(
                     
                     # Run the coordinator graph
                     print(f"Running coordinator graph for conversation {conversation_id}")
-                    result = coordinator_graph.invoke(current_state)
+                    if message_data.get("stream"):
+                        # Push node transitions and tokens as they are generated. Frames are
+                        # marked ephemeral; the complete reply is still sent and stored below.
+                        result = current_state
+                        async for event in stream_agent_graph(coordinator_graph, current_state):
+                            if event["type"] == "final":
+                                result = event["state"]
+                                continue
+                            await websocket.send_text(json.dumps({
+                                **event,
+                                "timestamp": datetime.utcnow().isoformat(),
+                                "ephemeral": True
+                            }))
+                    else:
+                        result = await invoke_agent_graph(coordinator_graph, current_state)
                     print(f"Coordinator graph execution completed for conversation {conversation_id}")
                     
                     # Save the updated state
@@ -0,0 +1,37 @@
+"""Add agent_idempotency_keys table for idempotent agent message submissions
+
+Revision ID: 20261016_agent_idempotency_keys
+Revises: 20261016_llm_rate_limit_buckets
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_agent_idempotency_keys'
+down_revision = '20261016_llm_rate_limit_buckets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('agent_idempotency_keys',
+        sa.Column('idempotency_key', sa.String(length=64), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('request_fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('response', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('idempotency_key')
+    )
+    op.create_index(op.f('ix_agent_idempotency_keys_organization_id'), 'agent_idempotency_keys', ['organization_id'])
+    op.create_index(op.f('ix_agent_idempotency_keys_expires_at'), 'agent_idempotency_keys', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index(op.f('ix_agent_idempotency_keys_expires_at'), table_name='agent_idempotency_keys')
+    op.drop_index(op.f('ix_agent_idempotency_keys_organization_id'), table_name='agent_idempotency_keys')
+    op.drop_table('agent_idempotency_keys')
@@ -0,0 +1,50 @@
+"""Make agent_states.conversation_id unique for the state write-behind UPSERT
+
+Revision ID: 20261016_agent_states_unique_conversation
+Revises: 20261016_context_extraction_job_leases
+Create Date: 2026-10-16 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_agent_states_unique_conversation'
+down_revision = '20261016_context_extraction_job_leases'
+branch_labels = None
+depends_on = None
+
+
+def _has_unique_conversation_id(bind):
+    inspector = sa.inspect(bind)
+    constraints = inspector.get_unique_constraints('agent_states')
+    indexes = [index for index in inspector.get_indexes('agent_states') if index.get('unique')]
+    return any(item['column_names'] == ['conversation_id'] for item in constraints + indexes)
+
+
+def upgrade():
+    # Databases created from the models already have the unique constraint
+    if _has_unique_conversation_id(op.get_bind()):
+        return
+
+    # Keep the most recently updated state of each conversation
+    op.execute("""
+        DELETE FROM agent_states
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY conversation_id
+                    ORDER BY updated_at DESC NULLS LAST, id DESC
+                ) AS position
+                FROM agent_states
+            ) ranked
+            WHERE position > 1
+        )
+    """)
+    op.create_index(op.f('ix_agent_states_conversation_id'), 'agent_states', ['conversation_id'], unique=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if any(index['name'] == 'ix_agent_states_conversation_id' for index in sa.inspect(bind).get_indexes('agent_states')):
+        op.drop_index(op.f('ix_agent_states_conversation_id'), table_name='agent_states')
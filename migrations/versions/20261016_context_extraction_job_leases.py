@@ -0,0 +1,25 @@
+"""Add lease columns to context_extraction_jobs
+
+Revision ID: 20261016_context_extraction_job_leases
+Revises: 20261016_agent_idempotency_keys
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_context_extraction_job_leases'
+down_revision = '20261016_agent_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('context_extraction_jobs', sa.Column('locked_at', sa.DateTime(), nullable=True))
+    op.add_column('context_extraction_jobs', sa.Column('worker_id', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    op.drop_column('context_extraction_jobs', 'worker_id')
+    op.drop_column('context_extraction_jobs', 'locked_at')
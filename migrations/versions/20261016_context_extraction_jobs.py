@@ -0,0 +1,45 @@
+"""Add context_extraction_jobs table for background context extraction
+
+Revision ID: 20261016_context_extraction_jobs
+Revises: 20251027_rename_metadata_column
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_context_extraction_jobs'
+down_revision = '20251027_rename_metadata_column'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('context_extraction_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('conversation_id', sa.Integer(), nullable=False),
+        sa.Column('message_id', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('message_timestamp', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['conversation_id'], ['tenant_conversations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['message_id'], ['tenant_messages.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_context_extraction_jobs_status', 'context_extraction_jobs', ['status', 'id'])
+    op.create_index(op.f('ix_context_extraction_jobs_id'), 'context_extraction_jobs', ['id'])
+
+
+def downgrade():
+    op.drop_index(op.f('ix_context_extraction_jobs_id'), table_name='context_extraction_jobs')
+    op.drop_index('idx_context_extraction_jobs_status', table_name='context_extraction_jobs')
+    op.drop_table('context_extraction_jobs')
@@ -0,0 +1,35 @@
+"""Add llm_cache_entries table for the LLM response cache
+
+Revision ID: 20261016_llm_cache_entries
+Revises: 20261016_context_extraction_jobs
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_llm_cache_entries'
+down_revision = '20261016_context_extraction_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('llm_cache_entries',
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=True),
+        sa.Column('generations', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('cache_key')
+    )
+    op.create_index(op.f('ix_llm_cache_entries_organization_id'), 'llm_cache_entries', ['organization_id'])
+    op.create_index(op.f('ix_llm_cache_entries_expires_at'), 'llm_cache_entries', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index(op.f('ix_llm_cache_entries_expires_at'), table_name='llm_cache_entries')
+    op.drop_index(op.f('ix_llm_cache_entries_organization_id'), table_name='llm_cache_entries')
+    op.drop_table('llm_cache_entries')
@@ -0,0 +1,29 @@
+"""Add llm_rate_limit_buckets table for per-organization LLM rate limits
+
+Revision ID: 20261016_llm_rate_limit_buckets
+Revises: 20261016_llm_cache_entries
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261016_llm_rate_limit_buckets'
+down_revision = '20261016_llm_cache_entries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('llm_rate_limit_buckets',
+        sa.Column('bucket_key', sa.String(length=64), nullable=False),
+        sa.Column('requests', sa.Float(), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('bucket_key')
+    )
+
+
+def downgrade():
+    op.drop_table('llm_rate_limit_buckets')
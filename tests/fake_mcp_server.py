@@ -0,0 +1,85 @@
+"""
+Minimal fake MCP server for testing app.utils.mcp_adapter.
+
+Speaks newline-delimited JSON-RPC over stdio (default) or TCP (--tcp PORT).
+Each request is answered on its own thread, so slow requests do not hold up
+fast ones and responses may arrive out of order.
+
+Supported methods:
+- ping
+- callTool: "echo" returns its arguments, "sleep" waits arguments["seconds"],
+  "pid" returns the server process ID, "crash" exits the process
+- readResource: returns the URI as text
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+
+def handle(request):
+    method = request.get("method")
+    params = request.get("params") or {}
+
+    if method == "ping":
+        return {}
+
+    if method == "callTool":
+        name = params.get("name")
+        arguments = params.get("arguments") or {}
+        if name == "echo":
+            return {"content": arguments}
+        if name == "sleep":
+            time.sleep(arguments.get("seconds", 0))
+            return {"content": arguments}
+        if name == "pid":
+            return {"content": os.getpid()}
+        if name == "crash":
+            os._exit(1)
+        raise ValueError(f"Unknown tool: {name}")
+
+    if method == "readResource":
+        return {"contents": [{"text": params.get("uri")}]}
+
+    raise ValueError(f"Unknown method: {method}")
+
+
+def serve(reader, writer):
+    write_lock = threading.Lock()
+
+    def respond(request):
+        try:
+            response = {"jsonrpc": "2.0", "id": request.get("id"), "result": handle(request)}
+        except Exception as e:
+            response = {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": str(e)}}
+        with write_lock:
+            writer.write((json.dumps(response) + "\n").encode())
+            writer.flush()
+
+    for line in reader:
+        if line.strip():
+            threading.Thread(target=respond, args=(json.loads(line),), daemon=True).start()
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--tcp":
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(("127.0.0.1", int(sys.argv[2])))
+        server.listen()
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(
+                target=serve,
+                args=(conn.makefile("rb"), conn.makefile("wb")),
+                daemon=True
+            ).start()
+    else:
+        serve(sys.stdin.buffer, sys.stdout.buffer)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Tests for streaming agent graph events and their server-sent event framing.
+"""
+
+import asyncio
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langgraph.graph import END, StateGraph
+
+from app.agents import api_router, execution
+from app.agents.execution import stream_agent_graph
+from app.subscription.feature_control import FeatureNotAvailableError
+
+
+REPLY = "Your venue is booked."
+
+
+def _graph():
+    """Two-node graph: a JSON extraction step followed by the user-facing reply."""
+    extraction_llm = FakeListChatModel(responses=['{"attendee_count": 200}'])
+    reply_llm = FakeListChatModel(responses=[REPLY])
+
+    async def gather_requirements(state, config):
+        result = await extraction_llm.ainvoke(state["messages"][-1]["content"], config=config)
+        return {**state, "requirements": json.loads(result.content)}
+
+    async def generate_response(state, config):
+        result = await reply_llm.ainvoke("Reply to the user", config=config)
+        return {**state, "messages": state["messages"] + [{"role": "assistant", "content": result.content}]}
+
+    workflow = StateGraph(dict)
+    workflow.add_node("gather_requirements", gather_requirements)
+    workflow.add_node("generate_response", generate_response)
+    workflow.add_edge("gather_requirements", "generate_response")
+    workflow.add_edge("generate_response", END)
+    workflow.set_entry_point("gather_requirements")
+    return workflow.compile()
+
+
+def _state():
+    return {"messages": [{"role": "user", "content": "Book a venue for 200 people"}], "organization_id": 1}
+
+
+async def _collect(events):
+    return [event async for event in events]
+
+
+@pytest.fixture(autouse=True)
+def no_rolling_summary(monkeypatch):
+    monkeypatch.setattr(execution.config, "CONTEXT_ROLLING_SUMMARY", False)
+
+
+def test_stream_yields_node_starts_reply_tokens_and_the_final_state():
+    """Only the reply node's tokens are streamed, and the last event holds the resulting state."""
+    events = asyncio.run(_collect(stream_agent_graph(_graph(), _state())))
+
+    assert [event["node"] for event in events if event["type"] == "node_start"] == [
+        "gather_requirements",
+        "generate_response"
+    ]
+    tokens = [event for event in events if event["type"] == "token"]
+    assert {event["node"] for event in tokens} == {"generate_response"}
+    assert "".join(event["content"] for event in tokens) == REPLY
+
+    reply_start = events.index({"type": "node_start", "node": "generate_response"})
+    assert events.index(tokens[0]) > reply_start
+    assert events[-1]["type"] == "final"
+    assert sum(event["type"] == "final" for event in events) == 1
+    final_state = events[-1]["state"]
+    assert final_state["requirements"] == {"attendee_count": 200}
+    assert final_state["messages"][-1] == {"role": "assistant", "content": REPLY}
+
+
+def test_stream_forwards_tokens_of_the_requested_nodes():
+    """The streamed node set decides which LLM output reaches the client."""
+    events = asyncio.run(_collect(stream_agent_graph(_graph(), _state(), streamed_nodes=("gather_requirements",))))
+
+    tokens = [event for event in events if event["type"] == "token"]
+    assert {event["node"] for event in tokens} == {"gather_requirements"}
+    assert "".join(event["content"] for event in tokens) == '{"attendee_count": 200}'
+
+
+def _frames(body):
+    frames = body.split("\n\n")
+    assert frames[-1] == ""
+    assert all(frame.startswith("data: ") for frame in frames[:-1])
+    return [json.loads(frame[len("data: "):]) for frame in frames[:-1]]
+
+
+def _stream_response(monkeypatch, prepare, idempotency_key=None):
+    calls = []
+
+    class IdempotencyManager:
+        async def complete(self, key, response):
+            calls.append(("complete", key))
+
+        async def release(self, key):
+            calls.append(("release", key))
+
+    monkeypatch.setattr(api_router, "_prepare_agent_run", prepare)
+    monkeypatch.setattr(
+        api_router,
+        "_finalize_agent_run",
+        lambda run, result, agent_type, organization_id, streamed=False: result["messages"][-1]["content"]
+    )
+    monkeypatch.setattr(api_router, "get_idempotency_manager", lambda: IdempotencyManager())
+
+    async def body():
+        chunks = api_router.stream_agent_response(
+            agent_type="coordinator",
+            message="Book a venue for 200 people",
+            conversation_id=None,
+            organization_id=1,
+            db=None,
+            current_user_id=7,
+            idempotency_key=idempotency_key
+        )
+        return "".join([chunk async for chunk in chunks])
+
+    return _frames(asyncio.run(body())), calls
+
+
+def test_sse_response_frames_the_stream_and_completes_the_idempotency_key(monkeypatch):
+    """The SSE body opens with the conversation and ends with the persisted reply."""
+    async def prepare(**kwargs):
+        return {"conversation_id": "42", "agent": {"graph": _graph()}, "state": _state()}
+
+    events, calls = _stream_response(monkeypatch, prepare, idempotency_key="key-1")
+
+    assert events[0] == {"type": "conversation", "conversation_id": "42", "agent_type": "coordinator"}
+    assert {event["type"] for event in events[1:-1]} == {"node_start", "token"}
+    assert events[-1] == {
+        "type": "done",
+        "response": REPLY,
+        "conversation_id": "42",
+        "agent_type": "coordinator",
+        "organization_id": 1
+    }
+    assert calls == [("complete", "key-1")]
+
+
+@pytest.mark.parametrize("error, status_code", [
+    (FeatureNotAvailableError("Upgrade your plan"), 403),
+    (RuntimeError("database unavailable"), 500),
+])
+def test_sse_response_reports_errors_and_releases_the_idempotency_key(monkeypatch, error, status_code):
+    """A failed run ends the stream with an error event and frees the key for a retry."""
+    async def prepare(**kwargs):
+        raise error
+
+    events, calls = _stream_response(monkeypatch, prepare, idempotency_key="key-2")
+
+    assert len(events) == 1
+    assert events[0]["type"] == "error"
+    assert events[0]["status_code"] == status_code
+    assert str(error) in events[0]["detail"]
+    assert calls == [("release", "key-2")]
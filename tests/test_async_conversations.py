@@ -0,0 +1,255 @@
+"""
+Tests for reading conversations through an async session.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+from app.services.tenant_conversation_service import AsyncTenantConversationService, TenantConversationService
+from app.state import tenant_aware_manager
+from app.state.state_cache import ConversationStateCache
+from app.state.tenant_aware_manager import AsyncTenantAwareStateManager, TenantAwareStateManager
+
+
+# The async sessions read the sqlite database through aiosqlite
+pytest.importorskip("aiosqlite")
+
+
+# (organization ID, user ID) pairs: owners, a participant, a former participant,
+# users of another organization and organization-wide access
+ACCESS_CASES = [(1, 1), (1, 2), (1, 3), (1, 4), (2, 1), (2, 3), (1, None), (2, None)]
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(type_, compiler, **kw):
+    # UUIDs are stored as hex strings on databases without a native type
+    return "CHAR(32)"
+
+
+def _databases(tmp_path):
+    """Create a seeded sqlite database and return a sync session and an async session factory."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    import app.db.models_saas  # noqa: F401 - configures the relationships
+    from app.db.base import Base
+    from app.db.models_tenant_conversations import (
+        ConversationContext,
+        ConversationParticipant,
+        TenantConversation,
+        TenantMessage
+    )
+    from app.db.models_updated import AgentState, Conversation
+
+    path = tmp_path / "conversations.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[
+        TenantConversation.__table__,
+        TenantMessage.__table__,
+        ConversationContext.__table__,
+        ConversationParticipant.__table__,
+        Conversation.__table__,
+        AgentState.__table__
+    ])
+
+    now = datetime(2026, 1, 1)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        TenantConversation(id=10, organization_id=1, user_id=1, last_activity_at=now),
+        TenantConversation(id=11, organization_id=1, user_id=2, last_activity_at=now + timedelta(hours=2)),
+        TenantConversation(id=12, organization_id=1, user_id=2, last_activity_at=now + timedelta(hours=1)),
+        TenantConversation(id=20, organization_id=2, user_id=1, last_activity_at=now),
+        ConversationParticipant(organization_id=1, conversation_id=11, user_id=3, is_active=True),
+        ConversationParticipant(organization_id=1, conversation_id=12, user_id=3, is_active=False),
+        TenantMessage(id=100, organization_id=1, conversation_id=11, user_id=2, role="user", content="Hi", timestamp=now),
+        TenantMessage(id=101, organization_id=1, conversation_id=11, user_id=2, role="assistant", content="Hello",
+                      timestamp=now + timedelta(minutes=1)),
+        TenantMessage(id=200, organization_id=2, conversation_id=20, user_id=1, role="user", content="Hi", timestamp=now),
+        ConversationContext(organization_id=1, conversation_id=11, user_id=2),
+        Conversation(id=1, organization_id=1, created_at=now),
+        Conversation(id=2, organization_id=1, created_at=now + timedelta(hours=1)),
+        Conversation(id=3, organization_id=2, created_at=now),
+        AgentState(conversation_id=1, state_data={"agent_type": "coordinator", "messages": [
+            {"role": "user", "content": "a", "timestamp": now.isoformat()}
+        ]}),
+        AgentState(conversation_id=2, state_data={"agent_type": "financial", "messages": []}),
+        AgentState(conversation_id=3, state_data={"agent_type": "coordinator", "organization_id": 2})
+    ])
+    db.commit()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    return db, async_sessionmaker(async_engine, expire_on_commit=False), async_engine
+
+
+def _summary(conversation):
+    if conversation is None:
+        return None
+    context = conversation.conversation_context
+    return (
+        conversation.id,
+        [message.id for message in conversation.messages],
+        context.id if context is not None else None
+    )
+
+
+def test_async_conversation_reads_match_sync_reads(tmp_path):
+    """aget_conversation and alist_conversations return the rows the sync reads return."""
+    db, async_sessions, async_engine = _databases(tmp_path)
+
+    async def read(organization_id, user_id):
+        async with async_sessions() as async_db:
+            service = AsyncTenantConversationService(async_db=async_db, organization_id=organization_id, user_id=user_id)
+            conversations, total = await service.alist_conversations()
+            found = [_summary(await service.aget_conversation(conversation_id)) for conversation_id in (10, 11, 12, 20)]
+        return [conversation.id for conversation in conversations], total, found
+
+    async def read_all():
+        try:
+            return [await read(organization_id, user_id) for organization_id, user_id in ACCESS_CASES]
+        finally:
+            await async_engine.dispose()
+
+    async_reads = asyncio.run(read_all())
+
+    sync_reads = []
+    for organization_id, user_id in ACCESS_CASES:
+        service = TenantConversationService(db=db, organization_id=organization_id, user_id=user_id)
+        conversations, total = service.list_conversations()
+        found = [_summary(service.get_conversation(conversation_id)) for conversation_id in (10, 11, 12, 20)]
+        sync_reads.append(([conversation.id for conversation in conversations], total, found))
+
+    assert async_reads == sync_reads
+    listed = {case: ids for case, (ids, _, _) in zip(ACCESS_CASES, async_reads)}
+    assert listed[(1, 1)] == [10]
+    assert listed[(1, 2)] == [11, 12]
+    # Only active participants see a conversation they do not own
+    assert listed[(1, 3)] == [11]
+    assert listed[(1, 4)] == []
+    # Conversations of another organization are never returned
+    assert listed[(2, 1)] == [20]
+    assert listed[(2, 3)] == []
+    assert listed[(1, None)] == [11, 12, 10]
+    assert async_reads[ACCESS_CASES.index((1, 3))][2] == [None, (11, [100, 101], 1), None, None]
+    assert async_reads[ACCESS_CASES.index((2, 1))][2] == [None, None, None, (20, [200], None)]
+
+
+def test_async_state_reads_match_sync_reads(tmp_path, monkeypatch):
+    """aget_conversation_state and alist_conversations return the states the sync reads return."""
+    monkeypatch.setattr(tenant_aware_manager.config, "STATE_WRITE_BEHIND", False)
+    # Read every state from the database rather than from a previous read
+    monkeypatch.setattr(tenant_aware_manager, "get_conversation_state_cache", lambda: ConversationStateCache(max_size=0))
+    db, async_sessions, async_engine = _databases(tmp_path)
+
+    async def read(organization_id):
+        async with async_sessions() as async_db:
+            manager = AsyncTenantAwareStateManager(organization_id=organization_id, async_db=async_db, db=db)
+            listed = await manager.alist_conversations()
+            states = []
+            for conversation_id in ("1", "2", "3", "missing"):
+                manager._conversations.clear()
+                states.append(await manager.aget_conversation_state(conversation_id))
+        return listed, states
+
+    async def read_all():
+        try:
+            return [await read(organization_id) for organization_id in (1, 2)]
+        finally:
+            await async_engine.dispose()
+
+    async_reads = asyncio.run(read_all())
+
+    sync_reads = []
+    for organization_id in (1, 2):
+        manager = TenantAwareStateManager(organization_id=organization_id, db=db)
+        listed = manager.list_conversations()
+        states = []
+        for conversation_id in ("1", "2", "3", "missing"):
+            manager._conversations.clear()
+            states.append(manager.get_conversation_state(conversation_id))
+        sync_reads.append((listed, states))
+
+    assert async_reads == sync_reads
+    assert [conversation["id"] for conversation in async_reads[0][0]] == ["2", "1"]
+    assert [conversation["id"] for conversation in async_reads[1][0]] == ["3"]
+    # A conversation of another organization reads as an empty state
+    assert async_reads[0][1][2] == {"organization_id": 1}
+    assert async_reads[1][1][0] == {"organization_id": 2}
+    assert async_reads[0][1][0]["agent_type"] == "coordinator"
+
+
+def test_prepare_agent_run_includes_the_new_message_with_an_async_session(tmp_path, monkeypatch):
+    """The agent state holds the message just sent whether the conversation is read sync or async."""
+    from types import SimpleNamespace
+
+    from app.agents import api_router
+    from app.services.tenant_conversation_service import TenantConversationService as Service
+
+    monkeypatch.setattr(Service, "_update_conversation_context", lambda self, conversation_id, message: None)
+    monkeypatch.setattr(api_router, "get_agent_factory", lambda db, organization_id: SimpleNamespace(
+        create_agent=lambda agent_type, conversation_id: {"state": {}}
+    ))
+    db, async_sessions, async_engine = _databases(tmp_path)
+
+    async def prepare(message, use_async):
+        async with async_sessions() as async_db:
+            run = await api_router._prepare_agent_run(
+                agent_type="financial",
+                message=message,
+                conversation_id="11",
+                organization_id=1,
+                db=db,
+                current_user_id=3,
+                async_db=async_db if use_async else None
+            )
+        return [(entry["role"], entry["content"]) for entry in run["state"]["messages"]]
+
+    async def prepare_both():
+        try:
+            return await prepare("Sync", use_async=False), await prepare("Async", use_async=True)
+        finally:
+            await async_engine.dispose()
+
+    sync_messages, async_messages = asyncio.run(prepare_both())
+
+    assert sync_messages == [("user", "Hi"), ("assistant", "Hello"), ("user", "Sync")]
+    assert async_messages == sync_messages + [("user", "Async")]
+
+
+def test_listed_states_include_pending_writes_without_flushing(tmp_path, monkeypatch):
+    """Listing shows the organization's unwritten states and leaves every pending write queued."""
+    import json
+
+    from app.db.models_updated import AgentState
+    from app.state.write_behind import StateWriteBehindFlusher
+
+    flusher = StateWriteBehindFlusher(flush_interval=60)
+    flusher._ensure_started = lambda: None
+    monkeypatch.setattr(tenant_aware_manager.config, "STATE_WRITE_BEHIND", True)
+    monkeypatch.setattr(tenant_aware_manager, "get_state_flusher", lambda: flusher)
+    monkeypatch.setattr(tenant_aware_manager, "get_conversation_state_cache", lambda: ConversationStateCache(max_size=0))
+    db, async_sessions, async_engine = _databases(tmp_path)
+    # Conversation 2 has no stored state yet
+    db.query(AgentState).filter(AgentState.conversation_id == 2).delete()
+    db.commit()
+    flusher.mark_dirty(1, "1", 1, json.dumps({"agent_type": "marketing"}))
+    flusher.mark_dirty(1, "2", 2, json.dumps({"agent_type": "budget"}))
+    flusher.mark_dirty(2, "3", 3, json.dumps({"agent_type": "compliance"}))
+
+    async def read():
+        try:
+            async with async_sessions() as async_db:
+                manager = AsyncTenantAwareStateManager(organization_id=1, async_db=async_db, db=db)
+                return await manager.alist_conversations()
+        finally:
+            await async_engine.dispose()
+
+    async_listed = asyncio.run(read())
+    listed = TenantAwareStateManager(organization_id=1, db=db).list_conversations()
+
+    assert async_listed == listed
+    assert [(entry["id"], entry["agent_type"]) for entry in listed] == [("2", "budget"), ("1", "marketing")]
+    assert flusher.get_stats()["pending"] == 3
@@ -0,0 +1,269 @@
+"""
+Tests for the background context extraction queue and its job backends.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+from app.services import context_extraction_queue, tenant_conversation_service
+from app.services.context_extraction_queue import (
+    ContextExtractionQueue,
+    ContextJobBackend,
+    InMemoryContextJobBackend,
+    PostgresContextJobBackend,
+)
+from app.services.tenant_conversation_service import TenantConversationService
+
+
+NOW = datetime(2026, 1, 1)
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(type_, compiler, **kw):
+    # UUIDs are stored as hex strings on databases without a native type
+    return "CHAR(32)"
+
+
+def _submit(extraction_queue, message_id, content="We need a venue for 200 guests"):
+    return extraction_queue.submit(
+        organization_id=1,
+        user_id=1,
+        conversation_id=10,
+        message_id=message_id,
+        content=content,
+        timestamp=NOW + timedelta(minutes=message_id)
+    )
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Sqlite session with a conversation (ID 10) of organization 1 owned by user 1, and its context."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    import app.db.models_saas  # noqa: F401 - configures the relationships
+    from app.db.base import Base
+    from app.db.models_tenant_conversations import (
+        ContextExtractionJob,
+        ConversationContext,
+        ConversationParticipant,
+        TenantConversation,
+        TenantMessage
+    )
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'context.db'}")
+    Base.metadata.create_all(engine, tables=[
+        TenantConversation.__table__,
+        TenantMessage.__table__,
+        ConversationContext.__table__,
+        ConversationParticipant.__table__,
+        ContextExtractionJob.__table__
+    ])
+    sessions = sessionmaker(bind=engine)
+    session = sessions()
+    session.add_all([
+        TenantConversation(id=10, organization_id=1, user_id=1, last_activity_at=NOW),
+        ConversationContext(organization_id=1, conversation_id=10, user_id=1)
+    ])
+    session.commit()
+    session.sessions = sessions
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def test_backend_interface_is_abstract():
+    """A backend must implement put, get and qsize."""
+    class Incomplete(ContextJobBackend):
+        def put(self, job):
+            return True
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_submitted_jobs_are_processed_by_the_workers():
+    """Workers pick up submitted jobs and the stats count them."""
+    processed = []
+    extraction_queue = ContextExtractionQueue(InMemoryContextJobBackend(max_size=10), num_workers=2)
+    extraction_queue._process = lambda job: processed.append(job["message_id"])
+    try:
+        assert all(_submit(extraction_queue, message_id) for message_id in (1, 2, 3))
+
+        assert _wait_for(lambda: extraction_queue.get_stats()["processed"] == 3)
+        assert sorted(processed) == [1, 2, 3]
+        assert extraction_queue.get_stats() == {
+            "pending": 0,
+            "submitted": 3,
+            "rejected": 0,
+            "processed": 3,
+            "failed": 0
+        }
+    finally:
+        extraction_queue.shutdown(timeout=2)
+
+
+def test_failed_jobs_are_counted():
+    """A job raising an error is marked done and counted as failed."""
+    def fail(job):
+        raise RuntimeError("LLM unavailable")
+
+    extraction_queue = ContextExtractionQueue(InMemoryContextJobBackend(max_size=10), num_workers=1)
+    extraction_queue._process = fail
+    try:
+        _submit(extraction_queue, 1)
+
+        assert _wait_for(lambda: extraction_queue.get_stats()["failed"] == 1)
+        assert extraction_queue.get_stats()["processed"] == 0
+        assert extraction_queue.backend.qsize() == 0
+    finally:
+        extraction_queue.shutdown(timeout=2)
+
+
+def test_full_queue_rejects_jobs():
+    """Jobs beyond the backend's capacity are rejected and counted."""
+    extraction_queue = ContextExtractionQueue(InMemoryContextJobBackend(max_size=2), num_workers=1)
+    # No workers, so the queue fills up
+    extraction_queue._ensure_started = lambda: None
+
+    assert [_submit(extraction_queue, message_id) for message_id in (1, 2, 3)] == [True, True, False]
+    assert extraction_queue.get_stats() == {
+        "pending": 2,
+        "submitted": 2,
+        "rejected": 1,
+        "processed": 0,
+        "failed": 0
+    }
+
+
+def test_full_queue_falls_back_to_inline_basic_extraction(db, monkeypatch):
+    """When the queue rejects a message the pattern-based extraction is applied right away."""
+    from app.db.models_tenant_conversations import ConversationContext, TenantMessage
+
+    extraction_queue = ContextExtractionQueue(InMemoryContextJobBackend(max_size=1), num_workers=1)
+    extraction_queue._ensure_started = lambda: None
+    _submit(extraction_queue, 1)
+    monkeypatch.setattr(tenant_conversation_service.config, "CONTEXT_EXTRACTION_ASYNC", True)
+    monkeypatch.setattr(tenant_conversation_service, "get_context_extraction_queue", lambda: extraction_queue)
+
+    service = TenantConversationService(db=db, organization_id=1, user_id=1)
+    monkeypatch.setattr(service, "_extract_context_from_message", lambda content: pytest.fail("LLM extraction ran inline"))
+    message = TenantMessage(
+        id=5, organization_id=1, conversation_id=10, user_id=1, role="user",
+        content="Our budget is $5000 for the party", timestamp=NOW
+    )
+    db.add(message)
+    db.commit()
+
+    service._update_conversation_context(10, message)
+
+    context = db.query(ConversationContext).filter(ConversationContext.conversation_id == 10).one()
+    assert context.conversation_memory["last_user_message"]["message_id"] == 5
+    assert extraction_queue.get_stats()["rejected"] == 1
+
+
+def test_expired_lease_is_reclaimed_and_stale_completion_is_ignored(db, monkeypatch):
+    """A job whose worker lost its lease is claimed again; the old worker cannot delete it."""
+    from app.db.models_tenant_conversations import ContextExtractionJob
+
+    monkeypatch.setattr(context_extraction_queue, "SessionLocal", db.sessions)
+    stale = PostgresContextJobBackend(poll_interval=0.01, lease_seconds=300)
+    stale.worker_id = "worker-a"
+    current = PostgresContextJobBackend(poll_interval=0.01, lease_seconds=300)
+    current.worker_id = "worker-b"
+    assert stale.put({
+        "organization_id": 1,
+        "user_id": 1,
+        "conversation_id": 10,
+        "message_id": 1,
+        "content": "We need a venue",
+        "timestamp": NOW.isoformat()
+    })
+
+    stale_job = stale.get(timeout=0)
+    assert stale_job["attempts"] == 1
+    # The lease is still held
+    assert current.get(timeout=0) is None
+    assert current.qsize() == 1
+
+    db.query(ContextExtractionJob).update({"locked_at": datetime.utcnow() - timedelta(seconds=301)})
+    db.commit()
+    current_job = current.get(timeout=0)
+    assert current_job["job_id"] == stale_job["job_id"]
+    assert current_job["attempts"] == 2
+
+    stale.task_done(stale_job)
+    db.expire_all()
+    row = db.query(ContextExtractionJob).one()
+    assert (row.status, row.worker_id) == ("processing", "worker-b")
+
+    current.task_done(current_job)
+    assert db.query(ContextExtractionJob).count() == 0
+
+
+def test_failed_job_is_retried_until_max_attempts(db, monkeypatch):
+    """A failed job goes back to pending and is marked failed after its last attempt."""
+    from app.db.models_tenant_conversations import ContextExtractionJob
+
+    monkeypatch.setattr(context_extraction_queue, "SessionLocal", db.sessions)
+    backend = PostgresContextJobBackend(poll_interval=0.01, max_attempts=2)
+    backend.put({
+        "organization_id": 1,
+        "user_id": 1,
+        "conversation_id": 10,
+        "message_id": 1,
+        "content": "We need a venue",
+        "timestamp": NOW.isoformat()
+    })
+
+    backend.task_done(backend.get(timeout=0), "timeout")
+    db.expire_all()
+    assert db.query(ContextExtractionJob).one().status == "pending"
+
+    backend.task_done(backend.get(timeout=0), "timeout")
+    db.expire_all()
+    row = db.query(ContextExtractionJob).one()
+    assert (row.status, row.attempts, row.last_error) == ("failed", 2, "timeout")
+    assert backend.get(timeout=0) is None
+
+
+def test_results_of_older_messages_fill_in_without_overwriting(db):
+    """A late extraction of an older message adds its facts but keeps the newer message's values."""
+    from app.db.models_tenant_conversations import ConversationContext
+
+    service = TenantConversationService(db=db, organization_id=1, user_id=1)
+
+    def apply(message_id, preferences):
+        service._apply_context_extraction(
+            conversation_id=10,
+            message_id=message_id,
+            content=f"Message {message_id}",
+            timestamp=(NOW + timedelta(minutes=message_id)).isoformat(),
+            extracted_context={"preferences": preferences}
+        )
+        db.expire_all()
+        return db.query(ConversationContext).filter(ConversationContext.conversation_id == 10).one()
+
+    assert apply(2, {"venue_type": "outdoor", "budget": "$5000"}).user_preferences == {
+        "venue_type": "outdoor",
+        "budget": "$5000"
+    }
+    context = apply(1, {"budget": "$3000", "location": "Austin"})
+    assert context.user_preferences == {"venue_type": "outdoor", "budget": "$5000", "location": "Austin"}
+    assert context.conversation_memory["last_user_message"]["message_id"] == 2
+
+    context = apply(3, {"budget": "$8000"})
+    assert context.user_preferences == {"venue_type": "outdoor", "budget": "$8000", "location": "Austin"}
+    assert context.conversation_memory["last_user_message"]["message_id"] == 3
@@ -0,0 +1,110 @@
+"""
+Tests for the sliding-window conversation context.
+"""
+
+from app.graphs.context_window import (
+    SUMMARY_PREFIX,
+    build_context_messages,
+    get_messages_to_summarize,
+    update_rolling_summary
+)
+
+
+def _conversation(count):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"}
+        for i in range(count)
+    ]
+
+
+class FakeLLM:
+    """LLM stand-in returning a fixed summary and recording prompts."""
+
+    def __init__(self, summary):
+        self.summary = summary
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return type("Result", (), {"content": self.summary})()
+
+
+def test_short_conversation_is_sent_verbatim():
+    """Without a summary every message is kept."""
+    state = {"messages": _conversation(4)}
+    messages = build_context_messages(state, max_messages=12, token_budget=1000)
+    assert [m["content"] for m in messages] == [f"message {i}" for i in range(4)]
+
+
+def test_summary_replaces_messages_outside_the_window():
+    """Summarized messages outside the window are replaced by the summary."""
+    state = {
+        "messages": _conversation(10),
+        "conversation_summary": "They want a conference.",
+        "summarized_message_count": 6
+    }
+    messages = build_context_messages(state, max_messages=4, token_budget=1000)
+    assert messages[0] == {"role": "system", "content": SUMMARY_PREFIX + "They want a conference."}
+    assert [m["content"] for m in messages[1:]] == [f"message {i}" for i in range(6, 10)]
+
+
+def test_unsummarized_messages_are_kept_beyond_the_window():
+    """Messages not yet covered by the summary are never dropped by the window."""
+    state = {
+        "messages": _conversation(10),
+        "conversation_summary": "Earlier.",
+        "summarized_message_count": 3
+    }
+    messages = build_context_messages(state, max_messages=4, token_budget=1000)
+    assert [m["content"] for m in messages[1:]] == [f"message {i}" for i in range(3, 10)]
+
+
+def test_token_budget_drops_oldest_but_keeps_latest_message():
+    """The budget trims from the oldest message and always keeps the last one."""
+    state = {"messages": [
+        {"role": "user", "content": "x" * 400},
+        {"role": "assistant", "content": "y" * 400},
+        {"role": "user", "content": "z" * 400}
+    ]}
+    messages = build_context_messages(state, max_messages=12, token_budget=250)
+    assert [m["content"][0] for m in messages] == ["y", "z"]
+    messages = build_context_messages(state, max_messages=12, token_budget=10)
+    assert [m["content"][0] for m in messages] == ["z"]
+
+
+def test_ephemeral_and_filtered_roles_are_excluded():
+    """Ephemeral messages and roles outside the filter are left out."""
+    state = {"messages": [
+        {"role": "system", "content": "status", "ephemeral": True},
+        {"role": "system", "content": "instructions"},
+        {"role": "user", "content": "hello"}
+    ]}
+    messages = build_context_messages(state, max_messages=12, token_budget=1000, roles=("user", "assistant"))
+    assert messages == [{"role": "user", "content": "hello"}]
+
+
+def test_summary_update_waits_for_a_full_batch():
+    """No summary call is made until enough messages have left the window."""
+    state = {"messages": _conversation(14)}
+    assert get_messages_to_summarize(state, max_messages=12, batch_messages=6) == []
+    state["messages"] = _conversation(18)
+    evicted = get_messages_to_summarize(state, max_messages=12, batch_messages=6)
+    assert [m["content"] for m in evicted] == [f"message {i}" for i in range(6)]
+
+
+def test_update_rolling_summary_folds_evicted_messages(monkeypatch):
+    """The summary covers the evicted messages and the count advances."""
+    monkeypatch.setattr("app.graphs.context_window.config.CONTEXT_WINDOW_MESSAGES", 4)
+    monkeypatch.setattr("app.graphs.context_window.config.CONTEXT_SUMMARY_BATCH_MESSAGES", 2)
+    state = {"messages": _conversation(8), "conversation_summary": "Old summary."}
+    llm = FakeLLM("New summary.")
+
+    assert update_rolling_summary(state, llm) is True
+    assert state["conversation_summary"] == "New summary."
+    assert state["summarized_message_count"] == 4
+    assert "Old summary." in llm.prompts[0]
+    assert "user: message 0" in llm.prompts[0]
+
+    # Nothing new has left the window
+    assert update_rolling_summary(state, llm) is False
+    assert len(llm.prompts) == 1
@@ -0,0 +1,85 @@
+"""
+Tests for the request-scoped database session.
+"""
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.db import session as db_session
+from app.db.session import get_db
+from app.middleware.tenant import tenant_middleware
+
+
+class FakeSession:
+    """Stands in for a SQLAlchemy session and records whether it was closed."""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _make_app(monkeypatch):
+    sessions = []
+
+    def session_factory():
+        session = FakeSession()
+        sessions.append(session)
+        return session
+
+    monkeypatch.setattr(db_session, "SessionLocal", session_factory)
+
+    app = FastAPI()
+    app.middleware("http")(tenant_middleware)
+
+    def get_other_db(db=Depends(get_db)):
+        return db
+
+    @app.get("/shared")
+    def shared(first=Depends(get_db), second=Depends(get_other_db)):
+        return {"same": first is second, "closed": first.closed}
+
+    @app.get("/stream")
+    def stream(db=Depends(get_db)):
+        def body():
+            # The session is still open while the body is sent
+            yield "open" if not db.closed else "closed"
+        return StreamingResponse(body())
+
+    @app.get("/fail")
+    def fail(db=Depends(get_db)):
+        raise RuntimeError("handler failed")
+
+    return app, sessions
+
+
+def test_one_session_is_shared_by_all_dependencies(monkeypatch):
+    """Every Depends(get_db) of a request gets the same session."""
+    app, sessions = _make_app(monkeypatch)
+    response = TestClient(app).get("/shared")
+
+    assert response.json() == {"same": True, "closed": False}
+    assert len(sessions) == 1
+    assert sessions[0].closed
+
+
+def test_session_is_closed_after_a_streamed_body(monkeypatch):
+    """A streaming response keeps the session until its body has been sent."""
+    app, sessions = _make_app(monkeypatch)
+    response = TestClient(app).get("/stream")
+
+    assert response.text == "open"
+    assert len(sessions) == 1
+    assert sessions[0].closed
+
+
+def test_session_is_closed_when_the_handler_raises(monkeypatch):
+    """The session is returned even if the route fails."""
+    app, sessions = _make_app(monkeypatch)
+    response = TestClient(app, raise_server_exceptions=False).get("/fail")
+
+    assert response.status_code == 500
+    assert len(sessions) == 1
+    assert sessions[0].closed
@@ -0,0 +1,94 @@
+"""
+Tests for concurrent delegation of coordinator tasks.
+"""
+
+import asyncio
+import threading
+import time
+
+from app.graphs import delegation
+from app.graphs.async_support import run_sync
+from app.graphs.delegation import TenantSlots, delegation_cancelled, run_delegations
+from app.utils.llm_cache import get_llm_cache_scope, llm_cache_scope
+
+
+def test_tenant_slots_limit_concurrent_calls():
+    """No more calls of one organization run at once than it has slots."""
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+        return {"ok": True}
+
+    delegation._tenant_slots[101] = TenantSlots(2)
+    outcomes = asyncio.run(run_delegations([call] * 5, organization_id=101, timeout=5))
+
+    assert outcomes == [({"ok": True}, None)] * 5
+    assert max(peak) == 2
+    assert delegation._tenant_slots[101].in_use == 0
+
+
+def test_timed_out_call_stops_and_gives_up_its_slot():
+    """A timed-out call is asked to stop and its slot is released once it has."""
+    stopped = threading.Event()
+
+    def slow_call():
+        while not delegation_cancelled():
+            time.sleep(0.01)
+        stopped.set()
+        return {"ok": False}
+
+    delegation._tenant_slots[102] = TenantSlots(1)
+    outcomes = asyncio.run(run_delegations([slow_call], organization_id=102, timeout=0.1))
+
+    assert outcomes[0][0] is None
+    assert isinstance(outcomes[0][1], TimeoutError)
+    assert stopped.wait(1)
+    time.sleep(0.05)
+    assert delegation._tenant_slots[102].in_use == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    """A caller cancelled while waiting for a slot leaves the slot count intact."""
+    slots = TenantSlots(1)
+
+    async def scenario():
+        await slots.acquire()
+        waiter = asyncio.ensure_future(slots.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        slots.release()
+        await asyncio.wait_for(slots.acquire(), timeout=1)
+        slots.release()
+
+    asyncio.run(scenario())
+    assert slots.in_use == 0
+
+
+def test_delegated_tasks_keep_the_tenant_scope():
+    """Delegated tasks and the nodes they run synchronously see the caller's tenant scope."""
+    async def node_scope():
+        return get_llm_cache_scope()
+
+    def call():
+        return {"scope": get_llm_cache_scope()}
+
+    def call_running_node():
+        async def run_node():
+            # A sync graph node called while an event loop is running
+            return run_sync(node_scope())
+        return {"scope": asyncio.run(run_node())}
+
+    async def scenario():
+        with llm_cache_scope(42):
+            return await run_delegations([call, call_running_node], organization_id=42, timeout=5)
+
+    assert asyncio.run(scenario()) == [({"scope": 42}, None), ({"scope": 42}, None)]
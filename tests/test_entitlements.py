@@ -0,0 +1,86 @@
+"""
+Tests for subscription entitlement snapshots and their cache.
+"""
+
+from types import MappingProxyType, SimpleNamespace
+
+from app.subscription.entitlements import EntitlementCache
+from app.subscription.feature_control import SubscriptionFeatureControl, build_entitlements
+
+
+FEATURE_TIERS = SubscriptionFeatureControl.FEATURE_TIERS
+AGENT_TIERS = SubscriptionFeatureControl.AGENT_TIERS
+
+
+def _organization(status="active", max_users=7, max_events=9):
+    return SimpleNamespace(subscription_status=status, max_users=max_users, max_events=max_events)
+
+
+def _plan(name):
+    return SimpleNamespace(name=name)
+
+
+def test_snapshot_is_shared_until_invalidated():
+    """Cached snapshots are returned as stored until invalidated."""
+    cache = EntitlementCache(ttl=60)
+    snapshot = MappingProxyType({"tier": "professional"})
+    cache.put(1, snapshot)
+    assert cache.get(1) is snapshot
+
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_plan_names_map_to_tiers():
+    """Each plan name selects its tier's agents and features."""
+    for plan_name, tier in (
+        ("Enterprise", "enterprise"),
+        ("Professional", "professional"),
+        ("Premium Monthly", "professional"),
+        ("Starter", "free"),
+    ):
+        entitlements = build_entitlements(1, _organization(), _plan(plan_name))
+
+        assert entitlements["tier"] == tier
+        assert entitlements["plan_name"] == plan_name
+        assert entitlements["allowed_agents"] == frozenset(AGENT_TIERS[tier])
+        assert entitlements["feature_access"]["analytics_dashboard"] == FEATURE_TIERS[tier]["analytics_dashboard"]
+        assert entitlements["usage_limits"]["max_messages"] == FEATURE_TIERS[tier]["max_messages"]
+
+    assert build_entitlements(1, _organization(), None)["tier"] == "free"
+
+
+def test_user_and_event_limits_come_from_the_organization():
+    """max_users and max_events are the organization's own limits."""
+    limits = build_entitlements(1, _organization(max_users=7, max_events=9), _plan("Enterprise"))["usage_limits"]
+
+    assert limits["max_users"] == 7
+    assert limits["max_events"] == 9
+    assert limits["max_conversations"] == FEATURE_TIERS["enterprise"]["max_conversations"]
+
+
+def test_inactive_subscription_gets_free_features_and_limits():
+    """A lapsed subscription keeps its tier's agents but only free features and limits."""
+    entitlements = build_entitlements(1, _organization(status="past_due"), _plan("Enterprise"))
+
+    assert entitlements["tier"] == "enterprise"
+    assert entitlements["subscription_status"] == "past_due"
+    assert entitlements["allowed_agents"] == frozenset(AGENT_TIERS["enterprise"])
+    assert not entitlements["feature_access"]["priority_support"]
+    assert dict(entitlements["usage_limits"]) == {
+        key: FEATURE_TIERS["free"][key]
+        for key in ("max_events", "max_users", "max_conversations", "max_messages")
+    }
+
+
+def test_no_organization_context_gets_free_limits():
+    """Without an organization only the free tier's limits and agents apply."""
+    entitlements = build_entitlements(None, None, None)
+
+    assert entitlements["tier"] == "free"
+    assert entitlements["subscription_status"] is None
+    assert entitlements["allowed_agents"] == frozenset(AGENT_TIERS["free"])
+    assert entitlements["usage_limits"]["max_users"] == FEATURE_TIERS["free"]["max_users"]
+    # Access is granted to every feature the free tier lists, as before the snapshots
+    assert all(entitlements["feature_access"][name] for name in FEATURE_TIERS["free"])
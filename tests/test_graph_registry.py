@@ -0,0 +1,130 @@
+"""
+Tests for the process-wide registry of compiled agent graphs.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.agents import graph_registry
+from app.agents.graph_registry import GraphRegistry
+
+
+def _registry(build_delay=0.0):
+    """Registry with fake builders recording every build."""
+    builds = []
+    lock = threading.Lock()
+
+    def builder(agent_type):
+        def build(entry_point=None):
+            time.sleep(build_delay)
+            with lock:
+                builds.append((agent_type, entry_point))
+            return object()
+        return build
+
+    def failing_builder():
+        raise RuntimeError("missing API key")
+
+    registry = GraphRegistry(builders={
+        "coordinator": builder("coordinator"),
+        "financial": builder("financial"),
+        "analytics": failing_builder
+    })
+    return registry, builds
+
+
+def test_hits_and_misses_are_counted():
+    """The first request compiles the graph; later requests share it."""
+    registry, builds = _registry()
+
+    graph = registry.get_graph("coordinator")
+    assert registry.get_graph("coordinator") is graph
+    assert registry.get_graph("coordinator") is graph
+
+    assert builds == [("coordinator", None)]
+    assert registry.get_stats() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3, "compiled": ["coordinator"]}
+
+
+def test_graphs_are_keyed_by_agent_type_and_entry_point():
+    """Each entry point of a delegated task gets its own compiled graph."""
+    registry, builds = _registry()
+
+    full = registry.get_graph("financial")
+    expenses = registry.get_graph("financial", entry_point="track_expenses")
+    contracts = registry.get_graph("financial", entry_point="manage_contracts")
+
+    assert len({id(full), id(expenses), id(contracts), id(registry.get_graph("coordinator"))}) == 4
+    assert registry.get_graph("financial", entry_point="track_expenses") is expenses
+    assert builds == [
+        ("financial", None),
+        ("financial", "track_expenses"),
+        ("financial", "manage_contracts"),
+        ("coordinator", None)
+    ]
+
+
+def test_graphs_are_keyed_by_llm_configuration(monkeypatch):
+    """A different configured model gets a freshly compiled graph."""
+    registry, builds = _registry()
+    monkeypatch.setattr(graph_registry.config, "LLM_PROVIDER", "openai")
+    monkeypatch.setattr(graph_registry.config, "LLM_MODEL", "gpt-4")
+    graph = registry.get_graph("coordinator")
+
+    monkeypatch.setattr(graph_registry.config, "LLM_MODEL", "gpt-4o")
+
+    assert registry.get_graph("coordinator") is not graph
+    assert len(builds) == 2
+
+
+def test_unsupported_agent_types_and_entry_points_are_rejected():
+    """Unknown agent types and nodes outside the task routes raise ValueError."""
+    registry, builds = _registry()
+
+    with pytest.raises(ValueError):
+        registry.get_graph("catering")
+    with pytest.raises(ValueError):
+        registry.get_graph("financial", entry_point="book_flights")
+    assert builds == []
+
+
+def test_concurrent_first_requests_compile_once():
+    """Requests racing for an uncompiled graph wait for a single build."""
+    registry, builds = _registry(build_delay=0.1)
+    barrier = threading.Barrier(8)
+
+    def request():
+        barrier.wait()
+        return registry.get_graph("financial", entry_point="track_expenses")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        graphs = list(executor.map(lambda _: request(), range(8)))
+
+    assert builds == [("financial", "track_expenses")]
+    assert all(graph is graphs[0] for graph in graphs)
+    assert registry.get_stats()["misses"] == 1
+    assert registry.get_stats()["hits"] == 7
+
+
+def test_warm_up_compiles_every_graph_and_reports_failures():
+    """warm_up compiles the requested graphs and records which could not be built."""
+    registry, builds = _registry()
+
+    assert registry.warm_up() == {"coordinator": True, "financial": True, "analytics": False}
+    assert registry.warm_up(["financial"]) == {"financial": True}
+    assert builds == [("coordinator", None), ("financial", None)]
+    assert registry.get_stats()["compiled"] == ["coordinator", "financial"]
+
+
+def test_clear_drops_compiled_graphs():
+    """Graphs are compiled again after the registry is cleared."""
+    registry, builds = _registry()
+    graph = registry.get_graph("coordinator")
+
+    registry.clear()
+
+    assert registry.get_stats()["compiled"] == []
+    assert registry.get_graph("coordinator") is not graph
+    assert builds == [("coordinator", None), ("coordinator", None)]
@@ -0,0 +1,143 @@
+"""
+Tests for idempotent agent message submissions.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.idempotency import (
+    IdempotencyInProgressError,
+    IdempotencyKeyReusedError,
+    IdempotencyManager,
+    InMemoryIdempotencyStore,
+    get_request_fingerprint,
+    get_scope_key
+)
+
+
+def _manager(**kwargs):
+    return IdempotencyManager(store=InMemoryIdempotencyStore(), poll_interval=0.01, **kwargs)
+
+
+def test_completed_response_is_replayed():
+    """A retry after completion gets the stored response."""
+    manager = _manager()
+    key = get_scope_key(1, 7, "retry-1")
+    fingerprint = get_request_fingerprint(message="hello")
+
+    async def main():
+        assert await manager.acquire(key, 1, fingerprint) is None
+        await manager.complete(key, {"response": "hi"})
+        return await manager.acquire(key, 1, fingerprint)
+
+    assert asyncio.run(main()) == {"response": "hi"}
+    assert manager.get_stats()["replayed"] == 1
+
+
+def test_concurrent_duplicate_attaches_to_the_original_run():
+    """A duplicate arriving while the original runs waits for its response."""
+    manager = _manager()
+    key = get_scope_key(1, 7, "retry-2")
+    fingerprint = get_request_fingerprint(message="hello")
+    runs = []
+
+    async def submit():
+        replay = await manager.acquire(key, 1, fingerprint)
+        if replay is not None:
+            return replay
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        response = {"response": "hi"}
+        await manager.complete(key, response)
+        return response
+
+    async def main():
+        return await asyncio.gather(submit(), submit(), submit())
+
+    assert asyncio.run(main()) == [{"response": "hi"}] * 3
+    assert len(runs) == 1
+
+
+def test_key_reused_for_another_request_is_rejected():
+    """The same key with a different body is an error."""
+    manager = _manager()
+    key = get_scope_key(1, 7, "retry-3")
+
+    async def main():
+        await manager.acquire(key, 1, get_request_fingerprint(message="hello"))
+        await manager.acquire(key, 1, get_request_fingerprint(message="goodbye"))
+
+    with pytest.raises(IdempotencyKeyReusedError):
+        asyncio.run(main())
+
+
+def test_failed_run_releases_the_key():
+    """After a failure the next submission runs again, and waiting is bounded."""
+    manager = _manager(max_wait=0.05)
+    key = get_scope_key(1, 7, "retry-4")
+    fingerprint = get_request_fingerprint(message="hello")
+
+    async def main():
+        assert await manager.acquire(key, 1, fingerprint) is None
+        await manager.release(key)
+        assert await manager.acquire(key, 1, fingerprint) is None
+        # Another worker's run: only the store knows about it
+        manager._running.clear()
+        with pytest.raises(IdempotencyInProgressError):
+            await manager.acquire(key, 1, fingerprint)
+
+    asyncio.run(main())
+
+
+def test_in_memory_store_purges_expired_records():
+    """Claiming a key drops expired records once the purge interval has passed."""
+    store = InMemoryIdempotencyStore(purge_interval=60)
+    store.claim("old", 1, "a", ttl=-1, lock_seconds=600)
+    store.claim("kept", 1, "b", ttl=60, lock_seconds=600)
+    assert len(store._records) == 2
+
+    store._next_purge = 0
+    store.claim("new", 1, "c", ttl=60, lock_seconds=600)
+
+    assert sorted(store._records) == ["kept", "new"]
+
+
+def test_postgres_store_purges_expired_records(monkeypatch):
+    """Expired records, with their stored responses, are deleted once the purge is due."""
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    import app.db.models_saas  # noqa: F401 - configures the relationships
+    from app.db import base
+    from app.db.models_tenant_conversations import AgentIdempotencyKey
+    from app.services.idempotency import PostgresIdempotencyStore
+
+    engine = create_engine("sqlite://")
+    AgentIdempotencyKey.__table__.create(engine)
+    sessions = sessionmaker(bind=engine)
+    monkeypatch.setattr(base, "SessionLocal", sessions)
+    now = datetime.utcnow()
+    db = sessions()
+    db.add_all([
+        AgentIdempotencyKey(idempotency_key=key, organization_id=1, request_fingerprint="f", status=status,
+                            response=response, created_at=now, expires_at=now + timedelta(seconds=offset))
+        for key, status, response, offset in [
+            ("expired", "completed", '{"response": "hi"}', -10),
+            ("running", "in_progress", None, 60),
+            ("replayable", "completed", '{"response": "hello"}', 60)
+        ]
+    ])
+    db.commit()
+
+    store = PostgresIdempotencyStore(purge_interval=60)
+    store._purge_if_due()
+    assert db.query(AgentIdempotencyKey).count() == 3
+
+    store._next_purge = 0
+    store._purge_if_due()
+
+    assert sorted(row[0] for row in db.query(AgentIdempotencyKey.idempotency_key).all()) == ["replayable", "running"]
+    assert store.purged == 1
+    db.close()
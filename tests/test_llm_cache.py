@@ -0,0 +1,76 @@
+"""
+Tests for the exact-match LLM response cache with the in-memory backend.
+"""
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from app.utils.llm_cache import InMemoryLLMCacheBackend, LLMResponseCache, llm_cache_scope
+
+
+def make_cache(max_size: int = 10, ttl: float = 60.0) -> LLMResponseCache:
+    return LLMResponseCache(InMemoryLLMCacheBackend(max_size=max_size), ttl=ttl)
+
+
+def test_hit_after_update_with_normalized_prompt():
+    """A prompt differing only in whitespace is served from the cache."""
+    cache = make_cache()
+    generations = [ChatGeneration(message=AIMessage(content="{\"venue_type\": \"outdoor\"}"))]
+
+    with llm_cache_scope(1):
+        assert cache.lookup("Extract   the\ncontext", "gpt-4 temperature=0.1") is None
+        cache.update("Extract the context", "gpt-4 temperature=0.1", generations)
+        cached = cache.lookup("Extract the\n  context", "gpt-4 temperature=0.1")
+
+    assert cached[0].message.content == generations[0].message.content
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_entries_are_isolated_per_model_and_tenant():
+    """Other model parameters and other organizations miss."""
+    cache = make_cache()
+    generations = [ChatGeneration(message=AIMessage(content="answer"))]
+
+    with llm_cache_scope(1):
+        cache.update("prompt", "gpt-4 temperature=0.1", generations)
+        assert cache.lookup("prompt", "gpt-4 temperature=0.7") is None
+
+    with llm_cache_scope(2):
+        assert cache.lookup("prompt", "gpt-4 temperature=0.1") is None
+
+
+
+def test_expired_postgres_entries_are_purged_on_write(monkeypatch):
+    """Writes delete expired rows once the purge interval has passed."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.dialects.sqlite import insert
+    from sqlalchemy.orm import sessionmaker
+    import app.db.models  # noqa: F401 - configures the relationships
+    import app.db.models_saas  # noqa: F401
+    from app.db.models_updated import LLMCacheEntry
+    from app.utils import llm_cache
+    from app.utils.llm_cache import PostgresLLMCacheBackend
+
+    engine = create_engine("sqlite://")
+    LLMCacheEntry.__table__.create(engine)
+    sessions = sessionmaker(bind=engine)
+    # The same UPSERT statement, compiled for sqlite
+    monkeypatch.setattr(llm_cache, "SessionLocal", sessions)
+    monkeypatch.setattr(llm_cache, "insert", insert)
+
+    db = sessions()
+    backend = PostgresLLMCacheBackend(purge_interval=60)
+    backend.set("expired", 1, "old", ttl=-1)
+    backend.set("fresh", 1, "new", ttl=60)
+    assert backend.get("expired") is None
+    assert db.query(LLMCacheEntry).count() == 2
+
+    # Due for a purge
+    backend._next_purge = 0
+    backend.set("other", 2, "value", ttl=60)
+
+    assert sorted(row[0] for row in db.query(LLMCacheEntry.cache_key).all()) == ["fresh", "other"]
+    assert backend.purged == 1
+    db.close()
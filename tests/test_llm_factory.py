@@ -0,0 +1,139 @@
+"""
+Tests for the pooled LLM clients, model tiers and shared HTTP connections.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app.graphs.async_support import run_sync
+from app.utils import llm_factory
+from app.utils.llm_cache import llm_cache_scope
+from app.utils.llm_factory import (
+    LLM_TIER_EXTRACTION,
+    LLM_TIER_RESPONSE,
+    clear_llm_clients,
+    get_llm,
+    get_model_for_tier,
+    get_node_llm,
+    get_node_tier,
+)
+
+
+@pytest.fixture
+def openai_config(monkeypatch):
+    monkeypatch.setattr(llm_factory.config, "LLM_PROVIDER", "openai")
+    monkeypatch.setattr(llm_factory.config, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(llm_factory.config, "LLM_MODEL", "gpt-4")
+    monkeypatch.setattr(llm_factory.config, "LLM_EXTRACTION_MODEL", "gpt-4o-mini")
+    monkeypatch.setattr(llm_factory.config, "LLM_NODE_TIERS", "")
+    monkeypatch.setattr(llm_factory.config, "LLM_FALLBACK_PROVIDER", "")
+    monkeypatch.setattr(llm_factory.config, "LLM_HEDGING_ENABLED", False)
+    monkeypatch.setattr(llm_factory.config, "LLM_RATE_LIMIT_ENABLED", False)
+    clear_llm_clients()
+    yield
+    clear_llm_clients()
+
+
+@pytest.fixture
+def fake_openai_server():
+    """Keep-alive HTTP server answering every chat completion with "hi"."""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            body = json.dumps({
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": requests[-1]["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "hi"}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/v1", requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_tiers_map_to_configured_models(openai_config, monkeypatch):
+    """The extraction tier uses its own model and falls back to the response model."""
+    assert get_model_for_tier(LLM_TIER_RESPONSE) == "gpt-4"
+    assert get_model_for_tier(LLM_TIER_EXTRACTION) == "gpt-4o-mini"
+
+    monkeypatch.setattr(llm_factory.config, "LLM_EXTRACTION_MODEL", "")
+    assert get_model_for_tier(LLM_TIER_EXTRACTION) == "gpt-4"
+
+
+def test_node_tier_overrides_are_parsed(openai_config, monkeypatch):
+    """LLM_NODE_TIERS overrides the declared tier; unknown tiers and other nodes are ignored."""
+    monkeypatch.setattr(
+        llm_factory.config,
+        "LLM_NODE_TIERS",
+        " coordinator.generate_proposal = extraction ,budget.analyze=unknown,, marketing.plan"
+    )
+
+    assert get_node_tier("coordinator.generate_proposal") == LLM_TIER_EXTRACTION
+    assert get_node_tier("budget.analyze", LLM_TIER_RESPONSE) == LLM_TIER_RESPONSE
+    assert get_node_tier("marketing.plan", LLM_TIER_EXTRACTION) == LLM_TIER_EXTRACTION
+    assert get_node_tier("coordinator.generate_response", LLM_TIER_EXTRACTION) == LLM_TIER_EXTRACTION
+
+
+def test_clients_are_pooled_per_model_and_temperature(openai_config):
+    """Callers with the same model and temperature share one client."""
+    llm = get_llm(temperature=0.2)
+
+    assert get_llm(temperature=0.2) is llm
+    assert get_node_llm("coordinator.generate_response", temperature=0.2) is llm
+    assert get_llm(temperature=0.7) is not llm
+    assert get_llm(temperature=0.2, tier=LLM_TIER_EXTRACTION) is not llm
+    assert get_llm(temperature=0.2, tier=LLM_TIER_EXTRACTION).model_name == "gpt-4o-mini"
+
+    clear_llm_clients()
+    assert get_llm(temperature=0.2) is not llm
+
+
+def test_pooled_client_survives_successive_event_loops(openai_config, fake_openai_server, monkeypatch):
+    """Async calls from separate sync runs each send exactly one request."""
+    base_url, requests = fake_openai_server
+    monkeypatch.setenv("OPENAI_API_BASE", base_url)
+    llm = get_llm()
+
+    # A connection left over from a closed loop would fail and be retried, sending the request twice
+    for count in (1, 2, 3):
+        assert run_sync(llm.ainvoke("Hello")).content == "hi"
+        assert len(requests) == count
+
+    assert llm.invoke("Hello").content == "hi"
+    assert len(requests) == 4
+
+
+def test_single_flight_is_scoped_to_the_organization(openai_config):
+    """Identical prompts only share an in-flight call within one organization."""
+    llm = get_llm()
+    messages = [HumanMessage(content="Hello")]
+
+    with llm_cache_scope(1):
+        key = llm._single_flight_key(messages, None, {})
+        assert llm._single_flight_key(messages, None, {}) == key
+    with llm_cache_scope(2):
+        assert llm._single_flight_key(messages, None, {}) != key
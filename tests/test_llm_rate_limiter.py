@@ -0,0 +1,117 @@
+"""
+Tests for per-organization LLM rate limiting and fair scheduling.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.utils.llm_rate_limiter import (
+    InMemoryRateLimitStore,
+    LLMRateLimiter,
+    LLMRateLimitError,
+    WeightedFairScheduler,
+    take_from_buckets
+)
+
+
+def _limiter(limits, max_concurrent=4, max_wait=1.0, tiers=None):
+    return LLMRateLimiter(
+        store=InMemoryRateLimitStore(),
+        scheduler=WeightedFairScheduler(max_concurrent),
+        limits=limits,
+        weights={"free": 1.0, "enterprise": 4.0},
+        max_wait=max_wait,
+        tier_resolver=lambda organization_id: (tiers or {}).get(organization_id, "free")
+    )
+
+
+def test_bucket_reports_wait_when_empty():
+    """An empty request bucket asks to wait for the next refill."""
+    requests, tokens, wait = take_from_buckets(0.5, 1000, (60, 6000), 100)
+    assert (requests, tokens) == (0.5, 1000)
+    assert wait == pytest.approx(0.5)
+
+    requests, tokens, wait = take_from_buckets(2, 1000, (60, 6000), 100)
+    assert (requests, tokens, wait) == (1, 900, 0.0)
+
+
+def test_requests_over_the_limit_are_rejected():
+    """Calls beyond the per-minute limit fail once the maximum wait is exceeded."""
+    limiter = _limiter({"free": (2, 100000)}, max_wait=0.5)
+    assert limiter.run(1, ["hi"], lambda: "a") == "a"
+    assert limiter.run(1, ["hi"], lambda: "b") == "b"
+    with pytest.raises(LLMRateLimitError):
+        limiter.run(1, ["hi"], lambda: "c")
+    # Other organizations have their own bucket
+    assert limiter.run(2, ["hi"], lambda: "d") == "d"
+    assert limiter.get_stats()["rejected"] == 1
+
+
+def test_scheduler_limits_concurrency():
+    """No more calls than max_concurrent run at the same time."""
+    limiter = _limiter({"free": (1000, 10 ** 7)}, max_concurrent=2, max_wait=5.0)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+        return "ok"
+
+    threads = [threading.Thread(target=limiter.run, args=(i % 3, ["hi"], call)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert max(peak) == 2
+    assert limiter.scheduler.get_stats()["active"] == 0
+
+
+def test_fair_queue_prefers_higher_weight():
+    """Waiting calls start in weighted fair order."""
+    scheduler = WeightedFairScheduler(1)
+    assert scheduler.acquire("busy", 1.0, 1.0)
+
+    order = []
+
+    def wait(tenant, weight):
+        scheduler.acquire(tenant, weight, 5.0)
+        order.append(tenant)
+        scheduler.release()
+
+    threads = []
+    for tenant, weight in [("free", 1.0), ("free", 1.0), ("enterprise", 4.0), ("enterprise", 4.0)]:
+        thread = threading.Thread(target=wait, args=(tenant, weight))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)
+
+    scheduler.release()
+    for thread in threads:
+        thread.join(5)
+    assert order[:2] == ["enterprise", "enterprise"]
+
+
+def test_async_waiter_timeout_frees_its_place():
+    """An async call that times out in the queue does not keep a slot."""
+    scheduler = WeightedFairScheduler(1)
+
+    async def main():
+        assert await scheduler.aacquire("a", 1.0, 1.0)
+        assert not await scheduler.aacquire("b", 1.0, 0.05)
+        scheduler.release()
+        assert await scheduler.aacquire("b", 1.0, 1.0)
+        scheduler.release()
+
+    asyncio.run(main())
+    stats = scheduler.get_stats()
+    assert stats["active"] == 0
+    assert stats["queued"] == 0
@@ -0,0 +1,93 @@
+"""
+Tests for hedged LLM requests and provider circuit breakers.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.llm_resilience import CircuitBreaker, LLMResilience, hedged_race, hedged_race_sync
+
+
+def test_breaker_opens_on_error_rate_and_recovers():
+    """The breaker opens past the error threshold and closes after a good trial call."""
+    breaker = CircuitBreaker("openai", error_threshold=0.5, min_calls=4, cooldown_seconds=0.05)
+    for success in (True, False, True):
+        breaker.record(success)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    breaker.record(True)
+    assert breaker.state == "closed"
+
+
+def test_fast_primary_sends_no_backup():
+    """A call finishing before the hedge delay does not start the backup."""
+    started = []
+
+    async def primary():
+        return "primary"
+
+    async def backup():
+        started.append(True)
+        return "backup"
+
+    result = asyncio.run(hedged_race(primary, backup, 0.5))
+    assert result == ("primary", False, False)
+    assert not started
+
+
+def test_slow_primary_loses_to_backup_and_is_cancelled():
+    """The first good answer wins and the other request is cancelled."""
+    cancelled = []
+
+    async def primary():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "primary"
+
+    async def backup():
+        return "backup"
+
+    async def main():
+        result = await hedged_race(primary, backup, 0.02)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == ("backup", True, True)
+    assert cancelled
+
+
+def test_failed_primary_fails_over_only_when_allowed():
+    """A failed call is replaced by the backup only if the predicate allows it."""
+    def primary():
+        raise ConnectionError("provider down")
+
+    with ThreadPoolExecutor(2) as executor:
+        result = hedged_race_sync(primary, lambda: "fallback", None, executor, retry_on_error=lambda e: True)
+        assert result == ("fallback", True, True)
+
+        try:
+            hedged_race_sync(primary, lambda: "fallback", 1.0, executor)
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("error was not raised")
+
+
+def test_hedge_delay_follows_p95():
+    """Without a fixed delay the provider's recent p95 latency is used."""
+    resilience = LLMResilience(hedging=True, min_hedge_delay=0.1, default_hedge_delay=7.0)
+    assert resilience.get_hedge_delay("openai") == 7.0
+    for i in range(100):
+        resilience.record("openai", True, 1.0 + i / 100.0)
+    assert 1.9 <= resilience.get_hedge_delay("openai") <= 2.0
+    assert LLMResilience(hedging=False).get_hedge_delay("openai") is None
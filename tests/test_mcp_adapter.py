@@ -0,0 +1,130 @@
+"""
+Tests for the pooled MCP connections, using the fake server in fake_mcp_server.py.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.mcp_adapter import (
+    McpConnectionError,
+    McpConnectionPool,
+    McpStdioConnection,
+    McpTcpConnection,
+    MCP_SERVER_CONFIG
+)
+
+
+FAKE_SERVER = os.path.join(os.path.dirname(__file__), "fake_mcp_server.py")
+
+
+@pytest.fixture
+def stdio_connection():
+    """A stdio connection to the fake server."""
+    connection = McpStdioConnection("fake-mcp", [sys.executable, FAKE_SERVER], request_timeout=5)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def tcp_server():
+    """A fake server listening on a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    process = subprocess.Popen(
+        [sys.executable, FAKE_SERVER, "--tcp", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+
+    yield port
+
+    process.terminate()
+    process.wait(timeout=5)
+
+
+def test_stdio_reuses_server_process(stdio_connection):
+    """Consecutive calls are served by the same server process."""
+    assert stdio_connection.call_tool("echo", {"value": 1}) == {"value": 1}
+    first_pid = stdio_connection.call_tool("pid", {})
+    second_pid = stdio_connection.call_tool("pid", {})
+
+    assert first_pid == second_pid
+    assert stdio_connection.access_resource("weather://Paris/current") == "weather://Paris/current"
+
+
+def test_stdio_multiplexes_concurrent_requests(stdio_connection):
+    """Requests in flight at the same time are matched to their own responses."""
+    stdio_connection.ping()
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(
+            lambda i: stdio_connection.call_tool("sleep", {"seconds": 0.5, "index": i}),
+            range(5)
+        ))
+    elapsed = time.time() - start
+
+    assert [result["index"] for result in results] == list(range(5))
+    assert elapsed < 2.0
+
+
+def test_stdio_restarts_after_server_exit(stdio_connection):
+    """A crashed server is restarted on the next call."""
+    first_pid = stdio_connection.call_tool("pid", {})
+
+    with pytest.raises(McpConnectionError):
+        stdio_connection.call_tool("crash", {})
+
+    second_pid = stdio_connection.call_tool("pid", {})
+    assert second_pid != first_pid
+    assert stdio_connection.restarts == 1
+
+
+def test_tool_error_is_raised(stdio_connection):
+    """JSON-RPC errors from the server surface as connection errors."""
+    with pytest.raises(McpConnectionError):
+        stdio_connection.call_tool("unknown", {})
+
+    # The connection stays usable
+    assert stdio_connection.ping()
+
+
+def test_tcp_connection(tcp_server):
+    """The TCP transport keeps one socket open for several requests."""
+    connection = McpTcpConnection("fake-mcp-tcp", "127.0.0.1", tcp_server, request_timeout=5)
+    try:
+        assert connection.call_tool("echo", {"value": "a"}) == {"value": "a"}
+        sock = connection._socket
+        assert connection.call_tool("echo", {"value": "b"}) == {"value": "b"}
+        assert connection._socket is sock
+    finally:
+        connection.close()
+
+
+def test_pool_shares_connection_and_health_checks(monkeypatch):
+    """The pool hands out one connection per server and reports its health."""
+    monkeypatch.setitem(MCP_SERVER_CONFIG, "fake-mcp", {"command": [sys.executable, FAKE_SERVER], "port": 0})
+    monkeypatch.delenv("WEBSITE_SITE_NAME", raising=False)
+
+    pool = McpConnectionPool()
+    try:
+        connection = pool.get("fake-mcp")
+        assert pool.get("fake-mcp") is connection
+        assert pool.health_check() == {"fake-mcp": True}
+    finally:
+        pool.close_all()
@@ -0,0 +1,64 @@
+"""
+Tests for cache-friendly node prompt templates.
+"""
+
+import importlib
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.graphs.prompt_registry import (
+    get_prompt,
+    get_prompt_cache_stats,
+    record_prompt_cache_usage,
+    register_prompt
+)
+
+
+def test_state_follows_history_and_prefix_is_stable():
+    """Instructions come first and are identical whatever the state."""
+    register_prompt("test.layout", "Plan the event {not a variable}", ("human", "Event details: {event_details}"))
+    prompt = get_prompt("test.layout")
+    history = [HumanMessage(content="A conference in May")]
+
+    first = prompt.format_messages(messages=history, event_details={"type": "conference"})
+    second = prompt.format_messages(messages=history, event_details={"type": "wedding"})
+
+    assert isinstance(first[0], SystemMessage)
+    assert first[0].content == "Plan the event {not a variable}"
+    assert first[:2] == second[:2]
+    assert first[-1].content == "Event details: {'type': 'conference'}"
+
+
+@pytest.mark.parametrize("module, node_name", [
+    ("analytics_graph", "analytics.generate_response"),
+    ("financial_graph", "financial.generate_response"),
+    ("marketing_communications_graph", "marketing_communications.generate_response"),
+    ("project_management_graph", "project_management.generate_response"),
+    ("resource_planning_graph", "resource_planning.generate_response"),
+    ("stakeholder_management_graph", "stakeholder_management.generate_response"),
+])
+def test_specialist_responses_send_their_state_after_the_history(module, node_name):
+    """The specialist response prompts keep the state out of the instructions."""
+    importlib.import_module(f"app.graphs.{module}")
+    prompt = get_prompt(node_name)
+
+    assert prompt.messages[0].content.count("{") == 0
+    assert prompt.messages[1].variable_name == "messages"
+    assert "event_details" in prompt.messages[-1].input_variables
+
+
+def test_cached_token_ratio_is_recorded_per_node():
+    """Cached prompt tokens reported by the provider are summed per node."""
+    message = AIMessage(content="ok", usage_metadata={
+        "input_tokens": 2000,
+        "output_tokens": 10,
+        "total_tokens": 2010,
+        "input_token_details": {"cache_read": 1536}
+    })
+    record_prompt_cache_usage("test_node", ChatResult(generations=[ChatGeneration(message=message)]))
+
+    node = get_prompt_cache_stats()["nodes"]["test_node"]
+    assert node["calls"] == 1
+    assert node["cached_ratio"] == 1536 / 2000
@@ -0,0 +1,139 @@
+"""
+Tests for incremental requirement extraction in the coordinator.
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import SystemMessage
+
+from app.graphs import coordinator_graph
+
+
+MESSAGES = [
+    {"role": "user", "content": "We are planning a conference", "timestamp": "2026-01-01T10:00:00"},
+    {"role": "assistant", "content": "How many attendees?", "timestamp": "2026-01-01T10:00:05"},
+    {"role": "user", "content": "About 200 people", "timestamp": "2026-01-01T10:01:00"},
+    {"role": "assistant", "content": "What is the budget?", "timestamp": "2026-01-01T10:01:05.250000"},
+    {"role": "user", "content": "Our budget is 50000", "timestamp": "2026-01-01T10:02:00"},
+]
+
+
+@pytest.fixture
+def gather_requirements(monkeypatch):
+    """Run the gather_requirements node with a recorded extraction call."""
+    fake_llm = FakeListChatModel(responses=["unused"])
+    monkeypatch.setattr(coordinator_graph, "get_llm", lambda *args, **kwargs: fake_llm)
+    monkeypatch.setattr(coordinator_graph, "get_node_llm", lambda *args, **kwargs: fake_llm)
+    monkeypatch.setattr(coordinator_graph, "COORDINATOR_INCREMENTAL_EXTRACTION", True)
+    node = coordinator_graph.create_coordinator_graph().builder.nodes["gather_requirements"].runnable
+    calls = []
+    extraction = {}
+
+    async def ainvoke_structured(llm, messages, schema, config=None):
+        calls.append(messages)
+        return schema.model_validate(extraction)
+
+    monkeypatch.setattr(coordinator_graph, "ainvoke_structured", ainvoke_structured)
+
+    def run(state, result=None):
+        extraction.clear()
+        extraction.update(result or {})
+        return asyncio.run(node.ainvoke(state))
+
+    run.calls = calls
+    return run
+
+
+def _state(messages, **values):
+    state = coordinator_graph.create_initial_state()
+    state["messages"] = [dict(message) for message in messages]
+    state.update(values)
+    return state
+
+
+def _sent_contents(prompt_messages):
+    return [message.content for message in prompt_messages if not isinstance(message, SystemMessage)][:-1]
+
+
+def test_only_messages_after_the_watermark_are_sent(gather_requirements):
+    """An incremental extraction sends just the new messages and moves the watermark."""
+    state = _state(MESSAGES, requirements_extracted_until=MESSAGES[2]["timestamp"])
+
+    result = gather_requirements(state, {"event_details": {"attendee_count": 200}})
+
+    assert _sent_contents(gather_requirements.calls[0]) == ["What is the budget?", "Our budget is 50000"]
+    assert "Requirements extracted so far" in str(gather_requirements.calls[0])
+    assert result["event_details"]["attendee_count"] == 200
+    assert result["requirements_extracted_until"] == MESSAGES[4]["timestamp"]
+
+
+def test_window_does_not_depend_on_message_positions(gather_requirements):
+    """Reordered messages and messages added during the run do not shift the window."""
+    messages = [MESSAGES[4], MESSAGES[0], MESSAGES[3], MESSAGES[1], MESSAGES[2]]
+    messages.append({"role": "assistant", "content": "Noted, checking venues"})
+    state = _state(messages, requirements_extracted_until=MESSAGES[2]["timestamp"])
+
+    gather_requirements(state)
+
+    assert _sent_contents(gather_requirements.calls[0]) == [
+        "Our budget is 50000",
+        "What is the budget?",
+        "Noted, checking venues"
+    ]
+
+
+def test_no_new_messages_skips_the_extraction(gather_requirements):
+    """Nothing is sent to the LLM when the transcript has no new messages."""
+    state = _state(MESSAGES, requirements_extracted_until=MESSAGES[4]["timestamp"])
+
+    result = gather_requirements(state)
+
+    assert gather_requirements.calls == []
+    assert result["requirements_extracted_until"] == MESSAGES[4]["timestamp"]
+
+
+@pytest.mark.parametrize("values", [{}, {"requirements_extracted_until": "not a timestamp"}, {"requirements_watermark": 3}])
+def test_missing_watermark_extracts_from_the_full_transcript(gather_requirements, values):
+    """Without a usable watermark the whole transcript is sent with the full prompt."""
+    state = _state(MESSAGES, **values)
+
+    result = gather_requirements(state)
+
+    assert _sent_contents(gather_requirements.calls[0]) == [message["content"] for message in MESSAGES]
+    assert "Requirements extracted so far" not in str(gather_requirements.calls[0])
+    assert result["requirements_extracted_until"] == MESSAGES[4]["timestamp"]
+
+
+def test_messages_without_timestamps_leave_no_watermark(gather_requirements):
+    """A transcript without timestamps is extracted in full every time."""
+    state = _state([{"role": "user", "content": "We are planning a conference"}])
+
+    result = gather_requirements(state)
+
+    assert len(gather_requirements.calls) == 1
+    assert "requirements_extracted_until" not in result
+
+
+def test_incremental_extraction_never_takes_back_collected_information(gather_requirements):
+    """A category already collected stays collected when the delta does not mention it."""
+    state = _state(MESSAGES, requirements_extracted_until=MESSAGES[2]["timestamp"])
+    state["information_collected"]["basic_details"] = True
+
+    result = gather_requirements(state, {"information_collected": {"basic_details": False, "budget": True}})
+
+    assert result["information_collected"]["basic_details"] is True
+    assert result["information_collected"]["budget"] is True
+    assert result["information_collected"]["timeline"] is False
+
+
+def test_full_extraction_can_reset_collected_information(gather_requirements):
+    """A full extraction reflects the whole transcript, including categories no longer covered."""
+    state = _state(MESSAGES)
+    state["information_collected"]["basic_details"] = True
+
+    result = gather_requirements(state, {"information_collected": {"budget": True}})
+
+    assert result["information_collected"]["basic_details"] is False
+    assert result["information_collected"]["budget"] is True
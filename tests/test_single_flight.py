@@ -0,0 +1,151 @@
+"""
+Tests for single-flight coalescing.
+"""
+
+import asyncio
+import threading
+import time
+
+from app.utils.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    """Followers receive the leader's result without running the call."""
+    group = SingleFlight("test")
+    calls = []
+    started = threading.Event()
+
+    def slow_call():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {"results": [1, 2]}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(group.do("q", slow_call)))
+    leader.start()
+    started.wait(1)
+    followers = [
+        threading.Thread(target=lambda: results.append(group.do("q", slow_call)))
+        for _ in range(3)
+    ]
+    for thread in followers:
+        thread.start()
+    for thread in [leader] + followers:
+        thread.join(2)
+
+    assert len(calls) == 1
+    assert results == [{"results": [1, 2]}] * 4
+    # Followers get copies they can modify
+    assert len({id(result) for result in results}) == 4
+    stats = group.get_stats()
+    assert stats["executed"] == 1
+    assert stats["coalesced"] == 3
+    assert stats["in_flight"] == 0
+
+
+def test_finished_calls_are_not_cached():
+    """A call made after the previous one finished runs again."""
+    group = SingleFlight("test")
+    assert group.do("q", lambda: 1) == 1
+    assert group.do("q", lambda: 2) == 2
+    assert group.get_stats()["coalesced"] == 0
+
+
+def test_leader_error_is_raised_to_followers():
+    """Followers see the exception of the call they waited for."""
+    group = SingleFlight("test")
+    started = threading.Event()
+    errors = []
+
+    def failing_call():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("rate limited")
+
+    def run():
+        try:
+            group.do("q", failing_call)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=run)
+    leader.start()
+    started.wait(1)
+    follower = threading.Thread(target=run)
+    follower.start()
+    leader.join(2)
+    follower.join(2)
+
+    assert errors == ["rate limited", "rate limited"]
+    assert group.get_stats()["executed"] == 1
+
+
+def test_async_callers_coalesce():
+    """Concurrent async callers share one awaited call."""
+    group = SingleFlight("test")
+    calls = []
+
+    async def slow_call():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(group.ado("q", slow_call) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["answer"] * 5
+    assert len(calls) == 1
+    assert group.get_stats()["coalesced"] == 4
+
+
+def test_same_thread_reentry_does_not_wait_for_itself():
+    """A call re-entering the same key on the leader's thread runs on its own."""
+    group = SingleFlight("test")
+    assert group.do("q", lambda: group.do("q", lambda: "inner")) == "inner"
+    assert group.get_stats()["executed"] == 2
+
+
+def test_cancelled_async_leader_hands_the_call_to_a_follower():
+    """Followers of a cancelled leader retry instead of seeing its cancellation."""
+    group = SingleFlight("test")
+    calls = []
+
+    async def slow_call():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "answer"
+
+    async def main():
+        leader = asyncio.ensure_future(group.ado("q", slow_call))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.ensure_future(group.ado("q", slow_call)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        return leader, results
+
+    leader, results = asyncio.run(main())
+    assert leader.cancelled()
+    assert results == ["answer"] * 3
+    assert len(calls) == 2
+
+
+def test_cancelled_async_follower_does_not_cancel_the_call():
+    """A follower giving up leaves the leader and the other followers unaffected."""
+    group = SingleFlight("test")
+
+    async def slow_call():
+        await asyncio.sleep(0.1)
+        return "answer"
+
+    async def main():
+        leader = asyncio.ensure_future(group.ado("q", slow_call))
+        await asyncio.sleep(0.01)
+        quitter = asyncio.ensure_future(group.ado("q", slow_call))
+        follower = asyncio.ensure_future(group.ado("q", slow_call))
+        await asyncio.sleep(0.01)
+        quitter.cancel()
+        return await asyncio.gather(leader, follower)
+
+    assert asyncio.run(main()) == ["answer", "answer"]
@@ -0,0 +1,62 @@
+"""
+Tests for schema-validated structured LLM output.
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.schemas.event import DelegationPlan
+from app.utils.structured_output import StructuredOutputError, ainvoke_structured
+
+
+class FakeStructuredLLM:
+    """Chat model stand-in returning queued structured output results."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = []
+
+    def with_structured_output(self, schema, include_raw=False):
+        assert include_raw
+        return self
+
+    async def ainvoke(self, messages, config=None):
+        self.calls.append(messages)
+        return self.results.pop(0)
+
+
+def _valid_plan():
+    return DelegationPlan(assignments=[{"agent_type": "financial", "task": "Allocate the budget"}])
+
+
+def test_valid_output_needs_one_call():
+    """A reply that validates is returned without a repair."""
+    llm = FakeStructuredLLM([{"raw": AIMessage(content=""), "parsed": _valid_plan(), "parsing_error": None}])
+    plan = asyncio.run(ainvoke_structured(llm, [HumanMessage(content="delegate")], DelegationPlan))
+    assert plan.assignments[0].agent_type == "financial"
+    assert len(llm.calls) == 1
+
+
+def test_invalid_output_is_repaired():
+    """An invalid reply is sent back with the validation error once."""
+    invalid = AIMessage(content='{"assignments": [{"agent_type": "catering"}]}')
+    llm = FakeStructuredLLM([
+        {"raw": invalid, "parsed": None, "parsing_error": ValueError("agent_type: unknown value")},
+        {"raw": AIMessage(content=""), "parsed": _valid_plan(), "parsing_error": None}
+    ])
+    plan = asyncio.run(ainvoke_structured(llm, [HumanMessage(content="delegate")], DelegationPlan))
+    assert plan.assignments[0].task == "Allocate the budget"
+    repair = llm.calls[1][-1].content
+    assert "catering" in repair
+    assert "agent_type: unknown value" in repair
+
+
+def test_repairs_are_bounded():
+    """After max_repairs invalid replies the call fails."""
+    failure = {"raw": AIMessage(content="not json"), "parsed": None, "parsing_error": ValueError("bad")}
+    llm = FakeStructuredLLM([failure, failure, failure])
+    with pytest.raises(StructuredOutputError):
+        asyncio.run(ainvoke_structured(llm, [HumanMessage(content="delegate")], DelegationPlan, max_repairs=1))
+    assert len(llm.calls) == 2
@@ -0,0 +1,77 @@
+"""
+Tests for routing delegated tasks to specialist graph nodes.
+"""
+
+from app.graphs.task_routing import TASK_ROUTES, get_target_nodes, resolve_target_node
+
+
+def test_assignment_target_node_is_used():
+    """A valid node named by the coordinator wins over keyword matching."""
+    assert resolve_target_node("financial", "Track the catering payment", "manage_contracts") == "manage_contracts"
+
+
+def test_unknown_target_node_falls_back_to_keywords():
+    """An invalid node name from the coordinator is ignored."""
+    assert resolve_target_node("financial", "Track the catering payment", "book_flights") == "track_expenses"
+
+
+def test_keyword_routes_match_in_order():
+    """The first matching route decides the node."""
+    assert resolve_target_node("resource_planning", "Find a venue and plan the equipment") == "search_venues"
+    assert resolve_target_node("compliance_security", "Check GDPR privacy obligations") == "implement_data_protection"
+
+
+def test_unmatched_task_runs_the_full_graph():
+    """Tasks without a route, and agents without routes, get no entry node."""
+    assert resolve_target_node("project_management", "Say hello") is None
+    assert resolve_target_node("marketing_communications", "Create a campaign") is None
+    assert get_target_nodes("marketing_communications") == ()
+
+
+# Graph module of each agent type with task routes
+GRAPH_MODULES = {
+    "resource_planning": "app.graphs.resource_planning_graph",
+    "financial": "app.graphs.financial_graph",
+    "stakeholder_management": "app.graphs.stakeholder_management_graph",
+    "project_management": "app.graphs.project_management_graph",
+    "analytics": "app.graphs.analytics_graph",
+    "compliance_security": "app.graphs.compliance_security_graph",
+}
+
+EVENT_DETAILS = {
+    "event_type": "conference",
+    "title": "Annual Summit",
+    "description": "Two-day industry conference",
+    "attendee_count": 200,
+    "scale": "medium",
+    "timeline_start": "2026-11-02",
+    "timeline_end": "2026-11-03",
+    "budget": 50000.0,
+    "location": "Berlin"
+}
+
+
+def test_every_route_target_runs_from_the_initial_state(monkeypatch):
+    """Each routable node completes when a delegated task enters the graph there."""
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    from app.agents.graph_registry import GRAPH_BUILDERS
+    from app.tools.agent_communication_tools import INITIAL_STATE_BUILDERS
+
+    fake_llm = FakeListChatModel(responses=["Here is the requested analysis."])
+    for agent_type, module in GRAPH_MODULES.items():
+        monkeypatch.setattr(f"{module}.get_llm", lambda *args, **kwargs: fake_llm)
+        monkeypatch.setattr(f"{module}.get_node_llm", lambda *args, **kwargs: fake_llm, raising=False)
+
+    assert set(GRAPH_MODULES) == {agent_type for agent_type, routes in TASK_ROUTES.items() if routes}
+    for agent_type in GRAPH_MODULES:
+        for node in get_target_nodes(agent_type):
+            state = INITIAL_STATE_BUILDERS[agent_type]()
+            for key, value in EVENT_DETAILS.items():
+                if key in state["event_details"]:
+                    state["event_details"][key] = value
+            state["messages"].append({"role": "user", "content": f"Task: {node.replace('_', ' ')}"})
+
+            result = GRAPH_BUILDERS[agent_type](entry_point=node).invoke(state)
+
+            assert result["messages"][-1]["role"] == "assistant", (agent_type, node)
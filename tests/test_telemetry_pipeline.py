@@ -0,0 +1,92 @@
+"""
+Tests for the background telemetry pipeline.
+"""
+
+import threading
+import time
+
+from app.utils.telemetry_pipeline import TelemetryPipeline
+
+
+class RecordingClient:
+    """Telemetry client stand-in that records tracked events and flushes."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.events = []
+        self.flushes = 0
+        self.threads = set()
+
+    def track_event(self, name, properties=None):
+        self.threads.add(threading.current_thread().name)
+        self.events.append(name)
+
+    def flush(self):
+        time.sleep(self.delay)
+        self.flushes += 1
+
+
+def test_submit_does_not_wait_for_the_client():
+    """Submitting returns immediately even if flushing the client is slow."""
+    client = RecordingClient(delay=0.5)
+    pipeline = TelemetryPipeline(client, batch_size=10, flush_interval=0.05)
+
+    start = time.time()
+    for index in range(5):
+        assert pipeline.submit(client.track_event, f"event-{index}")
+    assert time.time() - start < 0.1
+
+    assert pipeline.flush(timeout=5)
+    assert client.events == [f"event-{index}" for index in range(5)]
+    assert client.threads == {"telemetry-sender"}
+    pipeline.shutdown()
+
+
+def test_items_are_sent_in_batches():
+    """The client is flushed once per batch rather than once per item."""
+    client = RecordingClient()
+    pipeline = TelemetryPipeline(client, batch_size=10, flush_interval=1.0)
+
+    for index in range(25):
+        pipeline.submit(client.track_event, f"event-{index}")
+    pipeline.shutdown()
+
+    assert len(client.events) == 25
+    assert client.flushes <= 3
+    assert pipeline.get_stats()["sent"] == 25
+
+
+def test_items_are_dropped_when_the_queue_is_full():
+    """A full queue drops new items and counts them instead of blocking."""
+    client = RecordingClient()
+    block = threading.Event()
+    pipeline = TelemetryPipeline(client, max_queue_size=2, batch_size=1, flush_interval=0.05)
+
+    # Keep the sender busy so the queue fills up
+    pipeline.submit(block.wait, 5)
+    time.sleep(0.1)
+    results = [pipeline.submit(client.track_event, f"event-{index}") for index in range(5)]
+    block.set()
+    pipeline.shutdown()
+
+    assert results == [True, True, False, False, False]
+    stats = pipeline.get_stats()
+    assert stats["dropped"] == 3
+    assert client.events == ["event-0", "event-1"]
+
+
+def test_failing_calls_are_counted():
+    """An exception in a telemetry call does not stop the sender."""
+    client = RecordingClient()
+    pipeline = TelemetryPipeline(client, flush_interval=0.05)
+
+    def fail():
+        raise RuntimeError("network down")
+
+    pipeline.submit(fail)
+    pipeline.submit(client.track_event, "after-failure")
+    pipeline.shutdown()
+
+    assert client.events == ["after-failure"]
+    assert pipeline.get_stats()["failed"] == 1
+    assert not pipeline.submit(client.track_event, "after-shutdown")
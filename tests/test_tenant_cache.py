@@ -0,0 +1,41 @@
+"""
+Tests for the organization cache used by tenant resolution.
+"""
+
+from app.middleware.tenant_cache import OrganizationCache
+
+
+def _snapshot(organization_id=1, slug="acme"):
+    return {"id": organization_id, "slug": slug, "name": "Acme", "subscription_status": "active"}
+
+
+def test_snapshot_and_slug_are_cached():
+    """Storing a snapshot also resolves its slug, and copies are returned."""
+    cache = OrganizationCache(ttl=60)
+    cache.put(_snapshot())
+
+    assert cache.lookup_slug("acme") == (True, 1)
+    snapshot = cache.get(1)
+    snapshot["name"] = "Changed"
+    assert cache.get(1)["name"] == "Acme"
+
+
+def test_unknown_slug_is_cached_until_invalidated():
+    """A slug without organization is cached until an organization takes it."""
+    cache = OrganizationCache(ttl=60)
+    cache.put_slug("new", None)
+    assert cache.lookup_slug("new") == (True, None)
+
+    cache.invalidate(organization_id=2, slug="new")
+    assert cache.lookup_slug("new") == (False, None)
+
+
+def test_invalidate_removes_organization_and_slug():
+    """Invalidating an organization also forgets its slug."""
+    cache = OrganizationCache(ttl=60)
+    cache.put(_snapshot())
+
+    cache.invalidate(organization_id=1)
+    assert cache.get(1) is None
+    assert cache.lookup_slug("acme") == (False, None)
+
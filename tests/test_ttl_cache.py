@@ -0,0 +1,67 @@
+"""
+Tests for the bounded TTL cache shared by the per-worker caches.
+"""
+
+import time
+
+from app.utils.ttl_cache import TTLCache
+
+
+def test_entries_expire_after_the_ttl():
+    """Entries are served until their TTL passes, and per-entry TTLs win."""
+    cache = TTLCache(max_size=10, ttl=0.05)
+    cache.put("default", 1)
+    cache.put("longer", 2, ttl=60)
+    assert cache.get("default") == 1
+
+    time.sleep(0.06)
+    assert cache.get("default") is None
+    assert cache.get("longer") == 2
+    assert len(cache) == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Reading an entry keeps it; the least recently used one is evicted."""
+    cache = TTLCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_cached_none_is_told_apart_from_a_miss():
+    """lookup reports whether a key is cached even when its value is None."""
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.put("unknown", None)
+    assert cache.lookup("unknown") == (True, None)
+    assert cache.lookup("missing") == (False, None)
+
+
+def test_entries_are_removed_by_key_and_predicate():
+    """pop and pop_where remove entries; clear removes all of them."""
+    cache = TTLCache(max_size=10)
+    for key, value in (("a", 1), ("b", 2), ("c", 1)):
+        cache.put(key, value)
+
+    assert cache.pop("b") == 2
+    assert sorted(cache.pop_where(lambda _, value: value == 1)) == ["a", "c"]
+    assert len(cache) == 0
+    cache.put("d", 4)
+    cache.clear()
+    assert cache.get("d") is None
+
+
+def test_disabled_cache_stores_nothing():
+    """A size or TTL of 0 disables the cache."""
+    for cache in (TTLCache(max_size=0), TTLCache(max_size=10, ttl=0)):
+        cache.put("a", 1)
+        assert not cache.enabled
+        assert cache.get("a") is None
@@ -0,0 +1,75 @@
+"""
+Tests for authenticating users through the user cache.
+"""
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app.auth import dependencies
+from app.auth.user_cache import UserCache
+from app.config import ALGORITHM, SECRET_KEY
+
+
+def _session_with_users(*users):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    import app.db.models_saas  # noqa: F401 - configures User relationships
+    import app.db.models_updated  # noqa: F401
+    from app.db.models import User
+
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    for user_id, is_active in users:
+        db.add(User(id=user_id, email=f"{user_id}@example.com", username=f"user{user_id}", is_active=is_active))
+    db.commit()
+    return db
+
+
+def test_get_current_user_id_checks_the_user(monkeypatch):
+    """Tokens of active users resolve; inactive, deleted and forged subjects are rejected."""
+    cache = UserCache(ttl=60)
+    monkeypatch.setattr(dependencies, "get_user_cache", lambda: cache)
+    db = _session_with_users((1, True), (2, False))
+
+    assert dependencies.get_current_user_id(db, dependencies.create_access_token("1")) == 1
+    # Tokens issued with the former embedded claims are checked like any other
+    legacy_token = jwt.encode({"sub": "2", "act": True, "orgs": [1]}, SECRET_KEY, algorithm=ALGORITHM)
+    for token in (legacy_token, dependencies.create_access_token("3"), "not-a-token"):
+        with pytest.raises(HTTPException) as error:
+            dependencies.get_current_user_id(db, token)
+        assert error.value.status_code == 401
+
+
+def test_get_current_user_rejects_inactive_users_like_get_current_user_id(monkeypatch):
+    """Both dependencies agree on which users are authenticated."""
+    cache = UserCache(ttl=60)
+    monkeypatch.setattr(dependencies, "get_user_cache", lambda: cache)
+    db = _session_with_users((1, True), (2, False))
+
+    assert dependencies.get_current_user(db, dependencies.create_access_token("1")).id == 1
+    with pytest.raises(HTTPException) as error:
+        dependencies.get_current_user(db, dependencies.create_access_token("2"))
+    assert error.value.status_code == 401
+    assert cache.get(2) is False
+
+
+def test_get_current_user_id_serves_cached_users_until_invalidated(monkeypatch):
+    """A cached user needs no query; invalidation applies a deactivation at once."""
+    from app.db.models import User
+
+    cache = UserCache(ttl=60)
+    monkeypatch.setattr(dependencies, "get_user_cache", lambda: cache)
+    db = _session_with_users((1, True))
+    token = dependencies.create_access_token("1")
+    assert dependencies.get_current_user_id(db, token) == 1
+
+    db.query(User).filter(User.id == 1).update({"is_active": False})
+    db.commit()
+    assert dependencies.get_current_user_id(db, token) == 1
+    assert cache.get_stats()["hits"] == 1
+
+    cache.invalidate(1)
+    with pytest.raises(HTTPException):
+        dependencies.get_current_user_id(db, token)
@@ -0,0 +1,129 @@
+"""
+Tests for the write-behind persistence of agent conversation states.
+"""
+
+import json
+
+from app.state import write_behind
+from app.state.write_behind import StateWriteBehindFlusher
+
+
+def _flusher(batch_size=100, max_attempts=5):
+    # A long interval leaves flushing to the test
+    return StateWriteBehindFlusher(flush_interval=60, batch_size=batch_size, max_attempts=max_attempts)
+
+
+def _recording(flusher):
+    batches = []
+
+    def write_batch(batch):
+        batches.append({key: entry["state_data"] for key, entry in batch.items()})
+        return len(batch)
+
+    flusher._write_batch = write_batch
+    return batches
+
+
+def test_updates_of_a_conversation_are_coalesced():
+    """Only the latest pending state of a conversation is written."""
+    flusher = _flusher()
+    batches = _recording(flusher)
+    try:
+        for step in range(3):
+            flusher.mark_dirty(1, "7", 70, json.dumps({"step": step}))
+        flusher.mark_dirty(2, "7", 71, json.dumps({"step": 0}))
+
+        assert flusher.get_pending(1, "7") == json.dumps({"step": 2})
+        assert flusher.get_stats()["pending"] == 2
+        assert flusher.get_stats()["coalesced"] == 2
+
+        assert flusher.flush() == 2
+        assert batches == [{(1, "7"): json.dumps({"step": 2}), (2, "7"): json.dumps({"step": 0})}]
+        assert flusher.get_pending(1, "7") is None
+    finally:
+        flusher.shutdown(timeout=1)
+
+
+def test_flush_writes_in_batches():
+    """flush() writes every pending state, at most batch_size per transaction."""
+    flusher = _flusher(batch_size=2)
+    batches = _recording(flusher)
+    flusher._ensure_started = lambda: None
+    for conversation_id in range(5):
+        flusher.mark_dirty(1, str(conversation_id), conversation_id, "{}")
+
+    assert flusher.flush() == 5
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert flusher.flush() == 0
+
+
+def test_shutdown_stops_the_thread_and_drains_pending_writes():
+    """Pending states are written when the flusher shuts down."""
+    flusher = _flusher()
+    batches = _recording(flusher)
+    flusher.mark_dirty(1, "7", 70, "{}")
+    thread = flusher._thread
+
+    flusher.shutdown(timeout=1)
+
+    assert not thread.is_alive()
+    assert batches == [{(1, "7"): "{}"}]
+    assert flusher.get_stats()["pending"] == 0
+
+
+def test_failed_writes_are_retried_then_dropped():
+    """A failing batch is put back until it has failed max_attempts times."""
+    flusher = _flusher(max_attempts=3)
+    flusher._ensure_started = lambda: None
+
+    def failing_write(batch):
+        raise RuntimeError("no unique constraint")
+
+    flusher._write_batch = failing_write
+    flusher.mark_dirty(1, "7", 70, "{}")
+    flusher.mark_dirty(1, "8", 80, "{}")
+
+    assert flusher.flush() == 0
+    assert flusher.get_stats()["pending"] == 2
+    # A newer update replaces the failed entry and starts counting again
+    flusher.mark_dirty(1, "8", 80, '{"newer": true}')
+    assert flusher.flush() == 0
+    assert flusher.flush() == 0
+
+    stats = flusher.get_stats()
+    assert stats["failures"] == 3
+    assert stats["dropped"] == 1
+    assert flusher.get_pending(1, "7") is None
+    assert flusher.get_pending(1, "8") == '{"newer": true}'
+
+
+def test_write_batch_upserts_states_of_existing_conversations(monkeypatch):
+    """States are inserted or updated in one statement; deleted conversations are skipped."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.dialects.sqlite import insert
+    from sqlalchemy.orm import sessionmaker
+    import app.db.models  # noqa: F401 - configures the relationships
+    import app.db.models_saas  # noqa: F401
+    from app.db.models_updated import AgentState, Conversation
+
+    engine = create_engine("sqlite://")
+    Conversation.__table__.create(engine)
+    AgentState.__table__.create(engine)
+    sessions = sessionmaker(bind=engine)
+    db = sessions()
+    db.add_all([Conversation(id=1), Conversation(id=2), AgentState(conversation_id=1, state_data="old")])
+    db.commit()
+    # The same UPSERT statement, compiled for sqlite
+    monkeypatch.setattr(write_behind, "SessionLocal", sessions)
+    monkeypatch.setattr(write_behind, "insert", insert)
+
+    flusher = _flusher()
+    flusher._ensure_started = lambda: None
+    flusher.mark_dirty(1, "1", 1, "new")
+    flusher.mark_dirty(1, "2", 2, "created")
+    flusher.mark_dirty(1, "3", 3, "orphan")
+
+    assert flusher.flush() == 2
+    assert flusher.get_stats()["written"] == 2
+    states = dict(db.query(AgentState.conversation_id, AgentState.state_data).all())
+    assert states == {1: "new", 2: "created"}